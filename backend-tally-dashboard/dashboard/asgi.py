@@ -1,16 +1,23 @@
-"""
-ASGI config for dashboard project.
-
-It exposes the ASGI callable as a module-level variable named ``application``.
-
-For more information on this file, see
-https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
-"""
-
-import os
-
-from django.core.asgi import get_asgi_application
-
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'dashboard.settings')
-
-application = get_asgi_application()
+"""
+ASGI config for dashboard project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+
+The ASGI process serves the SSE streams (excel_data/views/sse_async.py,
+gunicorn_sse_config.py); the API itself stays on the WSGI workers.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'dashboard.settings')
+
+django_application = get_asgi_application()
+
+from excel_data.views.sse_async import SSEStreamApplication  # noqa: E402  (needs the app registry)
+
+application = SSEStreamApplication(django_application)
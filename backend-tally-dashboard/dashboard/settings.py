@@ -58,6 +58,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'excel_data.middleware.metrics_middleware.MetricsMiddleware',  # Per-route latency/SQL/cache metrics (first: times the whole stack)
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -199,6 +200,37 @@ CELERY_ENABLED = False
 # Face embedding encryption key (used by excel_data.utils.face_embedding_crypto)
 # Generate once with: from cryptography.fernet import Fernet; print(Fernet.generate_key().decode())
 FACE_EMBEDDING_SECRET_KEY = config('FACE_EMBEDDING_SECRET_KEY', default=None)
+# Retired keys, comma separated: still decrypt until manage.py rotate_face_embedding_keys
+# has re-encrypted every embedding with FACE_EMBEDDING_SECRET_KEY
+FACE_EMBEDDING_OLD_SECRET_KEYS = config('FACE_EMBEDDING_OLD_SECRET_KEYS', default='',
+                                        cast=lambda v: [s.strip() for s in v.split(',') if s.strip()])
+
+# Registration of a face scoring FACE_DUPLICATE_SIMILARITY or more against another employee:
+# 'reject' (409 unless allow_duplicate), 'flag' (save and report) or 'off' (services.face_duplicates)
+FACE_DUPLICATE_SIMILARITY = config('FACE_DUPLICATE_SIMILARITY', default=0.8, cast=float)
+FACE_DUPLICATE_ACTION = config('FACE_DUPLICATE_ACTION', default='reject')
+
+# Face verification answers before the DailyAttendance write; a writer thread applies
+# clock events in batches every FACE_ATTENDANCE_BATCH_INTERVAL_MS (services.face_attendance_writer)
+FACE_ATTENDANCE_FAST_ACK = config('FACE_ATTENDANCE_FAST_ACK', default=False, cast=bool)
+FACE_ATTENDANCE_BATCH_INTERVAL_MS = config('FACE_ATTENDANCE_BATCH_INTERVAL_MS', default=250, cast=int)
+
+# Retry worker for PendingAttendanceUpdate: rows claimed per batch and tenants applied in parallel
+PENDING_ATTENDANCE_BATCH_SIZE = config('PENDING_ATTENDANCE_BATCH_SIZE', default=500, cast=int)
+PENDING_ATTENDANCE_TENANT_WORKERS = config('PENDING_ATTENDANCE_TENANT_WORKERS', default=4, cast=int)
+
+# FaceAttendanceLog rows are buffered per process and written with bulk_create every
+# FACE_LOG_FLUSH_INTERVAL_MS or FACE_LOG_FLUSH_SIZE rows; failed writes are spooled to
+# FACE_LOG_SPOOL_DIR and replayed (services.face_log_sink)
+FACE_LOG_BUFFERED = config('FACE_LOG_BUFFERED', default=True, cast=bool)
+FACE_LOG_FLUSH_INTERVAL_MS = config('FACE_LOG_FLUSH_INTERVAL_MS', default=500, cast=int)
+FACE_LOG_FLUSH_SIZE = config('FACE_LOG_FLUSH_SIZE', default=200, cast=int)
+FACE_LOG_SPOOL_DIR = config('FACE_LOG_SPOOL_DIR', default=os.path.join(BASE_DIR, 'var', 'face_log_spool'))
+
+# Probes accepted per face-embeddings/verify-batch request (offline kiosk replay)
+FACE_VERIFY_BATCH_MAX_PROBES = config('FACE_VERIFY_BATCH_MAX_PROBES', default=500, cast=int)
+# Oldest probe accepted by verify-batch, in hours; probes in locked payroll periods are always rejected
+FACE_VERIFY_BATCH_MAX_AGE_HOURS = config('FACE_VERIFY_BATCH_MAX_AGE_HOURS', default=168, cast=int)
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -306,6 +338,27 @@ SUPPORT_ADMIN_EMAIL = config('SUPPORT_ADMIN_EMAIL', default='techsupport@snipert
 # Default: 30.4 (365 days / 12 months = 30.416...)
 AVERAGE_DAYS_PER_MONTH = config('AVERAGE_DAYS_PER_MONTH', default=30.4, cast=float)
 
+# Auto payroll runner: worker processes used to calculate tenants in parallel
+AUTO_PAYROLL_WORKERS = config('AUTO_PAYROLL_WORKERS', default=4, cast=int)
+
+# Request metrics (MetricsMiddleware, /api/metrics/); scrapers send "Authorization: Bearer <METRICS_TOKEN>".
+# /api/metrics/ answers 404 until METRICS_TOKEN is set
+METRICS_ENABLED = config('METRICS_ENABLED', default=True, cast=bool)
+METRICS_SERVER_TIMING = config('METRICS_SERVER_TIMING', default=True, cast=bool)
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+
+# Server-sent events (utils.sse_broadcaster): event log poll interval per worker and how long events are kept for resume
+SSE_POLL_INTERVAL = config('SSE_POLL_INTERVAL', default=1.0, cast=float)
+SSE_EVENT_RETENTION_SECONDS = config('SSE_EVENT_RETENTION_SECONDS', default=600, cast=int)
+# Also send user session events (emails, IPs, session keys) on the global channel that streams without
+# a ticket receive. Rollout only: anyone who opens a stream can read them
+SSE_LEGACY_BROADCAST = config('SSE_LEGACY_BROADCAST', default=False, cast=bool)
+# Seconds a single-use stream ticket (POST /api/sse/stream-ticket/) stays valid
+SSE_STREAM_TICKET_TTL = config('SSE_STREAM_TICKET_TTL', default=30, cast=int)
+
+# Query budgets (utils.query_budget): 'off', 'log' overruns, or 'raise' QueryBudgetExceeded (dev/CI)
+QUERY_BUDGET_MODE = config('QUERY_BUDGET_MODE', default='off')
+
 # Invitation and OTP Settings
 INVITATION_TOKEN_EXPIRY_HOURS = config('INVITATION_TOKEN_EXPIRY_HOURS', default=72, cast=int)
 OTP_EXPIRY_MINUTES = config('OTP_EXPIRY_MINUTES', default=10, cast=int)
@@ -347,7 +400,7 @@ if DEBUG:
 # Use database cache for persistent, shared cache across server restarts
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'BACKEND': 'excel_data.utils.metrics.InstrumentedDatabaseCache',  # DatabaseCache + hit/miss metrics
         'LOCATION': 'cache_table',
         'OPTIONS': {
             'MAX_ENTRIES': 10000,  # Maximum number of cache entries
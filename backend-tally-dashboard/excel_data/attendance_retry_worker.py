@@ -1,13 +1,21 @@
 import logging
 import threading
 import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import timedelta
 
-from django.db import transaction
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F, Q
 from django.utils import timezone
 
 logger = logging.getLogger(__name__)
 
+# Rows claimed per batch and tenants processed concurrently
+BATCH_SIZE = getattr(settings, 'PENDING_ATTENDANCE_BATCH_SIZE', 500)
+TENANT_WORKERS = getattr(settings, 'PENDING_ATTENDANCE_TENANT_WORKERS', 4)
+
 
 def _backoff_seconds(attempt_count: int) -> int:
     # Exponential backoff: 30s, 60s, 120s, 240s, 480s (max 1h)
@@ -15,66 +23,169 @@ def _backoff_seconds(attempt_count: int) -> int:
     return min(3600, base * (2 ** max(0, attempt_count - 1)))
 
 
-def process_pending_attendance_batch(batch_size: int = 25, max_attempts: int = 5) -> int:
-    """
-    Process a batch of pending attendance updates using row locks to avoid duplication.
-    Returns number of processed records.
-    """
-    from excel_data.models import PendingAttendanceUpdate, EmployeeProfile, Tenant
-    from excel_data.utils.face_attendance import mark_face_attendance
+def _claim_batch(batch_size: int):
+    """Lock up to ``batch_size`` due rows, mark them processing (one UPDATE) and return them."""
+    from excel_data.models import PendingAttendanceUpdate
 
     now = timezone.now()
-    items = []
-
     with transaction.atomic():
-        qs = (
+        ids = list(
             PendingAttendanceUpdate.objects.select_for_update(skip_locked=True)
             .filter(status="pending", next_retry_at__lte=now)
-            .order_by("next_retry_at")[:batch_size]
+            .order_by("next_retry_at", "event_time")
+            .values_list("id", flat=True)[:batch_size]
         )
-        for item in qs:
-            item.status = "processing"
-            item.attempt_count += 1
-            item.last_error = ""
-            item.save(update_fields=["status", "attempt_count", "last_error", "updated_at"])
-            items.append(item)
+        if not ids:
+            return []
+        PendingAttendanceUpdate.objects.filter(id__in=ids).update(
+            status="processing", attempt_count=F("attempt_count") + 1, last_error="", updated_at=now
+        )
+    return list(PendingAttendanceUpdate.objects.filter(id__in=ids).order_by("event_time", "id"))
+
+
+def _resolve_employees(items):
+    """EmployeeProfile per item (by pk, else by tenant + employee_id), in two queries at most."""
+    from excel_data.models import EmployeeProfile
+
+    by_pk = EmployeeProfile.all_objects.filter(is_active=True).in_bulk(
+        {item.employee_id for item in items if item.employee_id}
+    )
+    wanted = {
+        (item.tenant_id, item.employee_identifier)
+        for item in items
+        if item.employee_identifier and (item.employee_id not in by_pk or by_pk[item.employee_id].tenant_id != item.tenant_id)
+    }
+    by_identifier = {}
+    if wanted:
+        query = Q()
+        for tenant_id, identifier in wanted:
+            query |= Q(tenant_id=tenant_id, employee_id=identifier)
+        for employee in EmployeeProfile.all_objects.filter(query, is_active=True):
+            by_identifier[(employee.tenant_id, employee.employee_id)] = employee
+
+    resolved = {}
+    for item in items:
+        employee = by_pk.get(item.employee_id)
+        if employee is None or employee.tenant_id != item.tenant_id:
+            employee = by_identifier.get((item.tenant_id, item.employee_identifier))
+        resolved[item.id] = employee
+    return resolved
 
+
+def _process_tenant(tenant, items, employees):
+    """
+    Apply one tenant's items grouped by local date (one transaction per date).
+    Returns ``{item_id: error or None}``.
+    """
+    from excel_data.services.face_attendance_writer import ClockEvent, FaceAttendanceBatchWriter, apply_clock_events
+    from excel_data.utils.face_attendance import local_event_time
+
+    outcome = {}
+    by_date = defaultdict(list)
+    for item in items:
+        employee = employees.get(item.id)
+        if employee is None:
+            outcome[item.id] = "Employee not found or inactive"
+            continue
+        by_date[local_event_time(tenant, item.event_time).date()].append(item)
+
+    try:
+        for day in sorted(by_date):
+            day_items = by_date[day]
+            try:
+                result = apply_clock_events(
+                    tenant,
+                    [
+                        ClockEvent(
+                            tenant_id=item.tenant_id,
+                            employee_pk=employees[item.id].id,
+                            mode=item.mode,
+                            event_time=item.event_time,
+                            employee_identifier=item.employee_identifier or "",
+                            source=item.source,
+                        )
+                        for item in day_items
+                    ],
+                    employees={employees[item.id].id: employees[item.id] for item in day_items},
+                )
+                FaceAttendanceBatchWriter.schedule_summary_refresh(tenant.id, result.months)
+                for item in day_items:
+                    outcome[item.id] = None
+            except Exception as exc:
+                logger.error(f"❌ Pending attendance for tenant {tenant.id} on {day} failed: {exc}")
+                for item in day_items:
+                    outcome[item.id] = str(exc)
+    finally:
+        close_old_connections()
+    return outcome
+
+
+def process_pending_attendance_batch(batch_size: int = BATCH_SIZE, max_attempts: int = 5,
+                                     pool: ThreadPoolExecutor = None) -> int:
+    """
+    Process a batch of pending attendance updates using row locks to avoid duplication.
+
+    Rows are claimed in one locked SELECT + UPDATE; tenants and employees are
+    fetched in bulk; each tenant's clock events are applied per local date with
+    bulk upserts (services.face_attendance_writer), on ``pool`` when given
+    (one tenant per thread), else one tenant after the other; status
+    transitions are written as grouped UPDATEs.
+    Returns number of processed records.
+    """
+    from excel_data.models import PendingAttendanceUpdate, Tenant
+
+    items = _claim_batch(batch_size)
     if not items:
         return 0
 
-    for item in items:
-        try:
-            tenant = Tenant.objects.filter(id=item.tenant_id).first()
-            if not tenant:
-                raise ValueError("Tenant not found")
-
-            employee = None
-            if item.employee_id:
-                employee = EmployeeProfile.objects.filter(
-                    id=item.employee_id, tenant_id=item.tenant_id, is_active=True
-                ).first()
-            if not employee and item.employee_identifier:
-                employee = EmployeeProfile.objects.filter(
-                    tenant_id=item.tenant_id, employee_id=item.employee_identifier, is_active=True
-                ).first()
-
-            if not employee:
-                raise ValueError("Employee not found or inactive")
-
-            mark_face_attendance(tenant, employee, item.mode, event_time=item.event_time)
-
-            item.status = "completed"
-            item.save(update_fields=["status", "updated_at"])
-        except Exception as exc:
-            retry_delay = _backoff_seconds(item.attempt_count)
-            item.last_error = str(exc)
-            if item.attempt_count >= max_attempts:
-                item.status = "failed"
-            else:
-                item.status = "pending"
-                item.next_retry_at = timezone.now() + timedelta(seconds=retry_delay)
-            item.save(update_fields=["status", "next_retry_at", "last_error", "updated_at"])
+    start = time.perf_counter()
+    tenants = Tenant.objects.in_bulk({item.tenant_id for item in items})
+    employees = _resolve_employees(items)
 
+    by_tenant = defaultdict(list)
+    outcome = {}
+    for item in items:
+        if item.tenant_id in tenants:
+            by_tenant[item.tenant_id].append(item)
+        else:
+            outcome[item.id] = "Tenant not found"
+
+    if pool is not None and len(by_tenant) > 1:
+        futures = [
+            pool.submit(_process_tenant, tenants[tenant_id], tenant_items, employees)
+            for tenant_id, tenant_items in by_tenant.items()
+        ]
+        for future in futures:
+            outcome.update(future.result())
+    else:
+        for tenant_id, tenant_items in by_tenant.items():
+            outcome.update(_process_tenant(tenants[tenant_id], tenant_items, employees))
+
+    # Status transitions: one UPDATE per distinct (status, next retry, error)
+    now = timezone.now()
+    transitions = defaultdict(list)
+    failed = 0
+    for item in items:
+        error = outcome.get(item.id)
+        if error is None:
+            transitions[("completed", None, "")].append(item.id)
+            continue
+        failed += 1
+        if item.attempt_count >= max_attempts:
+            transitions[("failed", None, error)].append(item.id)
+        else:
+            retry_at = now + timedelta(seconds=_backoff_seconds(item.attempt_count))
+            transitions[("pending", retry_at, error)].append(item.id)
+    for (status, next_retry_at, last_error), ids in transitions.items():
+        values = {"status": status, "last_error": last_error, "updated_at": now}
+        if next_retry_at is not None:
+            values["next_retry_at"] = next_retry_at
+        PendingAttendanceUpdate.objects.filter(id__in=ids).update(**values)
+
+    logger.info(
+        f"🔁 Pending attendance: {len(items) - failed} applied, {failed} failed "
+        f"({len(by_tenant)} tenants) in {(time.perf_counter() - start) * 1000:.0f}ms"
+    )
     return len(items)
 
 
@@ -82,16 +193,28 @@ def start_pending_attendance_worker(poll_interval_seconds: int = 10):
     """
     Start a background thread that retries pending attendance updates.
     """
+    from excel_data.services.face_attendance_writer import FaceAttendanceBatchWriter
+
+    # One pool for the worker's lifetime: its threads keep their database
+    # connections (closed by close_old_connections after CONN_MAX_AGE) instead
+    # of each batch's new threads leaving connections open behind them
+    pool = None
+    if TENANT_WORKERS > 1:
+        pool = ThreadPoolExecutor(max_workers=TENANT_WORKERS, thread_name_prefix="pending-attendance")
+
     def _run():
         logger.info("Pending attendance retry worker started")
         while True:
             try:
-                processed = process_pending_attendance_batch()
+                processed = process_pending_attendance_batch(pool=pool)
+                FaceAttendanceBatchWriter.refresh_due_summaries()
                 if processed == 0:
                     time.sleep(poll_interval_seconds)
             except Exception as exc:
                 logger.error("Pending attendance worker error: %s", exc, exc_info=True)
                 time.sleep(poll_interval_seconds)
+            finally:
+                close_old_connections()
 
     thread = threading.Thread(target=_run, daemon=True)
     thread.start()
@@ -0,0 +1,71 @@
+"""
+Management command to list employees whose registered faces are near
+duplicates of each other (see services.face_duplicates).
+
+    python manage.py audit_face_duplicates --tenant-id 4
+    python manage.py audit_face_duplicates --threshold 0.9 --block-size 2048
+"""
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from excel_data.models import EmployeeProfile, FaceEmbedding, Tenant
+from excel_data.services.face_duplicates import find_duplicate_pairs
+
+
+class Command(BaseCommand):
+    help = 'List pairs of employees with near-duplicate face embeddings'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tenant-id', type=int, help='Only this tenant (default: every tenant with embeddings)')
+        parser.add_argument(
+            '--threshold', type=float,
+            help='Similarity at or above which two faces count as duplicates (default: FACE_DUPLICATE_SIMILARITY)',
+        )
+        parser.add_argument('--block-size', type=int, default=1024, help='Embedding rows scored per block (default: 1024)')
+
+    def handle(self, *args, **options):
+        threshold = options['threshold']
+        if threshold is None:
+            threshold = getattr(settings, 'FACE_DUPLICATE_SIMILARITY', 0.8)
+        if options['block_size'] < 1:
+            raise CommandError('--block-size must be at least 1')
+
+        if options['tenant_id']:
+            tenants = list(Tenant.objects.filter(id=options['tenant_id']))
+            if not tenants:
+                raise CommandError(f"Tenant with ID {options['tenant_id']} does not exist")
+        else:
+            tenant_ids = FaceEmbedding.objects.values_list('tenant_id', flat=True).distinct()
+            tenants = list(Tenant.objects.filter(id__in=tenant_ids).order_by('id'))
+
+        total = 0
+        for tenant in tenants:
+            start = time.perf_counter()
+            pairs = find_duplicate_pairs(tenant, threshold, block_size=options['block_size'])
+            seconds = time.perf_counter() - start
+            self.stdout.write(f'Tenant {tenant.id} ({tenant.name}): {len(pairs)} pairs at or above {threshold} ({seconds:.2f}s)')
+            if not pairs:
+                continue
+
+            employee_pks = {pk for pair in pairs for pk in (pair.employee_id, pair.other_employee_id)}
+            labels = {
+                pk: f"{code or pk} {first or ''} {last or ''}".strip()
+                for pk, code, first, last in EmployeeProfile.all_objects.filter(
+                    tenant=tenant, id__in=employee_pks
+                ).values_list('id', 'employee_id', 'first_name', 'last_name')
+            }
+            for pair in pairs:
+                self.stdout.write(
+                    f"  {pair.similarity:.3f}  {labels.get(pair.employee_id, pair.employee_id)}"
+                    f"  <->  {labels.get(pair.other_employee_id, pair.other_employee_id)}"
+                )
+            total += len(pairs)
+
+        if total:
+            self.stdout.write(self.style.WARNING(
+                f'{total} near-duplicate pairs: check them and register the right face again'
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS('No near-duplicate face embeddings'))
@@ -1,9 +1,11 @@
+from django.conf import settings
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 from datetime import datetime, timedelta
 from excel_data.models import Tenant
-from excel_data.salary_service import SalaryCalculationService
+from excel_data.services.payroll_runner import run_payroll_for_tenants
 import calendar
+import json
 import logging
 
 logger = logging.getLogger(__name__)
@@ -17,10 +19,32 @@ class Command(BaseCommand):
             action='store_true',
             help='Force calculation even if not 1st of month',
         )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=getattr(settings, 'AUTO_PAYROLL_WORKERS', 4),
+            help='Worker processes; tenants are calculated in parallel, largest first (1 = run in this process)',
+        )
+        parser.add_argument(
+            '--report',
+            type=str,
+            help='Write a JSON report with per-tenant status and timings to this path',
+        )
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Recalculate every employee instead of only those whose inputs changed',
+        )
+        parser.add_argument(
+            '--tenant-id',
+            type=int,
+            action='append',
+            help='Only process this tenant (repeatable)',
+        )
 
     def handle(self, *args, **options):
         today = timezone.now().date()
-        
+
         # Check if today is 1st of month or force is enabled
         if today.day != 1 and not options['force']:
             self.stdout.write(
@@ -37,42 +61,42 @@ class Command(BaseCommand):
             prev_year = today.year
 
         prev_month_name = calendar.month_name[prev_month].upper()
-        
-        self.stdout.write(f'Starting auto payroll calculation for {prev_month_name} {prev_year}')
 
         # Get all tenants with auto calculate enabled
         tenants = Tenant.objects.filter(auto_calculate_payroll=True)
-        
-        success_count = 0
-        error_count = 0
+        if options.get('tenant_id'):
+            tenants = tenants.filter(id__in=options['tenant_id'])
+
+        self.stdout.write(
+            f'Starting auto payroll calculation for {prev_month_name} {prev_year} '
+            f'({tenants.count()} tenants, {options["workers"]} workers)'
+        )
 
-        for tenant in tenants:
-            try:
-                self.stdout.write(f'Processing tenant: {tenant.name}')
-                
-                # Calculate payroll for previous month
-                results = SalaryCalculationService.calculate_salary_for_period(
-                    tenant, prev_year, prev_month_name, force_recalculate=True
-                )
-                
-                self.stdout.write(
-                    self.style.SUCCESS(
-                        f'✓ Successfully calculated payroll for {tenant.name}: {results}'
-                    )
-                )
-                success_count += 1
-                
-            except Exception as e:
-                logger.error(f"Error calculating payroll for tenant {tenant.name}: {str(e)}")
-                self.stdout.write(
-                    self.style.ERROR(
-                        f'✗ Failed to calculate payroll for {tenant.name}: {str(e)}'
-                    )
-                )
-                error_count += 1
+        def on_result(entry):
+            label = f"{entry['tenant_name']} ({entry['employee_count']} employees, {entry['duration_seconds']}s)"
+            if entry['status'] == 'error':
+                self.stdout.write(self.style.ERROR(f"✗ Failed to calculate payroll for {label}: {entry['error']}"))
+            elif entry['status'] == 'success':
+                self.stdout.write(self.style.SUCCESS(f"✓ Successfully calculated payroll for {label}: {entry['result']}"))
+            else:
+                self.stdout.write(self.style.WARNING(f"! Payroll for {label} finished with status '{entry['status']}': {entry['result']}"))
+
+        report = run_payroll_for_tenants(
+            tenants, prev_year, prev_month_name,
+            workers=options['workers'],
+            force_recalculate=True,
+            incremental=not options['full'],
+            on_result=on_result,
+        )
+
+        if options.get('report'):
+            with open(options['report'], 'w') as f:
+                json.dump(report, f, indent=2, default=str)
+            self.stdout.write(f"Report written to {options['report']}")
 
         self.stdout.write(
             self.style.SUCCESS(
-                f'\nAuto payroll calculation completed: {success_count} successful, {error_count} failed'
+                f"\nAuto payroll calculation completed in {report['total_seconds']}s: "
+                f"{report['success_count']} successful, {report['error_count']} failed"
             )
-        ) 
\ No newline at end of file
+        )
@@ -0,0 +1,96 @@
+"""
+Management command to compare ModelSerializer and projection serialization throughput
+for the hot list serializers, and check that both produce identical payloads.
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from excel_data.models import Tenant
+from excel_data.serializers import PROJECTIONS
+from excel_data.utils.utils import set_current_tenant, clear_current_tenant
+
+
+class Command(BaseCommand):
+    help = 'Benchmark list serializers against their .values() projections for one tenant'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tenant-id',
+            type=int,
+            required=True,
+            help='Tenant ID whose data is serialized',
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=1000,
+            help='Rows per serializer (default: 1000)',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=5,
+            help='Timed runs per path; the best run is reported (default: 5)',
+        )
+        parser.add_argument(
+            '--serializer',
+            type=str,
+            help='Only benchmark this serializer class (e.g. EmployeeTableSerializer)',
+        )
+
+    def handle(self, *args, **options):
+        tenant = Tenant.objects.filter(id=options['tenant_id']).first()
+        if not tenant:
+            raise CommandError(f'Tenant with ID "{options["tenant_id"]}" not found')
+
+        limit = options['limit']
+        repeat = max(1, options['repeat'])
+        only = options.get('serializer')
+        renderer = JSONRenderer()
+
+        # Serializers read through TenantAwareManager, same as during a request
+        set_current_tenant(tenant)
+        try:
+            for serializer_class, projection in PROJECTIONS.items():
+                if only and serializer_class.__name__ != only:
+                    continue
+                model = projection.model
+                base_qs = model.objects.filter(tenant=tenant).order_by('id')
+                ids = list(base_qs.values_list('id', flat=True)[:limit])
+                if not ids:
+                    self.stdout.write(self.style.WARNING(f'{serializer_class.__name__}: no {model.__name__} rows, skipped'))
+                    continue
+
+                def queryset():
+                    return model.objects.filter(tenant=tenant, id__in=ids).order_by('id')
+
+                serializer_data = serializer_class(queryset(), many=True).data
+                projection_data = projection.serialize(queryset())
+                identical = renderer.render(serializer_data) == renderer.render(projection_data)
+
+                serializer_best = self._best_of(repeat, lambda: serializer_class(queryset(), many=True).data)
+                projection_best = self._best_of(repeat, lambda: projection.serialize(queryset()))
+
+                rows = len(ids)
+                speedup = serializer_best / projection_best if projection_best else 0
+                style = self.style.SUCCESS if identical else self.style.ERROR
+                self.stdout.write(style(
+                    f'{serializer_class.__name__}: {rows} rows | '
+                    f'serializer {serializer_best * 1000:.1f}ms ({rows / serializer_best:,.0f} rows/s) | '
+                    f'projection {projection_best * 1000:.1f}ms ({rows / projection_best:,.0f} rows/s) | '
+                    f'{speedup:.1f}x | output {"identical" if identical else "DIFFERS"}'
+                ))
+        finally:
+            clear_current_tenant()
+
+    @staticmethod
+    def _best_of(repeat, func):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best
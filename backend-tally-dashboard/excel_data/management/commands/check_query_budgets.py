@@ -0,0 +1,163 @@
+"""
+Management command to verify the declared query budgets (utils.query_budget)
+on synthetic tenants of different sizes.
+
+Every benchmark scenario is run against each tenant; the queries of each
+budgeted function it reaches are compared with the declared budget. A count
+over budget at any size fails the check and prints the offending statements
+with their call sites. So does a statement shape that repeats per employee
+(grows by more than one per PER_EMPLOYEE_RATIO employees) even within budget;
+slower growth, e.g. writes batched per N rows, is reported as a warning.
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from excel_data.services.benchmarks import SCENARIOS, BenchmarkError, build_context
+from excel_data.services.synthetic_tenant import (
+    delete_synthetic_tenant, generate_synthetic_tenant, get_synthetic_tenants, synthetic_subdomain,
+)
+from excel_data.utils.query_budget import QUERY_BUDGETS, record_budgeted_calls
+from excel_data.utils.utils import clear_current_tenant, set_current_tenant
+
+# A statement shape growing by one per this many employees (or faster) is a per-employee query
+PER_EMPLOYEE_RATIO = 50
+
+
+class Command(BaseCommand):
+    help = 'Check that hot endpoints and services stay within their declared query budgets at any tenant size'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=str, default='10,1000',
+                            help='Comma-separated employee counts of the synthetic tenants (default: 10,1000)')
+        parser.add_argument('--months', type=int, default=2, help='Months of attendance per tenant (default: 2)')
+        parser.add_argument('--seed', type=int, default=7, help='Seed of the synthetic tenants (default: 7)')
+        parser.add_argument('--scenario', action='append', dest='scenarios', choices=sorted(SCENARIOS),
+                            help='Scenario to run (repeatable; default: all)')
+        parser.add_argument('--regenerate', action='store_true',
+                            help='Recreate the synthetic tenants instead of reusing existing ones')
+        parser.add_argument('--cleanup', action='store_true', help='Delete the synthetic tenants afterwards')
+        parser.add_argument('--list', action='store_true', help='List declared budgets and exit')
+
+    def handle(self, *args, **options):
+        if options['list']:
+            for name, budget in sorted(QUERY_BUDGETS.items()):
+                self.stdout.write(f'{budget:>5}  {name}')
+            return
+
+        try:
+            sizes = sorted({int(size) for size in options['sizes'].split(',') if size.strip()})
+        except ValueError:
+            raise CommandError('--sizes must be comma-separated integers')
+        if not sizes:
+            raise CommandError('--sizes is empty')
+
+        names = options.get('scenarios') or list(SCENARIOS)
+        # (scenario, budget name) -> {size: recorder}
+        measured = {}
+        tenants = []
+        try:
+            for size in sizes:
+                tenant = self._tenant(size, options)
+                tenants.append(tenant)
+                try:
+                    ctx = build_context(tenant)
+                except BenchmarkError as exc:
+                    raise CommandError(str(exc))
+                self.stdout.write(f'Tenant {tenant.id}: {size} employees')
+                for name in names:
+                    self._measure(ctx, name, size, measured)
+        finally:
+            if options['cleanup']:
+                for tenant in tenants:
+                    delete_synthetic_tenant(tenant)
+
+        failures = self._report(measured, sizes)
+        if failures:
+            raise CommandError(f'{failures} query budget violation(s)')
+        self.stdout.write(self.style.SUCCESS('All query budgets hold'))
+
+    def _tenant(self, size, options):
+        subdomain = synthetic_subdomain(options['seed'], size, options['months'])
+        existing = get_synthetic_tenants().filter(subdomain=subdomain).first()
+        if existing and not options['regenerate']:
+            return existing
+        if existing:
+            delete_synthetic_tenant(existing)
+        tenant, _, _ = generate_synthetic_tenant(
+            employees=size, months=options['months'], seed=options['seed'],
+            face_embeddings=size, payroll_months=1,
+        )
+        return tenant
+
+    def _measure(self, ctx, name, size, measured):
+        scenario = SCENARIOS[name]
+        set_current_tenant(ctx.tenant)
+        try:
+            # Warm-up: first calls fill in-process caches (embeddings, tenant settings)
+            scenario.func(ctx)
+            with record_budgeted_calls() as calls:
+                scenario.func(ctx)
+        except Exception as exc:
+            self.stdout.write(self.style.ERROR(f'  {name}: failed ({exc})'))
+            return
+        finally:
+            clear_current_tenant()
+        for budget_name, recorders in calls.items():
+            measured.setdefault((name, budget_name), {})[size] = max(recorders, key=len)
+
+    def _report(self, measured, sizes):
+        failures = 0
+        for (scenario, budget_name), by_size in sorted(measured.items()):
+            budget = QUERY_BUDGETS[budget_name]
+            counts = {size: len(recorder) for size, recorder in by_size.items()}
+            summary = ', '.join(f'{size} emp: {count}' for size, count in sorted(counts.items()))
+            over = [size for size, count in counts.items() if count > budget]
+            grows = len(set(counts.values())) > 1
+
+            per_employee = self._per_employee(by_size) if grows else []
+
+            label = f'{scenario} -> {budget_name} (budget {budget}): {summary}'
+            if not over and not per_employee:
+                if grows:
+                    # Within budget at every size, e.g. writes batched per N rows: show what grows
+                    self.stdout.write(self.style.WARNING(f'OK      {label} - grows with tenant size'))
+                    self.stdout.write(self._growth(by_size[min(by_size)], by_size[max(by_size)]))
+                else:
+                    self.stdout.write(self.style.SUCCESS(f'OK      {label}'))
+                continue
+
+            failures += 1
+            if over:
+                largest = by_size[max(over)]
+                self.stdout.write(self.style.ERROR(f'FAIL    {label}'))
+                self.stdout.write(largest.report(f'  Statements at {max(over)} employees:', limit=10))
+            else:
+                self.stdout.write(self.style.ERROR(f'FAIL    {label} - per-employee statements'))
+                for line in per_employee:
+                    self.stdout.write(f'  {line}')
+            if grows:
+                self.stdout.write(self._growth(by_size[min(by_size)], by_size[max(by_size)]))
+        return failures
+
+    @staticmethod
+    def _per_employee(by_size):
+        """Statement shapes growing by one per PER_EMPLOYEE_RATIO employees or faster."""
+        small_size, large_size = min(by_size), max(by_size)
+        limit = (large_size - small_size) / PER_EMPLOYEE_RATIO
+        small_counts = {group['sql']: group['count'] for group in by_size[small_size].grouped()}
+        return [
+            f"{small_counts.get(group['sql'], 0)} -> {group['count']}  {group['sql'][:160]}"
+            for group in by_size[large_size].grouped()
+            if group['count'] - small_counts.get(group['sql'], 0) > limit
+        ]
+
+    @staticmethod
+    def _growth(small, large):
+        """Statement shapes whose count grew between the smallest and largest tenant."""
+        small_counts = {group['sql']: group['count'] for group in small.grouped()}
+        lines = ['  Growing statements:']
+        for group in large.grouped():
+            before = small_counts.get(group['sql'], 0)
+            if group['count'] > before:
+                location = next(iter(group['locations']), 'unknown')
+                lines.append(f"    {before} -> {group['count']}  {location}  {group['sql'][:160]}")
+        return '\n'.join(lines)
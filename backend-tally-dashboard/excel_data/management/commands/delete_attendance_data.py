@@ -7,6 +7,7 @@ from excel_data.models import (
     Attendance,
     Tenant
 )
+from excel_data.utils.date_ranges import months_q
 import logging
 
 logger = logging.getLogger(__name__)
@@ -64,10 +65,8 @@ class Command(BaseCommand):
 
         # Get counts before deletion
         daily_attendance = DailyAttendance.objects.filter(
-            tenant_id=tenant_id,
-            date__year=year,
-            date__month__in=month_numbers
-        )
+            tenant_id=tenant_id
+        ).filter(months_q((year, month) for month in month_numbers))
         
         monthly_summary = MonthlyAttendanceSummary.objects.filter(
             tenant_id=tenant_id,
@@ -76,10 +75,8 @@ class Command(BaseCommand):
         )
         
         attendance = Attendance.objects.filter(
-            tenant_id=tenant_id,
-            date__year=year,
-            date__month__in=month_numbers
-        )
+            tenant_id=tenant_id
+        ).filter(months_q((year, month) for month in month_numbers))
 
         # Count records
         daily_count = daily_attendance.count()
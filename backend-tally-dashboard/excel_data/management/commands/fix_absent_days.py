@@ -1,6 +1,7 @@
 from django.core.management.base import BaseCommand
 from django.db import connection
 from excel_data.models import Attendance
+from excel_data.services.payroll_dirty import mark_dates_dirty
 
 
 class Command(BaseCommand):
@@ -65,9 +66,13 @@ class Command(BaseCommand):
                     AND da2.employee_id = a.employee_id
                     AND DATE_TRUNC('month', da2.date) = DATE_TRUNC('month', a.date)
                 )
+                RETURNING a.employee_id, a.date
             """, [tenant_id])
             
-            updated = cursor.rowcount
+            changed = cursor.fetchall()
+            updated = len(changed)
+            # Raw SQL skips the Attendance signals: mark the payroll of those months
+            mark_dates_dirty(tenant_id, changed, 'fix_absent_days')
             self.stdout.write(self.style.SUCCESS(f"✅ Updated {updated} records successfully!"))
             
             # Verify
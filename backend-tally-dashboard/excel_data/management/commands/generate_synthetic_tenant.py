@@ -0,0 +1,74 @@
+"""
+Management command to create (or delete) deterministic synthetic tenants for
+benchmarks and query-budget checks.
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from excel_data.services.synthetic_tenant import (
+    delete_synthetic_tenant, generate_synthetic_tenant, get_synthetic_tenants, synthetic_subdomain,
+)
+
+
+class Command(BaseCommand):
+    help = 'Generate a synthetic tenant (employees, daily attendance, holidays, advances, face embeddings)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--employees', type=int, default=5000, help='Employees (default: 5000)')
+        parser.add_argument('--months', type=int, default=24, help='Full months of daily attendance (default: 24)')
+        parser.add_argument('--seed', type=int, default=1, help='Random seed; same seed and scale give the same data')
+        parser.add_argument('--holidays-per-month', type=int, default=1)
+        parser.add_argument('--advance-ratio', type=float, default=0.2,
+                            help='Share of employees with advances (default: 0.2)')
+        parser.add_argument('--absent-rate', type=float, default=0.06,
+                            help='Share of working days marked absent (default: 0.06)')
+        parser.add_argument('--face-embeddings', type=int, default=1000,
+                            help='Employees with a registered face embedding (default: 1000)')
+        parser.add_argument('--payroll-months', type=int, default=3,
+                            help='Most recent months to calculate payroll for (default: 3)')
+        parser.add_argument('--replace', action='store_true',
+                            help='Delete an existing synthetic tenant with the same seed and scale first')
+        parser.add_argument('--list', action='store_true', help='List synthetic tenants and exit')
+        parser.add_argument('--delete', type=int, metavar='TENANT_ID', help='Delete a synthetic tenant and exit')
+
+    def handle(self, *args, **options):
+        if options['list']:
+            for tenant in get_synthetic_tenants():
+                self.stdout.write(f'{tenant.id}\t{tenant.subdomain}\t{tenant.name}')
+            return
+
+        if options.get('delete'):
+            tenant = get_synthetic_tenants().filter(id=options['delete']).first()
+            if not tenant:
+                raise CommandError(f'Synthetic tenant {options["delete"]} not found')
+            delete_synthetic_tenant(tenant)
+            self.stdout.write(self.style.SUCCESS(f'Deleted synthetic tenant {options["delete"]}'))
+            return
+
+        if options['employees'] < 1 or options['months'] < 1:
+            raise CommandError('--employees and --months must be positive')
+
+        subdomain = synthetic_subdomain(options['seed'], options['employees'], options['months'])
+        existing = get_synthetic_tenants().filter(subdomain=subdomain).first()
+        if existing:
+            if not options['replace']:
+                raise CommandError(f'Synthetic tenant {existing.id} ({subdomain}) already exists; use --replace')
+            existing_id = existing.id
+            delete_synthetic_tenant(existing)
+            self.stdout.write(f'Deleted existing synthetic tenant {existing_id}')
+
+        tenant, user, stats = generate_synthetic_tenant(
+            employees=options['employees'],
+            months=options['months'],
+            seed=options['seed'],
+            holidays_per_month=options['holidays_per_month'],
+            advance_ratio=options['advance_ratio'],
+            absent_rate=options['absent_rate'],
+            face_embeddings=options['face_embeddings'],
+            payroll_months=options['payroll_months'],
+            stdout=self.stdout,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Synthetic tenant {tenant.id} ({tenant.subdomain}) ready: {stats["employees"]} employees, '
+            f'{stats["daily_attendance"]} attendance rows, {stats["advances"]} advances, '
+            f'{stats["face_embeddings"]} face embeddings; admin user {user.email}'
+        ))
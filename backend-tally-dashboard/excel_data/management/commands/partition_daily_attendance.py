@@ -0,0 +1,51 @@
+"""
+Management command for the optional monthly partitioning of DailyAttendance
+(see services.attendance_partitions).
+
+    python manage.py partition_daily_attendance --convert      # one-off, maintenance window
+    python manage.py partition_daily_attendance --ahead 3      # monthly (cron): upcoming partitions
+    python manage.py partition_daily_attendance --status
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from excel_data.services.attendance_partitions import (
+    convert_to_partitioned, ensure_partitions, is_partitioned, list_partitions,
+)
+
+
+class Command(BaseCommand):
+    help = 'Partition excel_data_dailyattendance by month and keep future partitions created'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--convert', action='store_true',
+                            help='Rewrite the existing table as a partitioned table (locks it during the copy)')
+        parser.add_argument('--ahead', type=int, default=3,
+                            help='Months after the current one to create partitions for (default: 3)')
+        parser.add_argument('--status', action='store_true', help='Show partitions and exit')
+
+    def handle(self, *args, **options):
+        if options['status']:
+            if not is_partitioned():
+                self.stdout.write('excel_data_dailyattendance is not partitioned')
+                return
+            for partition in list_partitions():
+                self.stdout.write(f"{partition['name']:45} {partition['bounds']:60} ~{partition['approx_rows']} rows")
+            return
+
+        try:
+            if options['convert']:
+                summary = convert_to_partitioned(ahead_months=options['ahead'], stdout=self.stdout)
+                for warning in summary['warnings']:
+                    self.stdout.write(self.style.WARNING(warning))
+                self.stdout.write(self.style.SUCCESS(
+                    f"Partitioned excel_data_dailyattendance: {summary['rows']} rows in {summary['partitions']} partitions"
+                ))
+                return
+
+            created = ensure_partitions(ahead_months=options['ahead'])
+        except RuntimeError as exc:
+            raise CommandError(str(exc))
+        if created:
+            self.stdout.write(self.style.SUCCESS(f"Created partitions: {', '.join(created)}"))
+        else:
+            self.stdout.write('All partitions already exist')
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+from excel_data.models import Tenant
+from excel_data.services.advance_balances import find_balance_mismatches, refresh_advance_balances
+
+
+class Command(BaseCommand):
+    help = 'Check or rebuild the materialized employee advance balances from AdvanceLedger'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tenant-id', type=int, help='Specific tenant ID to process')
+        parser.add_argument('--check', action='store_true',
+                            help='Only report employees whose balance differs from the ledger (no changes)')
+
+    def handle(self, *args, **options):
+        tenants = Tenant.objects.all().order_by('id')
+        if options.get('tenant_id'):
+            tenants = tenants.filter(id=options['tenant_id'])
+
+        total_mismatches = 0
+        for tenant in tenants:
+            mismatches = find_balance_mismatches(tenant)
+            total_mismatches += len(mismatches)
+
+            if options['check']:
+                if mismatches:
+                    self.stdout.write(self.style.WARNING(f'{tenant.name} (ID: {tenant.id}): {len(mismatches)} mismatched balances'))
+                    for m in mismatches[:20]:
+                        expected = m['expected']['outstanding_balance'] if m['expected'] else None
+                        stored = m['stored']['outstanding_balance'] if m['stored'] else None
+                        self.stdout.write(f"  {m['employee_id']}: ledger={expected} stored={stored}")
+                continue
+
+            rows = refresh_advance_balances(tenant)
+            self.stdout.write(f'{tenant.name} (ID: {tenant.id}): rebuilt {rows} balances, fixed {len(mismatches)} mismatches')
+
+        if options['check']:
+            if total_mismatches:
+                raise CommandError(f'{total_mismatches} advance balances differ from the ledger')
+            self.stdout.write(self.style.SUCCESS('All advance balances match the ledger'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Rebuild complete ({total_mismatches} mismatches fixed)'))
@@ -0,0 +1,28 @@
+"""
+Management command to rebuild the attendance month catalog (AttendanceMonth)
+from DailyAttendance and Attendance, e.g. after deploying it or after writes
+that bypassed the ORM.
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from excel_data.models import Tenant
+from excel_data.services.attendance_months import rebuild_catalog
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the per-tenant catalog of months with attendance'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tenant-id', type=int, help='Only this tenant (default: all tenants)')
+
+    def handle(self, *args, **options):
+        tenants = Tenant.objects.all().order_by('id')
+        if options['tenant_id']:
+            tenants = tenants.filter(id=options['tenant_id'])
+            if not tenants.exists():
+                raise CommandError(f"Tenant with ID {options['tenant_id']} does not exist")
+
+        for tenant in tenants:
+            months = rebuild_catalog(tenant)
+            self.stdout.write(f"Tenant {tenant.id} ({tenant.name}): {months} months")
+        self.stdout.write(self.style.SUCCESS('Attendance month catalog rebuilt'))
@@ -0,0 +1,44 @@
+"""
+Management command to re-encrypt face embeddings with the primary
+FACE_EMBEDDING_SECRET_KEY after a key rotation (see services.face_key_rotation).
+
+    python manage.py rotate_face_embedding_keys                   # resumes an interrupted run
+    python manage.py rotate_face_embedding_keys --restart --workers 8
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from excel_data.models import Tenant
+from excel_data.services.face_key_rotation import rotate_embedding_keys
+
+
+class Command(BaseCommand):
+    help = 'Re-encrypt FaceEmbedding rows that are not on the primary FACE_EMBEDDING_SECRET_KEY'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500, help='Rows per locked chunk (default: 500)')
+        parser.add_argument('--workers', type=int, default=4, help='Re-encryption threads (default: 4)')
+        parser.add_argument('--tenant-id', type=int, help='Only this tenant (default: all tenants)')
+        parser.add_argument('--restart', action='store_true', help='Ignore the checkpoint of an earlier run')
+
+    def handle(self, *args, **options):
+        if options['tenant_id'] and not Tenant.objects.filter(id=options['tenant_id']).exists():
+            raise CommandError(f"Tenant with ID {options['tenant_id']} does not exist")
+
+        summary = rotate_embedding_keys(
+            chunk_size=options['chunk_size'],
+            workers=options['workers'],
+            resume=not options['restart'],
+            tenant_id=options['tenant_id'],
+            stdout=self.stdout,
+        )
+        self.stdout.write(
+            f"{summary['scanned']} scanned: {summary['rotated']} re-encrypted, {summary['current']} already on "
+            f"the primary key, {summary['unreadable']} unreadable; {summary['tenants']} tenants "
+            f"in {summary['seconds']}s"
+        )
+        if summary['unreadable']:
+            self.stdout.write(self.style.WARNING(
+                'Some embeddings cannot be decrypted with any configured key; they must be registered again'
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS('All face embeddings use the primary key'))
@@ -0,0 +1,104 @@
+"""
+Management command to run the in-process benchmark scenarios against a tenant
+in the local database and write comparable JSON results.
+
+Typical use:
+
+    python manage.py generate_synthetic_tenant --employees 5000 --months 24
+    python manage.py run_benchmarks --tenant-id <id> --output bench-<commit>.json
+    python manage.py run_benchmarks --tenant-id <id> --compare bench-<old>.json
+"""
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from excel_data.models import Tenant
+from excel_data.services.benchmarks import (
+    SCENARIOS, BenchmarkError, build_context, compare_results, load_results, run_scenarios,
+)
+
+
+class Command(BaseCommand):
+    help = 'Run timed payroll/directory/charts/attendance/face-verify scenarios in-process and emit JSON results'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tenant-id', type=int, help='Tenant to benchmark (e.g. one from generate_synthetic_tenant)')
+        parser.add_argument('--scenario', action='append', dest='scenarios', choices=sorted(SCENARIOS),
+                            help='Scenario to run (repeatable; default: all)')
+        parser.add_argument('--repeat', type=int, default=5, help='Timed runs per scenario (default: 5)')
+        parser.add_argument('--warmup', type=int, default=1, help='Untimed runs per scenario (default: 1)')
+        parser.add_argument('--read-only', action='store_true',
+                            help='Skip scenarios that write (payroll, bulk attendance, face verify)')
+        parser.add_argument('--output', type=str, help='Write results JSON to this file (default: stdout)')
+        parser.add_argument('--compare', type=str, metavar='BASELINE_JSON',
+                            help='Print median/query changes against an earlier results file')
+        parser.add_argument('--max-regression', type=float, metavar='PCT',
+                            help='With --compare: fail when a median is slower by more than PCT percent '
+                                 'or a scenario runs more queries')
+        parser.add_argument('--list', action='store_true', help='List scenarios and exit')
+
+    def handle(self, *args, **options):
+        if options['list']:
+            for name, entry in SCENARIOS.items():
+                self.stdout.write(f'{name:24} {"(writes) " if entry.writes else ""}{entry.description}')
+            return
+
+        if not options.get('tenant_id'):
+            raise CommandError('--tenant-id is required (create one with generate_synthetic_tenant)')
+        tenant = Tenant.objects.filter(id=options['tenant_id']).first()
+        if not tenant:
+            raise CommandError(f'Tenant with ID "{options["tenant_id"]}" not found')
+
+        try:
+            ctx = build_context(tenant)
+        except BenchmarkError as exc:
+            raise CommandError(str(exc))
+
+        self.stderr.write(f'Benchmarking tenant {tenant.id} ({ctx.dataset["employees"]} employees, '
+                          f'{ctx.dataset["daily_attendance"]} attendance rows), month {ctx.year}-{ctx.month:02d}')
+
+        def report(name, result):
+            if 'error' in result:
+                self.stderr.write(self.style.ERROR(f'  {name}: {result["error"]}'))
+            else:
+                self.stderr.write(f'  {name}: median {result["median_ms"]}ms, p95 {result["p95_ms"]}ms, '
+                                  f'{result["queries"]} queries ({result["db_ms"]}ms SQL)')
+
+        try:
+            results = run_scenarios(
+                ctx,
+                names=options.get('scenarios'),
+                repeat=options['repeat'],
+                warmup=options['warmup'],
+                include_writes=not options['read_only'],
+                on_result=report,
+            )
+        except BenchmarkError as exc:
+            raise CommandError(str(exc))
+
+        payload = json.dumps(results, indent=2, default=str)
+        if options.get('output'):
+            with open(options['output'], 'w') as handle:
+                handle.write(payload + '\n')
+            self.stderr.write(self.style.SUCCESS(f'Results written to {options["output"]}'))
+        else:
+            self.stdout.write(payload)
+
+        if options.get('compare'):
+            self._compare(load_results(options['compare']), results, options.get('max_regression'))
+
+    def _compare(self, baseline, results, max_regression):
+        self.stderr.write(f'Compared with {baseline.get("meta", {}).get("revision") or "baseline"}:')
+        regressions = []
+        for row in compare_results(baseline, results):
+            line = (f'  {row["scenario"]:24} {row["baseline_ms"]:>10.1f}ms -> {row["current_ms"]:>10.1f}ms '
+                    f'({row["change_pct"]:+.1f}%), queries {row["baseline_queries"]} -> {row["current_queries"]}')
+            slower = max_regression is not None and row['change_pct'] > max_regression
+            more_queries = max_regression is not None and row['current_queries'] > row['baseline_queries']
+            if slower or more_queries:
+                regressions.append(row['scenario'])
+                self.stderr.write(self.style.ERROR(line))
+            else:
+                self.stderr.write(line)
+        if regressions:
+            raise CommandError(f'Regressions in: {", ".join(regressions)}')
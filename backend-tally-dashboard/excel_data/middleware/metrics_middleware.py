@@ -0,0 +1,69 @@
+"""
+Per-route request instrumentation (see utils.metrics).
+
+Should be the first middleware so the latency covers the whole stack.
+"""
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from ..utils import metrics
+
+
+class MetricsMiddleware:
+    """Record latency, SQL, cache and response size per route; add Server-Timing."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, 'METRICS_ENABLED', True)
+        self.server_timing = getattr(settings, 'METRICS_SERVER_TIMING', True)
+
+    def __call__(self, request):
+        if not self.enabled:
+            return self.get_response(request)
+
+        stats, token = metrics.begin_request()
+        try:
+            with ExitStack() as stack:
+                for conn in connections.all():
+                    stack.enter_context(conn.execute_wrapper(stats))
+                response = self.get_response(request)
+        finally:
+            metrics.end_request(token)
+
+        match = getattr(request, 'resolver_match', None)
+        route = (match.route or match.view_name) if match else 'unmatched'
+
+        if response.streaming:
+            # Body is produced after we return: count bytes as they are sent
+            counter = self._count_async_stream if getattr(response, 'is_async', False) else self._count_stream
+            response.streaming_content = counter(response.streaming_content, route)
+            response_bytes = 0
+        else:
+            response_bytes = len(response.content)
+
+        metrics.registry.record_request(route, request.method, response.status_code, stats, response_bytes)
+        if self.server_timing:
+            response['Server-Timing'] = stats.server_timing()
+        return response
+
+    @staticmethod
+    def _count_stream(content, route):
+        sent = 0
+        try:
+            for chunk in content:
+                sent += len(chunk)
+                yield chunk
+        finally:
+            metrics.registry.add_response_bytes(route, sent)
+
+    @staticmethod
+    async def _count_async_stream(content, route):
+        sent = 0
+        try:
+            async for chunk in content:
+                sent += len(chunk)
+                yield chunk
+        finally:
+            metrics.registry.add_response_bytes(route, sent)
@@ -16,6 +16,9 @@ class SingleSessionMiddleware(MiddlewareMixin):
     Middleware to enforce single-session-per-user policy
     """
     
+    # __call__ is synchronous (ORM): under ASGI Django runs it in a thread
+    async_capable = False
+    
     # Endpoints that should skip session validation
     SKIP_SESSION_VALIDATION = [
         '/api/auth/login/',
@@ -31,6 +34,7 @@ class SingleSessionMiddleware(MiddlewareMixin):
         '/api/accept-invitation/',
         '/api/validate-invitation-token/',
         '/api/health/',
+        '/api/metrics/',
         '/admin/',
         '/static/',
         '/media/',
@@ -13,6 +13,9 @@ class TenantMiddleware(MiddlewareMixin):
     Allows public endpoints to work without tenant context
     """
     
+    # __call__ is synchronous (ORM): under ASGI Django runs it in a thread
+    async_capable = False
+    
     # Public endpoints that don't require tenant context
     PUBLIC_ENDPOINTS = [
         '/api/public/signup/',
@@ -23,6 +26,7 @@ class TenantMiddleware(MiddlewareMixin):
         '/api/accept-invitation/',
         '/api/validate-invitation-token/',
         '/api/health/',
+        '/api/metrics/',
         '/api/super-admin/',  # Super admin endpoints don't require tenant
         '/admin/',
         '/static/',
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 21:36
+
+import django.db.models.functions.comparison
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('excel_data', '0062_face_embedding_cache_and_pending_attendance'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='employeeprofile',
+            index=models.Index(models.F('tenant'), models.F('first_name'), django.db.models.functions.comparison.Coalesce('last_name', models.Value('')), models.F('id'), name='employee_directory_keyset_idx'),
+        ),
+    ]
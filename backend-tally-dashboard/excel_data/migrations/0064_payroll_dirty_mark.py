@@ -0,0 +1,33 @@
+# Generated by Django 5.2 on 2026-10-18 21:51
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('excel_data', '0063_employee_directory_keyset_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PayrollDirtyMark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('employee_id', models.CharField(blank=True, default='', max_length=50)),
+                ('year', models.IntegerField()),
+                ('month', models.PositiveSmallIntegerField(help_text='Month number 1-12')),
+                ('reason', models.CharField(max_length=50)),
+                ('marked_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('tenant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='%(class)s_set', to='excel_data.tenant')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['tenant', 'year', 'month'], name='payroll_dirty_period_idx')],
+                'unique_together': {('tenant', 'employee_id', 'year', 'month')},
+            },
+        ),
+    ]
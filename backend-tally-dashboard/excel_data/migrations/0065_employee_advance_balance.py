@@ -0,0 +1,52 @@
+# Generated by Django 5.2 on 2026-10-18 21:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('excel_data', '0064_payroll_dirty_mark'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmployeeAdvanceBalance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('employee_id', models.CharField(max_length=50)),
+                ('outstanding_balance', models.DecimalField(decimal_places=2, default=0, help_text='Sum of remaining_balance over PENDING/PARTIALLY_PAID advances', max_digits=12)),
+                ('open_advance_count', models.PositiveIntegerField(default=0)),
+                ('total_advanced', models.DecimalField(decimal_places=2, default=0, help_text='Sum of all advance amounts, including repaid ones', max_digits=12)),
+                ('last_advance_date', models.DateField(blank=True, null=True)),
+                ('tenant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='%(class)s_set', to='excel_data.tenant')),
+            ],
+            options={
+                'unique_together': {('tenant', 'employee_id')},
+            },
+        ),
+        # Backfill from the ledger in one statement
+        migrations.RunSQL(
+            sql="""
+                INSERT INTO excel_data_employeeadvancebalance
+                    (tenant_id, employee_id, outstanding_balance, open_advance_count,
+                     total_advanced, last_advance_date, created_at, updated_at)
+                SELECT
+                    tenant_id,
+                    employee_id,
+                    COALESCE(SUM(remaining_balance) FILTER (WHERE status IN ('PENDING', 'PARTIALLY_PAID')), 0),
+                    COUNT(*) FILTER (WHERE status IN ('PENDING', 'PARTIALLY_PAID')),
+                    COALESCE(SUM(amount), 0),
+                    MAX(advance_date),
+                    NOW(),
+                    NOW()
+                FROM excel_data_advanceledger
+                WHERE tenant_id IS NOT NULL
+                GROUP BY tenant_id, employee_id;
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.2 on 2026-10-18 21:59
+
+import re
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+GENERATED_ID_RE = re.compile(r'^(?P<base>[A-Z]{3}-[A-Z]{2}-\d{3,})(?:-(?P<suffix>[A-Z]+))?$')
+
+
+def seed_counters(apps, schema_editor):
+    """Start every counter after the highest suffix already in use."""
+    EmployeeProfile = apps.get_model('excel_data', 'EmployeeProfile')
+    EmployeeIdCounter = apps.get_model('excel_data', 'EmployeeIdCounter')
+
+    allocated = {}
+    for tenant_id, employee_id in EmployeeProfile.objects.values_list('tenant_id', 'employee_id').iterator(chunk_size=2000):
+        match = GENERATED_ID_RE.match(employee_id or '')
+        if not match or tenant_id is None:
+            continue
+        index = 0
+        for char in match.group('suffix') or '':
+            index = index * 26 + (ord(char) - ord('A') + 1)
+        key = (tenant_id, match.group('base'))
+        allocated[key] = max(allocated.get(key, 0), index + 1)
+
+    EmployeeIdCounter.objects.bulk_create(
+        [
+            EmployeeIdCounter(tenant_id=tenant_id, base_id=base_id, allocated=count)
+            for (tenant_id, base_id), count in allocated.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('excel_data', '0065_employee_advance_balance'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmployeeIdCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('base_id', models.CharField(max_length=32)),
+                ('allocated', models.PositiveIntegerField(default=0)),
+                ('tenant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='%(class)s_set', to='excel_data.tenant')),
+            ],
+            options={
+                'unique_together': {('tenant', 'base_id')},
+            },
+        ),
+        migrations.RunPython(seed_counters, migrations.RunPython.noop),
+    ]
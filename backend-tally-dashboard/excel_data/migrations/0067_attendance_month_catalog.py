@@ -0,0 +1,35 @@
+# Generated by Django 5.2 on 2026-10-18 22:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('excel_data', '0066_employee_id_counter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceMonth',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('year', models.IntegerField()),
+                ('month', models.PositiveSmallIntegerField(help_text='Month number 1-12')),
+                ('daily_records', models.IntegerField(default=0)),
+                ('monthly_records', models.IntegerField(default=0, help_text='Uploaded Attendance rows')),
+                ('employees_with_attendance', models.IntegerField(default=0, help_text='Distinct employees across both sources')),
+                ('is_stale', models.BooleanField(default=True)),
+                ('refreshed_at', models.DateTimeField(blank=True, null=True)),
+                ('tenant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='%(class)s_set', to='excel_data.tenant')),
+            ],
+            options={
+                'ordering': ['-year', '-month'],
+                'indexes': [models.Index(fields=['tenant', 'is_stale'], name='attendance_month_stale_idx')],
+                'unique_together': {('tenant', 'year', 'month')},
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2 on 2026-10-18 22:31
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('excel_data', '0067_attendance_month_catalog'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SSEEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('channel', models.CharField(max_length=100)),
+                ('event_type', models.CharField(max_length=50)),
+                ('data', models.JSONField(default=dict)),
+                ('created_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+            ],
+            options={
+                'db_table': 'excel_data_sse_event',
+                'indexes': [models.Index(fields=['channel', 'id'], name='sse_event_channel_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2 on 2026-10-18 23:08
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('excel_data', '0068_sse_event_log'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FaceEmbeddingTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('employee_pk', models.BigIntegerField()),
+                ('change_version', models.PositiveBigIntegerField()),
+                ('removed_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'db_table': 'excel_data_face_embedding_tombstone',
+            },
+        ),
+        migrations.AddField(
+            model_name='faceembedding',
+            name='change_version',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='faceembedding',
+            index=models.Index(fields=['tenant', 'change_version'], name='face_embedding_version_idx'),
+        ),
+        migrations.AddField(
+            model_name='faceembeddingtombstone',
+            name='tenant',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='face_embedding_tombstones', to='excel_data.tenant'),
+        ),
+        migrations.AddIndex(
+            model_name='faceembeddingtombstone',
+            index=models.Index(fields=['tenant', 'change_version'], name='face_tombstone_version_idx'),
+        ),
+    ]
@@ -40,6 +40,7 @@ from .email_verification import (
 from .employee import (
     EmployeeProfile,
     BulkUpdateLog,
+    EmployeeIdCounter,
 )
 
 # Attendance Models
@@ -47,6 +48,7 @@ from .attendance import (
     Attendance,
     DailyAttendance,
     MonthlyAttendanceSummary,
+    AttendanceMonth,
 )
 
 # Payroll Models
@@ -55,6 +57,7 @@ from .payroll import (
     PayrollPeriod,
     CalculatedSalary,
     SalaryAdjustment,
+    PayrollDirtyMark,
 )
 
 # Salary Models
@@ -66,6 +69,7 @@ from .salary import (
 from .ledger import (
     AdvanceLedger,
     Payment,
+    EmployeeAdvanceBalance,
 )
 
 # Chart Data Models
@@ -86,6 +90,7 @@ from .face_log import (
 # Face embeddings
 from .face_embedding import (
     FaceEmbedding,
+    FaceEmbeddingTombstone,
 )
 
 # Pending attendance retries
@@ -93,6 +98,11 @@ from .pending_attendance import (
     PendingAttendanceUpdate,
 )
 
+# Server-sent events log
+from .sse_event import (
+    SSEEvent,
+)
+
 # Define all models to be imported via 'from excel_data.models import *'
 __all__ = [
     # Tenant Models
@@ -115,6 +125,7 @@ __all__ = [
     # Employee Models
     'EmployeeProfile',
     'BulkUpdateLog',
+    'EmployeeIdCounter',
     
     # Leave Models
     'Leave',
@@ -126,12 +137,14 @@ __all__ = [
     'Attendance',
     'DailyAttendance',
     'MonthlyAttendanceSummary',
+    'AttendanceMonth',
     
     # Payroll Models
     'DataSource',
     'PayrollPeriod',
     'CalculatedSalary',
     'SalaryAdjustment',
+    'PayrollDirtyMark',
     
     # Salary Models
     'SalaryData',
@@ -139,6 +152,7 @@ __all__ = [
     # Ledger Models
     'AdvanceLedger',
     'Payment',
+    'EmployeeAdvanceBalance',
     
     # Chart Data Models
     'ChartAggregatedData',
@@ -149,5 +163,9 @@ __all__ = [
     # Face attendance
     'FaceAttendanceLog',
     'FaceEmbedding',
+    'FaceEmbeddingTombstone',
     'PendingAttendanceUpdate',
+    
+    # Server-sent events
+    'SSEEvent',
 ]
@@ -149,4 +149,32 @@ class MonthlyAttendanceSummary(TenantAwareModel):
         verbose_name_plural = "Monthly attendance summaries"
 
     def __str__(self):
-        return f"{self.employee_id} – {self.month}/{self.year}"
\ No newline at end of file
+        return f"{self.employee_id} – {self.month}/{self.year}"
+
+class AttendanceMonth(TenantAwareModel):
+    """
+    Catalog of the months that hold attendance for a tenant (DailyAttendance
+    rows and uploaded Attendance summaries), with their counts. Writes to
+    either table mark the month stale; reads refresh stale months with one
+    date-range scan each instead of grouping every row of the tenant.
+    Maintained by services/attendance_months.py.
+    """
+
+    year = models.IntegerField()
+    month = models.PositiveSmallIntegerField(help_text="Month number 1-12")
+    daily_records = models.IntegerField(default=0)
+    monthly_records = models.IntegerField(default=0, help_text="Uploaded Attendance rows")
+    employees_with_attendance = models.IntegerField(default=0, help_text="Distinct employees across both sources")
+    is_stale = models.BooleanField(default=True)
+    refreshed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        app_label = 'excel_data'
+        unique_together = ['tenant', 'year', 'month']
+        ordering = ['-year', '-month']
+        indexes = [
+            models.Index(fields=['tenant', 'is_stale'], name='attendance_month_stale_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.month}/{self.year}: {self.daily_records} daily, {self.monthly_records} monthly"
@@ -153,8 +153,41 @@ class ChartAggregatedData(TenantAwareModel):
         
         Direct mapping - fields match exactly
         """
-        from datetime import datetime
+        key, defaults = cls._calculated_salary_values(calculated_salary)
+        chart_data, created = cls.objects.update_or_create(**key, defaults=defaults)
+        return chart_data, created
+    
+    @classmethod
+    def bulk_aggregate_from_calculated_salaries(cls, calculated_salaries):
+        """
+        Create/update ChartAggregatedData for many CalculatedSalary rows in one
+        upsert per batch (same values as aggregate_from_calculated_salary)
+        """
+        from ..signals import clean_null_bytes_from_instance
         
+        rows = {}
+        for calculated_salary in calculated_salaries:
+            key, defaults = cls._calculated_salary_values(calculated_salary)
+            row = cls(**key, **defaults)
+            # What save() and its pre_save signal would do
+            if row.total_working_days > 0:
+                row.attendance_percentage = (row.present_days / row.total_working_days) * 100
+            else:
+                row.attendance_percentage = 0
+            clean_null_bytes_from_instance(row)
+            # Last one wins, as with one update_or_create per row
+            rows[(row.employee_id, row.year, row.month)] = row
+        if not rows:
+            return []
+        update_fields = ['attendance_percentage', 'aggregated_at', 'updated_at', *defaults]
+        return cls.objects.bulk_create(
+            list(rows.values()), batch_size=500, update_conflicts=True,
+            unique_fields=['tenant', 'employee_id', 'year', 'month'], update_fields=update_fields,
+        )
+    
+    @staticmethod
+    def _calculated_salary_values(calculated_salary):
+        """Lookup and defaults of the chart row of a CalculatedSalary"""
         # Standardize month to 3-letter abbreviation (JAN, FEB, MAR, etc.)
         MONTH_MAPPING = {
             'JANUARY': 'JAN', 'FEBRUARY': 'FEB', 'MARCH': 'MAR', 'APRIL': 'APR',
@@ -168,33 +201,33 @@ class ChartAggregatedData(TenantAwareModel):
         month_short = MONTH_MAPPING.get(month_name, 'JAN')
         period_key = f"{month_short}-{calculated_salary.payroll_period.year}"
         
-        chart_data, created = cls.objects.update_or_create(
-            tenant=calculated_salary.tenant,
-            employee_id=calculated_salary.employee_id,
-            year=calculated_salary.payroll_period.year,
-            month=month_short,
-            defaults={
-                'employee_name': calculated_salary.employee_name,
-                'department': calculated_salary.department or '',
-                'period_key': period_key,
-                'payroll_period': calculated_salary.payroll_period,
-                'basic_salary': calculated_salary.basic_salary,
-                'present_days': calculated_salary.present_days,
-                'absent_days': calculated_salary.absent_days,
-                'total_working_days': calculated_salary.total_working_days,
-                'ot_hours': calculated_salary.ot_hours,
-                'ot_charges': calculated_salary.ot_charges,
-                'late_minutes': calculated_salary.late_minutes,
-                'late_deduction': calculated_salary.late_deduction,
-                'gross_salary': calculated_salary.gross_salary,
-                'net_payable': calculated_salary.net_payable,
-                'tds_amount': calculated_salary.tds_amount,
-                'advance_deduction': calculated_salary.advance_deduction_amount,
-                'total_advance_balance': calculated_salary.total_advance_balance,
-                'incentive': calculated_salary.incentive,
-                'data_source': 'frontend',
-                'is_paid': calculated_salary.is_paid,
-            }
-        )
-        return chart_data, created
+        key = {
+            'tenant_id': calculated_salary.tenant_id,
+            'employee_id': calculated_salary.employee_id,
+            'year': calculated_salary.payroll_period.year,
+            'month': month_short,
+        }
+        defaults = {
+            'employee_name': calculated_salary.employee_name,
+            'department': calculated_salary.department or '',
+            'period_key': period_key,
+            'payroll_period': calculated_salary.payroll_period,
+            'basic_salary': calculated_salary.basic_salary,
+            'present_days': calculated_salary.present_days,
+            'absent_days': calculated_salary.absent_days,
+            'total_working_days': calculated_salary.total_working_days,
+            'ot_hours': calculated_salary.ot_hours,
+            'ot_charges': calculated_salary.ot_charges,
+            'late_minutes': calculated_salary.late_minutes,
+            'late_deduction': calculated_salary.late_deduction,
+            'gross_salary': calculated_salary.gross_salary,
+            'net_payable': calculated_salary.net_payable,
+            'tds_amount': calculated_salary.tds_amount,
+            'advance_deduction': calculated_salary.advance_deduction_amount,
+            'total_advance_balance': calculated_salary.total_advance_balance,
+            'incentive': calculated_salary.incentive,
+            'data_source': 'frontend',
+            'is_paid': calculated_salary.is_paid,
+        }
+        return key, defaults
 
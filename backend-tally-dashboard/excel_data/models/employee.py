@@ -1,4 +1,6 @@
 from django.db import models
+from django.db.models import Value
+from django.db.models.functions import Coalesce
 from django.conf import settings
 from .tenant import TenantAwareModel
 from datetime import datetime, timedelta
@@ -90,6 +92,11 @@ class EmployeeProfile(TenantAwareModel):
             models.Index(fields=['tenant', 'is_active'], name='employee_active_idx'),
             models.Index(fields=['tenant', 'employee_id'], name='employee_id_idx'),
             models.Index(fields=['is_active', 'employee_id'], name='employee_lookup_idx'),
+            # Keyset pagination order for directory_data (NULL last names sort as '')
+            models.Index(
+                'tenant', 'first_name', Coalesce('last_name', Value('')), 'id',
+                name='employee_directory_keyset_idx',
+            ),
         ]
 
     def _calculate_shift_hours(self):
@@ -246,3 +253,23 @@ class BulkUpdateLog(TenantAwareModel):
     
     def __str__(self):
         return f"{self.action_type} - {self.employee_count} employees - {self.performed_at}"
+
+
+class EmployeeIdCounter(TenantAwareModel):
+    """
+    Per-(tenant, base ID) suffix counter for generated employee IDs.
+
+    ``allocated`` is how many IDs have been handed out for ``base_id``:
+    index 0 is the bare base (SID-MA-025), then -A .. -Z, -AA, -AB, ...
+    Blocks are reserved with one upsert ... RETURNING, so concurrent uploads
+    never receive the same suffix (see utils.employee_ids).
+    """
+    base_id = models.CharField(max_length=32)
+    allocated = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        app_label = 'excel_data'
+        unique_together = ['tenant', 'base_id']
+
+    def __str__(self):
+        return f"{self.base_id} ({self.allocated})"
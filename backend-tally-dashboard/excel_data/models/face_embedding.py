@@ -39,13 +39,43 @@ class FaceEmbedding(models.Model):
     # Cosine-similarity threshold used when this embedding was created (for auditing/tuning)
     similarity_threshold = models.FloatField(default=0.55)
 
+    # tenant.embedding_cache_version of the last write (delta gallery sync, services.face_gallery)
+    change_version = models.PositiveBigIntegerField(default=0)
+
     class Meta:
         app_label = "excel_data"
         db_table = "excel_data_face_embedding"
         indexes = [
             models.Index(fields=["tenant", "employee"], name="face_embedding_employee_idx"),
+            models.Index(fields=["tenant", "change_version"], name="face_embedding_version_idx"),
         ]
 
     def __str__(self):
         return f"FaceEmbedding<{self.employee_id}> ({self.tenant_id})"
 
+
+class FaceEmbeddingTombstone(models.Model):
+    """
+    A removed FaceEmbedding, kept so delta gallery syncs can tell devices to drop it.
+    """
+
+    tenant = models.ForeignKey(
+        Tenant,
+        on_delete=models.CASCADE,
+        related_name="face_embedding_tombstones",
+    )
+    # EmployeeProfile pk; the employee itself may be gone
+    employee_pk = models.BigIntegerField()
+    change_version = models.PositiveBigIntegerField()
+    removed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        app_label = "excel_data"
+        db_table = "excel_data_face_embedding_tombstone"
+        indexes = [
+            models.Index(fields=["tenant", "change_version"], name="face_tombstone_version_idx"),
+        ]
+
+    def __str__(self):
+        return f"FaceEmbeddingTombstone<{self.employee_pk}> ({self.tenant_id} v{self.change_version})"
+
@@ -65,4 +65,28 @@ class Payment(TenantAwareModel):
         app_label = 'excel_data'
 
     def __str__(self):
-        return f"{self.employee_id} - {self.employee_name} - {self.payment_date}"
\ No newline at end of file
+        return f"{self.employee_id} - {self.employee_name} - {self.payment_date}"
+
+class EmployeeAdvanceBalance(TenantAwareModel):
+    """
+    Materialized per-employee advance balance, derived from AdvanceLedger.
+
+    Refreshed in the same transaction as every ledger write (signals for
+    save/delete, explicit refresh after bulk settlements), so payroll reads a
+    whole tenant's balances in one indexed query. Rebuild with the
+    ``rebuild_advance_balances`` command.
+    """
+    employee_id = models.CharField(max_length=50)
+    outstanding_balance = models.DecimalField(max_digits=12, decimal_places=2, default=0,
+                                              help_text="Sum of remaining_balance over PENDING/PARTIALLY_PAID advances")
+    open_advance_count = models.PositiveIntegerField(default=0)
+    total_advanced = models.DecimalField(max_digits=12, decimal_places=2, default=0,
+                                         help_text="Sum of all advance amounts, including repaid ones")
+    last_advance_date = models.DateField(null=True, blank=True)
+
+    class Meta:
+        app_label = 'excel_data'
+        unique_together = ['tenant', 'employee_id']
+
+    def __str__(self):
+        return f"{self.employee_id} - {self.outstanding_balance}"
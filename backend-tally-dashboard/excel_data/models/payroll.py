@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from decimal import Decimal
 from .tenant import TenantAwareModel
 
@@ -202,4 +203,31 @@ class SalaryAdjustment(TenantAwareModel):
     def save(self, *args, **kwargs):
         super().save(*args, **kwargs)
         # Recalculate the salary after adjustment
-        self.calculated_salary.save()
\ No newline at end of file
+        self.calculated_salary.save()
+
+
+class PayrollDirtyMark(TenantAwareModel):
+    """
+    Records that a payroll input changed for an employee and month after it may
+    have been calculated (attendance, uploaded salary, employee pay settings,
+    advances). An empty employee_id marks the whole period dirty (holidays,
+    tenant-level rules). One row per (tenant, employee_id, year, month);
+    re-marking only bumps marked_at, so the table stays bounded.
+    """
+    PERIOD_WIDE = ''
+
+    employee_id = models.CharField(max_length=50, blank=True, default='')
+    year = models.IntegerField()
+    month = models.PositiveSmallIntegerField(help_text="Month number 1-12")
+    reason = models.CharField(max_length=50)
+    marked_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        app_label = 'excel_data'
+        unique_together = ['tenant', 'employee_id', 'year', 'month']
+        indexes = [
+            models.Index(fields=['tenant', 'year', 'month'], name='payroll_dirty_period_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.employee_id or '*'} {self.month}/{self.year} ({self.reason})"
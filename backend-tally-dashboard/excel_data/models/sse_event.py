@@ -0,0 +1,28 @@
+from django.db import models
+from django.utils import timezone
+
+
+class SSEEvent(models.Model):
+    """
+    Append-only log of server-sent events, shared by all workers.
+
+    The auto-increment id is the SSE event id: each worker polls for rows
+    above the last id it delivered and fans them out to its local
+    subscribers, and reconnecting clients resume from ``Last-Event-ID``.
+    Rows are pruned after SSE_EVENT_RETENTION_SECONDS.
+    """
+
+    channel = models.CharField(max_length=100)
+    event_type = models.CharField(max_length=50)
+    data = models.JSONField(default=dict)
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        app_label = 'excel_data'
+        db_table = 'excel_data_sse_event'
+        indexes = [
+            models.Index(fields=['channel', 'id'], name='sse_event_channel_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return f"#{self.id} {self.channel}:{self.event_type}"
@@ -33,6 +33,12 @@ from .payment_serializers import (
     AdvanceLedgerSerializer, PaymentSerializer
 )
 
+from .projections import (
+    Projection, Computed, ProjectedListMixin, PROJECTIONS,
+    EMPLOYEE_LIST_PROJECTION, EMPLOYEE_TABLE_PROJECTION,
+    ATTENDANCE_PROJECTION, DAILY_ATTENDANCE_PROJECTION
+)
+
 from rest_framework import serializers
 
 class UserPermissionsSerializer(serializers.ModelSerializer):
@@ -118,4 +124,14 @@ __all__ = [
     # Payment serializers
     'AdvanceLedgerSerializer',
     'PaymentSerializer',
+    
+    # List projections (fast-path serialization)
+    'Projection',
+    'Computed',
+    'ProjectedListMixin',
+    'PROJECTIONS',
+    'EMPLOYEE_LIST_PROJECTION',
+    'EMPLOYEE_TABLE_PROJECTION',
+    'ATTENDANCE_PROJECTION',
+    'DAILY_ATTENDANCE_PROJECTION',
 ]
\ No newline at end of file
@@ -22,17 +22,26 @@ class AttendanceSerializer(serializers.ModelSerializer):
         read_only_fields = ['created_at', 'updated_at']
     
     def get_attendance_percentage(self, obj):
-        # Use total_working_days if available, otherwise fall back to calendar_days
-        working_days = obj.total_working_days if obj.total_working_days > 0 else obj.calendar_days
-        if working_days > 0:
-            return round((obj.present_days / working_days) * 100, 1)
-        return 0
+        return monthly_attendance_percentage(obj.present_days, obj.total_working_days, obj.calendar_days)
     
     def get_off_days(self, obj):
-        """Calculate off days based on calendar_days - total_working_days - holiday_days"""
-        holiday_days = obj.holiday_days if obj.holiday_days else 0
-        off_days = obj.calendar_days - obj.total_working_days - holiday_days
-        return max(0, off_days)  # Ensure non-negative
+        return monthly_off_days(obj.calendar_days, obj.total_working_days, obj.holiday_days)
+
+
+def monthly_attendance_percentage(present_days, total_working_days, calendar_days):
+    # Use total_working_days if available, otherwise fall back to calendar_days
+    working_days = total_working_days if total_working_days > 0 else calendar_days
+    if working_days > 0:
+        return round((present_days / working_days) * 100, 1)
+    return 0
+
+
+def monthly_off_days(calendar_days, total_working_days, holiday_days):
+    """Calculate off days based on calendar_days - total_working_days - holiday_days"""
+    holiday_days = holiday_days if holiday_days else 0
+    off_days = calendar_days - total_working_days - holiday_days
+    return max(0, off_days)  # Ensure non-negative
+
 
 class DailyAttendanceSerializer(serializers.ModelSerializer):
     
@@ -198,39 +198,50 @@ class EmployeeTableSerializer(serializers.ModelSerializer):
         
         Combines both sources to give complete attendance picture.
         """
-        total_present_days = 0
-        total_absent_days = 0
-        
         # 1. Get attendance data from uploaded Salary Excel
         latest_salary = SalaryData.objects.filter(
             employee_id=obj.employee_id
         ).order_by('-year', '-month').first()
         
-        if latest_salary:
-            total_present_days += float(latest_salary.days or 0)
-            total_absent_days += float(latest_salary.absent or 0)
-        
         # 2. Get manually marked attendance from DailyAttendance
         daily_attendance = DailyAttendance.objects.filter(
             employee_id=obj.employee_id
         )
         
-        # Count present days (PRESENT + PAID_LEAVE = full day, HALF_DAY = 0.5)
-        present_count = daily_attendance.filter(attendance_status='PRESENT').count()
-        paid_leave_count = daily_attendance.filter(attendance_status='PAID_LEAVE').count()
-        half_day_count = daily_attendance.filter(attendance_status='HALF_DAY').count()
-        absent_count = daily_attendance.filter(attendance_status='ABSENT').count()
-        
-        # Aggregate manually marked attendance
-        manual_present = present_count + paid_leave_count + (half_day_count * 0.5)
-        manual_absent = absent_count + (half_day_count * 0.5)
-        
-        total_present_days += manual_present
-        total_absent_days += manual_absent
-        
-        # Calculate percentage
-        total_days = total_present_days + total_absent_days
-        if total_days > 0:
-            return round((total_present_days / total_days) * 100, 1)
-        
-        return 0
\ No newline at end of file
+        return combined_attendance_percentage(
+            latest_salary.days if latest_salary else None,
+            latest_salary.absent if latest_salary else None,
+            present_count=daily_attendance.filter(attendance_status='PRESENT').count(),
+            paid_leave_count=daily_attendance.filter(attendance_status='PAID_LEAVE').count(),
+            half_day_count=daily_attendance.filter(attendance_status='HALF_DAY').count(),
+            absent_count=daily_attendance.filter(attendance_status='ABSENT').count(),
+        )
+
+
+def combined_attendance_percentage(salary_days, salary_absent, present_count, paid_leave_count,
+                                   half_day_count, absent_count):
+    """
+    Attendance percentage from the latest uploaded salary row plus manually marked
+    daily attendance. ``salary_days``/``salary_absent`` are None when the employee
+    has no uploaded salary. Shared by EmployeeTableSerializer and its projection.
+    """
+    total_present_days = 0
+    total_absent_days = 0
+    
+    if salary_days is not None:
+        total_present_days += float(salary_days or 0)
+        total_absent_days += float(salary_absent or 0)
+    
+    # Count present days (PRESENT + PAID_LEAVE = full day, HALF_DAY = 0.5)
+    manual_present = present_count + paid_leave_count + (half_day_count * 0.5)
+    manual_absent = absent_count + (half_day_count * 0.5)
+    
+    total_present_days += manual_present
+    total_absent_days += manual_absent
+    
+    # Calculate percentage
+    total_days = total_present_days + total_absent_days
+    if total_days > 0:
+        return round((total_present_days / total_days) * 100, 1)
+    
+    return 0
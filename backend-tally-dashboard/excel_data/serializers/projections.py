@@ -0,0 +1,255 @@
+"""
+Fast-path projections for hot list endpoints.
+
+A ModelSerializer with ``many=True`` instantiates a model per row, walks every
+field's ``get_attribute``/``to_representation`` and calls each
+``SerializerMethodField`` per object (``get_latest_salary`` even runs a query
+per row). A projection compiles the same serializer once into:
+
+- a ``.values()`` query over the plain fields,
+- database annotations for the values method fields used to query per row,
+- a tight loop that builds the output dicts, reusing each DRF field's
+  ``to_representation`` so the payload is identical to the serializer's.
+
+Method fields must be declared as ``Computed`` entries; compiling a serializer
+with an undeclared method field raises ImproperlyConfigured instead of silently
+dropping it from the output.
+"""
+
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from rest_framework import serializers
+from rest_framework.response import Response
+
+from ..models import DailyAttendance, SalaryData
+from .attendance_serializers import (
+    AttendanceSerializer,
+    DailyAttendanceSerializer,
+    monthly_attendance_percentage,
+    monthly_off_days,
+)
+from .employee_serializers import (
+    EmployeeProfileListSerializer,
+    EmployeeTableSerializer,
+    combined_attendance_percentage,
+)
+
+# to_representation is str(value), i.e. the identity for text columns; every
+# other field type goes through its own to_representation (annotated querysets
+# can hand back floats for integer-declared fields)
+_PASSTHROUGH_FIELDS = (
+    serializers.CharField,
+    serializers.EmailField,
+)
+
+
+class Computed:
+    """
+    Replacement for a SerializerMethodField.
+
+    ``requires`` lists the ``.values()`` columns and annotation aliases the
+    function reads; ``func`` receives the row dict and returns the field value.
+    """
+
+    def __init__(self, requires: Sequence[str], func: Callable[[Dict[str, Any]], Any]):
+        self.requires = tuple(requires)
+        self.func = func
+
+
+class Projection:
+    """
+    Compiled, dict-producing equivalent of a ModelSerializer for list views.
+
+    ``annotations`` maps alias -> zero-argument callable returning a query
+    expression; they are built per query so manager state (tenant) is current.
+    """
+
+    def __init__(self, serializer_class, computed: Optional[Dict[str, Computed]] = None,
+                 annotations: Optional[Dict[str, Callable[[], Any]]] = None):
+        self.serializer_class = serializer_class
+        self.model = serializer_class.Meta.model
+        self.computed = computed or {}
+        self.annotations = annotations or {}
+        self._plan = None
+        self._columns = None
+
+    def _compile(self):
+        plan = []
+        columns: List[str] = []
+
+        def need(column):
+            if column not in columns:
+                columns.append(column)
+
+        for name, field in self.serializer_class().fields.items():
+            if field.write_only:
+                continue
+            if name in self.computed:
+                entry = self.computed[name]
+                for column in entry.requires:
+                    need(column)
+                plan.append((name, None, entry.func))
+                continue
+            if isinstance(field, serializers.SerializerMethodField) or field.source == '*' or '.' in field.source:
+                raise ImproperlyConfigured(
+                    f"{self.serializer_class.__name__}.{name} needs a Computed entry in its projection"
+                )
+            need(field.source)
+            convert = None if type(field) in _PASSTHROUGH_FIELDS else field.to_representation
+            plan.append((name, field.source, convert))
+
+        self._plan = plan
+        self._columns = columns
+
+    @property
+    def plan(self):
+        if self._plan is None:
+            self._compile()
+        return self._plan
+
+    @property
+    def columns(self):
+        if self._columns is None:
+            self._compile()
+        return self._columns
+
+    def project(self, queryset):
+        """Turn a model queryset into the ``.values()`` queryset this projection renders."""
+        if self.annotations:
+            queryset = queryset.annotate(**{alias: build() for alias, build in self.annotations.items()})
+        return queryset.values(*self.columns)
+
+    def render(self, rows: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Build output dicts from rows produced by ``project``."""
+        plan = self.plan
+        results = []
+        append = results.append
+        for row in rows:
+            item = {}
+            for name, source, convert in plan:
+                if source is None:
+                    item[name] = convert(row)
+                    continue
+                value = row[source]
+                item[name] = value if value is None or convert is None else convert(value)
+            append(item)
+        return results
+
+    def serialize(self, queryset) -> List[Dict[str, Any]]:
+        """Equivalent of ``serializer_class(queryset, many=True).data``."""
+        return self.render(self.project(queryset))
+
+
+def _full_name(row):
+    # Same as EmployeeProfile.full_name
+    return f"{row['first_name']} {row['last_name']}"
+
+
+def _latest_salary_column(column):
+    def build():
+        latest = SalaryData.objects.filter(
+            tenant=OuterRef('tenant'),
+            employee_id=OuterRef('employee_id'),
+        ).order_by('-year', '-month').values(column)[:1]
+        return Subquery(latest)
+    return build
+
+
+def _daily_status_count(status):
+    def build():
+        counts = DailyAttendance.objects.filter(
+            tenant=OuterRef('tenant'),
+            employee_id=OuterRef('employee_id'),
+            attendance_status=status,
+        ).order_by().values('employee_id').annotate(total=Count('id')).values('total')[:1]
+        return Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+    return build
+
+
+EMPLOYEE_LIST_PROJECTION = Projection(
+    EmployeeProfileListSerializer,
+    computed={
+        'full_name': Computed(('first_name', 'last_name'), _full_name),
+    },
+)
+
+EMPLOYEE_TABLE_PROJECTION = Projection(
+    EmployeeTableSerializer,
+    computed={
+        'employee_name': Computed(('first_name', 'last_name'), _full_name),
+        'latest_salary': Computed(
+            ('latest_nett_payable',),
+            lambda row: float(row['latest_nett_payable']) if row['latest_nett_payable'] is not None else 0,
+        ),
+        'attendance_percentage': Computed(
+            ('latest_salary_days', 'latest_salary_absent', 'daily_present', 'daily_paid_leave',
+             'daily_half_day', 'daily_absent'),
+            lambda row: combined_attendance_percentage(
+                row['latest_salary_days'],
+                row['latest_salary_absent'],
+                present_count=row['daily_present'],
+                paid_leave_count=row['daily_paid_leave'],
+                half_day_count=row['daily_half_day'],
+                absent_count=row['daily_absent'],
+            ),
+        ),
+    },
+    annotations={
+        'latest_nett_payable': _latest_salary_column('nett_payable'),
+        'latest_salary_days': _latest_salary_column('days'),
+        'latest_salary_absent': _latest_salary_column('absent'),
+        'daily_present': _daily_status_count('PRESENT'),
+        'daily_paid_leave': _daily_status_count('PAID_LEAVE'),
+        'daily_half_day': _daily_status_count('HALF_DAY'),
+        'daily_absent': _daily_status_count('ABSENT'),
+    },
+)
+
+ATTENDANCE_PROJECTION = Projection(
+    AttendanceSerializer,
+    computed={
+        'attendance_percentage': Computed(
+            ('present_days', 'total_working_days', 'calendar_days'),
+            lambda row: monthly_attendance_percentage(
+                row['present_days'], row['total_working_days'], row['calendar_days']
+            ),
+        ),
+        'off_days': Computed(
+            ('calendar_days', 'total_working_days', 'holiday_days'),
+            lambda row: monthly_off_days(
+                row['calendar_days'], row['total_working_days'], row['holiday_days']
+            ),
+        ),
+    },
+)
+
+DAILY_ATTENDANCE_PROJECTION = Projection(DailyAttendanceSerializer)
+
+PROJECTIONS = {
+    EmployeeProfileListSerializer: EMPLOYEE_LIST_PROJECTION,
+    EmployeeTableSerializer: EMPLOYEE_TABLE_PROJECTION,
+    AttendanceSerializer: ATTENDANCE_PROJECTION,
+    DailyAttendanceSerializer: DAILY_ATTENDANCE_PROJECTION,
+}
+
+
+class ProjectedListMixin:
+    """
+    ViewSet mixin: serve ``list`` through the projection registered for the
+    list serializer class, keeping filtering and pagination unchanged.
+    """
+
+    def list(self, request, *args, **kwargs):
+        projection = PROJECTIONS.get(self.get_serializer_class())
+        queryset = self.filter_queryset(self.get_queryset())
+        if projection is None or getattr(queryset, 'model', None) is not projection.model:
+            return super().list(request, *args, **kwargs)
+
+        rows = projection.project(queryset)
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(projection.render(page))
+        return Response(projection.render(rows))
@@ -0,0 +1,127 @@
+"""
+Materialized advance balances (EmployeeAdvanceBalance).
+
+AdvanceLedger stays the source of truth; this module keeps the per-employee
+summary in step with it:
+
+- ``refresh_advance_balances`` recomputes the summary for some (or all)
+  employees of a tenant from the ledger in one aggregate query plus one
+  upsert. Callers run it inside the transaction that changed the ledger, so
+  the summary commits or rolls back with the change.
+- ``get_advance_balances`` reads a tenant's balances in one indexed query.
+- ``find_balance_mismatches`` compares the summary with a fresh aggregate
+  (used by the ``rebuild_advance_balances --check`` command).
+"""
+
+import logging
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional
+
+from django.db import transaction
+from django.db.models import Count, Max, Q, Sum
+
+logger = logging.getLogger(__name__)
+
+OPEN_ADVANCE_STATUSES = ('PENDING', 'PARTIALLY_PAID')
+
+
+def _tenant_id(tenant) -> int:
+    return tenant if isinstance(tenant, int) else tenant.id
+
+
+def _aggregate_ledger(tenant_id: int, employee_ids: Optional[List[str]] = None) -> Dict[str, Dict]:
+    """Balance summary per employee, computed from AdvanceLedger."""
+    from ..models import AdvanceLedger
+
+    open_filter = Q(status__in=OPEN_ADVANCE_STATUSES)
+    qs = AdvanceLedger.all_objects.filter(tenant_id=tenant_id)
+    if employee_ids is not None:
+        qs = qs.filter(employee_id__in=employee_ids)
+    rows = qs.values('employee_id').annotate(
+        outstanding_balance=Sum('remaining_balance', filter=open_filter),
+        open_advance_count=Count('id', filter=open_filter),
+        total_advanced=Sum('amount'),
+        last_advance_date=Max('advance_date'),
+    )
+    return {
+        row['employee_id']: {
+            'outstanding_balance': row['outstanding_balance'] or Decimal('0'),
+            'open_advance_count': row['open_advance_count'],
+            'total_advanced': row['total_advanced'] or Decimal('0'),
+            'last_advance_date': row['last_advance_date'],
+        }
+        for row in rows
+    }
+
+
+def refresh_advance_balances(tenant, employee_ids: Optional[Iterable[str]] = None) -> int:
+    """
+    Recompute EmployeeAdvanceBalance rows from the ledger.
+
+    ``employee_ids=None`` rebuilds the whole tenant. Employees left without
+    ledger rows lose their summary row. Returns the number of rows written.
+    """
+    from ..models import EmployeeAdvanceBalance
+
+    tenant_id = _tenant_id(tenant)
+    if employee_ids is not None:
+        employee_ids = sorted({e for e in employee_ids if e})
+        if not employee_ids:
+            return 0
+
+    with transaction.atomic():
+        summaries = _aggregate_ledger(tenant_id, employee_ids)
+
+        stale = EmployeeAdvanceBalance.all_objects.filter(tenant_id=tenant_id)
+        if employee_ids is not None:
+            stale = stale.filter(employee_id__in=employee_ids)
+        stale.exclude(employee_id__in=list(summaries)).delete()
+
+        if summaries:
+            EmployeeAdvanceBalance.all_objects.bulk_create(
+                [
+                    EmployeeAdvanceBalance(tenant_id=tenant_id, employee_id=employee_id, **values)
+                    for employee_id, values in summaries.items()
+                ],
+                batch_size=500,
+                update_conflicts=True,
+                unique_fields=['tenant', 'employee_id'],
+                update_fields=['outstanding_balance', 'open_advance_count', 'total_advanced',
+                               'last_advance_date', 'updated_at'],
+            )
+    return len(summaries)
+
+
+def get_advance_balances(tenant, employee_ids: Optional[Iterable[str]] = None) -> Dict[str, Decimal]:
+    """``{employee_id: outstanding_balance}`` for a tenant (employees without advances are absent)."""
+    from ..models import EmployeeAdvanceBalance
+
+    qs = EmployeeAdvanceBalance.all_objects.filter(tenant_id=_tenant_id(tenant))
+    if employee_ids is not None:
+        qs = qs.filter(employee_id__in=list(employee_ids))
+    return dict(qs.values_list('employee_id', 'outstanding_balance'))
+
+
+def get_advance_balance(tenant, employee_id: str) -> Decimal:
+    """Outstanding advance balance of one employee."""
+    return get_advance_balances(tenant, [employee_id]).get(employee_id, Decimal('0'))
+
+
+def find_balance_mismatches(tenant) -> List[Dict]:
+    """Employees whose materialized summary differs from the ledger."""
+    from ..models import EmployeeAdvanceBalance
+
+    tenant_id = _tenant_id(tenant)
+    expected = _aggregate_ledger(tenant_id)
+    actual = {
+        row['employee_id']: row
+        for row in EmployeeAdvanceBalance.all_objects.filter(tenant_id=tenant_id).values(
+            'employee_id', 'outstanding_balance', 'open_advance_count', 'total_advanced', 'last_advance_date'
+        )
+    }
+    mismatches = []
+    for employee_id in sorted(set(expected) | set(actual)):
+        want, have = expected.get(employee_id), actual.get(employee_id)
+        if want is None or have is None or any(want[k] != have[k] for k in want):
+            mismatches.append({'employee_id': employee_id, 'expected': want, 'stored': have})
+    return mismatches
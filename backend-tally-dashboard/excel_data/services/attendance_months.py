@@ -0,0 +1,161 @@
+"""
+Per-tenant catalog of months with attendance (AttendanceMonth).
+
+Rows created or deleted in DailyAttendance / Attendance mark their month stale:
+signals cover single-row writes, the bulk upload and aggregation paths call
+``mark_records_stale`` next to their payroll dirty marks. ``get_attendance_months``
+refreshes the stale months (one date-range scan each, see utils.date_ranges)
+and returns the catalog; a tenant without catalog rows is backfilled on first
+read, or with ``manage.py rebuild_attendance_months``.
+
+Marking never raises: a failure is logged and the month is picked up by the
+next rebuild.
+"""
+
+import logging
+from datetime import date
+from typing import Dict, Iterable, List, Tuple
+
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from ..utils.date_ranges import month_filter
+
+logger = logging.getLogger(__name__)
+
+
+def _tenant_id(tenant) -> int:
+    return tenant if isinstance(tenant, int) else tenant.id
+
+
+def mark_months_stale(tenant, months: Iterable[Tuple[int, int]]) -> int:
+    """Upsert stale catalog rows for ``(year, month)`` pairs. Returns the number of months marked."""
+    from ..models import AttendanceMonth
+
+    try:
+        tenant_id = _tenant_id(tenant)
+        keys = {(int(year), int(month)) for year, month in months if year and month}
+        if not keys:
+            return 0
+        # Savepoint: a failed upsert must not break the caller's transaction
+        with transaction.atomic():
+            AttendanceMonth.all_objects.bulk_create(
+                [AttendanceMonth(tenant_id=tenant_id, year=year, month=month, is_stale=True) for year, month in keys],
+                update_conflicts=True,
+                unique_fields=['tenant', 'year', 'month'],
+                update_fields=['is_stale', 'updated_at'],
+            )
+        return len(keys)
+    except Exception as e:
+        logger.warning(f"Failed to mark attendance months stale: {str(e)}")
+        return 0
+
+
+def mark_dates_stale(tenant, dates: Iterable[date]) -> int:
+    return mark_months_stale(tenant, ((d.year, d.month) for d in dates if d))
+
+
+def mark_records_stale(tenant, records) -> int:
+    """Mark the months of model instances that have a ``date``."""
+    return mark_dates_stale(tenant, (getattr(r, 'date', None) for r in records))
+
+
+def refresh_month(tenant, year: int, month: int) -> Dict:
+    """
+    Recount one month from both attendance tables and store it (or drop the
+    row when the month is empty). A mark made during the recount keeps the row
+    stale for the next read.
+    """
+    from ..models import Attendance, AttendanceMonth, DailyAttendance
+
+    tenant_id = _tenant_id(tenant)
+    as_of = timezone.now()
+    row = AttendanceMonth.all_objects.filter(tenant_id=tenant_id, year=year, month=month)
+    # Every mark rewrites updated_at: the row is only cleared if it still holds
+    # the value read before the recount (not "older than now", which misses a
+    # mark stamped before the recount but committed after it)
+    marked_at = row.values_list('updated_at', flat=True).first()
+    in_month = month_filter(year, month)
+    daily = DailyAttendance.all_objects.filter(tenant_id=tenant_id, **in_month)
+    monthly = Attendance.all_objects.filter(tenant_id=tenant_id, **in_month)
+
+    daily_counts = daily.aggregate(records=Count('id'), employees=Count('employee_id', distinct=True))
+    monthly_counts = monthly.aggregate(records=Count('id'), employees=Count('employee_id', distinct=True))
+    if daily_counts['records'] and monthly_counts['records']:
+        employees = daily.values('employee_id').union(monthly.values('employee_id')).count()
+    else:
+        employees = daily_counts['employees'] or monthly_counts['employees']
+
+    values = {
+        'year': int(year),
+        'month': int(month),
+        'daily_records': daily_counts['records'],
+        'monthly_records': monthly_counts['records'],
+        'employees_with_attendance': employees,
+    }
+    current = row.filter(updated_at=marked_at) if marked_at is not None else row.none()
+    if values['daily_records'] or values['monthly_records']:
+        current.update(
+            daily_records=values['daily_records'],
+            monthly_records=values['monthly_records'],
+            employees_with_attendance=employees,
+            is_stale=False,
+            refreshed_at=as_of,
+        )
+    else:
+        current.delete()
+    return values
+
+
+def rebuild_catalog(tenant) -> int:
+    """Recreate a tenant's catalog from a grouped scan of both tables. Returns the number of months."""
+    from ..models import Attendance, AttendanceMonth, DailyAttendance
+
+    tenant_id = _tenant_id(tenant)
+    months = set()
+    for model in (DailyAttendance, Attendance):
+        periods = (
+            model.all_objects.filter(tenant_id=tenant_id)
+            .annotate(period=TruncMonth('date'))
+            .values_list('period', flat=True)
+            .distinct()
+        )
+        months.update((period.year, period.month) for period in periods if period)
+
+    existing = AttendanceMonth.all_objects.filter(tenant_id=tenant_id).values_list('pk', 'year', 'month')
+    obsolete = [pk for pk, year, month in existing if (year, month) not in months]
+    if obsolete:
+        AttendanceMonth.all_objects.filter(pk__in=obsolete).delete()
+    mark_months_stale(tenant_id, months)
+    for year, month in sorted(months):
+        refresh_month(tenant_id, year, month)
+    logger.info(f"📅 Rebuilt attendance month catalog for tenant {tenant_id}: {len(months)} months")
+    return len(months)
+
+
+def get_attendance_months(tenant) -> List[Dict]:
+    """
+    Months with attendance for the tenant, newest first:
+    ``{'year', 'month', 'daily_records', 'monthly_records', 'employees_with_attendance'}``.
+    """
+    from ..models import AttendanceMonth
+
+    tenant_id = _tenant_id(tenant)
+    fields = ('year', 'month', 'daily_records', 'monthly_records', 'employees_with_attendance', 'is_stale')
+    rows = list(AttendanceMonth.all_objects.filter(tenant_id=tenant_id).values(*fields))
+    if not rows:
+        if not rebuild_catalog(tenant_id):
+            return []
+        rows = list(AttendanceMonth.all_objects.filter(tenant_id=tenant_id).values(*fields))
+
+    months = []
+    for row in rows:
+        if row.pop('is_stale'):
+            row = refresh_month(tenant_id, row['year'], row['month'])
+            if not (row['daily_records'] or row['monthly_records']):
+                continue
+        months.append(row)
+    months.sort(key=lambda row: (row['year'], row['month']), reverse=True)
+    return months
@@ -0,0 +1,256 @@
+"""
+Optional monthly range partitioning of excel_data_dailyattendance (PostgreSQL).
+
+The table keeps its name, columns and Django model; only its storage changes:
+
+- the parent is ``PARTITION BY RANGE (date)`` with one partition per month
+  (``excel_data_dailyattendance_p2025_06``) plus a DEFAULT partition that
+  catches dates without a partition yet;
+- the primary key becomes ``(id, date)`` (PostgreSQL requires the partition key
+  in unique constraints); ``id`` stays unique through its sequence, and the
+  ``(tenant, employee_id, date)`` unique constraint is unchanged;
+- indexes are recreated on the parent under their original names, so they exist
+  on every partition and later migrations keep working.
+
+Queries only benefit when they filter ``date`` with plain ranges (see
+utils.date_ranges); ``EXTRACT(...)`` filters scan every partition.
+
+``convert_to_partitioned`` rewrites the table in one transaction (it holds an
+exclusive lock for the copy: run it in a maintenance window).
+``ensure_partitions`` creates upcoming months and moves any matching rows out
+of the DEFAULT partition; run it monthly (``partition_daily_attendance``).
+"""
+
+import logging
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+from django.db import connection, transaction
+
+from ..utils.date_ranges import month_bounds
+
+logger = logging.getLogger(__name__)
+
+TABLE = 'excel_data_dailyattendance'
+DEFAULT_PARTITION = f'{TABLE}_default'
+PARTITION_KEY = 'date'
+
+
+def partition_name(year: int, month: int) -> str:
+    return f'{TABLE}_p{year:04d}_{month:02d}'
+
+
+def _add_months(year: int, month: int, count: int) -> Tuple[int, int]:
+    index = year * 12 + (month - 1) + count
+    return index // 12, index % 12 + 1
+
+
+def _month_span(first: Tuple[int, int], last: Tuple[int, int]) -> List[Tuple[int, int]]:
+    months = []
+    current = first
+    while current <= last:
+        months.append(current)
+        current = _add_months(*current, 1)
+    return months
+
+
+def is_partitioned(cursor=None) -> bool:
+    if connection.vendor != 'postgresql':
+        return False
+    with (cursor or connection.cursor()) as cur:
+        cur.execute("SELECT 1 FROM pg_partitioned_table WHERE partrelid = %s::regclass", [TABLE])
+        return cur.fetchone() is not None
+
+
+def list_partitions() -> List[Dict]:
+    """Partitions of the table with their bounds and approximate row counts."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT c.relname, pg_get_expr(c.relpartbound, c.oid), c.reltuples::bigint
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = %s::regclass
+            ORDER BY c.relname
+            """,
+            [TABLE],
+        )
+        return [{'name': name, 'bounds': bounds, 'approx_rows': max(rows, 0)} for name, bounds, rows in cursor.fetchall()]
+
+
+def _create_month_partition(cursor, year: int, month: int) -> bool:
+    """Create one month's partition; rows already in DEFAULT for that month are moved. False if it existed."""
+    name = partition_name(year, month)
+    cursor.execute("SELECT to_regclass(%s)", [name])
+    if cursor.fetchone()[0] is not None:
+        return False
+
+    first, next_first = month_bounds(year, month)
+    cursor.execute("SELECT to_regclass(%s)", [DEFAULT_PARTITION])
+    has_default = cursor.fetchone()[0] is not None
+    stranded = False
+    if has_default:
+        cursor.execute(
+            f'SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE {PARTITION_KEY} >= %s AND {PARTITION_KEY} < %s)',
+            [first, next_first],
+        )
+        stranded = cursor.fetchone()[0]
+
+    if stranded:
+        # PostgreSQL refuses a new partition while DEFAULT holds rows of its range
+        cursor.execute(f'ALTER TABLE {TABLE} DETACH PARTITION {DEFAULT_PARTITION}')
+    cursor.execute(
+        f'CREATE TABLE {name} PARTITION OF {TABLE} FOR VALUES FROM (%s) TO (%s)',
+        [first, next_first],
+    )
+    if stranded:
+        cursor.execute(
+            f'WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE {PARTITION_KEY} >= %s AND {PARTITION_KEY} < %s '
+            f'RETURNING *) INSERT INTO {name} SELECT * FROM moved',
+            [first, next_first],
+        )
+        logger.info(f"📦 Moved {cursor.rowcount} attendance rows from the default partition into {name}")
+        cursor.execute(f'ALTER TABLE {TABLE} ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT')
+    return True
+
+
+def ensure_partitions(ahead_months: int = 3, start: Optional[date] = None) -> List[str]:
+    """
+    Create monthly partitions from ``start`` (default: the current month)
+    through ``ahead_months`` months after the current month (at least the
+    start month). Returns the partitions created.
+    """
+    if not is_partitioned():
+        raise RuntimeError(f'{TABLE} is not partitioned; run partition_daily_attendance --convert first')
+    today = date.today()
+    first = (start.year, start.month) if start else (today.year, today.month)
+    last = max(_add_months(today.year, today.month, ahead_months), first)
+    created = []
+    with transaction.atomic(), connection.cursor() as cursor:
+        for year, month in _month_span(first, last):
+            if _create_month_partition(cursor, year, month):
+                created.append(partition_name(year, month))
+    return created
+
+
+def _table_definition(cursor) -> Dict:
+    """Constraints, indexes and id sequence of the (unpartitioned) table, by original name."""
+    cursor.execute(
+        """
+        SELECT conname, contype, pg_get_constraintdef(oid),
+               ARRAY(SELECT attname FROM pg_attribute
+                     WHERE attrelid = conrelid AND attnum = ANY(conkey))
+        FROM pg_constraint
+        WHERE conrelid = %s::regclass AND contype IN ('p', 'u', 'f', 'c')
+        ORDER BY contype, conname
+        """,
+        [TABLE],
+    )
+    constraints = cursor.fetchall()
+    cursor.execute(
+        """
+        SELECT i.indexname, i.indexdef, ix.indisunique
+        FROM pg_indexes i
+        JOIN pg_class ic ON ic.relname = i.indexname
+        JOIN pg_index ix ON ix.indexrelid = ic.oid
+        WHERE i.tablename = %s
+          AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = ic.oid)
+        ORDER BY i.indexname
+        """,
+        [TABLE],
+    )
+    indexes = cursor.fetchall()
+    cursor.execute(
+        "SELECT attidentity FROM pg_attribute WHERE attrelid = %s::regclass AND attname = 'id'",
+        [TABLE],
+    )
+    identity = (cursor.fetchone() or [''])[0] or ''
+    cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", [TABLE])
+    sequence = cursor.fetchone()[0]
+    cursor.execute(f'SELECT MIN({PARTITION_KEY}), MAX({PARTITION_KEY}), MAX(id) FROM {TABLE}')
+    min_date, max_date, max_id = cursor.fetchone()
+    return {
+        'constraints': constraints,
+        'indexes': indexes,
+        'identity': identity,
+        'sequence': sequence,
+        'min_date': min_date,
+        'max_date': max_date,
+        'max_id': max_id,
+    }
+
+
+def convert_to_partitioned(ahead_months: int = 3, stdout=None) -> Dict:
+    """
+    Rewrite excel_data_dailyattendance as a monthly-partitioned table (one transaction).
+
+    Returns a summary; raises if the table is already partitioned.
+    """
+    if connection.vendor != 'postgresql':
+        raise RuntimeError('Partitioning requires PostgreSQL')
+    if is_partitioned():
+        raise RuntimeError(f'{TABLE} is already partitioned')
+
+    def progress(message):
+        logger.info(f"📦 {message}")
+        if stdout is not None:
+            stdout.write(message)
+
+    legacy = f'{TABLE}_unpartitioned'
+    warnings = []
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'LOCK TABLE {TABLE} IN ACCESS EXCLUSIVE MODE')
+        definition = _table_definition(cursor)
+
+        cursor.execute(f'ALTER TABLE {TABLE} RENAME TO {legacy}')
+        cursor.execute(
+            f'CREATE TABLE {TABLE} (LIKE {legacy} INCLUDING DEFAULTS INCLUDING IDENTITY INCLUDING STORAGE) '
+            f'PARTITION BY RANGE ({PARTITION_KEY})'
+        )
+
+        today = date.today()
+        first = (definition['min_date'].year, definition['min_date'].month) if definition['min_date'] else (today.year, today.month)
+        last = _add_months(today.year, today.month, ahead_months)
+        if definition['max_date'] and (definition['max_date'].year, definition['max_date'].month) > last:
+            last = (definition['max_date'].year, definition['max_date'].month)
+        months = _month_span(first, last)
+        for year, month in months:
+            _create_month_partition(cursor, year, month)
+        cursor.execute(f'CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {TABLE} DEFAULT')
+        progress(f'Created {len(months)} monthly partitions ({months[0][0]}-{months[0][1]:02d} .. {last[0]}-{last[1]:02d}) and a default partition')
+
+        overriding = 'OVERRIDING SYSTEM VALUE' if definition['identity'] else ''
+        cursor.execute(f'INSERT INTO {TABLE} {overriding} SELECT * FROM {legacy}')
+        copied = cursor.rowcount
+        progress(f'Copied {copied} rows')
+
+        if definition['identity']:
+            if definition['max_id']:
+                cursor.execute("SELECT setval(pg_get_serial_sequence(%s, 'id'), %s)", [TABLE, definition['max_id']])
+        elif definition['sequence']:
+            # serial: keep the existing sequence, now owned by the new column
+            cursor.execute(f'ALTER SEQUENCE {definition["sequence"]} OWNED BY {TABLE}.id')
+
+        cursor.execute(f'DROP TABLE {legacy}')
+
+        for name, contype, condef, columns in definition['constraints']:
+            if contype == 'p':
+                key = ', '.join(dict.fromkeys(list(columns) + [PARTITION_KEY]))
+                cursor.execute(f'ALTER TABLE {TABLE} ADD CONSTRAINT {name} PRIMARY KEY ({key})')
+            elif contype == 'u' and PARTITION_KEY not in columns:
+                warnings.append(f'unique constraint {name} {condef} lacks {PARTITION_KEY}; recreated as a plain index')
+                cursor.execute(f'CREATE INDEX {name} ON {TABLE} ({", ".join(columns)})')
+            else:
+                cursor.execute(f'ALTER TABLE {TABLE} ADD CONSTRAINT {name} {condef}')
+        for name, indexdef, unique in definition['indexes']:
+            if unique and f'{PARTITION_KEY}' not in indexdef.split('USING', 1)[1]:
+                warnings.append(f'unique index {name} lacks {PARTITION_KEY}; recreated as a plain index')
+                indexdef = indexdef.replace('CREATE UNIQUE INDEX', 'CREATE INDEX', 1)
+            cursor.execute(indexdef)
+        progress(f'Recreated {len(definition["constraints"])} constraints and {len(definition["indexes"])} indexes')
+
+        cursor.execute(f'ANALYZE {TABLE}')
+
+    for warning in warnings:
+        logger.warning(f"⚠️ {warning}")
+    return {'rows': copied, 'partitions': len(months) + 1, 'warnings': warnings}
@@ -0,0 +1,383 @@
+"""
+In-process benchmark scenarios for the hot paths.
+
+Each scenario calls a view (through DRF's request factory, authenticated as
+the tenant admin) or a service method directly against the local database, so
+runs do not depend on a server, credentials or network. ``run_scenarios``
+times every scenario ``repeat`` times after ``warmup`` runs and records wall
+time plus SQL statement count/time (the same execute_wrapper the metrics
+middleware uses).
+
+Results are plain dicts (see ``run_benchmarks`` command) so runs on different
+commits can be compared with ``compare_results``.
+"""
+
+import calendar
+import json
+import logging
+import platform
+import statistics
+import subprocess
+import time
+from contextlib import ExitStack
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Callable, Dict, List, Optional
+
+import django
+from django.db import connection, connections
+
+logger = logging.getLogger(__name__)
+
+
+class BenchmarkError(Exception):
+    """A scenario returned an error response or could not run."""
+
+
+@dataclass
+class BenchmarkContext:
+    """Tenant, admin user and the month the scenarios target."""
+    tenant: object
+    user: object
+    year: int
+    month: int
+    day: date
+    dataset: Dict = field(default_factory=dict)
+
+    @property
+    def month_name(self) -> str:
+        return calendar.month_name[self.month].upper()
+
+
+@dataclass
+class Scenario:
+    name: str
+    description: str
+    func: Callable
+    writes: bool = False
+
+
+SCENARIOS: Dict[str, Scenario] = {}
+
+
+def scenario(name: str, description: str, writes: bool = False):
+    def register(func):
+        SCENARIOS[name] = Scenario(name, description, func, writes)
+        return func
+    return register
+
+
+def build_context(tenant, user=None) -> BenchmarkContext:
+    """Context for ``tenant``: its admin user and the latest month with attendance."""
+    from django.db.models import Max
+    from ..models import CustomUser, DailyAttendance, EmployeeProfile, FaceEmbedding, AdvanceLedger, Holiday
+
+    if user is None:
+        user = CustomUser.objects.filter(tenant=tenant, role='admin', is_active=True).order_by('id').first()
+    if user is None:
+        raise BenchmarkError(f"Tenant {tenant.id} has no active admin user to run requests as")
+
+    last_day = DailyAttendance.objects.filter(tenant=tenant).aggregate(last=Max('date'))['last']
+    if last_day is None:
+        raise BenchmarkError(f"Tenant {tenant.id} has no attendance data")
+
+    dataset = {
+        'tenant_id': tenant.id,
+        'employees': EmployeeProfile.all_objects.filter(tenant=tenant).count(),
+        'daily_attendance': DailyAttendance.objects.filter(tenant=tenant).count(),
+        'holidays': Holiday.objects.filter(tenant=tenant).count(),
+        'advances': AdvanceLedger.objects.filter(tenant=tenant).count(),
+        'face_embeddings': FaceEmbedding.objects.filter(tenant=tenant).count(),
+    }
+    return BenchmarkContext(tenant, user, last_day.year, last_day.month, last_day, dataset)
+
+
+# ---------------------------------------------------------------------------
+# Request helpers
+# ---------------------------------------------------------------------------
+
+def _call_view(ctx: BenchmarkContext, view, method: str, path: str, data=None):
+    from rest_framework.test import APIRequestFactory, force_authenticate
+
+    factory = APIRequestFactory()
+    if method == 'get':
+        request = factory.get(path, data or {})
+    else:
+        request = getattr(factory, method)(path, data or {}, format='json')
+    force_authenticate(request, user=ctx.user)
+    request.tenant = ctx.tenant
+
+    response = view(request)
+    if response.status_code >= 400:
+        body = getattr(response, 'data', None)
+        raise BenchmarkError(f"{method.upper()} {path} returned {response.status_code}: {str(body)[:300]}")
+    # Encoding is part of the cost the client sees
+    if hasattr(response, 'render'):
+        response.render()
+    if response.streaming:
+        size = sum(len(chunk) for chunk in response.streaming_content)
+    else:
+        size = len(response.content)
+    return size
+
+
+def _viewset_action(viewset, method: str, action: str):
+    return viewset.as_view({method: action})
+
+
+# ---------------------------------------------------------------------------
+# Scenarios
+# ---------------------------------------------------------------------------
+
+@scenario('payroll_full', 'calculate_salary_for_period, full recalculation of the latest month', writes=True)
+def _payroll_full(ctx):
+    from .salary_service import SalaryCalculationService
+    SalaryCalculationService.calculate_salary_for_period(
+        ctx.tenant, ctx.year, ctx.month_name, force_recalculate=True
+    )
+    return 0
+
+
+@scenario('payroll_incremental', 'calculate_salary_for_period, incremental run with nothing dirty', writes=True)
+def _payroll_incremental(ctx):
+    from .salary_service import SalaryCalculationService
+    SalaryCalculationService.calculate_salary_for_period(
+        ctx.tenant, ctx.year, ctx.month_name, force_recalculate=True, incremental=True
+    )
+    return 0
+
+
+@scenario('directory_cold', 'employees/directory_data, full directory, cache bypassed')
+def _directory_cold(ctx):
+    from ..views.core import EmployeeProfileViewSet
+    view = _viewset_action(EmployeeProfileViewSet, 'get', 'directory_data')
+    return _call_view(ctx, view, 'get', '/api/employees/directory_data/', {'no_cache': 'true'})
+
+
+@scenario('directory_keyset', 'employees/directory_data, keyset first page of 100')
+def _directory_keyset(ctx):
+    from ..views.core import EmployeeProfileViewSet
+    view = _viewset_action(EmployeeProfileViewSet, 'get', 'directory_data')
+    return _call_view(ctx, view, 'get', '/api/employees/directory_data/',
+                      {'cursor': '', 'limit': 100, 'no_cache': 'true'})
+
+
+@scenario('charts_12_months', 'salary-data/frontend_charts, last 12 months, cache bypassed')
+def _charts(ctx):
+    from ..views.core import SalaryDataViewSet
+    view = _viewset_action(SalaryDataViewSet, 'get', 'frontend_charts')
+    return _call_view(ctx, view, 'get', '/api/salary-data/frontend_charts/',
+                      {'time_period': 'last_12_months', 'no_cache': 'true'})
+
+
+@scenario('all_records_month', 'daily-attendance/all_records, latest month, cache bypassed')
+def _all_records_month(ctx):
+    from ..views.core import DailyAttendanceViewSet
+    view = _viewset_action(DailyAttendanceViewSet, 'get', 'all_records')
+    return _call_view(ctx, view, 'get', '/api/daily-attendance/all_records/', {
+        'time_period': 'custom_month', 'month': ctx.month, 'year': ctx.year, 'no_cache': 'true',
+    })
+
+
+@scenario('all_records_12_months', 'daily-attendance/all_records, last 12 months, cache bypassed')
+def _all_records_year(ctx):
+    from ..views.core import DailyAttendanceViewSet
+    view = _viewset_action(DailyAttendanceViewSet, 'get', 'all_records')
+    return _call_view(ctx, view, 'get', '/api/daily-attendance/all_records/',
+                      {'time_period': 'last_12_months', 'no_cache': 'true'})
+
+
+@scenario('bulk_attendance', 'bulk-update-attendance for every active employee on the latest day', writes=True)
+def _bulk_attendance(ctx):
+    from ..models import EmployeeProfile
+    from ..views.utils import bulk_update_attendance
+
+    employees = EmployeeProfile.objects.filter(tenant=ctx.tenant, is_active=True).values_list(
+        'employee_id', 'department'
+    )
+    records = [
+        {'employee_id': employee_id, 'department': department, 'status': 'present', 'ot_hours': 0, 'late_minutes': 0}
+        for employee_id, department in employees
+    ]
+    return _call_view(ctx, bulk_update_attendance, 'post', '/api/bulk-update-attendance/', {
+        'date': ctx.day.isoformat(),
+        'attendance_records': records,
+    })
+
+
+@scenario('face_verify', 'face-embeddings/verify with an unknown face (full scan of the tenant embeddings)', writes=True)
+def _face_verify(ctx):
+    import random
+    from ..views.face_embeddings import FaceEmbeddingVerifyView
+    from .synthetic_tenant import _random_embedding
+
+    if not ctx.dataset.get('face_embeddings'):
+        raise BenchmarkError("Tenant has no face embeddings")
+    probe = _random_embedding(random.Random(0))
+    return _call_view(ctx, FaceEmbeddingVerifyView.as_view(), 'post', '/api/face-embeddings/verify/',
+                      {'mode': 'clock_in', 'embedding': probe})
+
+
+@scenario('face_verify_batch', 'face-embeddings/verify-batch with 500 offline scans, half of them registered faces', writes=True)
+def _face_verify_batch(ctx):
+    import random
+    from datetime import timedelta
+    from django.utils import timezone
+    from ..utils.face_embedding_cache import get_cached_embeddings
+    from ..views.face_embeddings import FaceEmbeddingBatchVerifyView
+    from .synthetic_tenant import _random_embedding
+
+    known = get_cached_embeddings(ctx.tenant)
+    if not known:
+        raise BenchmarkError("Tenant has no face embeddings")
+    rng = random.Random(0)
+    # Latest weekday morning (a working day for the synthetic staff) whose scans are all
+    # in the past, well within FACE_VERIFY_BATCH_MAX_AGE_HOURS
+    now = timezone.now()
+    start = now.replace(hour=9, minute=0, second=0, microsecond=0)
+    while start.weekday() >= 5 or start + timedelta(seconds=10 * 500) > now:
+        start -= timedelta(days=1)
+    probes = [
+        {
+            'embedding': known[i % len(known)][1] if i % 2 == 0 else _random_embedding(rng),
+            'mode': 'clock_in',
+            'timestamp': (start + timedelta(seconds=10 * i)).isoformat(),
+        }
+        for i in range(500)
+    ]
+    return _call_view(ctx, FaceEmbeddingBatchVerifyView.as_view(), 'post', '/api/face-embeddings/verify-batch/',
+                      {'probes': probes})
+
+
+@scenario('face_gallery_full', 'face-embeddings/gallery full pack for on-device matching, cache bypassed')
+def _face_gallery_full(ctx):
+    from ..utils.face_embedding_cache import clear_tenant_cache
+    from ..views.face_embeddings import FaceGallerySyncView
+
+    if not ctx.dataset.get('face_embeddings'):
+        raise BenchmarkError("Tenant has no face embeddings")
+    clear_tenant_cache(ctx.tenant.id)
+    return _call_view(ctx, FaceGallerySyncView.as_view(), 'get', '/api/face-embeddings/gallery/')
+
+
+# ---------------------------------------------------------------------------
+# Runner
+# ---------------------------------------------------------------------------
+
+def _timed(func, ctx):
+    from ..utils.metrics import RequestStats
+
+    stats = RequestStats()
+    with ExitStack() as stack:
+        for conn in connections.all():
+            stack.enter_context(conn.execute_wrapper(stats))
+        start = time.perf_counter()
+        output = func(ctx)
+        elapsed = time.perf_counter() - start
+    return elapsed, stats, output
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+def run_scenario(ctx: BenchmarkContext, name: str, repeat: int = 5, warmup: int = 1) -> Dict:
+    """Time one scenario; returns timings in milliseconds and per-run SQL counts."""
+    from ..utils.utils import set_current_tenant, clear_current_tenant
+
+    entry = SCENARIOS[name]
+    set_current_tenant(ctx.tenant)
+    try:
+        for _ in range(warmup):
+            _timed(entry.func, ctx)
+        runs = [_timed(entry.func, ctx) for _ in range(max(1, repeat))]
+    finally:
+        clear_current_tenant()
+
+    times_ms = [elapsed * 1000 for elapsed, _, _ in runs]
+    queries = [stats.db_queries for _, stats, _ in runs]
+    return {
+        'description': entry.description,
+        'writes': entry.writes,
+        'runs': len(runs),
+        'min_ms': round(min(times_ms), 2),
+        'median_ms': round(statistics.median(times_ms), 2),
+        'p95_ms': round(_percentile(times_ms, 95), 2),
+        'mean_ms': round(statistics.fmean(times_ms), 2),
+        'queries': int(statistics.median(queries)),
+        'queries_max': max(queries),
+        'db_ms': round(statistics.median(stats.db_time * 1000 for _, stats, _ in runs), 2),
+        'output_size': runs[-1][2],
+    }
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, timeout=5, check=True
+        ).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def run_scenarios(ctx: BenchmarkContext, names: Optional[List[str]] = None, repeat: int = 5,
+                  warmup: int = 1, include_writes: bool = True, on_result=None) -> Dict:
+    """Run the selected scenarios (all by default); failures are recorded, not raised."""
+    selected = names or list(SCENARIOS)
+    unknown = [name for name in selected if name not in SCENARIOS]
+    if unknown:
+        raise BenchmarkError(f"Unknown scenarios: {', '.join(unknown)}")
+
+    results = {}
+    for name in selected:
+        if SCENARIOS[name].writes and not include_writes:
+            continue
+        try:
+            results[name] = run_scenario(ctx, name, repeat=repeat, warmup=warmup)
+        except Exception as exc:
+            logger.error(f"❌ Benchmark {name} failed: {exc}")
+            results[name] = {'description': SCENARIOS[name].description, 'error': str(exc)}
+        if on_result:
+            on_result(name, results[name])
+
+    return {
+        'meta': {
+            'revision': _git_revision(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'database_version': getattr(connection, 'pg_version', None),
+            'repeat': repeat,
+            'warmup': warmup,
+            'target_month': f"{ctx.year}-{ctx.month:02d}",
+        },
+        'dataset': ctx.dataset,
+        'scenarios': results,
+    }
+
+
+def compare_results(baseline: Dict, current: Dict) -> List[Dict]:
+    """Per-scenario median/query deltas between two ``run_scenarios`` results."""
+    rows = []
+    for name, result in current.get('scenarios', {}).items():
+        before = baseline.get('scenarios', {}).get(name)
+        if not before or 'error' in before or 'error' in result:
+            continue
+        change = (result['median_ms'] - before['median_ms']) / before['median_ms'] * 100 if before['median_ms'] else 0.0
+        rows.append({
+            'scenario': name,
+            'baseline_ms': before['median_ms'],
+            'current_ms': result['median_ms'],
+            'change_pct': round(change, 1),
+            'baseline_queries': before['queries'],
+            'current_queries': result['queries'],
+        })
+    return rows
+
+
+def load_results(path: str) -> Dict:
+    with open(path) as handle:
+        return json.load(handle)
@@ -101,9 +101,11 @@ def invalidate_payroll_caches_comprehensive(tenant, reason="payment_status_chang
             'reason': reason
         }
 
-def invalidate_payroll_payment_caches(tenant, period_id=None, reason="payment_marked"):
+def invalidate_payroll_payment_caches(tenant, period_id=None, reason="payment_marked", period_ids=None):
     """
     Specific cache invalidation for payroll payment operations
+    
+    period_ids: several periods at once; their keys are deleted in one delete_many call
     """
     try:
         cleared_keys = []
@@ -112,17 +114,22 @@ def invalidate_payroll_payment_caches(tenant, period_id=None, reason="payment_ma
         if invalidate_payroll_overview_cache(tenant, reason):
             cleared_keys.append(f"payroll_overview_{tenant.id}")
         
-        # Clear period-specific caches if period_id provided
+        # Clear period-specific caches if period_id(s) provided
+        all_period_ids = set(period_ids or [])
         if period_id:
+            all_period_ids.add(period_id)
+        if all_period_ids:
             period_cache_keys = [
-                f"payroll_period_detail_{period_id}",
-                f"payroll_summary_{period_id}",
-                f"calculated_salaries_{period_id}",
+                key
+                for pid in sorted(all_period_ids)
+                for key in (
+                    f"payroll_period_detail_{pid}",
+                    f"payroll_summary_{pid}",
+                    f"calculated_salaries_{pid}",
+                )
             ]
-            
-            for cache_key in period_cache_keys:
-                if cache.delete(cache_key):
-                    cleared_keys.append(cache_key)
+            cache.delete_many(period_cache_keys)
+            cleared_keys.extend(period_cache_keys)
         
         # Clear frontend charts for immediate dashboard refresh
         try:
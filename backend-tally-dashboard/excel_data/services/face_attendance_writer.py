@@ -0,0 +1,415 @@
+"""
+Batched DailyAttendance writes for face clock events.
+
+With ``FACE_ATTENDANCE_FAST_ACK`` the verify endpoint answers the kiosk as soon
+as the match is decided and hands the clock event to
+``FaceAttendanceBatchWriter.enqueue``. One writer thread per process drains the
+queue every ``FACE_ATTENDANCE_BATCH_INTERVAL_MS`` and applies the events with
+``apply_clock_events``, one transaction per tenant:
+
+1. insert the (employee, date) rows that do not exist yet (ON CONFLICT DO NOTHING);
+2. lock every row of the batch (ordered, so concurrent writers cannot deadlock);
+3. apply the events in event-time order with ``apply_clock_event``, the rules
+   of ``mark_face_attendance``: the first check_in / check_out is never
+   overwritten, late minutes and OT are recomputed from the stored times;
+4. one bulk update (``update_rows``: ``UPDATE ... FROM (VALUES ...)`` on PostgreSQL).
+
+Bulk writes skip the DailyAttendance signals, so the batch marks payroll dirty
+and attendance months stale itself, clears the attendance caches once per
+tenant, starts the Sunday bonus check for new rows, and schedules one monthly
+summary refresh (``run_bulk_aggregation``) per tenant and month, run at most
+every SUMMARY_REFRESH_DELAY_SECONDS.
+
+A tenant whose batch fails keeps its events in memory and retries them with
+backoff (up to HELD_RETRY_MAX_SECONDS) before any newer event of that tenant,
+so an earlier scan cannot lose check_in to a later one. Events still queued or
+held when the process exits are flushed, or stored as PendingAttendanceUpdate
+rows for the retry worker, at exit; so are a tenant's held events beyond
+HELD_MAX_EVENTS. Only a hard crash loses the events of the last interval.
+"""
+
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+
+from ..utils.face_attendance import (
+    apply_clock_event,
+    attendance_defaults,
+    clear_face_attendance_caches,
+    is_off_day,
+    local_event_time,
+)
+
+logger = logging.getLogger(__name__)
+
+BATCH_INTERVAL_SECONDS = getattr(settings, 'FACE_ATTENDANCE_BATCH_INTERVAL_MS', 250) / 1000.0
+# Events drained per flush at most; the rest wait for the next interval
+MAX_BATCH_SIZE = 2000
+# Events waiting in one process at most; beyond that the view writes synchronously
+QUEUE_MAX_SIZE = 10000
+SUMMARY_REFRESH_DELAY_SECONDS = 30
+# A tenant's failed batch is retried after BATCH_INTERVAL_SECONDS, doubling per failure up to this
+HELD_RETRY_MAX_SECONDS = 30
+# Events held back per tenant at most; beyond that they go to the retry worker
+HELD_MAX_EVENTS = QUEUE_MAX_SIZE
+
+UPDATE_FIELDS = ['check_in', 'check_out', 'late_minutes', 'ot_hours', 'attendance_status', 'updated_at']
+
+
+@dataclass
+class ClockEvent:
+    """A recognized face clock event waiting to be written."""
+    tenant_id: int
+    employee_pk: int
+    mode: str
+    event_time: datetime
+    employee_identifier: str = ''
+    source: str = 'mobile'
+    # The EmployeeProfile when the caller already has it (saves a fetch)
+    employee: Optional[object] = field(default=None, repr=False, compare=False)
+
+
+@dataclass
+class BatchResult:
+    applied: int = 0
+    created: int = 0
+    skipped_off_day: int = 0
+    missing_employees: List[int] = field(default_factory=list)
+    months: Set[Tuple[int, int]] = field(default_factory=set)
+
+
+def update_rows(rows, batch_size: int = 1000):
+    """
+    Write UPDATE_FIELDS of DailyAttendance rows. On PostgreSQL this is one
+    ``UPDATE ... FROM (VALUES ...)`` per ``batch_size`` rows (the date is matched
+    too, so only the row's partition is touched); Django's ``bulk_update``
+    builds a CASE per field and row, which costs about a millisecond per row.
+    """
+    from ..models import DailyAttendance
+
+    if connection.vendor != 'postgresql':
+        DailyAttendance.all_objects.bulk_update(rows, UPDATE_FIELDS, batch_size=500)
+        return
+
+    meta = DailyAttendance._meta
+    fields = [meta.pk, meta.get_field('date')] + [meta.get_field(name) for name in UPDATE_FIELDS]
+    row_sql = '(' + ', '.join(f'%s::{field.rel_db_type(connection) if field.primary_key else field.db_type(connection)}' for field in fields) + ')'
+    columns = [connection.ops.quote_name(field.column) for field in fields]
+    assignments = ', '.join(f'{column} = v.{column}' for column in columns[2:])
+    table = connection.ops.quote_name(meta.db_table)
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), batch_size):
+            chunk = rows[start:start + batch_size]
+            params = []
+            for row in chunk:
+                params.extend(field.get_db_prep_save(getattr(row, field.attname), connection) for field in fields)
+            cursor.execute(
+                f'UPDATE {table} AS t SET {assignments} '
+                f'FROM (VALUES {", ".join([row_sql] * len(chunk))}) AS v({", ".join(columns)}) '
+                f'WHERE t.{columns[0]} = v.{columns[0]} AND t.{columns[1]} = v.{columns[1]}',
+                params,
+            )
+
+
+def apply_clock_events(tenant, events: Iterable[ClockEvent], employees: Optional[Dict[int, object]] = None) -> BatchResult:
+    """
+    Write one tenant's clock events with bulk upserts (see module docstring).
+
+    ``employees`` maps EmployeeProfile pk to the instance; events whose
+    employee is missing or inactive are reported in ``missing_employees``.
+    Raises on database errors (nothing is written then).
+    """
+    from ..models import DailyAttendance, EmployeeProfile
+
+    events = list(events)
+    result = BatchResult()
+    if employees is None:
+        employees = {e.employee_pk: e.employee for e in events if e.employee is not None}
+        wanted = {e.employee_pk for e in events} - set(employees)
+        if wanted:
+            employees.update(EmployeeProfile.all_objects.filter(tenant_id=tenant.id, is_active=True).in_bulk(wanted))
+
+    # (employee_id, date) -> [(local time, event, employee)]
+    by_key: Dict[Tuple[str, date], List] = defaultdict(list)
+    for event in events:
+        employee = employees.get(event.employee_pk)
+        if employee is None or not getattr(employee, 'is_active', True):
+            result.missing_employees.append(event.employee_pk)
+            continue
+        local_now = local_event_time(tenant, event.event_time)
+        if is_off_day(employee, local_now.date()):
+            result.skipped_off_day += 1
+            continue
+        employee_id = employee.employee_id or str(employee.id)
+        by_key[(employee_id, local_now.date())].append((local_now, event, employee))
+    if not by_key:
+        return result
+
+    employee_ids = {key[0] for key in by_key}
+    dates = {key[1] for key in by_key}
+    with transaction.atomic():
+        rows_qs = DailyAttendance.all_objects.filter(tenant_id=tenant.id, employee_id__in=employee_ids, date__in=dates)
+        existing = {key for key in rows_qs.values_list('employee_id', 'date') if key in by_key}
+        created_keys = set(by_key) - existing
+        if created_keys:
+            DailyAttendance.all_objects.bulk_create(
+                [
+                    DailyAttendance(tenant=tenant, employee_id=employee_id, date=day,
+                                    **attendance_defaults(by_key[(employee_id, day)][0][2]))
+                    for employee_id, day in created_keys
+                ],
+                ignore_conflicts=True,
+            )
+
+        rows = {
+            (row.employee_id, row.date): row
+            for row in rows_qs.select_for_update().order_by('employee_id', 'date')
+            if (row.employee_id, row.date) in by_key
+        }
+        now = timezone.now()
+        for key, scans in by_key.items():
+            row = rows[key]
+            # Event-time order per employee: the earliest scan sets check_in / check_out
+            for local_now, event, employee in sorted(scans, key=lambda scan: scan[0]):
+                apply_clock_event(row, employee, event.mode, local_now)
+                result.applied += 1
+            row.updated_at = now
+        update_rows(list(rows.values()))
+
+    # bulk_create/bulk_update skip signals: record the changed payroll months explicitly
+    from .payroll_dirty import mark_records_dirty
+    from .attendance_months import mark_records_stale
+    created_rows = [rows[key] for key in created_keys]
+    mark_records_dirty(tenant, list(rows.values()), 'face_attendance')
+    mark_records_stale(tenant, created_rows)
+    clear_face_attendance_caches(tenant.id)
+
+    if created_rows:
+        try:
+            from excel_data.tasks import mark_sunday_bonus_background
+            for row in created_rows:
+                mark_sunday_bonus_background(tenant.id, row.employee_id, row.date)
+        except Exception as e:
+            logger.error(f"❌ [Face] Failed to trigger Sunday bonus background tasks: {e}", exc_info=True)
+
+    result.created = len(created_keys)
+    result.months = {(day.year, day.month) for _, day in rows}
+    return result
+
+
+def store_pending(events: Iterable[ClockEvent], error: str) -> int:
+    """Hand events to the retry worker (PendingAttendanceUpdate). Returns rows stored."""
+    from ..models import PendingAttendanceUpdate
+
+    pending = [
+        PendingAttendanceUpdate(
+            tenant_id=event.tenant_id,
+            employee_id=event.employee_pk,
+            employee_identifier=event.employee_identifier or None,
+            mode=event.mode,
+            event_time=event.event_time,
+            source=event.source,
+            status='pending',
+            last_error=error[:1000],
+        )
+        for event in events
+    ]
+    try:
+        PendingAttendanceUpdate.objects.bulk_create(pending, batch_size=500)
+        return len(pending)
+    except Exception as exc:
+        logger.error(f"❌ [Face] Lost {len(pending)} clock events, could not store them for retry: {exc}")
+        return 0
+
+
+class FaceAttendanceBatchWriter:
+    """
+    Per-process queue of clock events and the thread that writes them in batches.
+    """
+
+    _queue: 'queue.Queue[ClockEvent]' = queue.Queue(maxsize=QUEUE_MAX_SIZE)
+    _thread: Optional[threading.Thread] = None
+    _pid: Optional[int] = None
+    _start_lock = threading.Lock()
+    _flush_lock = threading.Lock()
+    _atexit_registered = False
+    # tenant_id -> events of a failed batch, followed by the tenant's newer events
+    _held: Dict[int, List[ClockEvent]] = {}
+    # tenant_id -> (failures, monotonic time of the next attempt)
+    _held_retry: Dict[int, Tuple[int, float]] = {}
+    # (tenant_id, year, month) -> monotonic time the summary refresh is due
+    _summary_due: Dict[Tuple[int, int, int], float] = {}
+    _summary_lock = threading.Lock()
+
+    @classmethod
+    def enqueue(cls, event: ClockEvent) -> bool:
+        """Queue an event for the next batch. False when the queue is full (write it synchronously)."""
+        cls.ensure_running()
+        try:
+            cls._queue.put_nowait(event)
+            return True
+        except queue.Full:
+            logger.warning("⚠️ [Face] Attendance write queue full, writing synchronously")
+            return False
+
+    @classmethod
+    def ensure_running(cls):
+        with cls._start_lock:
+            # A thread started before a fork does not exist in the child
+            if cls._thread is not None and cls._thread.is_alive() and cls._pid == os.getpid():
+                return
+            if cls._pid != os.getpid():
+                # Events queued in the parent belong to the parent
+                cls._queue = queue.Queue(maxsize=QUEUE_MAX_SIZE)
+                cls._held = {}
+                cls._held_retry = {}
+            cls._pid = os.getpid()
+            cls._thread = threading.Thread(target=cls._run, name='face-attendance-writer', daemon=True)
+            cls._thread.start()
+            if not cls._atexit_registered:
+                atexit.register(cls.flush_all)
+                cls._atexit_registered = True
+            logger.info(f"🧵 Face attendance batch writer started in worker {cls._pid}")
+
+    @classmethod
+    def _run(cls):
+        while True:
+            time.sleep(BATCH_INTERVAL_SECONDS)
+            try:
+                while cls.flush() >= MAX_BATCH_SIZE:
+                    pass
+                cls.refresh_due_summaries()
+            except Exception as exc:
+                logger.error(f"❌ [Face] Attendance batch writer error: {exc}", exc_info=True)
+            finally:
+                close_old_connections()
+
+    @classmethod
+    def flush(cls, limit: int = MAX_BATCH_SIZE) -> int:
+        """Write up to ``limit`` queued events, grouped per tenant. Returns events drained."""
+        with cls._flush_lock:
+            events: List[ClockEvent] = []
+            while len(events) < limit:
+                try:
+                    events.append(cls._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if events or cls._held:
+                cls.write(events)
+            return len(events)
+
+    @classmethod
+    def write(cls, events: List[ClockEvent]):
+        from ..models import Tenant
+
+        # Held events first: a tenant's scans are applied in the order they arrived
+        by_tenant: Dict[int, List[ClockEvent]] = defaultdict(list)
+        for tenant_id, held in cls._held.items():
+            by_tenant[tenant_id].extend(held)
+        cls._held = {}
+        for event in events:
+            by_tenant[event.tenant_id].append(event)
+        try:
+            tenants = Tenant.objects.in_bulk(list(by_tenant))
+        except Exception as exc:
+            for tenant_id, tenant_events in by_tenant.items():
+                cls._hold(tenant_id, tenant_events, str(exc), failed=True)
+            return
+
+        now = time.monotonic()
+        for tenant_id, tenant_events in by_tenant.items():
+            tenant = tenants.get(tenant_id)
+            if tenant is None:
+                logger.warning(f"⚠️ [Face] Dropping {len(tenant_events)} clock events of missing tenant {tenant_id}")
+                cls._held_retry.pop(tenant_id, None)
+                continue
+            if cls._held_retry.get(tenant_id, (0, 0.0))[1] > now:
+                # Still backing off: newer events wait behind the failed ones
+                cls._hold(tenant_id, tenant_events, "Waiting behind a failed batch", failed=False)
+                continue
+            start = time.perf_counter()
+            try:
+                result = apply_clock_events(tenant, tenant_events)
+            except Exception as exc:
+                logger.error(f"❌ [Face] Batch of {len(tenant_events)} clock events failed for tenant {tenant_id}: {exc}")
+                cls._hold(tenant_id, tenant_events, str(exc), failed=True)
+                continue
+            cls._held_retry.pop(tenant_id, None)
+            if result.missing_employees:
+                logger.warning(f"⚠️ [Face] Tenant {tenant_id}: employees not found or inactive: {result.missing_employees}")
+            cls.schedule_summary_refresh(tenant_id, result.months)
+            logger.info(
+                f"✅ [Face] Tenant {tenant_id}: {result.applied} clock events, {result.created} new rows "
+                f"in {(time.perf_counter() - start) * 1000:.0f}ms"
+            )
+
+    @classmethod
+    def _hold(cls, tenant_id: int, events: List[ClockEvent], error: str, failed: bool):
+        """Keep a tenant's events for the next attempt (backing off further when ``failed``)."""
+        if len(events) > HELD_MAX_EVENTS:
+            logger.error(f"❌ [Face] {len(events)} clock events held for tenant {tenant_id}, storing them for retry")
+            store_pending(events, error)
+            cls._held_retry.pop(tenant_id, None)
+            return
+        cls._held[tenant_id] = events
+        if failed:
+            failures = cls._held_retry.get(tenant_id, (0, 0.0))[0] + 1
+            delay = min(HELD_RETRY_MAX_SECONDS, BATCH_INTERVAL_SECONDS * 2 ** failures)
+            cls._held_retry[tenant_id] = (failures, time.monotonic() + delay)
+
+    @classmethod
+    def schedule_summary_refresh(cls, tenant_id: int, months: Iterable[Tuple[int, int]]):
+        """Refresh the monthly Attendance summary of these months once, SUMMARY_REFRESH_DELAY_SECONDS from now."""
+        due = time.monotonic() + SUMMARY_REFRESH_DELAY_SECONDS
+        with cls._summary_lock:
+            for year, month in months:
+                cls._summary_due.setdefault((tenant_id, year, month), due)
+
+    @classmethod
+    def refresh_due_summaries(cls, force: bool = False) -> int:
+        from ..models import Tenant
+        from ..utils.utils import run_bulk_aggregation
+
+        now = time.monotonic()
+        with cls._summary_lock:
+            due = [key for key, at in cls._summary_due.items() if force or at <= now]
+            for key in due:
+                del cls._summary_due[key]
+        for tenant_id, year, month in due:
+            try:
+                tenant = Tenant.objects.get(id=tenant_id)
+                run_bulk_aggregation(tenant, date(year, month, 1))
+            except Exception as exc:
+                logger.error(f"❌ [Face] Summary refresh failed for tenant {tenant_id} {year}-{month:02d}: {exc}")
+        return len(due)
+
+    @classmethod
+    def flush_all(cls):
+        """Write everything still queued (process exit)."""
+        if cls._pid != os.getpid():
+            return
+        try:
+            while cls.flush():
+                pass
+            with cls._flush_lock:
+                # Last attempt for held tenants, then the retry worker takes over
+                cls._held_retry = {}
+                if cls._held:
+                    cls.write([])
+                for tenant_id, held in cls._held.items():
+                    store_pending(held, "Not written before process exit")
+                cls._held = {}
+            cls.refresh_due_summaries(force=True)
+        except Exception as exc:
+            logger.error(f"❌ [Face] Final attendance flush failed: {exc}")
@@ -0,0 +1,73 @@
+"""
+Duplicate face detection over a tenant's embedding matrix.
+
+Registration scores the new embedding against every other employee's
+embedding in one matrix-vector product (``find_duplicate``); what happens
+above FACE_DUPLICATE_SIMILARITY is FACE_DUPLICATE_ACTION (views.face_embeddings).
+``find_duplicate_pairs`` audits a whole tenant: the upper triangle of the
+embeddings x embeddings similarity matrix is computed ``block_size`` rows at a
+time, so memory stays at ``block_size * n`` scores
+(``manage.py audit_face_duplicates``).
+
+Scores are dot products of the L2-normalized embeddings, as in verification.
+"""
+
+from dataclasses import dataclass
+from typing import List, Optional
+
+import numpy as np
+
+from ..utils.face_embedding_cache import get_embedding_matrices
+
+
+@dataclass
+class DuplicateMatch:
+    employee_id: int
+    similarity: float
+
+
+@dataclass
+class DuplicatePair:
+    employee_id: int
+    other_employee_id: int
+    similarity: float
+
+
+def find_duplicate(tenant, embedding: List[float], threshold: float,
+                   exclude_employee_id: Optional[int] = None) -> Optional[DuplicateMatch]:
+    """The most similar other employee at or above ``threshold``, or None."""
+    vector = np.asarray(embedding, dtype=np.float32)
+    matrices = get_embedding_matrices(tenant)
+    if vector.ndim != 1 or vector.shape[0] not in matrices:
+        return None
+    employee_ids, matrix = matrices[vector.shape[0]]
+    scores = matrix @ vector
+    if exclude_employee_id is not None:
+        scores = np.where(employee_ids == exclude_employee_id, -np.inf, scores)
+    if not scores.size:
+        return None
+    best = int(scores.argmax())
+    if scores[best] < threshold:
+        return None
+    return DuplicateMatch(employee_id=int(employee_ids[best]), similarity=float(scores[best]))
+
+
+def find_duplicate_pairs(tenant, threshold: float, block_size: int = 1024) -> List[DuplicatePair]:
+    """Every pair of employees whose embeddings score at or above ``threshold``, most similar first."""
+    pairs: List[DuplicatePair] = []
+    for employee_ids, matrix in get_embedding_matrices(tenant).values():
+        count = matrix.shape[0]
+        for start in range(0, count, block_size):
+            block = matrix[start:start + block_size]
+            # Only columns after each row: every pair once, no self-pairs
+            scores = block @ matrix[start:].T
+            after = np.arange(scores.shape[1])[None, :] > np.arange(scores.shape[0])[:, None]
+            rows, cols = np.nonzero((scores >= threshold) & after)
+            for row, col in zip(rows, cols):
+                pairs.append(DuplicatePair(
+                    employee_id=int(employee_ids[start + row]),
+                    other_employee_id=int(employee_ids[start + col]),
+                    similarity=float(scores[row, col]),
+                ))
+    pairs.sort(key=lambda pair: pair.similarity, reverse=True)
+    return pairs
@@ -0,0 +1,159 @@
+"""
+Face embedding gallery packs for on-device matching.
+
+Every FaceEmbedding write takes the next ``tenant.embedding_cache_version`` as
+its ``change_version`` (``next_embedding_version``, inside the write's
+transaction: the tenant row lock makes versions commit in order), and every
+removal leaves a FaceEmbeddingTombstone with its own version. A device that
+synced version V asks for ``since=V`` and gets only the embeddings written and
+removed after V; without a usable ``since`` it gets the full gallery.
+
+Pack layout (little-endian), built by ``build_gallery_pack``:
+
+    header   '<4sBBHQQII'  magic b'FGAL', format 1, flags, dim,
+                           version, since, upserts, removals
+    int64[upserts]         EmployeeProfile pks of added/updated embeddings
+    int64[removals]        EmployeeProfile pks whose embedding was removed
+    float32|float16[upserts * dim]  embeddings, row-major
+    per upsert             uint8 length + UTF-8 employee_id, uint8 length + UTF-8 name
+
+Flags: 1 = full gallery (drop everything not in the pack), 2 = float16 vectors.
+Embeddings of another size than the gallery's are left out (logged).
+"""
+
+import logging
+import struct
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from django.db import transaction
+from django.db.models import F
+
+from ..utils.face_embedding_cache import clear_tenant_cache, get_cached_embeddings
+from ..utils.face_embedding_crypto import decrypt_embedding
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'FGAL'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<4sBBHQQII')
+FLAG_FULL = 1
+FLAG_FLOAT16 = 2
+
+
+@dataclass
+class GalleryPack:
+    data: bytes
+    version: int
+    full: bool
+    upserts: int
+    removals: int
+
+
+def next_embedding_version(tenant_id: int) -> int:
+    """
+    Bump and return the tenant's embedding version. Call inside the transaction
+    that writes or removes the embedding; also invalidates the verify cache.
+    """
+    from ..models import Tenant
+
+    Tenant.objects.filter(id=tenant_id).update(embedding_cache_version=F('embedding_cache_version') + 1)
+    version = Tenant.objects.filter(id=tenant_id).values_list('embedding_cache_version', flat=True).first() or 0
+    transaction.on_commit(lambda: clear_tenant_cache(tenant_id))
+    return version
+
+
+def record_embedding_removed(tenant_id: int, employee_pk: int) -> None:
+    """Leave a tombstone for a removed embedding. Never raises (logged; devices catch up on a full sync)."""
+    from ..models import FaceEmbeddingTombstone
+
+    try:
+        # Savepoint: a failed insert must not break the caller's transaction
+        with transaction.atomic():
+            FaceEmbeddingTombstone.objects.create(
+                tenant_id=tenant_id,
+                employee_pk=employee_pk,
+                change_version=next_embedding_version(tenant_id),
+            )
+    except Exception as e:
+        logger.warning(f"Failed to record removed face embedding of employee {employee_pk}: {str(e)}")
+
+
+def _employee_labels(tenant_id: int, employee_pks: List[int]) -> Dict[int, Tuple[str, str]]:
+    from ..models import EmployeeProfile
+
+    rows = EmployeeProfile.all_objects.filter(tenant_id=tenant_id, id__in=employee_pks).values_list(
+        'id', 'employee_id', 'first_name', 'last_name'
+    )
+    return {pk: (code or str(pk), f"{first or ''} {last or ''}".strip()) for pk, code, first, last in rows}
+
+
+def _short_utf8(value: str) -> bytes:
+    encoded = value.encode('utf-8')[:255]
+    # Do not cut a multi-byte character in half
+    return encoded.decode('utf-8', 'ignore').encode('utf-8')
+
+
+def build_gallery_pack(tenant, since: Optional[int] = None, float16: bool = False) -> GalleryPack:
+    """Full gallery, or the changes after ``since`` when the tenant's history covers it."""
+    from ..models import FaceEmbedding, FaceEmbeddingTombstone, Tenant
+
+    # Read the version first: anything committed later has a higher version and comes next time
+    version = Tenant.objects.filter(id=tenant.id).values_list('embedding_cache_version', flat=True).first() or 0
+    full = since is None or since < 0 or since > version
+
+    if full:
+        # The cache must be at least as new as the version the device will store
+        tenant.embedding_cache_version = version
+        embeddings = list(get_cached_embeddings(tenant))
+        removed: List[int] = []
+    else:
+        embeddings = []
+        rows = FaceEmbedding.objects.filter(tenant_id=tenant.id, change_version__gt=since).values_list(
+            'employee_id', 'embedding_encrypted'
+        )
+        for employee_pk, encrypted in rows:
+            try:
+                embeddings.append((employee_pk, decrypt_embedding(encrypted)))
+            except Exception:
+                logger.warning(f"⚠️ Skipping unreadable face embedding of employee {employee_pk}")
+        updated = {employee_pk for employee_pk, _ in embeddings}
+        removed = sorted(
+            set(
+                FaceEmbeddingTombstone.objects.filter(tenant_id=tenant.id, change_version__gt=since)
+                .values_list('employee_pk', flat=True)
+            )
+            - updated
+        )
+
+    dims = Counter(len(vector) for _, vector in embeddings)
+    dim = dims.most_common(1)[0][0] if dims else 0
+    if len(dims) > 1:
+        logger.warning(f"⚠️ Tenant {tenant.id}: leaving {sum(dims.values()) - dims[dim]} face embeddings of another size out of the gallery")
+        embeddings = [(pk, vector) for pk, vector in embeddings if len(vector) == dim]
+
+    labels = _employee_labels(tenant.id, [pk for pk, _ in embeddings]) if embeddings else {}
+    dtype = np.float16 if float16 else np.float32
+    flags = (FLAG_FULL if full else 0) | (FLAG_FLOAT16 if float16 else 0)
+
+    parts = [
+        HEADER.pack(MAGIC, FORMAT_VERSION, flags, dim, version, since if not full else 0, len(embeddings), len(removed)),
+        np.array([pk for pk, _ in embeddings], dtype='<i8').tobytes(),
+        np.array(removed, dtype='<i8').tobytes(),
+        np.array([vector for _, vector in embeddings], dtype=dtype).astype(np.dtype(dtype).newbyteorder('<')).tobytes(),
+    ]
+    for pk, _ in embeddings:
+        code, name = labels.get(pk, (str(pk), ''))
+        for value in (_short_utf8(code), _short_utf8(name)):
+            parts.append(bytes([len(value)]))
+            parts.append(value)
+
+    return GalleryPack(
+        data=b''.join(parts),
+        version=version,
+        full=full,
+        upserts=len(embeddings),
+        removals=len(removed),
+    )
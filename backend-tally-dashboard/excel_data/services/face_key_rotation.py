@@ -0,0 +1,117 @@
+"""
+Re-encryption of FaceEmbedding rows with the primary FACE_EMBEDDING_SECRET_KEY.
+
+Rotating the key:
+
+1. set the new key as FACE_EMBEDDING_SECRET_KEY and move the old one to
+   FACE_EMBEDDING_OLD_SECRET_KEYS (comma separated), then deploy: every process
+   encrypts with the new key and still decrypts tokens of the old ones;
+2. run ``manage.py rotate_face_embedding_keys`` while the app is serving;
+3. when it reports no rows left on old keys, drop the old key.
+
+``rotate_embedding_keys`` walks the table in id order, ``chunk_size`` rows at a
+time. Each chunk is locked (SELECT ... FOR UPDATE: a registration running at
+the same time waits instead of being overwritten), re-encrypted by a thread
+pool and written with one bulk_update. Rows already on the primary key are
+left alone and the last finished id is checkpointed in the cache, so an
+interrupted run resumes where it stopped. Tenants whose rows changed get one
+embedding_cache_version bump at the end.
+"""
+
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from django.core.cache import cache
+from django.db import transaction
+
+from ..utils.face_embedding_crypto import primary_key_fingerprint, reencrypt_embedding
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_TIMEOUT = 7 * 24 * 3600
+
+
+def _checkpoint_key() -> str:
+    # One checkpoint per primary key: a later rotation starts from the beginning
+    return f'face_key_rotation:{primary_key_fingerprint()}'
+
+
+def _reencrypt_slice(rows: List[Tuple[int, int, str]]):
+    """(id, tenant_id, token or None, error or None) per row."""
+    results = []
+    for pk, tenant_id, encrypted in rows:
+        try:
+            results.append((pk, tenant_id, reencrypt_embedding(encrypted), None))
+        except ValueError as exc:
+            results.append((pk, tenant_id, None, str(exc)))
+    return results
+
+
+def rotate_embedding_keys(chunk_size: int = 500, workers: int = 4, resume: bool = True,
+                          tenant_id: Optional[int] = None, stdout=None) -> Dict:
+    """Re-encrypt every embedding not on the primary key (see module docstring). Returns a summary."""
+    from ..models import FaceEmbedding
+    from .face_gallery import next_embedding_version
+
+    def progress(message):
+        logger.info(f"🔑 {message}")
+        if stdout is not None:
+            stdout.write(message)
+
+    checkpoint = _checkpoint_key() + (f':{tenant_id}' if tenant_id else '')
+    # {'last_id', 'tenants'}: tenants already changed still need their version bump
+    state = (cache.get(checkpoint) if resume else None) or {'last_id': 0, 'tenants': []}
+    last_id = state['last_id']
+    tenants = set(state['tenants'])
+    if last_id:
+        progress(f'Resuming after embedding id {last_id}')
+
+    summary = {'scanned': 0, 'rotated': 0, 'current': 0, 'unreadable': 0, 'tenants': 0}
+    start = time.perf_counter()
+    base = FaceEmbedding.objects.all()
+    if tenant_id:
+        base = base.filter(tenant_id=tenant_id)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='face-key-rotation') as pool:
+        while True:
+            with transaction.atomic():
+                rows = list(
+                    base.select_for_update()
+                    .filter(id__gt=last_id)
+                    .order_by('id')
+                    .values_list('id', 'tenant_id', 'embedding_encrypted')[:chunk_size]
+                )
+                if not rows:
+                    break
+                step = -(-len(rows) // max(1, workers))
+                slices = [rows[i:i + step] for i in range(0, len(rows), step)]
+                changed = []
+                for results in pool.map(_reencrypt_slice, slices):
+                    for pk, row_tenant_id, token, error in results:
+                        if error:
+                            summary['unreadable'] += 1
+                            logger.warning(f"⚠️ Face embedding {pk} (tenant {row_tenant_id}): {error}")
+                        elif token is None:
+                            summary['current'] += 1
+                        else:
+                            changed.append(FaceEmbedding(id=pk, embedding_encrypted=token))
+                            tenants.add(row_tenant_id)
+                if changed:
+                    FaceEmbedding.objects.bulk_update(changed, ['embedding_encrypted'], batch_size=chunk_size)
+
+            summary['scanned'] += len(rows)
+            summary['rotated'] += len(changed)
+            last_id = rows[-1][0]
+            cache.set(checkpoint, {'last_id': last_id, 'tenants': sorted(tenants)}, CHECKPOINT_TIMEOUT)
+            progress(f"{summary['scanned']} scanned, {summary['rotated']} re-encrypted (last id {last_id})")
+
+    # One version bump per changed tenant, not per row: each embedding cache rebuilds once
+    for changed_tenant_id in sorted(tenants):
+        with transaction.atomic():
+            next_embedding_version(changed_tenant_id)
+    summary['tenants'] = len(tenants)
+    cache.delete(checkpoint)
+    summary['seconds'] = round(time.perf_counter() - start, 2)
+    return summary
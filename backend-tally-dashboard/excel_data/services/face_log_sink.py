@@ -0,0 +1,223 @@
+"""
+Buffered writes of FaceAttendanceLog rows.
+
+Face views call ``record_face_log`` instead of ``FaceAttendanceLog.objects.create``.
+With ``FACE_LOG_BUFFERED`` the row goes into a bounded per-process buffer and a
+sink thread writes it with ``bulk_create`` every ``FACE_LOG_FLUSH_INTERVAL_MS``,
+or as soon as ``FACE_LOG_FLUSH_SIZE`` rows are waiting. When the buffer is full
+the row is written synchronously.
+
+Durability: rows still buffered when the process exits are flushed at exit; a
+flush that fails (database down, exit during an outage) appends the rows to a
+JSON-lines spool file in ``FACE_LOG_SPOOL_DIR``, which the sink replays every
+SPOOL_REPLAY_SECONDS and when a process starts. Only a hard crash loses the
+rows of the last interval.
+
+Read-after-write: ``FaceAttendanceLogListView`` calls ``flush`` first, so every
+row recorded by the serving process is visible; rows buffered by other
+processes appear within one flush interval.
+"""
+
+import atexit
+import glob
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+logger = logging.getLogger(__name__)
+
+FLUSH_INTERVAL_SECONDS = getattr(settings, 'FACE_LOG_FLUSH_INTERVAL_MS', 500) / 1000.0
+FLUSH_SIZE = getattr(settings, 'FACE_LOG_FLUSH_SIZE', 200)
+# Rows waiting in one process at most; beyond that rows are written synchronously
+BUFFER_MAX_SIZE = getattr(settings, 'FACE_LOG_BUFFER_MAX_SIZE', 5000)
+SPOOL_DIR = getattr(settings, 'FACE_LOG_SPOOL_DIR', os.path.join(settings.BASE_DIR, 'var', 'face_log_spool'))
+SPOOL_REPLAY_SECONDS = 60
+
+DATETIME_FIELDS = ('event_time',)
+
+
+def _new_row(tenant, employee=None, **fields) -> Dict:
+    row = {
+        'tenant_id': tenant if isinstance(tenant, int) else tenant.id,
+        'employee_id': getattr(employee, 'id', employee),
+        'source': 'mobile',
+    }
+    row.update(fields)
+    row.setdefault('event_time', timezone.now())
+    return row
+
+
+def _bulk_create(rows: List[Dict]):
+    """Write rows in batches of 500, all or none: failed rows are spooled or replayed again whole."""
+    from ..models import FaceAttendanceLog
+
+    # One transaction over every batch: a failure in a later batch must not
+    # leave the earlier ones written, or the spool/replay would duplicate them
+    with transaction.atomic():
+        FaceAttendanceLog.objects.bulk_create([FaceAttendanceLog(**row) for row in rows], batch_size=500)
+
+
+class FaceAttendanceLogSink:
+    """
+    Per-process buffer of FaceAttendanceLog rows and the thread that writes them.
+    """
+
+    _buffer: Deque[Dict] = deque()
+    _lock = threading.Lock()
+    _flush_lock = threading.Lock()
+    _wake = threading.Event()
+    _thread: Optional[threading.Thread] = None
+    _pid: Optional[int] = None
+    _start_lock = threading.Lock()
+    _atexit_registered = False
+    _last_replay = 0.0
+
+    @classmethod
+    def record(cls, row: Dict) -> bool:
+        """Buffer a row for the next flush. False when the buffer is full (write it synchronously)."""
+        cls.ensure_running()
+        with cls._lock:
+            if len(cls._buffer) >= BUFFER_MAX_SIZE:
+                return False
+            cls._buffer.append(row)
+            size = len(cls._buffer)
+        if size >= FLUSH_SIZE:
+            cls._wake.set()
+        return True
+
+    @classmethod
+    def ensure_running(cls):
+        if cls._thread is not None and cls._pid == os.getpid():
+            return
+        with cls._start_lock:
+            # A thread started before a fork does not exist in the child
+            if cls._thread is not None and cls._thread.is_alive() and cls._pid == os.getpid():
+                return
+            if cls._pid != os.getpid():
+                # Rows buffered in the parent belong to the parent
+                cls._buffer = deque()
+                cls._wake = threading.Event()
+            cls._pid = os.getpid()
+            cls._thread = threading.Thread(target=cls._run, name='face-log-sink', daemon=True)
+            cls._thread.start()
+            if not cls._atexit_registered:
+                atexit.register(cls.flush_all)
+                cls._atexit_registered = True
+            logger.info(f"🧵 Face log sink started in worker {cls._pid}")
+
+    @classmethod
+    def _run(cls):
+        while True:
+            cls._wake.wait(FLUSH_INTERVAL_SECONDS)
+            cls._wake.clear()
+            try:
+                cls.flush()
+                if time.monotonic() - cls._last_replay >= SPOOL_REPLAY_SECONDS:
+                    cls._last_replay = time.monotonic()
+                    cls.replay_spool()
+            except Exception as exc:
+                logger.error(f"❌ [Face] Log sink error: {exc}", exc_info=True)
+            finally:
+                close_old_connections()
+
+    @classmethod
+    def pending(cls, tenant_id: Optional[int] = None) -> int:
+        with cls._lock:
+            if tenant_id is None:
+                return len(cls._buffer)
+            return sum(1 for row in cls._buffer if row['tenant_id'] == tenant_id)
+
+    @classmethod
+    def flush(cls) -> int:
+        """Write every buffered row. Returns rows written (or spooled on failure)."""
+        with cls._flush_lock:
+            with cls._lock:
+                rows = list(cls._buffer)
+                cls._buffer.clear()
+            if not rows:
+                return 0
+            try:
+                _bulk_create(rows)
+            except Exception as exc:
+                logger.error(f"❌ [Face] Writing {len(rows)} face log rows failed, spooling them: {exc}")
+                cls.spool(rows)
+            return len(rows)
+
+    @classmethod
+    def spool(cls, rows: List[Dict]) -> bool:
+        """Append rows to this process's spool file."""
+        try:
+            os.makedirs(SPOOL_DIR, exist_ok=True)
+            path = os.path.join(SPOOL_DIR, f'face_logs-{os.getpid()}.jsonl')
+            with open(path, 'a', encoding='utf-8') as spool_file:
+                for row in rows:
+                    spool_file.write(json.dumps(row, cls=DjangoJSONEncoder) + '\n')
+                spool_file.flush()
+                os.fsync(spool_file.fileno())
+            return True
+        except Exception as exc:
+            logger.error(f"❌ [Face] Lost {len(rows)} face log rows, could not spool them: {exc}")
+            return False
+
+    @classmethod
+    def replay_spool(cls) -> int:
+        """Write spooled rows of every process to the database. Returns rows written."""
+        written = 0
+        for path in sorted(glob.glob(os.path.join(SPOOL_DIR, 'face_logs-*.jsonl'))):
+            claimed = f'{path}.replaying-{os.getpid()}'
+            try:
+                # The rename claims the file: one process replays it
+                os.rename(path, claimed)
+            except OSError:
+                continue
+            try:
+                with open(claimed, encoding='utf-8') as spool_file:
+                    rows = [json.loads(line) for line in spool_file if line.strip()]
+                for row in rows:
+                    for name in DATETIME_FIELDS:
+                        if isinstance(row.get(name), str):
+                            row[name] = parse_datetime(row[name])
+                _bulk_create(rows)
+                os.remove(claimed)
+                written += len(rows)
+            except Exception as exc:
+                logger.error(f"❌ [Face] Replaying spooled face logs from {path} failed: {exc}")
+                os.rename(claimed, f'{path[:-len(".jsonl")]}-retry{int(time.time())}.jsonl')
+        if written:
+            logger.info(f"✅ [Face] Replayed {written} spooled face log rows")
+        return written
+
+    @classmethod
+    def flush_all(cls):
+        """Write everything still buffered (process exit)."""
+        if cls._pid != os.getpid():
+            return
+        try:
+            cls.flush()
+        except Exception as exc:
+            logger.error(f"❌ [Face] Final face log flush failed: {exc}")
+
+
+def record_face_log(tenant, employee=None, **fields) -> None:
+    """
+    Record a FaceAttendanceLog row (``FACE_LOG_BUFFERED``: through the sink).
+    Never raises: face endpoints must answer even when logging fails.
+    """
+    try:
+        row = _new_row(tenant, employee, **fields)
+        if getattr(settings, 'FACE_LOG_BUFFERED', False) and FaceAttendanceLogSink.record(row):
+            return
+        from ..models import FaceAttendanceLog
+        FaceAttendanceLog.objects.create(**row)
+    except Exception as exc:
+        logger.warning(f"Failed to create FaceAttendanceLog: {exc}")
@@ -0,0 +1,258 @@
+"""
+Dirty tracking for incremental payroll recalculation.
+
+Writes to payroll inputs record PayrollDirtyMark rows:
+
+- DailyAttendance / Attendance writes      -> (employee, month of the record)
+- SalaryData uploads                       -> (employee, month of the upload)
+- employee pay settings, advances          -> (employee, every unlocked period)
+- holiday edits                            -> whole month (employee_id '')
+- tenant rules (average days, break time,
+  weekly penalty / sunday bonus rules)     -> every existing period, whole month
+
+``SalaryCalculationService.calculate_salary_for_period(..., incremental=True)``
+then recalculates only dirty employees (plus employees with no row yet), or the
+whole period when a period-wide mark exists, and clears the marks it consumed.
+
+Writes that skip model signals (queryset ``update()``, ``bulk_update``, raw
+SQL) must call the marking helpers themselves, or incremental runs keep the
+employees' old rows.
+
+Marking never raises: a failure is logged, and since incremental runs are the
+default (auto_calculate_payroll, calculate-payroll) the change is only picked
+up when the employee is marked again or by a full run (``--full`` /
+``"full": true``).
+"""
+
+import logging
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Tenant fields that change how every employee's salary is calculated
+TENANT_RULE_FIELDS = (
+    'average_days_per_month',
+    'break_time',
+    'weekly_absent_penalty_enabled',
+    'weekly_absent_threshold',
+    'sunday_bonus_enabled',
+    'sunday_bonus_threshold',
+)
+
+# EmployeeProfile fields read by the salary calculation
+EMPLOYEE_PAYROLL_FIELDS = (
+    'basic_salary',
+    'ot_charge_per_hour',
+    'tds_percentage',
+    'shift_start_time',
+    'shift_end_time',
+    'off_monday', 'off_tuesday', 'off_wednesday', 'off_thursday',
+    'off_friday', 'off_saturday', 'off_sunday',
+    'weekly_rules_enabled',
+    'date_of_joining',
+    'department',
+    'is_active',
+    'first_name',
+    'last_name',
+)
+
+
+@dataclass
+class DirtyState:
+    """
+    Dirty marks for one tenant/month as read by ``get_dirty_state``.
+
+    ``marks`` maps each mark's id to the ``marked_at`` read, so ``clear_dirty``
+    deletes exactly those marks.
+    """
+    as_of: object
+    period_wide: bool = False
+    employee_ids: Set[str] = field(default_factory=set)
+    marks: Dict[int, object] = field(default_factory=dict)
+
+
+def _tenant_id(tenant) -> int:
+    return tenant if isinstance(tenant, int) else tenant.id
+
+
+def _month_number(month) -> Optional[int]:
+    if month is None or month == '':
+        return None
+    if isinstance(month, int):
+        return month
+    from .salary_service import SalaryCalculationService
+    return SalaryCalculationService._get_month_number(str(month))
+
+
+def mark_dirty(tenant, entries: Iterable[Tuple[str, int, int]], reason: str) -> int:
+    """
+    Upsert marks for ``(employee_id, year, month_number)`` entries.
+
+    Use PayrollDirtyMark.PERIOD_WIDE as employee_id to mark a whole month.
+    Returns the number of distinct marks written.
+    """
+    from ..models import PayrollDirtyMark
+
+    try:
+        tenant_id = _tenant_id(tenant)
+        keys = {
+            (employee_id or PayrollDirtyMark.PERIOD_WIDE, int(year), int(month))
+            for employee_id, year, month in entries
+            if year and month
+        }
+        if not keys:
+            return 0
+        now = timezone.now()
+        # Savepoint: a failed upsert must not break the caller's transaction
+        with transaction.atomic():
+            PayrollDirtyMark.all_objects.bulk_create(
+                [
+                    PayrollDirtyMark(
+                        tenant_id=tenant_id, employee_id=employee_id, year=year, month=month,
+                        reason=reason[:50], marked_at=now,
+                    )
+                    for employee_id, year, month in keys
+                ],
+                batch_size=500,
+                update_conflicts=True,
+                unique_fields=['tenant', 'employee_id', 'year', 'month'],
+                update_fields=['reason', 'marked_at', 'updated_at'],
+            )
+        return len(keys)
+    except Exception as e:
+        logger.warning(f"Failed to record payroll dirty marks ({reason}): {str(e)}")
+        return 0
+
+
+def mark_dates_dirty(tenant, pairs: Iterable[Tuple[str, date]], reason: str) -> int:
+    """Mark the months of ``(employee_id, date)`` pairs, e.g. attendance rows."""
+    return mark_dirty(
+        tenant,
+        ((employee_id, d.year, d.month) for employee_id, d in pairs if employee_id and d),
+        reason,
+    )
+
+
+def mark_records_dirty(tenant, records, reason: str) -> int:
+    """Mark the months of model instances that have ``employee_id`` and ``date``."""
+    return mark_dates_dirty(
+        tenant,
+        ((getattr(r, 'employee_id', None), getattr(r, 'date', None)) for r in records),
+        reason,
+    )
+
+
+def mark_salary_uploads_dirty(tenant, salary_records, reason: str = 'salary_upload') -> int:
+    """Mark the months of SalaryData instances (month stored as a name)."""
+    return mark_dirty(
+        tenant,
+        ((r.employee_id, r.year, _month_number(r.month)) for r in salary_records if r.employee_id),
+        reason,
+    )
+
+
+def _existing_periods(tenant_id: int, unlocked_only: bool = False):
+    from ..models import PayrollPeriod
+
+    periods = PayrollPeriod.all_objects.filter(tenant_id=tenant_id)
+    if unlocked_only:
+        periods = periods.filter(is_locked=False)
+    for year, month in periods.values_list('year', 'month'):
+        month_number = _month_number(month)
+        if month_number:
+            yield year, month_number
+
+
+def mark_employees_dirty_all_periods(tenant, employee_ids: Iterable[str], reason: str) -> int:
+    """
+    Mark employees dirty in every unlocked payroll period of the tenant.
+
+    Locked periods are finalized: their marks would only pile up uncleared.
+    """
+    tenant_id = _tenant_id(tenant)
+    employee_ids = [e for e in set(employee_ids) if e]
+    if not employee_ids:
+        return 0
+    try:
+        periods = list(_existing_periods(tenant_id, unlocked_only=True))
+    except Exception as e:
+        logger.warning(f"Failed to load payroll periods for dirty marks ({reason}): {str(e)}")
+        return 0
+    return mark_dirty(
+        tenant_id,
+        ((employee_id, year, month) for employee_id in employee_ids for year, month in periods),
+        reason,
+    )
+
+
+def mark_all_periods_dirty(tenant, reason: str) -> int:
+    """Mark every existing payroll period of the tenant for full recalculation."""
+    from ..models import PayrollDirtyMark
+
+    tenant_id = _tenant_id(tenant)
+    try:
+        periods = list(_existing_periods(tenant_id))
+    except Exception as e:
+        logger.warning(f"Failed to load payroll periods for dirty marks ({reason}): {str(e)}")
+        return 0
+    return mark_dirty(
+        tenant_id,
+        ((PayrollDirtyMark.PERIOD_WIDE, year, month) for year, month in periods),
+        reason,
+    )
+
+
+def get_dirty_state(tenant, year: int, month) -> DirtyState:
+    """Snapshot the marks of one month; the state is later passed to ``clear_dirty``."""
+    from ..models import PayrollDirtyMark
+
+    state = DirtyState(as_of=timezone.now())
+    marks = PayrollDirtyMark.all_objects.filter(
+        tenant_id=_tenant_id(tenant),
+        year=year,
+        month=_month_number(month),
+    ).values_list('id', 'employee_id', 'marked_at')
+    for mark_id, employee_id, marked_at in marks:
+        state.marks[mark_id] = marked_at
+        if employee_id == PayrollDirtyMark.PERIOD_WIDE:
+            state.period_wide = True
+        else:
+            state.employee_ids.add(employee_id)
+    return state
+
+
+def clear_dirty(tenant, state: DirtyState) -> int:
+    """
+    Delete the marks read into ``state``.
+
+    A mark is deleted only if its ``marked_at`` is still the one read: marks
+    written or re-marked after the snapshot (even with an earlier clock, or
+    committed after it was taken) survive for the next run.
+    """
+    from ..models import PayrollDirtyMark
+
+    if not state.marks:
+        return 0
+    # Marks of one mark_dirty call share marked_at: one (marked_at, ids) term per call
+    ids_by_time = defaultdict(list)
+    for mark_id, marked_at in state.marks.items():
+        ids_by_time[marked_at].append(mark_id)
+    terms = [Q(marked_at=marked_at, id__in=ids) for marked_at, ids in ids_by_time.items()]
+
+    deleted = 0
+    for start in range(0, len(terms), 500):
+        condition = Q()
+        for term in terms[start:start + 500]:
+            condition |= term
+        count, _ = PayrollDirtyMark.all_objects.filter(
+            condition, tenant_id=_tenant_id(tenant)
+        ).delete()
+        deleted += count
+    return deleted
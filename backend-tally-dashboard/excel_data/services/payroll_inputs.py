@@ -0,0 +1,98 @@
+"""
+Inputs of one payroll period, loaded in bulk for ``calculate_salary_for_period``.
+
+The salary calculation used to read the uploaded salary, the monthly summary,
+the monthly attendance, the daily attendance, the holidays and the existing
+CalculatedSalary row once per employee (about 30 statements each).
+``load_payroll_inputs`` reads each of them once for the employees being
+calculated; SalaryCalculationService looks employees up in the result instead
+of querying, with the same precedence and the same "first row" choice (model
+ordering) as the per-employee queries.
+"""
+
+from dataclasses import dataclass, field
+from datetime import date
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from ..utils.date_ranges import month_filter
+
+
+@dataclass
+class DailyRow:
+    date: date
+    status: str
+    penalty_ignored: bool
+    ot_hours: Decimal
+    late_minutes: int
+
+
+@dataclass
+class PayrollInputs:
+    # (employee_id, month as stored) -> SalaryData
+    salary_rows: Dict[Tuple[str, str], object] = field(default_factory=dict)
+    summaries: Dict[str, object] = field(default_factory=dict)
+    attendance: Dict[str, object] = field(default_factory=dict)
+    daily: Dict[str, List[DailyRow]] = field(default_factory=dict)
+    # Active holidays of the month
+    holidays: List[object] = field(default_factory=list)
+    existing: Dict[str, object] = field(default_factory=dict)
+
+    def daily_rows(self, employee_id: str, start: Optional[date] = None, end: Optional[date] = None) -> List[DailyRow]:
+        rows = self.daily.get(employee_id, [])
+        if start is None and end is None:
+            return rows
+        return [row for row in rows if (start is None or row.date >= start) and (end is None or row.date <= end)]
+
+
+def _first_per_employee(queryset) -> Dict[str, object]:
+    # Model ordering, first row per employee: what .first() returned per employee
+    rows = {}
+    for row in queryset:
+        rows.setdefault(row.employee_id, row)
+    return rows
+
+
+def load_payroll_inputs(tenant, payroll_period, year: int, month: str, month_num: int,
+                        employee_ids: Iterable[str]) -> PayrollInputs:
+    """Everything the calculation reads for ``employee_ids`` in one period: one query per source."""
+    from ..models import (
+        Attendance, CalculatedSalary, DailyAttendance, Holiday, MonthlyAttendanceSummary, SalaryData,
+    )
+
+    employee_ids = list(set(employee_ids))
+    inputs = PayrollInputs()
+    if not employee_ids:
+        return inputs
+
+    # Both spellings the calculation looks up: the requested month and the period's
+    for row in SalaryData.objects.filter(
+        tenant=tenant, year=year, month__in={month, payroll_period.month}, employee_id__in=employee_ids,
+    ):
+        inputs.salary_rows.setdefault((row.employee_id, row.month), row)
+
+    inputs.summaries = _first_per_employee(MonthlyAttendanceSummary.objects.filter(
+        tenant=tenant, year=year, month=month_num, employee_id__in=employee_ids,
+    ))
+    inputs.attendance = _first_per_employee(Attendance.objects.filter(
+        tenant=tenant, employee_id__in=employee_ids, **month_filter(year, month_num),
+    ))
+
+    daily = DailyAttendance.objects.filter(
+        tenant=tenant, employee_id__in=employee_ids, **month_filter(year, month_num),
+    ).order_by().values_list('employee_id', 'date', 'attendance_status', 'penalty_ignored', 'ot_hours', 'late_minutes')
+    for employee_id, day, status, ignored, ot_hours, late_minutes in daily:
+        inputs.daily.setdefault(employee_id, []).append(
+            DailyRow(day, status, bool(ignored), ot_hours, late_minutes)
+        )
+
+    inputs.holidays = list(Holiday.objects.filter(
+        tenant=tenant, is_active=True, **month_filter(year, month_num),
+    ))
+    inputs.existing = {
+        row.employee_id: row
+        for row in CalculatedSalary.objects.filter(
+            tenant=tenant, payroll_period=payroll_period, employee_id__in=employee_ids,
+        )
+    }
+    return inputs
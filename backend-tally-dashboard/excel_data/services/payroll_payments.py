@@ -0,0 +1,155 @@
+"""
+Set-based salary payment marking with FIFO advance settlement.
+
+Marking N salaries as paid takes a fixed number of statements instead of a
+Python loop over salaries and advances:
+
+1. lock the open advances of the affected employees (so concurrent payments
+   settle one after the other);
+2. one statement that flips the paid flags and settles the advance deductions
+   of the salaries that were unpaid, oldest advance first, using a running
+   total window;
+3. one refresh of the materialized advance balances.
+
+Settlement per employee (deduction D, open advances ordered by date, id):
+an advance is reached when the balances before it sum to less than D; its new
+remaining balance is ``min(balance, max(0, running_total - D))`` and it becomes
+REPAID at zero, PARTIALLY_PAID otherwise. This is the same result as the
+previous per-advance loop.
+"""
+
+import logging
+from datetime import date
+from typing import Dict, Iterable, Optional
+
+from django.db import connection, transaction
+
+logger = logging.getLogger(__name__)
+
+_LOCK_OPEN_ADVANCES_SQL = """
+    SELECT a.id
+    FROM excel_data_advanceledger a
+    WHERE a.tenant_id = %(tenant_id)s
+      AND a.status IN ('PENDING', 'PARTIALLY_PAID')
+      AND a.employee_id IN (
+          SELECT cs.employee_id
+          FROM excel_data_calculatedsalary cs
+          WHERE cs.tenant_id = %(tenant_id)s AND cs.id = ANY(%(salary_ids)s)
+      )
+    ORDER BY a.id
+    FOR UPDATE
+"""
+
+_MARK_PAID_AND_SETTLE_SQL = """
+    WITH newly_paid AS (
+        -- is_paid = FALSE is rechecked under the row lock, so a salary is settled only once
+        UPDATE excel_data_calculatedsalary cs
+        SET is_paid = TRUE, payment_date = %(payment_date)s, updated_at = NOW()
+        WHERE cs.tenant_id = %(tenant_id)s AND cs.id = ANY(%(salary_ids)s) AND cs.is_paid = FALSE
+        RETURNING cs.employee_id, cs.advance_deduction_amount, cs.payroll_period_id
+    ),
+    already_paid AS (
+        UPDATE excel_data_calculatedsalary cs
+        SET payment_date = %(payment_date)s, updated_at = NOW()
+        WHERE cs.tenant_id = %(tenant_id)s AND cs.id = ANY(%(salary_ids)s) AND cs.is_paid = TRUE
+        RETURNING cs.payroll_period_id
+    ),
+    deductions AS (
+        SELECT employee_id, SUM(advance_deduction_amount) AS amount
+        FROM newly_paid
+        WHERE advance_deduction_amount > 0
+        GROUP BY employee_id
+    ),
+    ordered AS (
+        SELECT a.id, a.remaining_balance, d.amount,
+               SUM(a.remaining_balance) OVER (
+                   PARTITION BY a.employee_id
+                   ORDER BY a.advance_date, a.id
+                   ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW
+               ) AS running_total
+        FROM excel_data_advanceledger a
+        JOIN deductions d ON d.employee_id = a.employee_id
+        WHERE a.tenant_id = %(tenant_id)s AND a.status IN ('PENDING', 'PARTIALLY_PAID')
+    ),
+    settled AS (
+        UPDATE excel_data_advanceledger a
+        SET remaining_balance = LEAST(o.remaining_balance, GREATEST(0, o.running_total - o.amount)),
+            status = CASE WHEN o.running_total - o.amount <= 0 THEN 'REPAID' ELSE 'PARTIALLY_PAID' END,
+            updated_at = NOW()
+        FROM ordered o
+        WHERE a.id = o.id AND o.running_total - o.remaining_balance < o.amount
+        RETURNING a.employee_id, a.status
+    )
+    SELECT
+        (SELECT COUNT(*) FROM newly_paid) + (SELECT COUNT(*) FROM already_paid),
+        (SELECT COUNT(*) FROM deductions),
+        (SELECT COUNT(*) FROM settled),
+        (SELECT COUNT(*) FROM settled WHERE status = 'REPAID'),
+        (SELECT ARRAY_AGG(DISTINCT employee_id) FROM settled),
+        (SELECT ARRAY_AGG(DISTINCT payroll_period_id) FROM (
+            SELECT payroll_period_id FROM newly_paid
+            UNION SELECT payroll_period_id FROM already_paid
+        ) periods)
+"""
+
+
+def mark_salaries_paid(tenant, salary_ids: Iterable[int], paid: bool = True,
+                       payment_date: Optional[date] = None) -> Dict:
+    """
+    Mark CalculatedSalary rows paid (settling their advance deductions) or unpaid.
+
+    Advance deductions are settled only for salaries that go from unpaid to
+    paid; re-marking a paid salary only updates its payment date. Marking
+    unpaid does not reverse settlements. Returns counts and the touched period ids.
+    """
+    from ..models import CalculatedSalary
+    from .advance_balances import refresh_advance_balances
+    from .payroll_dirty import mark_employees_dirty_all_periods
+
+    salary_ids = sorted({int(i) for i in salary_ids})
+    result = {
+        'updated_count': 0,
+        'processed_advance_deductions': 0,
+        'advances_settled': 0,
+        'advances_repaid': 0,
+        'period_ids': [],
+    }
+    if not salary_ids:
+        return result
+
+    with transaction.atomic():
+        if not paid:
+            salaries = CalculatedSalary.objects.filter(tenant=tenant, id__in=salary_ids)
+            result['period_ids'] = sorted(set(salaries.values_list('payroll_period_id', flat=True)))
+            result['updated_count'] = salaries.update(is_paid=False, payment_date=None)
+            return result
+
+        params = {
+            'tenant_id': tenant.id,
+            'salary_ids': salary_ids,
+            'payment_date': payment_date or date.today(),
+        }
+        with connection.cursor() as cursor:
+            cursor.execute(_LOCK_OPEN_ADVANCES_SQL, params)
+            cursor.execute(_MARK_PAID_AND_SETTLE_SQL, params)
+            updated, employees, settled, repaid, settled_employee_ids, period_ids = cursor.fetchone()
+
+        result.update({
+            'updated_count': updated,
+            'processed_advance_deductions': employees,
+            'advances_settled': settled,
+            'advances_repaid': repaid,
+            'period_ids': sorted(period_ids or []),
+        })
+
+        if settled_employee_ids:
+            # Raw SQL skips signals: keep the materialized balances in this transaction
+            refresh_advance_balances(tenant, settled_employee_ids)
+            # ... and mark the employees' payroll as the AdvanceLedger signal would
+            mark_employees_dirty_all_periods(tenant, settled_employee_ids, 'advance_settlement')
+
+    logger.info(
+        f"💰 Marked {result['updated_count']} salaries paid for tenant {tenant.id}: "
+        f"{employees} employees with deductions, {settled} advances settled ({repaid} repaid)"
+    )
+    return result
@@ -0,0 +1,161 @@
+"""
+Parallel multi-tenant payroll runner.
+
+Fans ``SalaryCalculationService.calculate_salary_for_period`` out over a
+process pool, one tenant per task:
+
+- Tenants are ordered by active employee count, largest first, so the long
+  runs start immediately instead of being the tail of the job.
+- Workers are forked and open their own database connections; the parent
+  closes its connections before the pool starts so no socket is shared.
+- Each tenant runs in its own try/except (and its own transaction inside the
+  service), so one failing tenant never affects the others.
+- Every tenant gets a result entry with status, timings and the service
+  summary or the error, which callers can write out as a report.
+"""
+
+import logging
+import multiprocessing
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from django.db import connections
+from django.db.models import Count
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+def order_tenants_by_size(tenants) -> List[Dict]:
+    """Return ``[{'id', 'name', 'employee_count'}]`` sorted by active employees, largest first."""
+    from ..models import EmployeeProfile
+
+    tenants = list(tenants)
+    counts = dict(
+        EmployeeProfile.all_objects.filter(
+            tenant_id__in=[t.id for t in tenants],
+            is_active=True
+        ).values('tenant_id').annotate(total=Count('id')).values_list('tenant_id', 'total')
+    )
+    entries = [
+        {'id': t.id, 'name': t.name, 'employee_count': counts.get(t.id, 0)}
+        for t in tenants
+    ]
+    entries.sort(key=lambda e: (-e['employee_count'], e['id']))
+    return entries
+
+
+def _init_worker():
+    # A forked child inherits the parent's connection objects; drop them without
+    # closing so the child never talks over a socket it does not own.
+    for conn in connections.all(initialized_only=True):
+        conn.connection = None
+
+
+def run_tenant_payroll(tenant_id: int, year: int, month_name: str, force_recalculate: bool = True,
+                       incremental: bool = True) -> Dict:
+    """Calculate one tenant's payroll and return its report entry (never raises)."""
+    from ..models import Tenant
+    from .salary_service import SalaryCalculationService
+
+    started_at = timezone.now()
+    start = time.perf_counter()
+    entry = {
+        'tenant_id': tenant_id,
+        'started_at': started_at.isoformat(),
+    }
+    try:
+        tenant = Tenant.objects.get(id=tenant_id)
+        results = SalaryCalculationService.calculate_salary_for_period(
+            tenant, year, month_name, force_recalculate=force_recalculate, incremental=incremental
+        )
+        if isinstance(results, dict) and results.get('status'):
+            entry['status'] = results['status']  # e.g. 'locked'
+        elif isinstance(results, dict) and results.get('errors'):
+            entry['status'] = 'partial'  # some employees failed inside the service
+        else:
+            entry['status'] = 'success'
+        entry['result'] = results
+    except Exception as e:
+        logger.error(f"Auto payroll failed for tenant {tenant_id}: {str(e)}")
+        entry['status'] = 'error'
+        entry['error'] = str(e)
+        entry['traceback'] = traceback.format_exc()
+    finally:
+        entry['duration_seconds'] = round(time.perf_counter() - start, 3)
+        if multiprocessing.parent_process() is not None:
+            # Pool workers are reused; don't keep a connection idle between tenants
+            connections.close_all()
+    return entry
+
+
+def run_payroll_for_tenants(tenants, year: int, month_name: str, workers: int = 1,
+                            force_recalculate: bool = True, incremental: bool = True,
+                            on_result: Optional[Callable[[Dict], None]] = None) -> Dict:
+    """
+    Run payroll for ``tenants`` on ``workers`` processes (1 = in this process).
+
+    ``on_result`` is called in the parent with each tenant's entry as it finishes.
+    Returns the full report dict.
+    """
+    ordered = order_tenants_by_size(tenants)
+    tenant_info = {t['id']: t for t in ordered}
+    entries: List[Dict] = []
+    run_start = time.perf_counter()
+
+    def record(entry):
+        entry.update({
+            'tenant_name': tenant_info[entry['tenant_id']]['name'],
+            'employee_count': tenant_info[entry['tenant_id']]['employee_count'],
+        })
+        entries.append(entry)
+        if on_result:
+            on_result(entry)
+
+    workers = max(1, min(workers, len(ordered) or 1))
+    if workers == 1:
+        for t in ordered:
+            record(run_tenant_payroll(t['id'], year, month_name, force_recalculate, incremental))
+    else:
+        # Workers must open their own connections
+        connections.close_all()
+        pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('fork'),
+            initializer=_init_worker,
+        )
+        try:
+            futures = {
+                pool.submit(run_tenant_payroll, t['id'], year, month_name, force_recalculate, incremental): t['id']
+                for t in ordered
+            }
+            for future in as_completed(futures):
+                tenant_id = futures[future]
+                try:
+                    record(future.result())
+                except BrokenProcessPool as e:
+                    # A worker died (e.g. OOM kill); the pool cannot run anything else
+                    record({'tenant_id': tenant_id, 'status': 'error', 'error': f'Worker process died: {e}',
+                            'duration_seconds': None})
+                except Exception as e:
+                    record({'tenant_id': tenant_id, 'status': 'error', 'error': str(e),
+                            'duration_seconds': None})
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    failed = [e for e in entries if e['status'] == 'error']
+    return {
+        'year': year,
+        'month': month_name,
+        'workers': workers,
+        'generated_at': datetime.now().isoformat(),
+        'total_seconds': round(time.perf_counter() - run_start, 3),
+        'tenant_count': len(entries),
+        'success_count': len(entries) - len(failed),
+        'error_count': len(failed),
+        'tenants': entries,
+    }
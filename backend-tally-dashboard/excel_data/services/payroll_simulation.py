@@ -0,0 +1,302 @@
+"""
+Payroll what-if simulation.
+
+Re-evaluates a payroll period under overridden parameters without writing
+anything:
+
+- the period's stored CalculatedSalary rows, the employees' shift settings and
+  (only when weekly rules are overridden) the month's ABSENT days are loaded
+  once, in a handful of queries;
+- every employee is recalculated in memory on an unsaved CalculatedSalary, so
+  the formulas are exactly the ones a real recalculation would apply;
+- per-employee and aggregate deltas are reported against the stored rows.
+
+Overridable parameters:
+    average_days_per_month, break_time   -> OT rate (and late deduction)
+    weekly_absent_penalty_enabled,
+    weekly_absent_threshold              -> weekly penalty days / present days
+    ot_rates {employee_id: rate}         -> per-employee OT rate
+"""
+
+import calendar
+import logging
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from decimal import Decimal, InvalidOperation
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+CENT = Decimal('0.01')
+
+# CalculatedSalary fields compared between stored and simulated results
+COMPARED_FIELDS = (
+    'employee_ot_rate',
+    'present_days',
+    'absent_days',
+    'weekly_penalty_days',
+    'salary_for_present_days',
+    'ot_charges',
+    'late_deduction',
+    'gross_salary',
+    'tds_amount',
+    'salary_after_tds',
+    'advance_deduction_amount',
+    'net_payable',
+)
+
+# Fields summed into the aggregate totals
+TOTAL_FIELDS = (
+    'salary_for_present_days',
+    'ot_charges',
+    'late_deduction',
+    'gross_salary',
+    'tds_amount',
+    'advance_deduction_amount',
+    'net_payable',
+)
+
+# Stored inputs copied onto the in-memory CalculatedSalary
+_INPUT_FIELDS = (
+    'employee_id', 'employee_name', 'department', 'basic_salary', 'basic_salary_per_hour',
+    'employee_ot_rate', 'employee_tds_rate', 'total_working_days', 'present_days',
+    'absent_days', 'holiday_days', 'weekly_penalty_days', 'ot_hours', 'late_minutes',
+    'incentive', 'total_advance_balance', 'advance_deduction_amount',
+    'advance_deduction_editable', 'data_source',
+)
+
+
+def _decimal(value, name: str, minimum: Decimal = Decimal('0'), strict: bool = False) -> Decimal:
+    try:
+        result = Decimal(str(value))
+    except (InvalidOperation, ValueError, TypeError):
+        raise ValueError(f"{name} must be a number")
+    if not result.is_finite() or result < minimum or (strict and result == minimum):
+        raise ValueError(f"{name} must be {'greater than' if strict else 'at least'} {minimum}")
+    return result
+
+
+def parse_overrides(data) -> Dict:
+    """Validate simulation overrides from a request body; raises ValueError."""
+    overrides = {}
+    if data.get('average_days_per_month') is not None:
+        overrides['average_days_per_month'] = _decimal(
+            data['average_days_per_month'], 'average_days_per_month', strict=True
+        )
+    if data.get('break_time') is not None:
+        overrides['break_time'] = _decimal(data['break_time'], 'break_time')
+    if data.get('weekly_absent_penalty_enabled') is not None:
+        value = data['weekly_absent_penalty_enabled']
+        overrides['weekly_absent_penalty_enabled'] = (
+            value if isinstance(value, bool) else str(value).lower() in ('1', 'true', 'yes')
+        )
+    if data.get('weekly_absent_threshold') is not None:
+        try:
+            threshold = int(data['weekly_absent_threshold'])
+        except (ValueError, TypeError):
+            raise ValueError("weekly_absent_threshold must be an integer")
+        if not 1 <= threshold <= 7:
+            raise ValueError("weekly_absent_threshold must be between 1 and 7")
+        overrides['weekly_absent_threshold'] = threshold
+    ot_rates = data.get('ot_rates') or {}
+    if not isinstance(ot_rates, dict):
+        raise ValueError("ot_rates must be an object of employee_id -> rate")
+    if ot_rates:
+        overrides['ot_rates'] = {
+            str(employee_id): _decimal(rate, f"ot_rates[{employee_id}]")
+            for employee_id, rate in ot_rates.items()
+        }
+    return overrides
+
+
+def _shift_hours(profile) -> Decimal:
+    """Raw shift length in hours, as in SalaryCalculationService (8h when unset)."""
+    start, end = profile.get('shift_start_time'), profile.get('shift_end_time')
+    if not (start and end):
+        return Decimal('8')
+    start_dt = datetime.combine(date.today(), start)
+    end_dt = datetime.combine(date.today(), end)
+    if end_dt <= start_dt:
+        end_dt += timedelta(days=1)
+    return Decimal(str((end_dt - start_dt).total_seconds() / 3600))
+
+
+def _ot_rate(basic_salary: Decimal, raw_shift_hours: Decimal, break_time: Decimal, average_days: Decimal) -> Decimal:
+    shift_hours = max(Decimal('0'), raw_shift_hours - break_time)
+    if shift_hours > 0 and basic_salary > 0:
+        return basic_salary / (shift_hours * average_days)
+    return Decimal('0')
+
+
+def _weekly_penalties(year: int, month_num: int, absent_dates_by_employee, threshold: int) -> Dict[str, int]:
+    """Weeks (calendar.monthcalendar) with at least ``threshold`` counted ABSENT days, per employee."""
+    week_of_day = {}
+    for week_index, week in enumerate(calendar.monthcalendar(year, month_num)):
+        for day in week:
+            if day:
+                week_of_day[day] = week_index
+    penalties = {}
+    for employee_id, days in absent_dates_by_employee.items():
+        per_week = defaultdict(int)
+        for d in days:
+            per_week[week_of_day[d.day]] += 1
+        penalties[employee_id] = sum(1 for count in per_week.values() if count >= threshold)
+    return penalties
+
+
+def _values(salary, fields=COMPARED_FIELDS) -> Dict[str, Decimal]:
+    return {f: Decimal(str(getattr(salary, f) or 0)).quantize(CENT) for f in fields}
+
+
+def simulate_payroll_period(tenant, period, overrides: Optional[Dict] = None, changed_only: bool = False) -> Dict:
+    """
+    Recalculate ``period`` in memory under ``overrides`` (see ``parse_overrides``).
+
+    Rows with UPLOADED data are Excel values and are reported unchanged.
+    Nothing is written to the database.
+    """
+    from ..models import CalculatedSalary, DailyAttendance, DataSource, EmployeeProfile, SalaryData
+    from ..utils.utils import get_average_days_per_month, get_break_time
+    from .salary_service import SalaryCalculationService
+
+    start = time.perf_counter()
+    overrides = overrides or {}
+    month_num = SalaryCalculationService._get_month_number(period.month)
+
+    baseline = {
+        'average_days_per_month': Decimal(str(get_average_days_per_month(tenant))),
+        'break_time': Decimal(str(get_break_time(tenant))),
+        'weekly_absent_penalty_enabled': bool(getattr(tenant, 'weekly_absent_penalty_enabled', False)),
+        'weekly_absent_threshold': getattr(tenant, 'weekly_absent_threshold', 4) or 4,
+    }
+    params = {**baseline, **{k: v for k, v in overrides.items() if k in baseline}}
+    ot_rate_overrides = overrides.get('ot_rates', {})
+    weekly_overridden = any(
+        params[k] != baseline[k] for k in ('weekly_absent_penalty_enabled', 'weekly_absent_threshold')
+    )
+
+    # 1. Load the period's inputs once
+    stored_rows = list(
+        CalculatedSalary.objects.filter(tenant=tenant, payroll_period=period)
+        .order_by('employee_name', 'employee_id')
+        .values('id', *_INPUT_FIELDS, *(f for f in COMPARED_FIELDS if f not in _INPUT_FIELDS))
+    )
+    employee_ids = [row['employee_id'] for row in stored_rows]
+    profiles = {
+        p['employee_id']: p
+        for p in EmployeeProfile.objects.filter(tenant=tenant, employee_id__in=employee_ids).values(
+            'employee_id', 'shift_start_time', 'shift_end_time', 'weekly_rules_enabled'
+        )
+    }
+
+    simulated_penalties = None
+    uploaded_attendance = set()
+    if weekly_overridden:
+        uploaded_attendance = set(
+            SalaryData.objects.filter(tenant=tenant, year=period.year, month=period.month)
+            .values_list('employee_id', flat=True)
+        )
+        simulated_penalties = {}
+        if params['weekly_absent_penalty_enabled']:
+            absent_dates = defaultdict(list)
+            month_start = date(period.year, month_num, 1)
+            month_end = date(period.year, month_num, calendar.monthrange(period.year, month_num)[1])
+            for employee_id, d in DailyAttendance.objects.filter(
+                tenant=tenant,
+                date__gte=month_start,
+                date__lte=month_end,
+                attendance_status='ABSENT',
+                penalty_ignored=False,
+            ).values_list('employee_id', 'date'):
+                absent_dates[employee_id].append(d)
+            simulated_penalties = _weekly_penalties(
+                period.year, month_num, absent_dates, params['weekly_absent_threshold']
+            )
+
+    # 2. Recalculate every employee in memory
+    employees = []
+    totals = {f: {'stored': Decimal('0'), 'simulated': Decimal('0')} for f in TOTAL_FIELDS}
+    changed_count = 0
+    simulated_count = 0
+
+    for row in stored_rows:
+        stored = {f: Decimal(str(row[f] or 0)).quantize(CENT) for f in COMPARED_FIELDS}
+        employee_id = row['employee_id']
+        profile = profiles.get(employee_id)
+
+        if row['data_source'] == DataSource.UPLOADED:
+            simulated = dict(stored)
+            is_simulated = False
+        else:
+            salary = CalculatedSalary(tenant=tenant, payroll_period=period, **{f: row[f] for f in _INPUT_FIELDS})
+            salary.present_days = Decimal(str(row['present_days'] or 0))
+            salary.absent_days = Decimal(str(row['absent_days'] or 0))
+            salary.weekly_penalty_days = Decimal(str(row['weekly_penalty_days'] or 0))
+
+            if employee_id in ot_rate_overrides:
+                salary.employee_ot_rate = ot_rate_overrides[employee_id]
+            elif profile is not None:
+                salary.employee_ot_rate = _ot_rate(
+                    salary.basic_salary or Decimal('0'), _shift_hours(profile),
+                    params['break_time'], params['average_days_per_month'],
+                )
+
+            if simulated_penalties is not None and employee_id not in uploaded_attendance:
+                rules_enabled = profile.get('weekly_rules_enabled', True) if profile else True
+                new_penalty = Decimal(simulated_penalties.get(employee_id, 0) if rules_enabled else 0)
+                old_penalty = salary.weekly_penalty_days
+                if new_penalty != old_penalty:
+                    # Undo the stored penalty, then apply the simulated one
+                    salary.present_days = max(Decimal('0'), salary.present_days + old_penalty - new_penalty)
+                    salary.absent_days = max(Decimal('0'), salary.absent_days - old_penalty + new_penalty)
+                    salary.weekly_penalty_days = new_penalty
+
+            salary.calculate_salary()
+            simulated = _values(salary)
+            is_simulated = True
+            simulated_count += 1
+
+        delta = {f: simulated[f] - stored[f] for f in COMPARED_FIELDS}
+        changed = any(delta.values())
+        changed_count += changed
+        for f in TOTAL_FIELDS:
+            totals[f]['stored'] += stored[f]
+            totals[f]['simulated'] += simulated[f]
+
+        if changed or not changed_only:
+            employees.append({
+                'employee_id': employee_id,
+                'employee_name': row['employee_name'],
+                'department': row['department'],
+                'simulated': is_simulated,
+                'changed': changed,
+                'stored': stored,
+                'result': simulated,
+                'delta': delta,
+            })
+
+    for values in totals.values():
+        values['delta'] = values['simulated'] - values['stored']
+
+    duration_ms = round((time.perf_counter() - start) * 1000, 1)
+    logger.info(
+        f"🧪 Payroll simulation: tenant={tenant.id} period={period.month} {period.year} "
+        f"employees={len(stored_rows)} changed={changed_count} in {duration_ms}ms"
+    )
+    return {
+        'period': {'id': period.id, 'year': period.year, 'month': period.month},
+        'parameters': {
+            'baseline': baseline,
+            'simulated': params,
+            'ot_rate_overrides': ot_rate_overrides,
+        },
+        'summary': {
+            'employee_count': len(stored_rows),
+            'simulated_count': simulated_count,
+            'changed_count': changed_count,
+            'totals': totals,
+        },
+        'employees': employees,
+        'duration_ms': duration_ms,
+    }
@@ -13,6 +13,9 @@ from ..models import (
     EmployeeProfile, Attendance, SalaryData, AdvanceLedger, PayrollPeriod, CalculatedSalary, SalaryAdjustment, DataSource,
     MonthlyAttendanceSummary, DailyAttendance, Holiday,
 )
+from ..utils.query_budget import query_budget
+from ..utils.date_ranges import month_filter
+from ..utils.sse_broadcaster import SSENotifier
 import logging
 
 logger = logging.getLogger(__name__)
@@ -68,7 +71,8 @@ class SalaryCalculationService:
             return holidays.filter(applies_to_all=True).count()
     
     @staticmethod
-    def _get_employee_holidays_in_period(tenant, employee, year: int, month: str, start_date=None, end_date=None) -> list:
+    def _get_employee_holidays_in_period(tenant, employee, year: int, month: str, start_date=None, end_date=None,
+                                         inputs=None) -> list:
         """
         Get list of holiday dates that apply to a specific employee in a period
         
@@ -79,6 +83,7 @@ class SalaryCalculationService:
             month: Month name
             start_date: Optional start date (for partial month calculations)
             end_date: Optional end date (for partial month calculations)
+            inputs: Optional PayrollInputs of the month (services.payroll_inputs), read instead of querying
             
         Returns:
             list: List of date objects representing holidays (only after employee's joining date)
@@ -106,12 +111,15 @@ class SalaryCalculationService:
             return []
         
         # Get all active holidays in this period (after joining date)
-        holidays = Holiday.objects.filter(
-            tenant=tenant,
-            date__gte=start_date,
-            date__lte=end_date,
-            is_active=True
-        )
+        if inputs is not None:
+            holidays = [holiday for holiday in inputs.holidays if start_date <= holiday.date <= end_date]
+        else:
+            holidays = Holiday.objects.filter(
+                tenant=tenant,
+                date__gte=start_date,
+                date__lte=end_date,
+                is_active=True
+            )
         
         # Filter holidays that apply to this employee
         applicable_dates = []
@@ -182,7 +190,8 @@ class SalaryCalculationService:
                 return None
 
     @staticmethod
-    def _calculate_employee_working_days(employee: 'EmployeeProfile', year: int, month: str, tenant=None) -> int:
+    def _calculate_employee_working_days(employee: 'EmployeeProfile', year: int, month: str, tenant=None,
+                                         inputs=None) -> int:
         """
         Calculate working days for a specific employee for the full month
         
@@ -237,7 +246,7 @@ class SalaryCalculationService:
         holiday_dates = set()
         if tenant:
             holiday_dates = set(SalaryCalculationService._get_employee_holidays_in_period(
-                tenant, employee, year, month, start_date, month_end
+                tenant, employee, year, month, start_date, month_end, inputs=inputs
             ))
         
         # Count working days excluding off days AND holidays
@@ -252,7 +261,9 @@ class SalaryCalculationService:
         return working_days
     
     @staticmethod
-    def calculate_salary_for_period(tenant, year: int, month: str, force_recalculate: bool = False):
+    @query_budget(20)
+    def calculate_salary_for_period(tenant, year: int, month: str, force_recalculate: bool = False,
+                                    incremental: bool = False):
         """
         Calculate salaries for all active employees for a given period
         
@@ -261,10 +272,16 @@ class SalaryCalculationService:
             year: Year (e.g., 2025)
             month: Month name (e.g., "JUNE")
             force_recalculate: Whether to recalculate existing records
+            incremental: With force_recalculate, only recalculate employees whose inputs
+                changed since the last run (PayrollDirtyMark) plus employees without a
+                row yet; falls back to a full run when the period is marked as a whole
         
         Returns:
             dict: Summary of calculation results
         """
+        from .payroll_dirty import get_dirty_state, clear_dirty, mark_dirty
+        from .payroll_inputs import load_payroll_inputs
+
         with transaction.atomic():
             # Determine data source based on existing data
             data_source = SalaryCalculationService._determine_data_source(tenant, year, month)
@@ -289,15 +306,16 @@ class SalaryCalculationService:
             
             # Check for uploaded salary data first (from Excel uploads)
             from django.db.models import Q
+            uploaded_salary_ids = SalaryData.objects.filter(
+                tenant=tenant,
+                year=year
+            ).filter(
+                Q(month__iexact=month_normalized) | Q(month__iexact=month)
+            ).values_list('employee_id', flat=True)
             employees_with_salary_data = EmployeeProfile.objects.filter(
                 tenant=tenant,
                 is_active=True,
-                employee_id__in=SalaryData.objects.filter(
-                    tenant=tenant,
-                    year=year
-                ).filter(
-                    Q(month__iexact=month_normalized) | Q(month__iexact=month)
-                ).values_list('employee_id', flat=True)
+                employee_id__in=uploaded_salary_ids
             )
             
             # Check for attendance data (from Attendance model or DailyAttendance)
@@ -308,21 +326,19 @@ class SalaryCalculationService:
             ).filter(
                 Q(employee_id__in=Attendance.objects.filter(
                     tenant=tenant,
-                    date__year=year,
-                    date__month=month_num
+                    **month_filter(year, month_num)
                 ).values_list('employee_id', flat=True).distinct())
                 |
                 Q(employee_id__in=DailyAttendance.objects.filter(
                     tenant=tenant,
-                    date__year=year,
-                    date__month=month_num
+                    **month_filter(year, month_num)
                 ).values_list('employee_id', flat=True).distinct())
             )
             
             # Combine both (employees with either salary data or attendance data)
-            active_employees = (employees_with_salary_data | employees_with_attendance).distinct()
+            active_employees = list((employees_with_salary_data | employees_with_attendance).distinct())
             
-            if not active_employees.exists():
+            if not active_employees:
                 logger.info(f"No employees with attendance data for {month} {year}")
                 return {
                     'calculated': 0,
@@ -341,31 +357,62 @@ class SalaryCalculationService:
                 'data_source': data_source
             }
             
+            # DIRTY TRACKING: snapshot what changed since the last recalculation
+            dirty_state = get_dirty_state(tenant, year, month_num) if force_recalculate else None
+            dirty_employee_ids = None
+            if incremental and dirty_state is not None and not dirty_state.period_wide:
+                dirty_employee_ids = dirty_state.employee_ids
+                already_calculated = set(CalculatedSalary.objects.filter(
+                    tenant=tenant,
+                    payroll_period=payroll_period
+                ).values_list('employee_id', flat=True))
+                results['skipped_clean'] = 0
+            results['recalculation'] = 'incremental' if dirty_employee_ids is not None else 'full'
+            failed_employee_ids = []
+            
+            # Advance balances for the whole tenant in one query
+            from .advance_balances import get_advance_balances
+            advance_balances = get_advance_balances(tenant)
+            # Employees with uploaded salary data, once for the period (not an exists() per employee)
+            employees_with_uploaded_salary = set(uploaded_salary_ids)
+            
+            to_calculate = []
             for employee in active_employees:
+                if dirty_employee_ids is not None and employee.employee_id not in dirty_employee_ids \
+                        and employee.employee_id in already_calculated:
+                    # Inputs unchanged since this row was calculated
+                    results['skipped_clean'] += 1
+                    continue
+                # Same tenant for all: no tenant lookup per employee
+                employee.tenant = tenant
+                to_calculate.append(employee)
+            
+            # Salary, attendance, holidays and existing rows of the period in one query each
+            inputs = load_payroll_inputs(
+                tenant, payroll_period, year, month, month_num,
+                [employee.employee_id for employee in to_calculate if employee.employee_id],
+            )
+            # Computed rows, written in bulk after the loop
+            pending = []
+            
+            for employee in to_calculate:
                 try:
                     # Additional check: Skip if employee has no attendance data at all
                     attendance_data = SalaryCalculationService._get_attendance_data(
-                        employee, year, month, force_recalculate
+                        employee, year, month, force_recalculate, inputs=inputs
                     )
                     
                     # Skip employees with no attendance (present_days = 0 and absent_days = 0)
                     # and no uploaded salary data
-                    month_normalized = SalaryCalculationService._normalize_month_to_short(month)
-                    from django.db.models import Q
-                    has_uploaded_salary = SalaryData.objects.filter(
-                        tenant=tenant,
-                        employee_id=employee.employee_id,
-                        year=year
-                    ).filter(
-                        Q(month__iexact=month_normalized) | Q(month__iexact=month)
-                    ).exists()
+                    has_uploaded_salary = employee.employee_id in employees_with_uploaded_salary
                     
                     if not has_uploaded_salary and attendance_data['present_days'] == 0 and attendance_data['absent_days'] == 0:
                         logger.debug(f"Skipping employee {employee.employee_id} - no attendance data")
                         continue
                     
                     calculated_salary = SalaryCalculationService._calculate_employee_salary(
-                        payroll_period, employee, force_recalculate
+                        payroll_period, employee, force_recalculate, advance_balances,
+                        inputs=inputs, pending=pending
                     )
                     
                     if calculated_salary:
@@ -376,9 +423,67 @@ class SalaryCalculationService:
                 except Exception as e:
                     logger.error(f"Error calculating salary for {employee.employee_id}: {str(e)}")
                     results['errors'].append(f"{employee.employee_id}: {str(e)}")
+                    failed_employee_ids.append(employee.employee_id)
+            
+            SalaryCalculationService._save_calculated_salaries(tenant, pending)
+            
+            if dirty_state is not None:
+                # Everything in the snapshot is now reflected; failed employees stay dirty
+                clear_dirty(tenant, dirty_state)
+                if failed_employee_ids:
+                    mark_dirty(tenant, [(e, year, month_num) for e in failed_employee_ids], 'calculation_error')
             
+            # Sent when the transaction commits
+            SSENotifier.notify_payroll_calculated(
+                tenant, year, month,
+                period_id=payroll_period.id,
+                calculated=results['calculated'],
+                updated=results['updated'],
+                errors=len(results['errors']),
+            )
             return results
     
+    @staticmethod
+    def _save_calculated_salaries(tenant, calculated_salaries: list):
+        """
+        Write the rows computed by calculate_salary_for_period in bulk, then sync
+        their chart rows and clear the chart cache once (what the CalculatedSalary
+        post_save signal does per row).
+        """
+        if not calculated_salaries:
+            return
+        from django.utils import timezone
+        from ..models import ChartAggregatedData
+        
+        new_rows = [row for row in calculated_salaries if row._state.adding]
+        changed_rows = [row for row in calculated_salaries if not row._state.adding]
+        if new_rows:
+            CalculatedSalary.objects.bulk_create(new_rows, batch_size=500)
+        if changed_rows:
+            # bulk_update does not apply auto_now
+            now = timezone.now()
+            for row in changed_rows:
+                row.updated_at = now
+                row.calculation_timestamp = now
+            fields = [
+                field.name for field in CalculatedSalary._meta.concrete_fields
+                if not field.primary_key and field.name not in ('tenant', 'created_at', 'calculation_date')
+            ]
+            CalculatedSalary.objects.bulk_update(changed_rows, fields, batch_size=500)
+        
+        try:
+            with transaction.atomic():
+                ChartAggregatedData.bulk_aggregate_from_calculated_salaries(calculated_salaries)
+            from django.core.cache import cache
+            try:
+                cache.delete_pattern(f"frontend_charts_{tenant.id}_*")
+            except AttributeError:
+                # Fallback if delete_pattern not available
+                cache.delete(f"frontend_charts_{tenant.id}")
+        except Exception as e:
+            # Soft fail - don't break salary calculation if aggregation fails
+            logger.warning(f"Failed to sync ChartAggregatedData from CalculatedSalary: {e}")
+    
     @staticmethod
     def _determine_data_source(tenant, year: int, month: str) -> str:
         """Determine if period should use uploaded data or frontend calculations"""
@@ -399,8 +504,7 @@ class SalaryCalculationService:
         month_start = date(year, SalaryCalculationService._get_month_number(month), 1)
         has_frontend_attendance = Attendance.objects.filter(
             tenant=tenant,
-            date__year=year,
-            date__month=month_start.month,
+            **month_filter(year, month_start.month),
             calendar_days=1,  # Indicates daily tracking
             total_working_days=1
         ).exists()
@@ -413,8 +517,15 @@ class SalaryCalculationService:
             return DataSource.FRONTEND
     
     @staticmethod
-    def _calculate_employee_salary(payroll_period: PayrollPeriod, employee: EmployeeProfile, force_recalculate: bool = False):
-        """Calculate salary for a specific employee"""
+    def _calculate_employee_salary(payroll_period: PayrollPeriod, employee: EmployeeProfile, force_recalculate: bool = False,
+                                   advance_balances: dict = None, inputs=None, pending: list = None):
+        """Calculate salary for a specific employee
+        
+        advance_balances: optional preloaded {employee_id: balance} for the tenant
+        inputs: optional PayrollInputs of the period (services.payroll_inputs)
+        pending: optional list collecting the computed rows unsaved, for one bulk
+            write by the caller (calculate_salary_for_period)
+        """
         
         # Ensure employee has an employee_id
         if not employee.employee_id:
@@ -422,11 +533,14 @@ class SalaryCalculationService:
             return None
         
         # Check if calculation already exists
-        existing = CalculatedSalary.objects.filter(
-            tenant=employee.tenant,
-            payroll_period=payroll_period,
-            employee_id=employee.employee_id
-        ).first()
+        if inputs is not None:
+            existing = inputs.existing.get(employee.employee_id)
+        else:
+            existing = CalculatedSalary.objects.filter(
+                tenant=employee.tenant,
+                payroll_period=payroll_period,
+                employee_id=employee.employee_id
+            ).first()
         
         if existing and not force_recalculate:
             # Ensure uploaded periods are reflected as paid in existing records
@@ -438,12 +552,15 @@ class SalaryCalculationService:
             return existing
         
         # Check if we have uploaded salary data for this employee/period
-        uploaded_salary = SalaryData.objects.filter(
-            tenant=employee.tenant,
-            employee_id=employee.employee_id,
-            year=payroll_period.year,
-            month=payroll_period.month
-        ).first()
+        if inputs is not None:
+            uploaded_salary = inputs.salary_rows.get((employee.employee_id, payroll_period.month))
+        else:
+            uploaded_salary = SalaryData.objects.filter(
+                tenant=employee.tenant,
+                employee_id=employee.employee_id,
+                year=payroll_period.year,
+                month=payroll_period.month
+            ).first()
         
         if uploaded_salary and payroll_period.data_source == DataSource.UPLOADED:
             # Skip calculation entirely for uploaded data - use Excel values directly
@@ -456,7 +573,8 @@ class SalaryCalculationService:
             month_start = date(payroll_period.year, month_num_calc, 1)
             month_end = date(payroll_period.year, month_num_calc, total_days)
             holiday_dates = SalaryCalculationService._get_employee_holidays_in_period(
-                employee.tenant, employee, payroll_period.year, payroll_period.month, month_start, month_end
+                employee.tenant, employee, payroll_period.year, payroll_period.month, month_start, month_end,
+                inputs=inputs
             )
             holiday_count = len(holiday_dates)
             
@@ -495,17 +613,20 @@ class SalaryCalculationService:
             # Use normal calculation logic for FRONTEND data
             # Get attendance data (with force calculation support)
             attendance_data = SalaryCalculationService._get_attendance_data(
-                employee, payroll_period.year, payroll_period.month, force_recalculate
+                employee, payroll_period.year, payroll_period.month, force_recalculate, inputs=inputs
             )
             
             # Get advance balance
-            advance_balance = SalaryCalculationService._get_advance_balance(employee.employee_id)
+            if advance_balances is not None:
+                advance_balance = advance_balances.get(employee.employee_id, Decimal('0'))
+            else:
+                advance_balance = SalaryCalculationService._get_advance_balance(employee.employee_id, employee.tenant)
             
             # Calculate per-hour and per-minute rates
             basic_salary = employee.basic_salary or Decimal('0')
             # Use employee-specific working days instead of period working days
             working_days = SalaryCalculationService._calculate_employee_working_days(
-                employee, payroll_period.year, payroll_period.month, employee.tenant
+                employee, payroll_period.year, payroll_period.month, employee.tenant, inputs=inputs
             )
             
             # Calculate shift hours from shift_start_time and shift_end_time
@@ -571,21 +692,26 @@ class SalaryCalculationService:
         if existing:
             for key, value in salary_data.items():
                 setattr(existing, key, value)
-            # Skip auto-calculation for uploaded data
-            if payroll_period.data_source == DataSource.UPLOADED:
-                existing._skip_auto_calc = True
-            existing.save()
-            return existing
+            calculated_salary = existing
         else:
             calculated_salary = CalculatedSalary(tenant=employee.tenant, **salary_data)
-            # Skip auto-calculation for uploaded data
-            if payroll_period.data_source == DataSource.UPLOADED:
-                calculated_salary._skip_auto_calc = True
-            calculated_salary.save()
+        # Skip auto-calculation for uploaded data
+        if payroll_period.data_source == DataSource.UPLOADED:
+            calculated_salary._skip_auto_calc = True
+        if pending is not None:
+            # What save() and its pre_save signal would do; the caller writes the rows in bulk
+            from ..signals import clean_null_bytes_from_instance
+            if not getattr(calculated_salary, '_skip_auto_calc', False) \
+                    and calculated_salary.data_source != DataSource.UPLOADED:
+                calculated_salary.calculate_salary()
+            clean_null_bytes_from_instance(calculated_salary)
+            pending.append(calculated_salary)
             return calculated_salary
+        calculated_salary.save()
+        return calculated_salary
     
     @staticmethod
-    def _compute_weekly_penalty_and_bonus(employee: 'EmployeeProfile', year: int, month: str) -> dict:
+    def _compute_weekly_penalty_and_bonus(employee: 'EmployeeProfile', year: int, month: str, inputs=None) -> dict:
         """
         Compute weekly absent penalty days for a month using DailyAttendance.
         
@@ -625,21 +751,29 @@ class SalaryCalculationService:
         month_start = date(year, month_num, 1)
         month_end = date(year, month_num, total_days)
         
-        # Fetch all DailyAttendance rows for this employee/month once
-        daily_qs = DailyAttendance.objects.filter(
-            tenant=tenant,
-            employee_id=employee.employee_id,
-            date__gte=month_start,
-            date__lte=month_end,
-        ).only('date', 'attendance_status', 'penalty_ignored')
-        
-        if not daily_qs.exists():
-            return {
-                'weekly_penalty_days': Decimal('0'),
-            }
-        
-        # Build map date -> (status, penalty_ignored) for quick lookup
-        status_by_date = {rec.date: (rec.attendance_status, bool(getattr(rec, 'penalty_ignored', False))) for rec in daily_qs}
+        if inputs is not None:
+            # Preloaded rows of the month (services.payroll_inputs)
+            status_by_date = {row.date: (row.status, row.penalty_ignored) for row in inputs.daily_rows(employee.employee_id)}
+            if not status_by_date:
+                return {
+                    'weekly_penalty_days': Decimal('0'),
+                }
+        else:
+            # Fetch all DailyAttendance rows for this employee/month once
+            daily_qs = DailyAttendance.objects.filter(
+                tenant=tenant,
+                employee_id=employee.employee_id,
+                date__gte=month_start,
+                date__lte=month_end,
+            ).only('date', 'attendance_status', 'penalty_ignored')
+            
+            if not daily_qs.exists():
+                return {
+                    'weekly_penalty_days': Decimal('0'),
+                }
+            
+            # Build map date -> (status, penalty_ignored) for quick lookup
+            status_by_date = {rec.date: (rec.attendance_status, bool(getattr(rec, 'penalty_ignored', False))) for rec in daily_qs}
         
         weekly_penalty_days = 0
         
@@ -677,22 +811,29 @@ class SalaryCalculationService:
         }
     
     @staticmethod
-    def _get_attendance_data(employee: EmployeeProfile, year: int, month: str, force_calculate_partial: bool = False) -> dict:
+    def _get_attendance_data(employee: EmployeeProfile, year: int, month: str, force_calculate_partial: bool = False,
+                             inputs=None) -> dict:
         """
         Get attendance data from either uploaded or frontend sources
         Enhanced to support force calculation for partial months
+        
+        inputs: optional PayrollInputs of the period (services.payroll_inputs); every
+        source is then looked up in it instead of queried per employee
         """
         from datetime import date, datetime
         
         month_num = SalaryCalculationService._get_month_number(month)
         
         # First, try to get from uploaded SalaryData
-        salary_record = SalaryData.objects.filter(
-            tenant=employee.tenant,
-            employee_id=employee.employee_id,
-            year=year,
-            month=month
-        ).first()
+        if inputs is not None:
+            salary_record = inputs.salary_rows.get((employee.employee_id, month))
+        else:
+            salary_record = SalaryData.objects.filter(
+                tenant=employee.tenant,
+                employee_id=employee.employee_id,
+                year=year,
+                month=month
+            ).first()
         
         if salary_record and not force_calculate_partial:
             # Use uploaded data for full month calculation
@@ -703,7 +844,7 @@ class SalaryCalculationService:
             month_start = date(year, month_num_calc, 1)
             month_end = date(year, month_num_calc, total_days)
             holiday_dates = SalaryCalculationService._get_employee_holidays_in_period(
-                employee.tenant, employee, year, month, month_start, month_end
+                employee.tenant, employee, year, month, month_start, month_end, inputs=inputs
             )
             holiday_count = len(holiday_dates)
             
@@ -719,16 +860,19 @@ class SalaryCalculationService:
             }
         
         # Next try the pre-aggregated MonthlyAttendanceSummary (fast path)
-        summary = MonthlyAttendanceSummary.objects.filter(
-            tenant=employee.tenant,
-            employee_id=employee.employee_id,
-            year=year,
-            month=month_num,
-        ).first()
+        if inputs is not None:
+            summary = inputs.summaries.get(employee.employee_id)
+        else:
+            summary = MonthlyAttendanceSummary.objects.filter(
+                tenant=employee.tenant,
+                employee_id=employee.employee_id,
+                year=year,
+                month=month_num,
+            ).first()
 
         if summary and not force_calculate_partial:
             employee_working_days = SalaryCalculationService._calculate_employee_working_days(
-                employee, year, month, employee.tenant
+                employee, year, month, employee.tenant, inputs=inputs
             )
 
             # Only count explicitly logged absences, not assumed ones based on missing attendance
@@ -736,13 +880,17 @@ class SalaryCalculationService:
             # For employees with no records at all, both present and absent should be 0
             
             # Get count of explicit ABSENT entries for this employee/month
-            explicit_absent_count = DailyAttendance.objects.filter(
-                tenant=employee.tenant,
-                employee_id=employee.employee_id,
-                date__year=year,
-                date__month=SalaryCalculationService._get_month_number(month),
-                attendance_status='ABSENT'
-            ).count()
+            if inputs is not None:
+                explicit_absent_count = sum(
+                    1 for row in inputs.daily_rows(employee.employee_id) if row.status == 'ABSENT'
+                )
+            else:
+                explicit_absent_count = DailyAttendance.objects.filter(
+                    tenant=employee.tenant,
+                    employee_id=employee.employee_id,
+                    **month_filter(year, SalaryCalculationService._get_month_number(month)),
+                    attendance_status='ABSENT'
+                ).count()
             
             # Get paid holidays count for this employee
             import calendar
@@ -751,12 +899,12 @@ class SalaryCalculationService:
             month_start = date(year, month_num, 1)
             month_end = date(year, month_num, total_days)
             holiday_dates = SalaryCalculationService._get_employee_holidays_in_period(
-                employee.tenant, employee, year, month, month_start, month_end
+                employee.tenant, employee, year, month, month_start, month_end, inputs=inputs
             )
             holiday_count = len(holiday_dates)
 
             weekly_stats = SalaryCalculationService._compute_weekly_penalty_and_bonus(
-                employee, year, month
+                employee, year, month, inputs=inputs
             )
             
             present_days = Decimal(str(summary.present_days)) + Decimal(str(holiday_count))
@@ -779,12 +927,14 @@ class SalaryCalculationService:
             }
         
         # If MonthlyAttendanceSummary doesn't have data, try the Attendance model (monthly summary format)
-        attendance_record = Attendance.objects.filter(
-            tenant=employee.tenant,
-            employee_id=employee.employee_id,
-            date__year=year,
-            date__month=month_num,
-        ).first()
+        if inputs is not None:
+            attendance_record = inputs.attendance.get(employee.employee_id)
+        else:
+            attendance_record = Attendance.objects.filter(
+                tenant=employee.tenant,
+                employee_id=employee.employee_id,
+                **month_filter(year, month_num),
+            ).first()
 
         if attendance_record and not force_calculate_partial:
             # TRUST UPLOADED WORKING DAYS: Use uploaded value if available, otherwise calculate
@@ -793,7 +943,7 @@ class SalaryCalculationService:
             else:
                 # Fallback to calculation if no uploaded value
                 employee_working_days = SalaryCalculationService._calculate_employee_working_days(
-                    employee, year, month, employee.tenant
+                    employee, year, month, employee.tenant, inputs=inputs
                 )
             
             # Get paid holidays count for this employee
@@ -803,12 +953,12 @@ class SalaryCalculationService:
             month_start = date(year, month_num, 1)
             month_end = date(year, month_num, total_days)
             holiday_dates = SalaryCalculationService._get_employee_holidays_in_period(
-                employee.tenant, employee, year, month, month_start, month_end
+                employee.tenant, employee, year, month, month_start, month_end, inputs=inputs
             )
             holiday_count = len(holiday_dates)
 
             weekly_stats = SalaryCalculationService._compute_weekly_penalty_and_bonus(
-                employee, year, month
+                employee, year, month, inputs=inputs
             )
             
             present_days = Decimal(str(attendance_record.present_days)) + Decimal(str(holiday_count))
@@ -850,30 +1000,44 @@ class SalaryCalculationService:
             )
         else:
             employee_working_days = SalaryCalculationService._calculate_employee_working_days(
-                employee, year, month, employee.tenant
+                employee, year, month, employee.tenant, inputs=inputs
             )
 
-        daily_qs = DailyAttendance.objects.filter(
-            tenant=employee.tenant,
-            employee_id=employee.employee_id,
-            date__year=year,
-            date__month=month_num,
-        )
+        if inputs is not None:
+            daily_rows = inputs.daily_rows(
+                employee.employee_id,
+                *((start_date, end_date) if force_calculate_partial else (None, None))
+            )
+            has_daily = bool(daily_rows)
+        else:
+            daily_qs = DailyAttendance.objects.filter(
+                tenant=employee.tenant,
+                employee_id=employee.employee_id,
+                **month_filter(year, month_num),
+            )
 
-        if force_calculate_partial:
-            daily_qs = daily_qs.filter(date__range=[start_date, end_date])
+            if force_calculate_partial:
+                daily_qs = daily_qs.filter(date__range=[start_date, end_date])
+            has_daily = daily_qs.exists()
 
-        if daily_qs.exists():
-            present_full = daily_qs.filter(attendance_status__in=["PRESENT", "PAID_LEAVE"]).count()
-            half_count = daily_qs.filter(attendance_status="HALF_DAY").count()
+        if has_daily:
+            if inputs is not None:
+                present_full = sum(1 for row in daily_rows if row.status in ("PRESENT", "PAID_LEAVE"))
+                half_count = sum(1 for row in daily_rows if row.status == "HALF_DAY")
+                explicit_absent = sum(1 for row in daily_rows if row.status == "ABSENT")
+                aggregates = {
+                    "total_ot": sum((row.ot_hours for row in daily_rows if row.ot_hours is not None), Decimal('0')),
+                    "total_late": sum(row.late_minutes for row in daily_rows if row.late_minutes is not None),
+                }
+            else:
+                present_full = daily_qs.filter(attendance_status__in=["PRESENT", "PAID_LEAVE"]).count()
+                half_count = daily_qs.filter(attendance_status="HALF_DAY").count()
+                # Count only explicit ABSENT entries, not missing days
+                explicit_absent = daily_qs.filter(attendance_status="ABSENT").count()
+                aggregates = daily_qs.aggregate(total_ot=Sum("ot_hours"), total_late=Sum("late_minutes"))
             total_present = present_full + (half_count * 0.5)
-            
-            # Count only explicit ABSENT entries, not missing days
-            explicit_absent = daily_qs.filter(attendance_status="ABSENT").count()
             # Add half day absences
             explicit_absent += half_count * 0.5
-
-            aggregates = daily_qs.aggregate(total_ot=Sum("ot_hours"), total_late=Sum("late_minutes"))
             
             # Get paid holidays count for this employee
             import calendar
@@ -887,12 +1051,12 @@ class SalaryCalculationService:
                 month_end = end_date
             
             holiday_dates = SalaryCalculationService._get_employee_holidays_in_period(
-                employee.tenant, employee, year, month, month_start, month_end
+                employee.tenant, employee, year, month, month_start, month_end, inputs=inputs
             )
             holiday_count = len(holiday_dates)
 
             weekly_stats = SalaryCalculationService._compute_weekly_penalty_and_bonus(
-                employee, year, month
+                employee, year, month, inputs=inputs
             )
             
             present_days = Decimal(str(total_present)) + Decimal(str(holiday_count))
@@ -923,7 +1087,7 @@ class SalaryCalculationService:
         month_end = date(year, month_num_calc, total_days)
         
         holiday_dates = SalaryCalculationService._get_employee_holidays_in_period(
-            employee.tenant, employee, year, month, month_start, month_end
+            employee.tenant, employee, year, month, month_start, month_end, inputs=inputs
         )
         holiday_count = len(holiday_dates)
         
@@ -979,16 +1143,18 @@ class SalaryCalculationService:
         return working_days
     
     @staticmethod
-    def _get_advance_balance(employee_id: str) -> Decimal:
-        """Calculate current advance balance for an employee"""
-        
-        # Sum all advances with PENDING or PARTIALLY_PAID status using remaining_balance
-        total_advances = AdvanceLedger.objects.filter(
-            employee_id=employee_id,
-            status__in=['PENDING', 'PARTIALLY_PAID']
-        ).aggregate(total=Sum('remaining_balance'))['total'] or Decimal('0')
-        
-        return total_advances
+    def _get_advance_balance(employee_id: str, tenant=None) -> Decimal:
+        """Current advance balance for an employee (materialized EmployeeAdvanceBalance)"""
+        from .advance_balances import get_advance_balance
+        
+        if tenant is None:
+            # Legacy callers without a tenant: sum the ledger (tenant-filtered by the manager)
+            return AdvanceLedger.objects.filter(
+                employee_id=employee_id,
+                status__in=['PENDING', 'PARTIALLY_PAID']
+            ).aggregate(total=Sum('remaining_balance'))['total'] or Decimal('0')
+        
+        return get_advance_balance(tenant, employee_id)
     
     @staticmethod
     def update_advance_deduction(tenant, payroll_period_id: int, employee_id: str, new_amount: Decimal, admin_user: str):
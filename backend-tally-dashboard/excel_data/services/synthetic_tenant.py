@@ -0,0 +1,355 @@
+"""
+Synthetic tenants for benchmarks and query-budget checks.
+
+``generate_synthetic_tenant`` builds a complete, deterministic tenant (same
+seed -> same rows) at a configurable scale:
+
+- EmployeeProfile rows spread over departments, with off days and salaries;
+- DailyAttendance for every working day of the last ``months`` full months
+  (off days and holidays have no row, like the attendance tracker);
+- Holiday rows per month, AdvanceLedger rows for a share of employees;
+- the monthly Attendance / MonthlyAttendanceSummary aggregates, advance
+  balances and optionally face embeddings and calculated payroll for the most
+  recent months;
+- an admin user to authenticate in-process requests.
+
+Rows are written with ``bulk_create`` (no per-row signals) and the derived
+tables are then built with the same services production uses.
+"""
+
+import calendar
+import logging
+import math
+import random
+import time
+from datetime import date, time as dt_time, timedelta
+from decimal import Decimal
+from typing import Dict, List, Optional
+
+from django.db import transaction
+from django.db.models import Case, DecimalField, Sum, Value, When
+
+logger = logging.getLogger(__name__)
+
+SYNTHETIC_SUBDOMAIN_PREFIX = 'synthetic-'
+
+# MobileFaceNet output size (what the mobile app registers)
+EMBEDDING_DIMENSIONS = 192
+
+DEPARTMENTS = ['Production', 'Assembly', 'Quality', 'Warehouse', 'Maintenance',
+               'Accounts', 'HR', 'Sales', 'Logistics', 'Packing']
+DESIGNATIONS = ['Operator', 'Technician', 'Supervisor', 'Executive', 'Helper', 'Manager']
+EMPLOYMENT_TYPES = ['FULL_TIME', 'FULL_TIME', 'FULL_TIME', 'PART_TIME', 'CONTRACT']
+FIRST_NAMES = ['Aarav', 'Vivaan', 'Aditya', 'Vihaan', 'Arjun', 'Sai', 'Reyansh', 'Krishna',
+               'Ishaan', 'Rohan', 'Ananya', 'Diya', 'Priya', 'Kavya', 'Meera', 'Sneha',
+               'Pooja', 'Neha', 'Riya', 'Sara', 'Rahul', 'Amit', 'Suresh', 'Ramesh']
+LAST_NAMES = ['Sharma', 'Verma', 'Patel', 'Shah', 'Mehta', 'Iyer', 'Nair', 'Reddy',
+              'Gupta', 'Singh', 'Kumar', 'Das', 'Joshi', 'Kulkarni', 'Desai', 'Rao']
+
+BATCH_SIZE = 2000
+
+
+def synthetic_subdomain(seed: int, employees: int, months: int) -> str:
+    return f"{SYNTHETIC_SUBDOMAIN_PREFIX}{seed}-{employees}x{months}"
+
+
+def _months_back(months: int, end: Optional[date] = None) -> List[tuple]:
+    """(year, month) for the ``months`` full months before ``end``'s month, oldest first."""
+    end = end or date.today()
+    year, month = end.year, end.month
+    result = []
+    for _ in range(months):
+        month -= 1
+        if month == 0:
+            year, month = year - 1, 12
+        result.append((year, month))
+    return list(reversed(result))
+
+
+def _random_embedding(rng: random.Random) -> List[float]:
+    vector = [rng.gauss(0.0, 1.0) for _ in range(EMBEDDING_DIMENSIONS)]
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return [round(v / norm, 6) for v in vector]
+
+
+def _create_employees(tenant, count: int, rng: random.Random, first_month: date):
+    from ..models import EmployeeProfile
+
+    average_days = Decimal(str(tenant.average_days_per_month))
+    shift_hours = Decimal('9') - Decimal(str(tenant.break_time))
+    employees = []
+    for index in range(count):
+        basic_salary = Decimal(rng.randrange(12000, 90000, 500))
+        off_saturday = rng.random() < 0.3
+        employees.append(EmployeeProfile(
+            tenant=tenant,
+            employee_id=f"SYN-{index + 1:06d}",
+            first_name=rng.choice(FIRST_NAMES),
+            last_name=rng.choice(LAST_NAMES),
+            mobile_number=f"9{rng.randrange(10 ** 8, 10 ** 9)}",
+            department=DEPARTMENTS[index % len(DEPARTMENTS)],
+            designation=rng.choice(DESIGNATIONS),
+            employment_type=rng.choice(EMPLOYMENT_TYPES),
+            date_of_joining=first_month - timedelta(days=rng.randrange(0, 1500)),
+            shift_start_time=dt_time(9, 0),
+            shift_end_time=dt_time(18, 0),
+            basic_salary=basic_salary,
+            tds_percentage=Decimal(rng.choice([0, 0, 1, 2, 5])),
+            off_sunday=True,
+            off_saturday=off_saturday,
+            # EmployeeProfile.save() formula: basic / ((shift - break) x average days)
+            ot_charge_per_hour=(basic_salary / (shift_hours * average_days)).quantize(Decimal('0.01')),
+            weekly_rules_enabled=rng.random() < 0.5,
+        ))
+    EmployeeProfile.objects.bulk_create(employees, batch_size=BATCH_SIZE)
+    return list(EmployeeProfile.all_objects.filter(tenant=tenant).order_by('employee_id'))
+
+
+def _create_holidays(tenant, months: List[tuple], per_month: int, rng: random.Random) -> Dict[tuple, set]:
+    from ..models import Holiday
+
+    holidays = []
+    by_month: Dict[tuple, set] = {}
+    for year, month in months:
+        days_in_month = calendar.monthrange(year, month)[1]
+        weekdays = [d for d in range(1, days_in_month + 1) if date(year, month, d).weekday() < 5]
+        for day in rng.sample(weekdays, min(per_month, len(weekdays))):
+            holiday_date = date(year, month, day)
+            by_month.setdefault((year, month), set()).add(holiday_date)
+            holidays.append(Holiday(
+                tenant=tenant,
+                name=f"Synthetic holiday {holiday_date.isoformat()}",
+                date=holiday_date,
+                holiday_type=rng.choice(['NATIONAL', 'FESTIVAL', 'COMPANY']),
+                applies_to_all=True,
+            ))
+    Holiday.objects.bulk_create(holidays, batch_size=BATCH_SIZE)
+    return by_month
+
+
+def _off_weekdays(employee) -> set:
+    flags = [employee.off_monday, employee.off_tuesday, employee.off_wednesday, employee.off_thursday,
+             employee.off_friday, employee.off_saturday, employee.off_sunday]
+    return {weekday for weekday, off in enumerate(flags) if off}
+
+
+def _create_attendance_month(tenant, employees, year: int, month: int, holidays: set,
+                             absent_rate: float, rng: random.Random) -> int:
+    from ..models import DailyAttendance
+
+    days_in_month = calendar.monthrange(year, month)[1]
+    rows = []
+    for employee in employees:
+        off_days = _off_weekdays(employee)
+        name = f"{employee.first_name} {employee.last_name}"
+        for day in range(1, days_in_month + 1):
+            current = date(year, month, day)
+            if current.weekday() in off_days or current in holidays or current < employee.date_of_joining:
+                continue
+            roll = rng.random()
+            if roll < absent_rate:
+                status, check_in, check_out, ot_hours, late = 'ABSENT', None, None, 0, 0
+            elif roll < absent_rate + 0.03:
+                status, check_in, check_out, ot_hours, late = 'HALF_DAY', dt_time(9, 0), dt_time(13, 30), 0, 0
+            else:
+                late = rng.choice([0, 0, 0, 0, 5, 10, 20, 35])
+                status = 'PRESENT'
+                check_in = dt_time(9, late)
+                ot_hours = rng.choice([0, 0, 0, 1, 2])
+                check_out = dt_time(18 + ot_hours, 0)
+            working_hours = None
+            if check_in and check_out:
+                working_hours = round(Decimal(check_out.hour * 60 + check_out.minute
+                                              - check_in.hour * 60 - check_in.minute) / 60, 2)
+            rows.append(DailyAttendance(
+                tenant=tenant,
+                employee_id=employee.employee_id,
+                employee_name=name,
+                department=employee.department,
+                designation=employee.designation,
+                employment_type=employee.employment_type,
+                attendance_status=status,
+                date=current,
+                check_in=check_in,
+                check_out=check_out,
+                working_hours=working_hours,
+                time_status=('LATE' if late else 'ON_TIME') if check_in else None,
+                ot_hours=ot_hours,
+                late_minutes=late,
+            ))
+    DailyAttendance.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+    return len(rows)
+
+
+def _build_monthly_summaries(tenant, year: int, month: int, holiday_count: int) -> int:
+    from ..models import DailyAttendance, MonthlyAttendanceSummary
+
+    start = date(year, month, 1)
+    end = date(year, month, calendar.monthrange(year, month)[1])
+    totals = DailyAttendance.objects.filter(tenant=tenant, date__gte=start, date__lte=end).values(
+        'employee_id'
+    ).annotate(
+        present=Sum(Case(
+            When(attendance_status__in=['PRESENT', 'PAID_LEAVE'], then=Value(Decimal('1'))),
+            When(attendance_status='HALF_DAY', then=Value(Decimal('0.5'))),
+            default=Value(Decimal('0')),
+            output_field=DecimalField(max_digits=5, decimal_places=1),
+        )),
+        ot=Sum('ot_hours'),
+        late=Sum('late_minutes'),
+    )
+    summaries = [
+        MonthlyAttendanceSummary(
+            tenant=tenant,
+            employee_id=row['employee_id'],
+            year=year,
+            month=month,
+            present_days=row['present'] or 0,
+            holiday_days=holiday_count,
+            ot_hours=row['ot'] or 0,
+            late_minutes=row['late'] or 0,
+        )
+        for row in totals
+    ]
+    MonthlyAttendanceSummary.objects.bulk_create(summaries, batch_size=BATCH_SIZE)
+    return len(summaries)
+
+
+def _create_advances(tenant, employees, months: List[tuple], ratio: float, rng: random.Random) -> int:
+    from ..models import AdvanceLedger
+
+    recent = months[-6:]
+    advances = []
+    for employee in employees:
+        if rng.random() >= ratio:
+            continue
+        for _ in range(rng.randint(1, 3)):
+            year, month = rng.choice(recent)
+            amount = Decimal(rng.randrange(1000, 20000, 500))
+            status = rng.choice(['PENDING', 'PENDING', 'PARTIALLY_PAID', 'REPAID'])
+            remaining = {'PENDING': amount, 'PARTIALLY_PAID': (amount / 2).quantize(Decimal('0.01')),
+                         'REPAID': Decimal('0')}[status]
+            advances.append(AdvanceLedger(
+                tenant=tenant,
+                employee_id=employee.employee_id,
+                employee_name=f"{employee.first_name} {employee.last_name}",
+                advance_date=date(year, month, rng.randint(1, 28)),
+                amount=amount,
+                remaining_balance=remaining,
+                for_month=date(year, month, 1).strftime('%b %Y'),
+                payment_method=rng.choice(['CASH', 'BANK_TRANSFER']),
+                status=status,
+            ))
+    AdvanceLedger.objects.bulk_create(advances, batch_size=BATCH_SIZE)
+    return len(advances)
+
+
+def _create_face_embeddings(tenant, employees, count: int, rng: random.Random) -> int:
+    from ..models import FaceEmbedding
+    from ..utils.face_embedding_crypto import encrypt_embedding
+
+    rows = [
+        FaceEmbedding(tenant=tenant, employee=employee, embedding_encrypted=encrypt_embedding(_random_embedding(rng)))
+        for employee in employees[:count]
+    ]
+    FaceEmbedding.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+    return len(rows)
+
+
+def generate_synthetic_tenant(employees: int = 5000, months: int = 24, seed: int = 1,
+                              holidays_per_month: int = 1, advance_ratio: float = 0.2,
+                              absent_rate: float = 0.06, face_embeddings: int = 1000,
+                              payroll_months: int = 3, name: Optional[str] = None,
+                              end: Optional[date] = None, stdout=None):
+    """
+    Create a synthetic tenant and return ``(tenant, admin_user, stats)``.
+
+    Data covers the ``months`` full months before ``end`` (default: today), so
+    every attendance date is in the past. The same arguments produce the same
+    rows; the tenant subdomain includes the seed and scale.
+    """
+    from ..models import CustomUser, Tenant
+    from ..utils.utils import run_bulk_aggregation, set_current_tenant, clear_current_tenant
+    from .advance_balances import refresh_advance_balances
+    from .salary_service import SalaryCalculationService
+
+    def progress(message):
+        logger.info(f"🧪 Synthetic tenant: {message}")
+        if stdout is not None:
+            stdout.write(message)
+
+    rng = random.Random(seed)
+    month_list = _months_back(months, end)
+    first_month = date(*month_list[0], 1)
+    stats = {'employees': employees, 'months': months, 'seed': seed}
+    started = time.perf_counter()
+
+    subdomain = synthetic_subdomain(seed, employees, months)
+    with transaction.atomic():
+        tenant = Tenant.objects.create(
+            name=name or f"Synthetic {employees} x {months}m (seed {seed})",
+            subdomain=subdomain,
+            max_employees=max(employees, 1000),
+            credits=1000,
+            face_attendance_enabled=face_embeddings > 0,
+        )
+        user = CustomUser.objects.create_user(
+            email=f"admin@{subdomain}.invalid",
+            password=None,
+            tenant=tenant,
+            role='admin',
+            first_name='Synthetic',
+            last_name='Admin',
+            email_verified=True,
+        )
+        staff = _create_employees(tenant, employees, rng, first_month)
+        holidays = _create_holidays(tenant, month_list, holidays_per_month, rng)
+    progress(f"tenant {tenant.id} ({subdomain}): {len(staff)} employees, {len(month_list)} months")
+
+    set_current_tenant(tenant)
+    try:
+        attendance_rows = 0
+        for year, month in month_list:
+            with transaction.atomic():
+                month_holidays = holidays.get((year, month), set())
+                attendance_rows += _create_attendance_month(tenant, staff, year, month, month_holidays, absent_rate, rng)
+                _build_monthly_summaries(tenant, year, month, len(month_holidays))
+            run_bulk_aggregation(tenant, date(year, month, 1))
+            progress(f"  {year}-{month:02d}: {attendance_rows} attendance rows so far")
+        stats['daily_attendance'] = attendance_rows
+        stats['holidays'] = sum(len(days) for days in holidays.values())
+
+        with transaction.atomic():
+            stats['advances'] = _create_advances(tenant, staff, month_list, advance_ratio, rng)
+            refresh_advance_balances(tenant)
+            stats['face_embeddings'] = _create_face_embeddings(tenant, staff, min(face_embeddings, len(staff)), rng)
+
+        stats['payroll_months'] = []
+        for year, month in month_list[-payroll_months:] if payroll_months > 0 else []:
+            month_name = calendar.month_name[month].upper()
+            SalaryCalculationService.calculate_salary_for_period(tenant, year, month_name, force_recalculate=True)
+            stats['payroll_months'].append(f"{year}-{month:02d}")
+            progress(f"  payroll calculated for {month_name} {year}")
+    finally:
+        clear_current_tenant()
+
+    stats['generation_seconds'] = round(time.perf_counter() - started, 1)
+    progress(f"done in {stats['generation_seconds']}s")
+    return tenant, user, stats
+
+
+def get_synthetic_tenants():
+    from ..models import Tenant
+    return Tenant.objects.filter(subdomain__startswith=SYNTHETIC_SUBDOMAIN_PREFIX).order_by('id')
+
+
+def delete_synthetic_tenant(tenant) -> None:
+    """Delete a tenant created by ``generate_synthetic_tenant`` (refuses any other tenant)."""
+    if not (tenant.subdomain or '').startswith(SYNTHETIC_SUBDOMAIN_PREFIX):
+        raise ValueError(f"Tenant {tenant.id} is not a synthetic tenant")
+    from ..models import CustomUser
+    from ..utils.signal_utils import disable_signals
+    # Without receivers the cascade is a handful of bulk DELETEs instead of per-row signals
+    with transaction.atomic(), disable_signals():
+        CustomUser.objects.filter(tenant=tenant).delete()
+        tenant.delete()
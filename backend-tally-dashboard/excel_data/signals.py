@@ -1,7 +1,8 @@
 from django.db.models.signals import post_save, post_delete, pre_save
 from django.dispatch import receiver
-from .models import DailyAttendance, Attendance, AdvanceLedger, Payment, SalaryData, MonthlyAttendanceSummary, EmployeeProfile, ChartAggregatedData, CalculatedSalary
+from .models import DailyAttendance, Attendance, AdvanceLedger, Payment, SalaryData, MonthlyAttendanceSummary, EmployeeProfile, ChartAggregatedData, CalculatedSalary, Holiday, Tenant, FaceEmbedding
 from django.db.models import Sum
+from .utils.date_ranges import month_filter
 from datetime import date
 from decimal import Decimal
 
@@ -67,8 +68,7 @@ def sync_attendance_from_daily(sender, instance, **kwargs):
         daily_records = DailyAttendance.objects.filter(
             tenant=tenant,
             employee_id=employee_id,
-            date__year=year,
-            date__month=month,
+            **month_filter(year, month),
         )
 
         # Calculate aggregated values
@@ -301,8 +301,7 @@ def update_monthly_attendance_summary(sender, instance, **kwargs):
         qs = DailyAttendance.objects.filter(
             tenant=tenant,
             employee_id=employee_id,
-            date__year=year,
-            date__month=month,
+            **month_filter(year, month),
         )
 
         # Present counts: PRESENT and PAID_LEAVE count as 1, HALF_DAY as 0.5
@@ -639,4 +638,145 @@ def invalidate_cache_on_employee_update(sender, instance, created, **kwargs):
         
     except Exception as e:
         # Soft fail - don't break employee updates if cache clearing fails
-        logger.warning(f"Failed to invalidate cache on employee update: {e}") 
\ No newline at end of file
+        logger.warning(f"Failed to invalidate cache on employee update: {e}") 
+
+# ---------------------------------------------------------------------------
+# Payroll dirty tracking (incremental recalculation, see services/payroll_dirty.py)
+# ---------------------------------------------------------------------------
+
+def _inputs_changed(instance, old_values, field_names):
+    """Compare in-memory values (possibly raw request strings) with the stored row."""
+    meta = instance._meta
+    return any(
+        meta.get_field(name).to_python(getattr(instance, name)) != old_values[name]
+        for name in field_names
+    )
+
+@receiver([post_save, post_delete], sender=DailyAttendance)
+@receiver([post_save, post_delete], sender=Attendance)
+def mark_payroll_dirty_on_attendance(sender, instance, **kwargs):
+    """Attendance changed: the employee's payroll for that month must be recalculated."""
+    from .services.payroll_dirty import mark_dates_dirty
+    if instance.tenant_id and instance.employee_id and instance.date:
+        mark_dates_dirty(instance.tenant_id, [(instance.employee_id, instance.date)], sender.__name__.lower())
+
+
+@receiver([post_save, post_delete], sender=DailyAttendance)
+@receiver([post_save, post_delete], sender=Attendance)
+def mark_attendance_month_stale(sender, instance, **kwargs):
+    """A row was added or removed: the month's counts in the attendance month catalog are out of date."""
+    from .services.attendance_months import mark_dates_stale
+    if kwargs.get('created', True) and instance.tenant_id and instance.date:
+        mark_dates_stale(instance.tenant_id, [instance.date])
+
+
+@receiver([post_save, post_delete], sender=SalaryData)
+def mark_payroll_dirty_on_salary_data(sender, instance, **kwargs):
+    from .services.payroll_dirty import mark_salary_uploads_dirty
+    if instance.tenant_id:
+        mark_salary_uploads_dirty(instance.tenant_id, [instance])
+
+
+@receiver([post_save, post_delete], sender=AdvanceLedger)
+def mark_payroll_dirty_on_advance(sender, instance, **kwargs):
+    """
+    Advance balance feeds the deduction of every period the employee is paid in.
+    Payment rows do not change ledger balances, so they are not tracked.
+    """
+    from .services.payroll_dirty import mark_employees_dirty_all_periods
+    if instance.tenant_id and instance.employee_id:
+        mark_employees_dirty_all_periods(instance.tenant_id, [instance.employee_id], sender.__name__.lower())
+
+
+@receiver(post_delete, sender=FaceEmbedding)
+def record_face_embedding_removal(sender, instance, origin=None, **kwargs):
+    """Devices syncing the face gallery must drop the embedding (services.face_gallery)."""
+    from .services.face_gallery import record_embedding_removed
+    # A deleted tenant takes its whole gallery with it
+    if isinstance(origin, Tenant) or getattr(origin, 'model', None) is Tenant:
+        return
+    record_embedding_removed(instance.tenant_id, instance.employee_id)
+
+
+@receiver(pre_save, sender=EmployeeProfile)
+def detect_employee_payroll_change(sender, instance, **kwargs):
+    """Remember whether a field used by the salary calculation is about to change."""
+    from .services.payroll_dirty import EMPLOYEE_PAYROLL_FIELDS
+    instance._payroll_inputs_changed = False
+    if not instance.pk:
+        return
+    update_fields = kwargs.get('update_fields')
+    if update_fields is not None and not set(update_fields) & set(EMPLOYEE_PAYROLL_FIELDS):
+        return
+    old = EmployeeProfile.all_objects.filter(pk=instance.pk).values(*EMPLOYEE_PAYROLL_FIELDS).first()
+    if old:
+        try:
+            instance._payroll_inputs_changed = _inputs_changed(instance, old, EMPLOYEE_PAYROLL_FIELDS)
+        except Exception:
+            instance._payroll_inputs_changed = True
+
+
+@receiver(post_save, sender=EmployeeProfile)
+def mark_payroll_dirty_on_employee_change(sender, instance, created, **kwargs):
+    from .services.payroll_dirty import mark_employees_dirty_all_periods
+    if not created and getattr(instance, '_payroll_inputs_changed', False) and instance.employee_id:
+        mark_employees_dirty_all_periods(instance.tenant_id, [instance.employee_id], 'employee_profile')
+
+
+@receiver(pre_save, sender=Holiday)
+def remember_holiday_date(sender, instance, **kwargs):
+    instance._previous_date = None
+    if instance.pk:
+        instance._previous_date = Holiday.all_objects.filter(pk=instance.pk).values_list('date', flat=True).first()
+
+
+@receiver([post_save, post_delete], sender=Holiday)
+def mark_payroll_dirty_on_holiday(sender, instance, **kwargs):
+    """Holidays can apply to any employee of the tenant: the whole month is dirty."""
+    from .services.payroll_dirty import mark_dirty
+    from .models import PayrollDirtyMark
+    dates = {d for d in (instance.date, getattr(instance, '_previous_date', None)) if d}
+    if instance.tenant_id and dates:
+        mark_dirty(instance.tenant_id, [(PayrollDirtyMark.PERIOD_WIDE, d.year, d.month) for d in dates], 'holiday')
+
+
+@receiver(pre_save, sender=Tenant)
+def detect_tenant_rule_change(sender, instance, **kwargs):
+    from .services.payroll_dirty import TENANT_RULE_FIELDS
+    instance._payroll_rules_changed = False
+    if not instance.pk:
+        return
+    update_fields = kwargs.get('update_fields')
+    if update_fields is not None and not set(update_fields) & set(TENANT_RULE_FIELDS):
+        return
+    old = Tenant.objects.filter(pk=instance.pk).values(*TENANT_RULE_FIELDS).first()
+    if old:
+        try:
+            instance._payroll_rules_changed = _inputs_changed(instance, old, TENANT_RULE_FIELDS)
+        except Exception:
+            instance._payroll_rules_changed = True
+
+
+@receiver(post_save, sender=Tenant)
+def mark_payroll_dirty_on_tenant_rules(sender, instance, created, **kwargs):
+    """Average days, break time and weekly rules change every employee's salary."""
+    from .services.payroll_dirty import mark_all_periods_dirty
+    if not created and getattr(instance, '_payroll_rules_changed', False):
+        mark_all_periods_dirty(instance, 'tenant_rules')
+
+
+# ---------------------------------------------------------------------------
+# Materialized advance balances (EmployeeAdvanceBalance)
+# ---------------------------------------------------------------------------
+
+@receiver([post_save, post_delete], sender=AdvanceLedger)
+def refresh_advance_balance_on_ledger_change(sender, instance, **kwargs):
+    """Keep the employee's materialized balance in the ledger write's transaction."""
+    from .services.advance_balances import refresh_advance_balances
+    if not instance.tenant_id or not instance.employee_id:
+        return
+    try:
+        refresh_advance_balances(instance.tenant_id, [instance.employee_id])
+    except Exception as e:
+        import logging
+        logging.getLogger(__name__).error(f"❌ SIGNAL FAILED: Could not refresh advance balance for {instance.employee_id}: {e}")
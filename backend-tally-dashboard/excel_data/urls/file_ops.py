@@ -1,6 +1,7 @@
 from django.urls import path
 
 from ..views import UploadSalaryDataAPIView, DownloadTemplateAPIView, EmployeeProfileViewSet
+from ..views.exports import export_payroll_period, export_daily_attendance
 from ..views.utils import UploadAttendanceDataAPIView, DownloadAttendanceTemplateAPIView, UploadMonthlyAttendanceAPIView
 
 urlpatterns = [
@@ -11,4 +12,6 @@ urlpatterns = [
     path('download-attendance-template/', DownloadAttendanceTemplateAPIView.as_view(), name='download-attendance-template'),
     path('employees/bulk-upload/', EmployeeProfileViewSet.as_view({'post': 'bulk_upload'}), name='employee-bulk-upload'),
     path('employees/download-template/', EmployeeProfileViewSet.as_view({'get': 'download_template'}), name='employee-download-template'),
+    path('export/payroll-period/<int:period_id>/', export_payroll_period, name='export-payroll-period'),
+    path('export/daily-attendance/', export_daily_attendance, name='export-daily-attendance'),
 ]
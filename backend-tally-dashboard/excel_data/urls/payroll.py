@@ -6,7 +6,7 @@ from ..views import (
     get_months_with_attendance, calculate_simple_payroll, calculate_simple_payroll_ultra_fast,
     update_payroll_entry, mark_payroll_paid, payroll_overview, create_current_month_payroll,
     payroll_period_detail, add_employee_advance, auto_payroll_settings, manual_calculate_payroll,
-    save_payroll_period_direct, bulk_update_payroll_period
+    save_payroll_period_direct, bulk_update_payroll_period, simulate_payroll
 )
 
 urlpatterns = [
@@ -35,6 +35,9 @@ urlpatterns = [
     path('auto-payroll-settings/', auto_payroll_settings, name='auto-payroll-settings'),
     path('manual-calculate-payroll/', manual_calculate_payroll, name='manual-calculate-payroll'),
 
+    # What-if payroll simulation (read-only)
+    path('payroll-periods/<int:period_id>/simulate/', simulate_payroll, name='simulate-payroll'),
+
     # Direct payroll save endpoint
     path('save-payroll-period-direct/', save_payroll_period_direct, name='save-payroll-period-direct'),
 
@@ -7,13 +7,14 @@ from ..views import (
     CleanupTokensView, get_salary_config, update_salary_config,
     recalculate_penalty_bonus_days, RevertPenaltyDayView,
     get_face_attendance_config, update_face_attendance_config,
-    list_timezones, update_tenant_timezone,
+    list_timezones, update_tenant_timezone, metrics_endpoint,
 )
 
 urlpatterns = [
     path('dashboard/stats/', dashboard_stats, name='dashboard-stats'),
     path('admin/cleanup/', cleanup_salary_data, name='cleanup-data'),
     path('health/', health_check, name='health-check'),
+    path('metrics/', metrics_endpoint, name='metrics'),
     path('dropdown-options/', get_dropdown_options, name='dropdown-options'),
     path('calculate-ot/', calculate_ot_rate, name='calculate-ot'),
     path('salary-config/', get_salary_config, name='salary-config'),
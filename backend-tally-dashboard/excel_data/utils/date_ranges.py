@@ -0,0 +1,64 @@
+"""
+Sargable month/year filters for date columns.
+
+``date__year=y, date__month=m`` compiles to ``EXTRACT(MONTH FROM date) = m``
+(plus a year BETWEEN), which cannot use ``(tenant, date)`` indexes for the
+month and defeats partition pruning on the monthly DailyAttendance partitions.
+These helpers build plain half-open ranges instead:
+
+    DailyAttendance.objects.filter(tenant=tenant, **month_filter(2025, 6))
+    # WHERE date >= '2025-06-01' AND date < '2025-07-01'
+"""
+
+from datetime import date
+from typing import Dict, Iterable, List, Tuple
+
+from django.db.models import Q
+
+
+def month_bounds(year: int, month: int) -> Tuple[date, date]:
+    """First day of the month and first day of the next month."""
+    year, month = int(year), int(month)
+    first = date(year, month, 1)
+    next_first = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+    return first, next_first
+
+
+def month_filter(year: int, month: int, field: str = 'date') -> Dict[str, date]:
+    """Filter kwargs for ``field`` within the month."""
+    first, next_first = month_bounds(year, month)
+    return {f'{field}__gte': first, f'{field}__lt': next_first}
+
+
+def year_filter(year: int, field: str = 'date') -> Dict[str, date]:
+    """Filter kwargs for ``field`` within the year."""
+    year = int(year)
+    return {f'{field}__gte': date(year, 1, 1), f'{field}__lt': date(year + 1, 1, 1)}
+
+
+def month_range_q(year: int, month: int, field: str = 'date') -> Q:
+    return Q(**month_filter(year, month, field))
+
+
+def merge_month_ranges(months: Iterable[Tuple[int, int]]) -> List[Tuple[date, date]]:
+    """Half-open date ranges covering ``months``; consecutive months are merged."""
+    ranges: List[Tuple[date, date]] = []
+    for year, month in sorted({(int(y), int(m)) for y, m in months}):
+        first, next_first = month_bounds(year, month)
+        if ranges and ranges[-1][1] == first:
+            ranges[-1] = (ranges[-1][0], next_first)
+        else:
+            ranges.append((first, next_first))
+    return ranges
+
+
+def months_q(months: Iterable[Tuple[int, int]], field: str = 'date') -> Q:
+    """
+    Q for ``field`` within any of ``months`` ((year, month) pairs).
+
+    An empty list matches nothing.
+    """
+    query = Q(pk__in=[])
+    for first, next_first in merge_month_ranges(months):
+        query |= Q(**{f'{field}__gte': first, f'{field}__lt': next_first})
+    return query
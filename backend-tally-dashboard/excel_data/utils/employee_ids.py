@@ -0,0 +1,142 @@
+"""
+Employee ID allocation backed by per-(tenant, base ID) counters.
+
+Generated IDs look like ``SID-MA-025`` (name, department, tenant) with a
+collision suffix: the n-th ID for a base gets ``''`` for n = 0, then ``-A`` ..
+``-Z``, ``-AA``, ``-AB``, ... (the first ten match the previous -A..-J scheme).
+
+A batch reserves its suffixes for every base it needs in a single
+``INSERT ... ON CONFLICT DO UPDATE ... RETURNING`` on EmployeeIdCounter, so
+concurrent uploads get disjoint blocks without reading the tenant's ID space.
+Candidates are then checked against existing employees in one query bounded by
+the batch size; anything taken (manually entered IDs, rows older than the
+counter) is re-reserved.
+"""
+
+import logging
+import re
+import uuid
+from collections import Counter
+from typing import Dict, List, Optional
+
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+GENERATED_ID_RE = re.compile(r'^(?P<base>[A-Z]{3}-[A-Z]{2}-\d{3,})(?:-(?P<suffix>[A-Z]+))?$')
+
+# Re-reservation rounds before falling back to a random ID
+MAX_ALLOCATION_ROUNDS = 5
+
+_EMPTY_NAMES = ('', '0', 'nan', 'NaN', '-')
+
+
+def employee_id_base(name, department, tenant_id: int) -> Optional[str]:
+    """``NAM-DE-TTT`` for a name/department, or None when the name is empty."""
+    if not name or str(name).strip() in _EMPTY_NAMES:
+        return None
+
+    # First three letters of the name, first two of the department (X padded)
+    name_clean = ''.join(char for char in str(name).strip().upper() if char.isalpha())
+    name_prefix = name_clean[:3].ljust(3, 'X')
+    if department and str(department).strip():
+        dept_clean = ''.join(char for char in str(department).strip().upper() if char.isalpha())
+        dept_prefix = dept_clean[:2].ljust(2, 'X')
+    else:
+        dept_prefix = 'XX'
+    return f"{name_prefix}-{dept_prefix}-{str(tenant_id).zfill(3)}"
+
+
+def suffix_for_index(index: int) -> str:
+    """0 -> '', 1 -> '-A', 26 -> '-Z', 27 -> '-AA' (bijective base 26)."""
+    letters = ''
+    while index > 0:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(ord('A') + remainder) + letters
+    return f"-{letters}" if letters else ''
+
+
+def index_for_suffix(letters: Optional[str]) -> int:
+    """Inverse of ``suffix_for_index`` (without the dash)."""
+    index = 0
+    for char in letters or '':
+        index = index * 26 + (ord(char) - ord('A') + 1)
+    return index
+
+
+def _random_id() -> str:
+    return str(uuid.uuid4())[:8]
+
+
+def reserve_suffix_blocks(tenant_id: int, counts: Dict[str, int]) -> Dict[str, int]:
+    """
+    Reserve ``counts[base]`` consecutive suffix indexes per base in one statement.
+
+    Returns ``{base: first reserved index}``.
+    """
+    if not counts:
+        return {}
+    bases = sorted(counts)
+    values_sql = ', '.join(['(%s, %s, %s, NOW(), NOW())'] * len(bases))
+    params = []
+    for base in bases:
+        params.extend([tenant_id, base, counts[base]])
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO excel_data_employeeidcounter (tenant_id, base_id, allocated, created_at, updated_at)
+            VALUES {values_sql}
+            ON CONFLICT (tenant_id, base_id) DO UPDATE
+                SET allocated = excel_data_employeeidcounter.allocated + EXCLUDED.allocated,
+                    updated_at = NOW()
+            RETURNING base_id, allocated
+            """,
+            params,
+        )
+        return {base: allocated - counts[base] for base, allocated in cursor.fetchall()}
+
+
+def allocate_employee_ids(tenant_id: int, bases: List[Optional[str]]) -> List[str]:
+    """
+    One unique employee ID per entry of ``bases`` (None -> random ID).
+
+    IDs are unique within the batch and against existing employees of the tenant.
+    """
+    from ..models import EmployeeProfile
+
+    result: List[Optional[str]] = [None] * len(bases)
+    pending = []
+    for index, base in enumerate(bases):
+        if base is None:
+            result[index] = _random_id()
+        else:
+            pending.append(index)
+
+    for _ in range(MAX_ALLOCATION_ROUNDS):
+        if not pending:
+            break
+        starts = reserve_suffix_blocks(tenant_id, Counter(bases[i] for i in pending))
+        next_index = dict(starts)
+        candidates = {}
+        for i in pending:
+            base = bases[i]
+            candidates[i] = f"{base}{suffix_for_index(next_index[base])}"
+            next_index[base] += 1
+
+        taken = set(
+            EmployeeProfile.all_objects.filter(
+                tenant_id=tenant_id,
+                employee_id__in=list(candidates.values())
+            ).values_list('employee_id', flat=True)
+        )
+        for i, candidate in candidates.items():
+            if candidate not in taken:
+                result[i] = candidate
+        pending = [i for i in pending if result[i] is None]
+        if pending:
+            logger.info(f"Employee ID allocation: {len(taken)} reserved IDs already in use for tenant {tenant_id}, retrying")
+
+    for i in pending:
+        logger.warning(f"Employee ID allocation exhausted for base {bases[i]} (tenant {tenant_id}), using random ID")
+        result[i] = _random_id()
+    return result
@@ -3,18 +3,22 @@ import time
 import logging
 from typing import Dict, List, Tuple
 
+import numpy as np
+
 from .face_embedding_crypto import decrypt_embedding
 
 logger = logging.getLogger(__name__)
 
 
 class _TenantEmbeddingCacheEntry:
-    __slots__ = ("version", "expires_at", "embeddings")
+    __slots__ = ("version", "expires_at", "embeddings", "matrices")
 
     def __init__(self, version: int, expires_at: float, embeddings: List[Tuple[int, List[float]]]):
         self.version = version
         self.expires_at = expires_at
         self.embeddings = embeddings
+        # Built on first use by get_embedding_matrices
+        self.matrices = None
 
 
 _CACHE_LOCK = threading.Lock()
@@ -65,3 +69,35 @@ def get_cached_embeddings(tenant, ttl_seconds: int = 600) -> List[Tuple[int, Lis
         _TENANT_CACHE[tenant_id] = _TenantEmbeddingCacheEntry(version, expires_at, embeddings)
 
     return embeddings
+
+
+def _build_matrices(embeddings: List[Tuple[int, List[float]]]) -> Dict[int, Tuple[np.ndarray, np.ndarray]]:
+    by_dim: Dict[int, List[Tuple[int, List[float]]]] = {}
+    for employee_id, vector in embeddings:
+        by_dim.setdefault(len(vector), []).append((employee_id, vector))
+    return {
+        dim: (
+            np.array([employee_id for employee_id, _ in rows], dtype=np.int64),
+            np.array([vector for _, vector in rows], dtype=np.float32),
+        )
+        for dim, rows in by_dim.items()
+    }
+
+
+def get_embedding_matrices(tenant, ttl_seconds: int = 600) -> Dict[int, Tuple[np.ndarray, np.ndarray]]:
+    """
+    The tenant's embeddings as matrices for batch scoring, keyed by dimension:
+    ``{dim: (employee_ids, matrix)}`` with one row per embedding. Cached with
+    the embeddings of ``get_cached_embeddings``.
+    """
+    embeddings = get_cached_embeddings(tenant, ttl_seconds=ttl_seconds)
+    with _CACHE_LOCK:
+        entry = _TENANT_CACHE.get(tenant.id)
+        if entry is not None and entry.embeddings is embeddings and entry.matrices is not None:
+            return entry.matrices
+    matrices = _build_matrices(embeddings)
+    with _CACHE_LOCK:
+        entry = _TENANT_CACHE.get(tenant.id)
+        if entry is not None and entry.embeddings is embeddings:
+            entry.matrices = matrices
+    return matrices
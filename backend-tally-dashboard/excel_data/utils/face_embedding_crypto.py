@@ -1,24 +1,54 @@
+import hashlib
 import json
-from typing import List
+import threading
+from typing import List, Optional, Tuple
 
 from django.conf import settings
 from django.core.exceptions import ImproperlyConfigured
-from cryptography.fernet import Fernet, InvalidToken
+from cryptography.fernet import Fernet, InvalidToken, MultiFernet
 
+# (keys it was built from, primary Fernet, keyring) -- rebuilt when the settings change
+_KEYRING: Optional[Tuple[Tuple[bytes, ...], Fernet, MultiFernet]] = None
+_KEYRING_LOCK = threading.Lock()
 
-def _get_fernet() -> Fernet:
-    """
-    Returns a Fernet instance using a symmetric key from settings.
 
-    You MUST set FACE_EMBEDDING_SECRET_KEY in environment; it should be a
-    base64 url-safe key generated via: Fernet.generate_key().decode().
-    """
+def _configured_keys() -> Tuple[bytes, ...]:
     key = getattr(settings, "FACE_EMBEDDING_SECRET_KEY", None)
     if not key:
         raise ImproperlyConfigured(
             "FACE_EMBEDDING_SECRET_KEY is not configured in Django settings."
         )
-    return Fernet(key.encode("utf-8") if isinstance(key, str) else key)
+    old_keys = getattr(settings, "FACE_EMBEDDING_OLD_SECRET_KEYS", None) or []
+    return tuple(k.encode("utf-8") if isinstance(k, str) else k for k in [key, *old_keys] if k)
+
+
+def _get_keyring() -> Tuple[Fernet, MultiFernet]:
+    """
+    Returns the primary Fernet and a MultiFernet of all keys, built once per key set.
+
+    You MUST set FACE_EMBEDDING_SECRET_KEY in environment; it should be a
+    base64 url-safe key generated via: Fernet.generate_key().decode().
+    FACE_EMBEDDING_OLD_SECRET_KEYS lists retired keys that can still decrypt
+    (rotation: see services.face_key_rotation).
+    """
+    global _KEYRING
+    keys = _configured_keys()
+    keyring = _KEYRING
+    if keyring is None or keyring[0] != keys:
+        with _KEYRING_LOCK:
+            fernets = [Fernet(k) for k in keys]
+            keyring = _KEYRING = (keys, fernets[0], MultiFernet(fernets))
+    return keyring[1], keyring[2]
+
+
+def primary_key_fingerprint() -> str:
+    """Short, non-secret identifier of the primary key."""
+    return hashlib.sha256(_configured_keys()[0]).hexdigest()[:16]
+
+
+def _get_fernet() -> MultiFernet:
+    """The keyring: encrypts with the primary key, decrypts with any configured key."""
+    return _get_keyring()[1]
 
 
 def encrypt_embedding(embedding: List[float]) -> str:
@@ -42,3 +72,21 @@ def decrypt_embedding(encrypted: str) -> List[float]:
         raise ValueError("Invalid embedding encryption token") from exc
     return json.loads(data.decode("utf-8"))
 
+
+def reencrypt_embedding(encrypted: str) -> Optional[str]:
+    """
+    The token re-encrypted with the primary key, or None when it already uses it.
+    Raises ValueError when no configured key can decrypt it.
+    """
+    primary, keyring = _get_keyring()
+    token = encrypted.encode("utf-8")
+    try:
+        # The HMAC check fails before any decryption for tokens of other keys
+        primary.decrypt(token)
+        return None
+    except InvalidToken:
+        pass
+    try:
+        return keyring.rotate(token).decode("utf-8")
+    except InvalidToken as exc:
+        raise ValueError("Invalid embedding encryption token") from exc
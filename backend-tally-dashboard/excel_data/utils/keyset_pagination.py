@@ -0,0 +1,114 @@
+"""
+Keyset (cursor) pagination helpers for large progressive-loading endpoints.
+
+Offset pagination forces every page to build (or unpickle) the whole dataset
+before slicing it. Keyset pagination instead remembers the sort key of the
+last row served and asks the database for ``WHERE (key) > cursor LIMIT n``,
+which an index on the sort key answers without touching earlier rows.
+
+Cursors are opaque to clients: a url-safe base64 encoding of the JSON list of
+sort-key values of the last row on the previous page.
+"""
+
+import base64
+import binascii
+import hashlib
+import json
+import time
+from typing import Any, Iterable, List, Optional, Sequence, Tuple
+
+from django.core.cache import cache
+from django.db.models import Q
+
+
+class InvalidCursor(ValueError):
+    """Raised when a client supplies a cursor that cannot be decoded."""
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Encode the sort-key values of the last row into an opaque cursor."""
+    payload = json.dumps(list(values), separators=(",", ":"), default=str)
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, key_length: int) -> Optional[List[Any]]:
+    """
+    Decode a cursor produced by ``encode_cursor``.
+
+    An empty cursor means "first page" and returns None.
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8"))
+    except (binascii.Error, UnicodeError, ValueError) as exc:
+        raise InvalidCursor("Malformed cursor") from exc
+    if not isinstance(values, list) or len(values) != key_length:
+        raise InvalidCursor("Cursor does not match the sort key of this endpoint")
+    return values
+
+
+def keyset_filter(queryset, key_fields: Sequence[str], after: Optional[Sequence[Any]]):
+    """
+    Restrict ``queryset`` to rows strictly after ``after`` in ``key_fields`` order.
+
+    ``(a, b, c) > (x, y, z)`` is expanded to
+    ``a >= x AND (a > x OR (a = x AND b > y) OR (a = x AND b = y AND c > z))`` so
+    it works on every backend. The redundant ``a >= x`` is what lets the planner
+    seek a composite index on the key columns instead of scanning every earlier
+    row: an OR chain alone has no range bound on the leading column.
+    All key fields must be non-null and sorted ascending.
+    """
+    if after is None:
+        return queryset
+    condition = Q()
+    for i, field in enumerate(key_fields):
+        equal_prefix = {key_fields[j]: after[j] for j in range(i)}
+        condition |= Q(**equal_prefix, **{f"{field}__gt": after[i]})
+    return queryset.filter(Q(**{f"{key_fields[0]}__gte": after[0]}) & condition)
+
+
+def fetch_keyset_page(queryset, key_fields: Sequence[str], after: Optional[Sequence[Any]], limit: int) -> Tuple[list, Optional[str]]:
+    """
+    Fetch one page of ``queryset`` ordered by ``key_fields``.
+
+    Returns ``(rows, next_cursor)``; ``next_cursor`` is None on the last page.
+    Rows may be model instances or ``.values()`` dicts.
+    """
+    page_qs = keyset_filter(queryset, key_fields, after).order_by(*key_fields)
+    rows = list(page_qs[:limit + 1])
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = None
+    if has_more and rows:
+        last = rows[-1]
+        if isinstance(last, dict):
+            next_cursor = encode_cursor([last[f] for f in key_fields])
+        else:
+            next_cursor = encode_cursor([getattr(last, f) for f in key_fields])
+    return rows, next_cursor
+
+
+def get_dataset_version(version_key: str) -> str:
+    """
+    Return the current version token for a cached dataset.
+
+    Page caches embed this token in their keys. The token lives under a key the
+    existing invalidation code already deletes (e.g. ``directory_data_{tenant_id}``),
+    so deleting it retires every cached page at once without pattern deletes,
+    which the database cache backend does not support.
+    """
+    version = cache.get(version_key)
+    if version is None:
+        cache.add(version_key, str(time.time_ns()), None)
+        version = cache.get(version_key)
+    return str(version)
+
+
+def page_cache_key(prefix: str, version: str, cursor: str, limit: int, extra: Iterable[Any] = ()) -> str:
+    """Build a cache key for one keyset page of a versioned dataset."""
+    cursor_digest = hashlib.md5(cursor.encode("utf-8")).hexdigest() if cursor else "first"
+    parts = [prefix, f"v{version}", f"c{cursor_digest}", f"l{limit}"]
+    parts.extend(str(p) for p in extra)
+    return "_".join(parts)
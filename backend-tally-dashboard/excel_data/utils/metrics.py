@@ -0,0 +1,237 @@
+"""
+Request instrumentation: per-route latency, SQL and cache metrics.
+
+``MetricsMiddleware`` opens a ``RequestStats`` for every request:
+
+- SQL statements and their time are counted by a DB ``execute_wrapper``;
+- cache hits/misses are counted by ``InstrumentedDatabaseCache`` (the
+  configured cache backend);
+- latency, status and response bytes are recorded per route pattern when the
+  response leaves the middleware (streamed bodies are counted as they are sent).
+
+Totals live in a process-local registry rendered in Prometheus text format by
+``/api/metrics/``. Every gunicorn worker keeps its own registry, so series
+carry a ``worker`` label (the pid); sum over it in queries.
+
+Views can read the running request's numbers with ``current_stats()`` /
+``performance_snapshot()`` to fill their ``performance`` blocks, and time their
+steps with ``record_step()``.
+"""
+
+import os
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from django.core.cache.backends.db import DatabaseCache
+
+# Request latency histogram buckets, in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_current: ContextVar[Optional['RequestStats']] = ContextVar('hrms_request_stats', default=None)
+
+
+class RequestStats:
+    """Counters for one request."""
+
+    __slots__ = ('started', 'db_queries', 'db_time', 'cache_hits', 'cache_misses', 'timings')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db_queries = 0
+        self.db_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.timings: Dict[str, float] = {}
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def __call__(self, execute, sql, params, many, context):
+        # Django execute_wrapper protocol
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_queries += 1
+            self.db_time += time.perf_counter() - start
+
+    def server_timing(self) -> str:
+        parts = [
+            f'app;dur={self.elapsed * 1000:.1f}',
+            f'db;dur={self.db_time * 1000:.1f};desc="{self.db_queries} queries"',
+            f'cache;desc="{self.cache_hits} hit, {self.cache_misses} miss"',
+        ]
+        for name, seconds in self.timings.items():
+            parts.append(f'{name};dur={seconds * 1000:.1f}')
+        return ', '.join(parts)
+
+
+def begin_request() -> tuple:
+    stats = RequestStats()
+    return stats, _current.set(stats)
+
+
+def end_request(token) -> None:
+    _current.reset(token)
+
+
+def current_stats() -> Optional[RequestStats]:
+    """Stats of the request being handled on this thread, if any."""
+    return _current.get()
+
+
+def add_timing(name: str, seconds: float) -> None:
+    """Report a named step (e.g. 'attendance_query') in the Server-Timing header."""
+    stats = _current.get()
+    if stats is not None:
+        stats.timings[name] = stats.timings.get(name, 0.0) + seconds
+
+
+def record_step(breakdown: Dict, key: str, started: float) -> float:
+    """
+    Store a view step's milliseconds in its ``timing_breakdown`` / ``queryTimings``
+    dict under ``key`` and report the step in Server-Timing (totals excepted: the
+    header already has ``app``). ``started`` is the step's time.time().
+    """
+    seconds = time.time() - started
+    if not key.startswith('total_'):
+        add_timing(key[:-3] if key.endswith('_ms') else key, seconds)
+    breakdown[key] = round(seconds * 1000, 2)
+    return breakdown[key]
+
+
+def performance_snapshot() -> Dict:
+    """Current request's numbers for a view's ``performance`` block."""
+    stats = _current.get()
+    if stats is None:
+        return {}
+    return {
+        'elapsed_ms': round(stats.elapsed * 1000, 2),
+        'db_queries': stats.db_queries,
+        'db_time_ms': round(stats.db_time * 1000, 2),
+        'cache_hits': stats.cache_hits,
+        'cache_misses': stats.cache_misses,
+    }
+
+
+class _RouteMetrics:
+    __slots__ = ('requests', 'bucket_counts', 'latency_sum', 'db_queries', 'db_time',
+                 'cache_hits', 'cache_misses', 'response_bytes')
+
+    def __init__(self):
+        self.requests: Dict[tuple, int] = {}
+        self.bucket_counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.latency_sum = 0.0
+        self.db_queries = 0
+        self.db_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.response_bytes = 0
+
+
+class MetricsRegistry:
+    """Process-local totals per route."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes: Dict[str, _RouteMetrics] = {}
+
+    def _route(self, route: str) -> _RouteMetrics:
+        metrics = self._routes.get(route)
+        if metrics is None:
+            metrics = self._routes.setdefault(route, _RouteMetrics())
+        return metrics
+
+    def record_request(self, route: str, method: str, status: int, stats: RequestStats, response_bytes: int):
+        latency = stats.elapsed
+        with self._lock:
+            metrics = self._route(route)
+            key = (method, f'{status // 100}xx')
+            metrics.requests[key] = metrics.requests.get(key, 0) + 1
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if latency <= bound:
+                    metrics.bucket_counts[i] += 1
+                    break
+            else:
+                metrics.bucket_counts[-1] += 1
+            metrics.latency_sum += latency
+            metrics.db_queries += stats.db_queries
+            metrics.db_time += stats.db_time
+            metrics.cache_hits += stats.cache_hits
+            metrics.cache_misses += stats.cache_misses
+            metrics.response_bytes += response_bytes
+
+    def add_response_bytes(self, route: str, response_bytes: int):
+        with self._lock:
+            self._route(route).response_bytes += response_bytes
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        worker = os.getpid()
+        lines = []
+
+        def family(name, kind, help_text):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+
+        with self._lock:
+            routes = sorted(self._routes.items())
+
+            family('hrms_http_requests_total', 'counter', 'Requests by route, method and status class')
+            for route, m in routes:
+                for (method, status), count in sorted(m.requests.items()):
+                    lines.append(
+                        f'hrms_http_requests_total{{route="{_escape(route)}",method="{method}",'
+                        f'status="{status}",worker="{worker}"}} {count}'
+                    )
+
+            family('hrms_http_request_duration_seconds', 'histogram', 'Request latency by route')
+            for route, m in routes:
+                labels = f'route="{_escape(route)}",worker="{worker}"'
+                cumulative = 0
+                for bound, count in zip(LATENCY_BUCKETS, m.bucket_counts):
+                    cumulative += count
+                    lines.append(f'hrms_http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+                cumulative += m.bucket_counts[-1]
+                lines.append(f'hrms_http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {cumulative}')
+                lines.append(f'hrms_http_request_duration_seconds_sum{{{labels}}} {m.latency_sum:.6f}')
+                lines.append(f'hrms_http_request_duration_seconds_count{{{labels}}} {cumulative}')
+
+            for name, attr, help_text in (
+                ('hrms_db_queries_total', 'db_queries', 'SQL statements executed by route'),
+                ('hrms_db_query_seconds_total', 'db_time', 'Time spent in SQL by route'),
+                ('hrms_cache_hits_total', 'cache_hits', 'Cache hits by route'),
+                ('hrms_cache_misses_total', 'cache_misses', 'Cache misses by route'),
+                ('hrms_http_response_bytes_total', 'response_bytes', 'Response body bytes by route'),
+            ):
+                family(name, 'counter', help_text)
+                for route, m in routes:
+                    value = getattr(m, attr)
+                    value = f'{value:.6f}' if isinstance(value, float) else value
+                    lines.append(f'{name}{{route="{_escape(route)}",worker="{worker}"}} {value}')
+
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+registry = MetricsRegistry()
+
+
+class InstrumentedDatabaseCache(DatabaseCache):
+    """DatabaseCache that counts hits and misses on the current request."""
+
+    # DatabaseCache.get() goes through get_many(), so this covers both
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        values = super().get_many(keys, version)
+        stats = _current.get()
+        if stats is not None:
+            stats.cache_hits += len(values)
+            stats.cache_misses += len(keys) - len(values)
+        return values
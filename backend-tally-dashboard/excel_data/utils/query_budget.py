@@ -0,0 +1,169 @@
+"""
+Query budgets for hot endpoints and service methods.
+
+A budget is the maximum number of SQL statements a call may run, independent of
+tenant size. Declare it where the code lives:
+
+    @query_budget(12)
+    def directory_data(self, request): ...
+
+Budgets are checked by ``manage.py check_query_budgets`` on synthetic tenants
+of 10 and 1,000 employees, so a per-employee query blows the budget at the
+larger size, and so does a statement repeated once per employee even within
+budget (writes batched per N rows may grow slowly and still fit). At
+runtime the decorator only records the budget, unless ``QUERY_BUDGET_MODE`` is
+``'log'`` (log overruns) or ``'raise'`` (raise ``QueryBudgetExceeded``).
+
+Overrun reports group statements by shape (literals stripped) with their count
+and the first application frame that issued them.
+"""
+
+import functools
+import logging
+import re
+import time
+import traceback
+from collections import OrderedDict
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+# Declared budgets: name -> max queries
+QUERY_BUDGETS: Dict[str, int] = {}
+
+_APP_ROOT = __name__.rsplit('.', 2)[0].replace('.', '/') + '/'
+_THIS_FILE = __file__.rsplit('.', 1)[0]
+
+_LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_IN_LIST_RE = re.compile(r'\((?:\s*%s\s*,?)+\)|\((?:\s*\?\s*,?)+\)')
+_ARRAY_RE = re.compile(r'ARRAY\[[^\]]*\]')
+_SAVEPOINT_RE = re.compile(r'"s\d+_x\d+"')
+
+# Set by record_budgeted_calls(): budget name -> recorders of the calls made
+_recording: ContextVar[Optional[Dict[str, List['QueryRecorder']]]] = ContextVar('query_budget_recording', default=None)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """A call ran more SQL statements than its declared budget."""
+
+    def __init__(self, name: str, budget: int, recorder: 'QueryRecorder'):
+        self.name = name
+        self.budget = budget
+        self.recorder = recorder
+        super().__init__(recorder.report(f"{name}: {len(recorder.queries)} queries, budget {budget}"))
+
+
+class QueryRecorder:
+    """execute_wrapper that keeps each statement with its time and call site."""
+
+    def __init__(self):
+        self.queries: List[Dict] = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append({
+                'sql': sql,
+                'seconds': time.perf_counter() - start,
+                'location': _call_site(),
+            })
+
+    def __len__(self):
+        return len(self.queries)
+
+    def grouped(self) -> List[Dict]:
+        """Statements grouped by shape, most frequent first."""
+        groups: 'OrderedDict[str, Dict]' = OrderedDict()
+        for query in self.queries:
+            shape = normalize_sql(query['sql'])
+            group = groups.get(shape)
+            if group is None:
+                group = groups[shape] = {'sql': shape, 'count': 0, 'seconds': 0.0, 'locations': OrderedDict()}
+            group['count'] += 1
+            group['seconds'] += query['seconds']
+            group['locations'][query['location']] = group['locations'].get(query['location'], 0) + 1
+        return sorted(groups.values(), key=lambda g: -g['count'])
+
+    def report(self, title: str, limit: int = 15) -> str:
+        lines = [title]
+        for group in self.grouped()[:limit]:
+            lines.append(f"  {group['count']:>5} x  {group['sql'][:240]}")
+            for location, count in list(group['locations'].items())[:3]:
+                lines.append(f"           {count:>5} from {location}")
+        return '\n'.join(lines)
+
+
+def normalize_sql(sql: str) -> str:
+    """Collapse literals and IN/ARRAY lists so repeated statements share one shape."""
+    shape = _SAVEPOINT_RE.sub('"savepoint"', sql)
+    shape = _ARRAY_RE.sub('ARRAY[...]', shape)
+    shape = _IN_LIST_RE.sub('(...)', shape)
+    shape = _LITERAL_RE.sub('?', shape)
+    return ' '.join(shape.split())
+
+
+def _call_site() -> str:
+    """First application frame (outside this module) on the stack."""
+    for frame in reversed(traceback.extract_stack()[:-2]):
+        filename = frame.filename.replace('\\', '/')
+        if _APP_ROOT in filename and not filename.startswith(_THIS_FILE):
+            return f"{filename.split(_APP_ROOT, 1)[1]}:{frame.lineno} in {frame.name}"
+    return 'unknown'
+
+
+@contextmanager
+def capture_queries():
+    """Record every statement run on any connection inside the block."""
+    recorder = QueryRecorder()
+    with ExitStack() as stack:
+        for conn in connections.all():
+            stack.enter_context(conn.execute_wrapper(recorder))
+        yield recorder
+
+
+@contextmanager
+def record_budgeted_calls():
+    """Collect the queries of every budgeted call made inside the block, by budget name."""
+    calls: Dict[str, List[QueryRecorder]] = {}
+    token = _recording.set(calls)
+    try:
+        yield calls
+    finally:
+        _recording.reset(token)
+
+
+def query_budget(max_queries: int, name: Optional[str] = None):
+    """Declare the maximum queries a function may run, whatever the tenant size."""
+    def decorator(func):
+        budget_name = name or func.__qualname__
+        QUERY_BUDGETS[budget_name] = max_queries
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            calls = _recording.get()
+            mode = getattr(settings, 'QUERY_BUDGET_MODE', 'off')
+            if calls is None and mode not in ('log', 'raise'):
+                return func(*args, **kwargs)
+            with capture_queries() as recorder:
+                result = func(*args, **kwargs)
+            if calls is not None:
+                calls.setdefault(budget_name, []).append(recorder)
+            elif len(recorder) > max_queries:
+                if mode == 'raise':
+                    raise QueryBudgetExceeded(budget_name, max_queries, recorder)
+                logger.warning(recorder.report(
+                    f"⚠️ Query budget exceeded: {budget_name} ran {len(recorder)} queries (budget {max_queries})", limit=5
+                ))
+            return result
+
+        wrapper.query_budget = max_queries
+        wrapper.query_budget_name = budget_name
+        return wrapper
+    return decorator
@@ -22,6 +22,8 @@ def disable_signals():
     for signal in [post_save, post_delete, pre_save, pre_delete]:
         saved_receivers[signal] = signal.receivers
         signal.receivers = []
+        # Model signals cache receivers per sender; drop the cache or they still fire
+        signal.sender_receivers_cache.clear()
     
     try:
         yield
@@ -29,6 +31,7 @@ def disable_signals():
         # Restore original signal receivers
         for signal, receivers in saved_receivers.items():
             signal.receivers = receivers
+            signal.sender_receivers_cache.clear()
 
 
 @contextmanager
@@ -1,112 +1,292 @@
 """
-In-memory SSE broadcaster - No Redis required!
-Works great for development and single-server deployments
+SSE broadcaster - No Redis required!
 
-For production with multiple workers, uses database cache as fallback
+Every event gets a monotonic id and is delivered to the subscriber queues of
+each worker process:
+
+- Development (DEBUG): events stay in this process; ids come from a local
+  counter and the last REPLAY_LIMIT events are kept for ``Last-Event-ID``
+  resume.
+- Production (multiple workers): events are appended to the SSEEvent table
+  after the publishing transaction commits. One EventLogPoller thread per
+  worker reads new rows (``id > last seen``) every SSE_POLL_INTERVAL seconds
+  while the worker has subscribers and fans them out to its local queues, so
+  database load scales with workers, not with connected clients. Reconnecting
+  clients replay missed events from the table.
+
+Events are routed by channel: ``user:<id>`` for one user's session events,
+``tenant:<id>`` for a tenant's data-change notifications (payroll calculated,
+upload finished) and the global ``session_conflicts`` channel, which streams
+without a ticket get only while SSE_LEGACY_BROADCAST is on. A stream subscribes to its own channels only,
+so delivering an event costs one dict lookup plus the matching subscribers.
 """
+import asyncio
 import json
 import logging
+import os
 import queue
+import secrets
 import threading
-from typing import Dict, Set
-from django.core.cache import cache
+import time
+from collections import OrderedDict, deque
+from itertools import count
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Union
+
 from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections, transaction
+from django.utils import timezone
 
 logger = logging.getLogger(__name__)
 
 # Use database broadcasting in production (when multiple workers)
 USE_DB_BROADCASTING = not getattr(settings, 'DEBUG', True)
 
+POLL_INTERVAL = getattr(settings, 'SSE_POLL_INTERVAL', 1.0)
+EVENT_RETENTION_SECONDS = getattr(settings, 'SSE_EVENT_RETENTION_SECONDS', 600)
+# Events replayed to a reconnecting client at most
+REPLAY_LIMIT = 100
+# An id skipped by the poller (transaction committed out of order) is re-read for this long
+GAP_TIMEOUT_SECONDS = 10
+POLL_BATCH_SIZE = 500
+PRUNE_INTERVAL_SECONDS = 60
+# Recently delivered ids, to drop duplicates (local publish + poller, replay + live)
+DELIVERED_IDS_KEPT = 10000
+# Also publish user-targeted session events on the global channel (clients without a token).
+# Off by default: the global channel is open to any stream, and these events carry user details
+LEGACY_BROADCAST = getattr(settings, 'SSE_LEGACY_BROADCAST', False)
+# Seconds a stream ticket stays valid: the client opens the stream right after asking for one
+STREAM_TICKET_TTL = getattr(settings, 'SSE_STREAM_TICKET_TTL', 30)
+STREAM_TICKET_CACHE_PREFIX = 'sse_ticket_'
+
+
+def user_channel(user_id) -> str:
+    return f'user:{user_id}'
+
+
+def tenant_channel(tenant_id) -> str:
+    return f'tenant:{tenant_id}'
+
+
+def channels_for_token(token: str) -> Optional[List[str]]:
+    """
+    Channels a stream subscribes to: the user's and their tenant's for a valid
+    access token. None if the token is invalid or its user is inactive.
+    """
+    from rest_framework_simplejwt.exceptions import TokenError
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    try:
+        user_id = AccessToken(token).get('user_id')
+    except TokenError as e:
+        logger.debug(f"SSE token rejected: {e}")
+        return None
+    return _channels_for_user(user_id)
+
+
+def issue_stream_ticket(user) -> str:
+    """
+    Single-use ticket that opens one stream as ``user``. EventSource cannot send
+    headers, and a ticket in the URL keeps the access token out of access logs.
+    Tickets live in the shared cache, so the ASGI stream process can redeem the
+    ones the API workers issue.
+    """
+    ticket = secrets.token_urlsafe(32)
+    cache.set(STREAM_TICKET_CACHE_PREFIX + ticket, user.id, STREAM_TICKET_TTL)
+    return ticket
+
+
+def channels_for_ticket(ticket: str) -> Optional[List[str]]:
+    """Channels for a stream ticket, which is used up. None if it is unknown, expired or already used."""
+    key = STREAM_TICKET_CACHE_PREFIX + ticket
+    user_id = cache.get(key)
+    # delete() is True for one caller only: two streams racing on a ticket do not both get it
+    if user_id is None or not cache.delete(key):
+        return None
+    return _channels_for_user(user_id)
+
+
+def _channels_for_user(user_id) -> Optional[List[str]]:
+    from ..models import CustomUser
+
+    user = CustomUser.objects.filter(id=user_id, is_active=True).values('id', 'tenant_id').first()
+    if not user:
+        return None
+    channels = [user_channel(user['id'])]
+    if user['tenant_id']:
+        channels.append(tenant_channel(user['tenant_id']))
+    return channels
+
+
+def format_sse(event: dict) -> str:
+    """Serialize a broadcaster event as an SSE message."""
+    return f"id: {event['id']}\nevent: {event['event_type']}\ndata: {json.dumps(event['data'])}\n\n"
+
+
+def parse_last_event_id(value) -> Optional[int]:
+    try:
+        return int(value) if value not in (None, '') else None
+    except (TypeError, ValueError):
+        return None
+
+
+class AsyncSubscriberQueue:
+    """
+    Subscriber queue for an asyncio consumer (the ASGI stream).
+
+    ``put_nowait`` is called from any thread (request threads, the poller) and
+    hands the event to the consumer's event loop.
+    """
+
+    def __init__(self, maxsize: int = 100):
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+
+    def put_nowait(self, event: dict):
+        if self.queue.full():
+            raise queue.Full
+        self.loop.call_soon_threadsafe(self._put, event)
+
+    def _put(self, event: dict):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            logger.warning(f"Subscriber queue full, skipping event")
+
+    async def get(self, timeout: float) -> dict:
+        """Next event; raises asyncio.TimeoutError after ``timeout`` seconds."""
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
 
 class InMemorySSEBroadcaster:
     """
-    Simple in-memory event broadcaster for SSE
-    No external dependencies required - uses only Python standard library
+    Event broadcaster for SSE with per-process subscriber queues.
+    No external dependencies required - the database is the cross-worker transport.
     """
     
-    # Class-level storage for listeners (shared across all instances)
+    # Class-level storage for listeners (shared across all instances): channel -> queues
     _listeners: Dict[str, Set[queue.Queue]] = {}
+    # queue -> its channels
+    _subscriptions: Dict[object, Tuple[str, ...]] = {}
     _lock = threading.Lock()
+    _delivered: 'OrderedDict[int, None]' = OrderedDict()
+    # Development mode: local ids and replay buffer
+    _local_ids = count(1)
+    _backlog: deque = deque(maxlen=REPLAY_LIMIT)
     
     CHANNEL_NAME = 'session_conflicts'
     
     @classmethod
-    def subscribe(cls, channel: str = CHANNEL_NAME) -> queue.Queue:
+    def subscribe(cls, channels: Union[str, Iterable[str]] = CHANNEL_NAME, last_event_id: Optional[int] = None) -> queue.Queue:
         """
-        Subscribe to a channel and return a queue for receiving events
+        Subscribe to one or more channels and return a queue for receiving events.
+        With ``last_event_id``, events published after it are queued first.
         """
+        return cls._add_subscriber(queue.Queue(maxsize=100), channels, last_event_id)
+    
+    @classmethod
+    async def subscribe_async(cls, channels: Union[str, Iterable[str]] = CHANNEL_NAME,
+                              last_event_id: Optional[int] = None) -> AsyncSubscriberQueue:
+        """Like ``subscribe`` for asyncio consumers; the replay query runs in a pool thread."""
+        from asgiref.sync import sync_to_async
+
+        def add_subscriber(event_queue):
+            try:
+                return cls._add_subscriber(event_queue, channels, last_event_id)
+            finally:
+                close_old_connections()
+
+        return await sync_to_async(add_subscriber, thread_sensitive=False)(AsyncSubscriberQueue(maxsize=100))
+    
+    @classmethod
+    def _add_subscriber(cls, event_queue, channels: Union[str, Iterable[str]], last_event_id: Optional[int]):
+        channels = (channels,) if isinstance(channels, str) else tuple(dict.fromkeys(channels))
         with cls._lock:
-            if channel not in cls._listeners:
-                cls._listeners[channel] = set()
-            
-            # Create a queue for this subscriber
-            event_queue = queue.Queue(maxsize=100)
-            cls._listeners[channel].add(event_queue)
-            
-            logger.info(f"New subscriber to channel '{channel}'. Total: {len(cls._listeners[channel])}")
-            return event_queue
+            cls._subscriptions[event_queue] = channels
+            for channel in channels:
+                cls._listeners.setdefault(channel, set()).add(event_queue)
+            logger.info(f"New subscriber to {', '.join(channels)}. Total: {len(cls._subscriptions)}")
+        
+        if USE_DB_BROADCASTING:
+            EventLogPoller.ensure_running()
+        if last_event_id is not None:
+            for event in cls.replay(channels, last_event_id):
+                try:
+                    event_queue.put_nowait(event)
+                except queue.Full:
+                    break
+        return event_queue
     
     @classmethod
-    def unsubscribe(cls, event_queue: queue.Queue, channel: str = CHANNEL_NAME):
+    def unsubscribe(cls, event_queue):
         """
-        Unsubscribe from a channel
+        Unsubscribe a queue from all its channels
         """
         with cls._lock:
-            if channel in cls._listeners:
-                cls._listeners[channel].discard(event_queue)
-                logger.info(f"Subscriber removed from channel '{channel}'. Remaining: {len(cls._listeners[channel])}")
+            for channel in cls._subscriptions.pop(event_queue, ()):
+                listeners = cls._listeners.get(channel)
+                if listeners is not None:
+                    listeners.discard(event_queue)
+                    if not listeners:
+                        del cls._listeners[channel]
+            logger.info(f"Subscriber removed. Remaining: {len(cls._subscriptions)}")
     
     @classmethod
     def publish(cls, channel: str, event_type: str, data: dict):
         """
-        Publish an event to all subscribers of a channel
-        Uses database cache for multi-worker production deployments
+        Publish an event to all subscribers of a channel, in every worker.
+        In production the event is written once the current transaction commits.
         """
-        event_data = {
-            'event_type': event_type,
-            'data': data,
-            'timestamp': json.dumps({'time': str(logging.Formatter().formatTime(logging.LogRecord('', 0, '', 0, '', (), None)))}) if hasattr(logging, 'Formatter') else ''
-        }
-        
         logger.info(f"📡 Publishing event: {event_type} to channel: {channel}")
-        logger.info(f"📡 Event data: {data}")
         
-        # In production with multiple workers, use database cache
         if USE_DB_BROADCASTING:
-            try:
-                # Store event in cache with short TTL for workers to poll
-                cache_key = f"sse_event_{channel}_{event_type}"
-                cache.set(cache_key, event_data, timeout=5)  # 5 second TTL
-                
-                # Also store in a list for this channel (last 10 events)
-                channel_key = f"sse_channel_{channel}"
-                events = cache.get(channel_key, [])
-                events.append(event_data)
-                # Keep only last 10 events
-                events = events[-10:]
-                cache.set(channel_key, events, timeout=30)
-                
-                logger.info(f"✅ Published {event_type} to database cache (multi-worker mode)")
-            except Exception as e:
-                logger.error(f"Error publishing to database cache: {e}")
-                # Continue with in-memory fallback
+            transaction.on_commit(lambda: cls._append(channel, event_type, data))
+            return
         
-        # In-memory broadcasting (for same worker)
         with cls._lock:
-            if channel not in cls._listeners or not cls._listeners[channel]:
-                logger.warning(f"⚠️ No in-memory subscribers for channel '{channel}'")
-                return
+            event = {
+                'id': next(cls._local_ids),
+                'channel': channel,
+                'event_type': event_type,
+                'data': data,
+                'timestamp': timezone.now().isoformat(),
+            }
+            cls._backlog.append(event)
+        cls.dispatch(event)
+    
+    @classmethod
+    def _append(cls, channel: str, event_type: str, data: dict):
+        from ..models import SSEEvent
+        
+        try:
+            row = SSEEvent.objects.create(channel=channel, event_type=event_type, data=data)
+        except Exception as e:
+            logger.error(f"Error appending SSE event {event_type} to the event log: {e}")
+            return
+        # Deliver to this worker right away; the poller skips the id later
+        cls.dispatch(EventLogPoller.to_event(row))
+    
+    @classmethod
+    def dispatch(cls, event: dict) -> int:
+        """Put an event on this process's subscriber queues (once per id). Returns queues reached."""
+        channel = event['channel']
+        with cls._lock:
+            if event['id'] in cls._delivered:
+                return 0
+            cls._delivered[event['id']] = None
+            while len(cls._delivered) > DELIVERED_IDS_KEPT:
+                cls._delivered.popitem(last=False)
             
-            subscriber_count = len(cls._listeners[channel])
-            logger.info(f"📡 Sending to {subscriber_count} in-memory subscribers")
+            listeners = cls._listeners.get(channel)
+            if not listeners:
+                return 0
             
-            # Send to all subscribers
             dead_queues = set()
             sent_count = 0
-            for event_queue in cls._listeners[channel]:
+            for event_queue in listeners:
                 try:
                     # Non-blocking put - if queue is full, skip this subscriber
-                    event_queue.put_nowait(event_data)
+                    event_queue.put_nowait(event)
                     sent_count += 1
                 except queue.Full:
                     logger.warning(f"Subscriber queue full, skipping event")
@@ -116,41 +296,205 @@ class InMemorySSEBroadcaster:
             
             # Clean up dead queues
             for dead_queue in dead_queues:
-                cls._listeners[channel].discard(dead_queue)
-            
-            logger.info(f"✅ Published {event_type} to {sent_count}/{subscriber_count} in-memory subscribers")
+                listeners.discard(dead_queue)
+                cls._subscriptions.pop(dead_queue, None)
+        
+        logger.info(f"✅ Published {event['event_type']} #{event['id']} to {sent_count} subscribers")
+        return sent_count
+    
+    @classmethod
+    def replay(cls, channels: Tuple[str, ...], last_event_id: int) -> List[dict]:
+        """Events of the channels published after ``last_event_id`` (at most REPLAY_LIMIT)."""
+        if not USE_DB_BROADCASTING:
+            with cls._lock:
+                return [e for e in cls._backlog if e['channel'] in channels and e['id'] > last_event_id]
+        
+        from ..models import SSEEvent
+        try:
+            rows = SSEEvent.objects.filter(channel__in=channels, id__gt=last_event_id).order_by('id')[:REPLAY_LIMIT]
+            return [EventLogPoller.to_event(row) for row in rows]
+        except Exception as e:
+            logger.warning(f"Could not replay SSE events after #{last_event_id}: {e}")
+            return []
+    
+    @classmethod
+    def has_subscribers(cls) -> bool:
+        with cls._lock:
+            return bool(cls._subscriptions)
     
     @classmethod
-    def get_subscriber_count(cls, channel: str = CHANNEL_NAME) -> int:
+    def get_subscriber_count(cls, channel: Optional[str] = None) -> int:
         """
-        Get the number of active subscribers for a channel
+        Get the number of active subscribers for a channel (all subscribers by default)
         """
         with cls._lock:
+            if channel is None:
+                return len(cls._subscriptions)
             return len(cls._listeners.get(channel, set()))
 
 
+class EventLogPoller:
+    """
+    One daemon thread per worker process that tails the SSEEvent table.
+
+    It only queries while the worker has subscribers. Ids are assigned at
+    insert but rows become visible at commit, so an id skipped over is kept as
+    a gap and re-read for GAP_TIMEOUT_SECONDS before it is given up.
+    """
+    
+    _thread: Optional[threading.Thread] = None
+    _pid: Optional[int] = None
+    _start_lock = threading.Lock()
+    
+    @classmethod
+    def ensure_running(cls):
+        with cls._start_lock:
+            # A thread started before a fork does not exist in the child
+            if cls._thread is not None and cls._thread.is_alive() and cls._pid == os.getpid():
+                return
+            cls._pid = os.getpid()
+            cls._thread = threading.Thread(target=cls()._run, name='sse-event-log-poller', daemon=True)
+            cls._thread.start()
+            logger.info(f"📡 SSE event log poller started in worker {cls._pid}")
+    
+    @staticmethod
+    def to_event(row) -> dict:
+        return {
+            'id': row.id,
+            'channel': row.channel,
+            'event_type': row.event_type,
+            'data': row.data,
+            'timestamp': row.created_at.isoformat() if row.created_at else '',
+        }
+    
+    def __init__(self):
+        self.last_id: Optional[int] = None
+        self.gaps: Dict[int, float] = {}
+        self.last_prune = 0.0
+    
+    def _run(self):
+        while True:
+            time.sleep(POLL_INTERVAL)
+            if not InMemorySSEBroadcaster.has_subscribers():
+                # Re-anchor at the head when subscribers come back (they replay via Last-Event-ID)
+                self.last_id = None
+                self.gaps.clear()
+                continue
+            try:
+                self.poll()
+                if time.monotonic() - self.last_prune > PRUNE_INTERVAL_SECONDS:
+                    self.prune()
+            except Exception as e:
+                logger.warning(f"SSE event log poll failed: {e}")
+            finally:
+                close_old_connections()
+    
+    def poll(self) -> int:
+        from django.db.models import Max
+        from ..models import SSEEvent
+        
+        if self.last_id is None:
+            self.last_id = SSEEvent.objects.aggregate(last=Max('id'))['last'] or 0
+            return 0
+        
+        now = time.monotonic()
+        self.gaps = {gap: seen for gap, seen in self.gaps.items() if now - seen < GAP_TIMEOUT_SECONDS}
+        floor = min(self.gaps) - 1 if self.gaps else self.last_id
+        rows = list(SSEEvent.objects.filter(id__gt=floor).order_by('id')[:POLL_BATCH_SIZE])
+        
+        delivered = 0
+        for row in rows:
+            self.gaps.pop(row.id, None)
+            if row.id > self.last_id:
+                for missing in range(self.last_id + 1, min(row.id, self.last_id + 1 + POLL_BATCH_SIZE)):
+                    self.gaps[missing] = now
+                self.last_id = row.id
+            delivered += InMemorySSEBroadcaster.dispatch(self.to_event(row))
+        return delivered
+    
+    def prune(self):
+        from datetime import timedelta
+        from ..models import SSEEvent
+        
+        self.last_prune = time.monotonic()
+        cutoff = timezone.now() - timedelta(seconds=EVENT_RETENTION_SECONDS)
+        deleted, _ = SSEEvent.objects.filter(created_at__lt=cutoff).delete()
+        if deleted:
+            logger.info(f"🧹 Pruned {deleted} SSE events older than {EVENT_RETENTION_SECONDS}s")
+
+
 class SSENotifier:
     """Simplified SSE notifier using in-memory broadcasting"""
     
     @staticmethod
-    def publish_conflict_event(event_type, data):
+    def publish_conflict_event(event_type, data, user=None):
         """
         Publish a session conflict event
         
         Args:
             event_type: Type of conflict ('ip_conflict', 'session_conflict', 'login_attempt')
             data: Dictionary containing event details
+            user: Target user; the event goes to their channel (and to the global
+                channel while SSE_LEGACY_BROADCAST is on). Without a user it goes
+                to the global channel only.
         """
         try:
-            InMemorySSEBroadcaster.publish(
-                InMemorySSEBroadcaster.CHANNEL_NAME,
-                event_type,
-                data
-            )
+            if user is not None:
+                InMemorySSEBroadcaster.publish(user_channel(user.id), event_type, data)
+            if user is None or LEGACY_BROADCAST:
+                InMemorySSEBroadcaster.publish(InMemorySSEBroadcaster.CHANNEL_NAME, event_type, data)
             logger.info(f"Published SSE event: {event_type} for IP: {data.get('ip_address', 'unknown')}")
         except Exception as e:
             logger.error(f"Error publishing SSE event: {e}")
     
+    @staticmethod
+    def notify_tenant_event(tenant, event_type, data):
+        """
+        Publish a data-change notification to every stream of the tenant
+        
+        Args:
+            tenant: Tenant instance or id
+            event_type: Event name (e.g. 'payroll_calculated', 'upload_finished')
+            data: Dictionary containing event details
+        """
+        try:
+            tenant_id = tenant if isinstance(tenant, int) else tenant.id
+            InMemorySSEBroadcaster.publish(tenant_channel(tenant_id), event_type, data)
+        except Exception as e:
+            logger.error(f"Error publishing SSE event: {e}")
+    
+    @staticmethod
+    def notify_payroll_calculated(tenant, year, month, **details):
+        """
+        Notify a tenant that payroll for a period was calculated or saved
+        
+        Args:
+            tenant: Tenant instance or id
+            year: Payroll year
+            month: Payroll month (name or number, as the caller has it)
+            details: Extra fields for the client (period_id, counts...)
+        """
+        SSENotifier.notify_tenant_event(tenant, 'payroll_calculated', {
+            'year': year,
+            'month': month,
+            **details,
+        })
+    
+    @staticmethod
+    def notify_upload_finished(tenant, upload_type, **details):
+        """
+        Notify a tenant that an upload was processed
+        
+        Args:
+            tenant: Tenant instance or id
+            upload_type: What was uploaded ('attendance', 'monthly_attendance', 'salary', 'employees')
+            details: Extra fields for the client (month, year, counts...)
+        """
+        SSENotifier.notify_tenant_event(tenant, 'upload_finished', {
+            'upload_type': upload_type,
+            **details,
+        })
+    
     @staticmethod
     def notify_ip_conflict(ip_address, existing_user, attempting_user=None):
         """
@@ -177,7 +521,7 @@ class SSENotifier:
                 'role': attempting_user.role
             }
         
-        SSENotifier.publish_conflict_event('ip_conflict', data)
+        SSENotifier.publish_conflict_event('ip_conflict', data, user=existing_user)
     
     @staticmethod
     def notify_session_conflict(user, ip_address):
@@ -197,7 +541,7 @@ class SSENotifier:
             }
         }
         
-        SSENotifier.publish_conflict_event('session_conflict', data)
+        SSENotifier.publish_conflict_event('session_conflict', data, user=user)
     
     @staticmethod
     def notify_login_attempt_blocked(user, ip_address, reason):
@@ -219,7 +563,7 @@ class SSENotifier:
             'reason': reason
         }
         
-        SSENotifier.publish_conflict_event('login_attempt_blocked', data)
+        SSENotifier.publish_conflict_event('login_attempt_blocked', data, user=user)
     
     @staticmethod
     def notify_force_logout(user, ip_address, reason, session_key=None):
@@ -251,5 +595,5 @@ class SSENotifier:
             data['target_session_key'] = session_key  # Explicit naming for clarity
         
         logger.info(f"📢 Broadcasting force_logout event for user {user.email}, session_key: {session_key}")
-        SSENotifier.publish_conflict_event('force_logout', data)
+        SSENotifier.publish_conflict_event('force_logout', data, user=user)
 
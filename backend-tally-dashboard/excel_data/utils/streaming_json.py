@@ -0,0 +1,117 @@
+"""
+Streaming JSON responses for large list endpoints.
+
+A normal DRF ``Response`` holds the full list of Python dicts and then the
+full rendered body in memory before the first byte is sent. The helpers here
+emit the metadata envelope and each record incrementally through a
+``StreamingHttpResponse``, so peak memory stays at roughly one chunk of rows
+and the first bytes go out as soon as the envelope head is known.
+
+The body is ordinary JSON::
+
+    {<head fields>, "<list_key>": [<row>, <row>, ...], <tail fields>}
+
+Tail fields (counts, totals, timings) are computed after the rows have been
+streamed. Once streaming has started the status code can no longer change, so
+a failure mid-stream is logged and the JSON is closed with an ``"error"`` field.
+
+NOTE: generators run after TenantMiddleware has cleared the thread-local
+tenant, so every queryset used while streaming must filter by tenant
+explicitly (never rely on TenantAwareManager inside a row generator).
+"""
+
+import json
+import logging
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+logger = logging.getLogger(__name__)
+
+# Flush to the client roughly every 64 KB instead of once per row
+STREAM_FLUSH_BYTES = 64 * 1024
+DEFAULT_CHUNK_SIZE = 500
+
+
+def is_stream_requested(request) -> bool:
+    """True when the client asked for the streaming mode (?stream=true)."""
+    return request.GET.get('stream', '').lower() == 'true'
+
+
+def iter_chunks(iterable: Iterable[Any], size: int = DEFAULT_CHUNK_SIZE) -> Iterator[List[Any]]:
+    """Yield lists of up to ``size`` items from ``iterable``."""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _iter_json_body(head: Dict[str, Any], list_key: str, rows: Iterable[Dict[str, Any]],
+                    tail: Optional[Callable[[], Dict[str, Any]]]) -> Iterator[bytes]:
+    encoder = DjangoJSONEncoder(separators=(',', ':'))
+    encode = encoder.encode
+
+    # Head goes out immediately so time-to-first-byte doesn't depend on row count
+    head_parts = [f'{json.dumps(key)}:{encode(value)}' for key, value in head.items()]
+    head_parts.append(f'{json.dumps(list_key)}:[')
+    yield ('{' + ','.join(head_parts)).encode('utf-8')
+
+    buffer: List[str] = []
+    buffered = 0
+    first = True
+    error = None
+    try:
+        for row in rows:
+            piece = encode(row) if first else ',' + encode(row)
+            first = False
+            buffer.append(piece)
+            buffered += len(piece)
+            if buffered >= STREAM_FLUSH_BYTES:
+                yield ''.join(buffer).encode('utf-8')
+                buffer = []
+                buffered = 0
+    except Exception as exc:
+        logger.error(f"Streaming JSON response failed while encoding '{list_key}': {str(exc)}", exc_info=True)
+        error = str(exc)
+
+    tail_parts = [''.join(buffer), ']']
+    if error is None and tail is not None:
+        try:
+            for key, value in tail().items():
+                tail_parts.append(f',{json.dumps(key)}:{encode(value)}')
+        except Exception as exc:
+            logger.error(f"Streaming JSON response failed while building tail: {str(exc)}", exc_info=True)
+            error = str(exc)
+    if error is not None:
+        tail_parts.append(f',"error":{json.dumps(error)}')
+    tail_parts.append('}')
+    yield ''.join(tail_parts).encode('utf-8')
+
+
+def stream_json_response(head: Dict[str, Any], list_key: str, rows: Iterable[Dict[str, Any]],
+                         tail: Optional[Callable[[], Dict[str, Any]]] = None,
+                         status: int = 200) -> StreamingHttpResponse:
+    """
+    Build a StreamingHttpResponse that encodes ``rows`` one record at a time.
+
+    Args:
+        head: Envelope fields emitted before the list.
+        list_key: Name of the list field (e.g. 'results', 'employees').
+        rows: Iterable of JSON-serializable dicts, ideally a generator fed by
+            ``queryset.iterator(chunk_size=...)``.
+        tail: Optional callable returning envelope fields emitted after the
+            list; it runs once all rows have been consumed.
+    """
+    response = StreamingHttpResponse(
+        _iter_json_body(head, list_key, rows, tail),
+        content_type='application/json',
+        status=status,
+    )
+    response['Cache-Control'] = 'no-store'
+    # Disable proxy buffering (nginx) so chunks reach the client as they are produced
+    response['X-Accel-Buffering'] = 'no'
+    return response
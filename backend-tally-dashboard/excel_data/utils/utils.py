@@ -51,48 +51,21 @@ def generate_employee_id(name: str, tenant_id: int, department: str = None) -> s
     Generate employee ID using format: First three letters-Department first two letters-Tenant id
     Example: Siddhant Marketing Analysis tenant_id 025 -> SID-MA-025
     
-    In case of collision with same name, add postfix A, B, C
+    In case of collision with same name, add postfix A, B, C ... Z, AA, AB ...
     Example: SID-MA-025-A, SID-MA-025-B, SID-MA-025-C
-    """
-    from ..models import EmployeeProfile
-    import uuid
-    
-    if not name or str(name).strip() in ['', '0', 'nan', 'NaN', '-']:
-        return str(uuid.uuid4())[:8]  # Random ID for empty names
-    
-    # Extract first three letters from name (uppercase)
-    name_clean = ''.join(char for char in name.strip().upper() if char.isalpha())
-    name_prefix = name_clean[:3].ljust(3, 'X')  # Pad with X if less than 3 letters
-    
-    # Extract first two letters from department (uppercase)
-    if department and str(department).strip():
-        dept_clean = ''.join(char for char in str(department).strip().upper() if char.isalpha())
-        dept_prefix = dept_clean[:2].ljust(2, 'X')  # Pad with X if less than 2 letters
-    else:
-        dept_prefix = 'XX'  # Default if no department
-    
-    # Format tenant ID with leading zeros (3 digits)
-    tenant_str = str(tenant_id).zfill(3)
     
-    # Generate base employee ID
-    base_id = f"{name_prefix}-{dept_prefix}-{tenant_str}"
-    
-    # Check for collisions and add postfix if needed
-    collision_suffixes = ['', '-A', '-B', '-C', '-D', '-E', '-F', '-G', '-H', '-I', '-J']
-    
-    for suffix in collision_suffixes:
-        candidate_id = f"{base_id}{suffix}"
-        
-        # Check if this ID already exists in the database for this tenant
-        if not EmployeeProfile.objects.filter(tenant_id=tenant_id, employee_id=candidate_id).exists():
-            return candidate_id
+    Suffixes come from a per-(tenant, base ID) counter (see utils.employee_ids).
+    """
+    from .employee_ids import allocate_employee_ids, employee_id_base
     
+    return allocate_employee_ids(tenant_id, [employee_id_base(name, department, tenant_id)])[0]
+
 def generate_employee_id_bulk_optimized(employees_data: list, tenant_id: int) -> dict:
     """
-    ULTRA-FAST bulk employee ID generation for large datasets
+    Bulk employee ID generation for large datasets
     
-    Process all employees in memory first, then generate unique IDs in batch
-    This avoids N database queries during ID generation
+    Reserves suffix blocks for every base ID of the batch in one statement and
+    checks the candidates in one query, instead of loading every existing ID.
     
     Args:
         employees_data: List of dicts with 'name', 'department' keys
@@ -101,69 +74,13 @@ def generate_employee_id_bulk_optimized(employees_data: list, tenant_id: int) ->
     Returns:
         Dict mapping array index to generated employee_id
     """
-    from ..models import EmployeeProfile
-    import uuid
-    from collections import defaultdict
-    
-    # Get all existing employee IDs for this tenant in one query
-    existing_ids = set(
-        EmployeeProfile.objects.filter(tenant_id=tenant_id)
-        .values_list('employee_id', flat=True)
-    )
-    
-    # Track generated IDs to avoid duplicates within this batch
-    generated_ids = set()
-    id_collision_counters = defaultdict(int)  # Track collision counts per base ID
-    result_mapping = {}
-    
-    for index, emp_data in enumerate(employees_data):
-        name = emp_data.get('name', '')
-        department = emp_data.get('department', '')
-        
-        # Handle empty names
-        if not name or str(name).strip() in ['', '0', 'nan', 'NaN', '-']:
-            unique_id = str(uuid.uuid4())[:8]
-            result_mapping[index] = unique_id
-            generated_ids.add(unique_id)
-            continue
-        
-        # Extract first three letters from name (uppercase)
-        name_clean = ''.join(char for char in name.strip().upper() if char.isalpha())
-        name_prefix = name_clean[:3].ljust(3, 'X')
-        
-        # Extract first two letters from department (uppercase)
-        if department and str(department).strip():
-            dept_clean = ''.join(char for char in str(department).strip().upper() if char.isalpha())
-            dept_prefix = dept_clean[:2].ljust(2, 'X')
-        else:
-            dept_prefix = 'XX'
-        
-        # Format tenant ID with leading zeros (3 digits)
-        tenant_str = str(tenant_id).zfill(3)
-        
-        # Generate base employee ID
-        base_id = f"{name_prefix}-{dept_prefix}-{tenant_str}"
-        
-        # Check for collisions in existing DB + already generated IDs
-        collision_suffixes = ['', '-A', '-B', '-C', '-D', '-E', '-F', '-G', '-H', '-I', '-J']
-        
-        candidate_id = None
-        for suffix in collision_suffixes:
-            test_id = f"{base_id}{suffix}"
-            
-            # Check if this ID exists in DB or already generated in this batch
-            if test_id not in existing_ids and test_id not in generated_ids:
-                candidate_id = test_id
-                break
-        
-        # If all suffixes exhausted, use UUID fallback
-        if not candidate_id:
-            candidate_id = str(uuid.uuid4())[:8]
-        
-        result_mapping[index] = candidate_id
-        generated_ids.add(candidate_id)
+    from .employee_ids import allocate_employee_ids, employee_id_base
     
-    return result_mapping
+    bases = [
+        employee_id_base(emp_data.get('name', ''), emp_data.get('department', ''), tenant_id)
+        for emp_data in employees_data
+    ]
+    return dict(enumerate(allocate_employee_ids(tenant_id, bases)))
 
 def validate_excel_columns(df_columns, required_columns, optional_columns=None):
     """
@@ -292,6 +209,7 @@ def run_bulk_aggregation(tenant, attendance_date):
     from datetime import date
     from django.db import transaction, connection
     from ..models import DailyAttendance, Attendance, EmployeeProfile
+    from .date_ranges import month_filter
     
     logger = logging.getLogger(__name__)
     start_time = time.time()
@@ -302,8 +220,7 @@ def run_bulk_aggregation(tenant, attendance_date):
         # Get all DailyAttendance records for this tenant and month
         daily_records = DailyAttendance.objects.filter(
             tenant=tenant,
-            date__year=attendance_date.year,
-            date__month=attendance_date.month
+            **month_filter(attendance_date.year, attendance_date.month)
         ).select_related().only(
             'employee_id', 'employee_name', 'department', 'attendance_status', 
             'ot_hours', 'late_minutes'
@@ -594,6 +511,12 @@ def run_bulk_aggregation(tenant, attendance_date):
                     )
                     updated_count = len(records_to_update)
                     logger.info(f"✅ BACKGROUND AGGREGATION: Updated {updated_count} existing attendance records")
+                
+                # Raw INSERT / bulk writes skip signals: record the changed payroll months explicitly
+                from ..services.payroll_dirty import mark_records_dirty
+                from ..services.attendance_months import mark_records_stale
+                mark_records_dirty(tenant, records_to_create + records_to_update, 'attendance_aggregation')
+                mark_records_stale(tenant, records_to_create)
         
         db_time = time.time() - db_start_time
         
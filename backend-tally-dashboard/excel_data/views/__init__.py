@@ -3,6 +3,8 @@ from .core import *
 from .auth import *
 from .payroll import *
 from .utils import *
+from .exports import export_payroll_period, export_daily_attendance
+from .metrics import metrics_endpoint
 from .holiday_views import HolidayViewSet
 from .support_views import SupportTicketViewSet
 from .pin_auth import *
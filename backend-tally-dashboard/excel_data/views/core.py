@@ -22,6 +22,10 @@ from datetime import datetime, time as dt_time
 from django.db import transaction
 from django.utils import timezone
 from django.core.cache import cache
+from ..utils.metrics import performance_snapshot, record_step
+from ..utils.query_budget import query_budget
+from ..utils.date_ranges import month_filter, months_q
+from ..utils.sse_broadcaster import SSENotifier
 
 # Initialize logger
 logger = logging.getLogger(__name__)
@@ -88,7 +92,8 @@ from ..serializers import (
     DailyAttendanceSerializer,
     AdvanceLedgerSerializer,
     PaymentSerializer,
-
+    ATTENDANCE_PROJECTION,
+    ProjectedListMixin,
 )
 class SalaryDataViewSet(viewsets.ModelViewSet):
 
@@ -345,11 +350,7 @@ class SalaryDataViewSet(viewsets.ModelViewSet):
             salary_queryset = salary_queryset.filter(department=selected_department)
         
         # Get Attendance data for selected months
-        attendance_queryset = Attendance.objects.filter(
-            tenant=tenant,
-            date__year__in=[m['year'] for m in selected_months_list],
-            date__month__in=[self._get_month_number(m['month']) for m in selected_months_list]
-        )
+        attendance_queryset = Attendance.objects.filter(tenant=tenant).filter(months_q((m['year'], self._get_month_number(m['month'])) for m in selected_months_list))
         
         if selected_department and selected_department != 'All':
             attendance_queryset = attendance_queryset.filter(department=selected_department)
@@ -385,8 +386,7 @@ class SalaryDataViewSet(viewsets.ModelViewSet):
         if current_month:
             current_salary = salary_queryset.filter(year=current_month['year'], month=current_month['month'])
             current_attendance = attendance_queryset.filter(
-                date__year=current_month['year'],
-                date__month=self._get_month_number(current_month['month'])
+                **month_filter(current_month['year'], self._get_month_number(current_month['month']))
             )
         else:
             current_salary = salary_queryset.none()
@@ -470,8 +470,7 @@ class SalaryDataViewSet(viewsets.ModelViewSet):
         for month in selected_months:
             month_salary = salary_queryset.filter(year=month['year'], month=month['month'])
             month_attendance = attendance_queryset.filter(
-                date__year=month['year'],
-                date__month=self._get_month_number(month['month'])
+                **month_filter(month['year'], self._get_month_number(month['month']))
             )
             
             month_salary_stats = month_salary.aggregate(
@@ -604,6 +603,7 @@ class SalaryDataViewSet(viewsets.ModelViewSet):
         
         # Add timing information if provided
         if query_timings is not None:
+            query_timings['request_metrics'] = performance_snapshot()
             response_data['queryTimings'] = query_timings
         
         # Cache the response if cache_key is provided
@@ -625,7 +625,7 @@ class SalaryDataViewSet(viewsets.ModelViewSet):
         return Response(response_data)
 
     @action(detail=False, methods=['get'])
-
+    @query_budget(36)
     def frontend_charts(self, request):
         """
         HYBRID APPROACH: Get salary data formatted for frontend charts
@@ -678,11 +678,12 @@ class SalaryDataViewSet(viewsets.ModelViewSet):
         else:
             logger.info("🚫 Cache bypassed (no_cache=true)")
         
-        query_timings['cache_check_ms'] = round((time.time() - cache_check_start) * 1000, 2)
+        record_step(query_timings, 'cache_check_ms', cache_check_start)
         
         if cached_response:
-            query_timings['total_time_ms'] = round((time.time() - start_time) * 1000, 2)
+            record_step(query_timings, 'total_time_ms', start_time)
             # Enhance cached response with current timing information
+            query_timings['request_metrics'] = performance_snapshot()
             cached_response['queryTimings'] = query_timings
             if 'cache_metadata' in cached_response:
                 cached_response['queryTimings']['cached_response'] = True
@@ -745,7 +746,7 @@ class SalaryDataViewSet(viewsets.ModelViewSet):
             )
         ).order_by('-year', '-month_num')
         
-        query_timings['payroll_periods_ms'] = round((time.time() - payroll_periods_start) * 1000, 2)
+        record_step(query_timings, 'payroll_periods_ms', payroll_periods_start)
         
         # Debug: Log available periods
         available_periods = list(payroll_periods.values('year', 'month', 'calculation_date')[:10])
@@ -1040,7 +1041,7 @@ class SalaryDataViewSet(viewsets.ModelViewSet):
         if selected_department and selected_department != 'All':
             chart_queryset = chart_queryset.filter(department=selected_department)
         
-        query_timings['chart_queryset_setup_ms'] = round((time.time() - chart_query_start) * 1000, 2)
+        record_step(query_timings, 'chart_queryset_setup_ms', chart_query_start)
         
         # CRITICAL: Check if we have ANY data for selected periods BEFORE proceeding
         # This prevents returning cached data when no data exists
@@ -1083,7 +1084,7 @@ class SalaryDataViewSet(viewsets.ModelViewSet):
                 _sel_year = str(period.year) if period.year else ''
                 _sel_label = f"{_sel_month} {_sel_year}" if _sel_month and _sel_year else ''
             
-            query_timings['total_time_ms'] = round((time.time() - start_time) * 1000, 2)
+            record_step(query_timings, 'total_time_ms', start_time)
             return Response({
                 "totalEmployees": 0,
                 "avgAttendancePercentage": 0,
@@ -1174,7 +1175,7 @@ class SalaryDataViewSet(viewsets.ModelViewSet):
         if selected_department and selected_department != 'All':
             calculated_queryset = calculated_queryset.filter(department=selected_department)
         
-        query_timings['calculated_queryset_setup_ms'] = round((time.time() - calculated_query_start) * 1000, 2)
+        record_step(query_timings, 'calculated_queryset_setup_ms', calculated_query_start)
         
         # LEGACY PATH: Use CalculatedSalary if ChartAggregatedData not available
         if calculated_queryset.exists():
@@ -1278,11 +1279,7 @@ class SalaryDataViewSet(viewsets.ModelViewSet):
                 salary_queryset = salary_queryset.filter(department=selected_department)
             
             # Get Attendance data for selected months
-            attendance_queryset = Attendance.objects.filter(
-                tenant=tenant,
-                date__year__in=[m['year'] for m in selected_months_list],
-                date__month__in=[self._get_month_number(m['month']) for m in selected_months_list]
-            )
+            attendance_queryset = Attendance.objects.filter(tenant=tenant).filter(months_q((m['year'], self._get_month_number(m['month'])) for m in selected_months_list))
             
             if selected_department and selected_department != 'All':
                 attendance_queryset = attendance_queryset.filter(department=selected_department)
@@ -1366,7 +1363,7 @@ class SalaryDataViewSet(viewsets.ModelViewSet):
             total_late_minutes=Sum('late_minutes'),
             avg_salary=Avg('net_payable')
         )
-        query_timings['current_stats_aggregate_ms'] = round((time.time() - current_stats_start) * 1000, 2)
+        record_step(query_timings, 'current_stats_aggregate_ms', current_stats_start)
         
         # Calculate attendance percentage - assume 30 working days per month for now
         total_present = float(current_stats['total_present_days'] or 0)
@@ -1447,7 +1444,7 @@ class SalaryDataViewSet(viewsets.ModelViewSet):
             # Keep previous_period_stats empty on failure; deltas will default to 0 safely below
             pass
         
-        query_timings['previous_period_analysis_ms'] = round((time.time() - previous_period_start) * 1000, 2)
+        record_step(query_timings, 'previous_period_analysis_ms', previous_period_start)
         
         # Calculate percentage changes
         employees_change = 0
@@ -1482,7 +1479,7 @@ class SalaryDataViewSet(viewsets.ModelViewSet):
             total_late_minutes=Sum('late_minutes'),
             total_present_days=Sum('present_days')
         ).order_by('-total_salary')
-        query_timings['department_analysis_ms'] = round((time.time() - dept_analysis_start) * 1000, 2)
+        record_step(query_timings, 'department_analysis_ms', dept_analysis_start)
         
         # Format department data and get available departments
         department_data = []
@@ -1540,7 +1537,7 @@ class SalaryDataViewSet(viewsets.ModelViewSet):
             }
             for emp in employee_max_salaries
         ]
-        query_timings['top_employees_ms'] = round((time.time() - top_employees_start) * 1000, 2)
+        record_step(query_timings, 'top_employees_ms', top_employees_start)
         
         # NEW: Top Attendance Employees - employees with highest attendance percentage
         top_attendance_start = time.time()
@@ -1565,7 +1562,7 @@ class SalaryDataViewSet(viewsets.ModelViewSet):
             }
             for emp in top_attendance_employees
         ]
-        query_timings['top_attendance_employees_ms'] = round((time.time() - top_attendance_start) * 1000, 2)
+        record_step(query_timings, 'top_attendance_employees_ms', top_attendance_start)
         
         # NEW: Late Minute Trends - monthly trend of late minutes
         late_trends_start = time.time()
@@ -1574,16 +1571,11 @@ class SalaryDataViewSet(viewsets.ModelViewSet):
         # Get late minute trends for the selected periods
         late_trends = []
         if payroll_periods:
-            # Get date range from payroll periods
-            years = [p.year for p in payroll_periods]
-            months = [self._get_month_number(p.month) for p in payroll_periods]
+            # Date ranges of the payroll periods
+            period_months = months_q((p.year, self._get_month_number(p.month)) for p in payroll_periods)
             
             # Try DailyAttendance first (daily records)
-            daily_queryset = DailyAttendance.objects.filter(
-                tenant=tenant,
-                date__year__in=years,
-                date__month__in=months
-            )
+            daily_queryset = DailyAttendance.objects.filter(tenant=tenant).filter(period_months)
             
             # Apply department filter if specified
             if selected_department and selected_department != 'All':
@@ -1611,11 +1603,7 @@ class SalaryDataViewSet(viewsets.ModelViewSet):
             else:
                 # Fallback to monthly Attendance model
                 logger.info("No daily attendance data found, trying monthly Attendance model")
-                monthly_queryset = Attendance.objects.filter(
-                    tenant=tenant,
-                    date__year__in=[p.year for p in payroll_periods],
-                    date__month__in=[self._get_month_number(p.month) for p in payroll_periods]
-                )
+                monthly_queryset = Attendance.objects.filter(tenant=tenant).filter(period_months)
                 
                 if selected_department and selected_department != 'All':
                     monthly_queryset = monthly_queryset.filter(department=selected_department)
@@ -1666,7 +1654,7 @@ class SalaryDataViewSet(viewsets.ModelViewSet):
                                 'averageLateMinutes': round(float(trend['avg_late_minutes'] or 0), 2)
                             })
         
-        query_timings['late_minute_trends_ms'] = round((time.time() - late_trends_start) * 1000, 2)
+        record_step(query_timings, 'late_minute_trends_ms', late_trends_start)
         
         # PHASE 2 OPTIMIZATION: Hyper-optimized salary distribution with minimal data transfer
         salary_dist_start = time.time()
@@ -1688,7 +1676,7 @@ class SalaryDataViewSet(viewsets.ModelViewSet):
             {'range': '75K-100K', 'count': salary_dist_stats['range_75_100k'] or 0},
             {'range': '100K+', 'count': salary_dist_stats['range_100k_plus'] or 0}
         ]
-        query_timings['salary_distribution_ms'] = round((time.time() - salary_dist_start) * 1000, 2)
+        record_step(query_timings, 'salary_distribution_ms', salary_dist_start)
         
         # PHASE 1 OPTIMIZATION: Salary trends with enhanced timing and query optimization
         trends_start = time.time()
@@ -1742,7 +1730,7 @@ class SalaryDataViewSet(viewsets.ModelViewSet):
                     output_field=IntegerField()
                 )
             ).order_by('-payroll_period__year', '-month_num')  # Newest year first, then newest month within year
-            query_timings['trends_query_ms'] = round((time.time() - trends_query_start) * 1000, 2)
+            record_step(query_timings, 'trends_query_ms', trends_query_start)
             
             # Convert to our format - already in correct order (newest first)
             for trend_stat in trends_stats:
@@ -1766,7 +1754,7 @@ class SalaryDataViewSet(viewsets.ModelViewSet):
             salary_trends.reverse()
             ot_trends.reverse()
         
-        query_timings['total_trends_ms'] = round((time.time() - trends_start) * 1000, 2)
+        record_step(query_timings, 'total_trends_ms', trends_start)
         
         # Today's attendance (dynamic from DailyAttendance)
         today_attendance = _build_today_attendance(tenant, selected_department)
@@ -1786,16 +1774,16 @@ class SalaryDataViewSet(viewsets.ModelViewSet):
                     all_departments = ['N/A']
                 # Cache for 30 minutes since departments don't change often
                 cache.set(dept_cache_key, all_departments, 1800)
-                query_timings['dept_lookup_cache_miss_ms'] = round((time.time() - dept_lookup_start) * 1000, 2)
+                record_step(query_timings, 'dept_lookup_cache_miss_ms', dept_lookup_start)
             else:
-                query_timings['dept_lookup_cache_hit_ms'] = round((time.time() - dept_lookup_start) * 1000, 2)
+                record_step(query_timings, 'dept_lookup_cache_hit_ms', dept_lookup_start)
         except Exception as e:
             # Fallback if cache fails
             all_departments_qs = EmployeeProfile.objects.filter(tenant=tenant).values_list('department', flat=True).distinct()
             all_departments = sorted(set([d for d in all_departments_qs if d and d.strip() and d.strip().upper() != 'N/A']))
             if not all_departments:
                 all_departments = ['N/A']
-            query_timings['dept_lookup_fallback_ms'] = round((time.time() - dept_lookup_start) * 1000, 2)
+            record_step(query_timings, 'dept_lookup_fallback_ms', dept_lookup_start)
         
         # NEW: Determine which payroll period was ultimately used so the frontend can display it
         # Determine selected period label (same logic as _get_charts_from_aggregated_data)
@@ -1912,10 +1900,11 @@ class SalaryDataViewSet(viewsets.ModelViewSet):
                 "label": _sel_label
             }
         }
-        query_timings['response_preparation_ms'] = round((time.time() - response_prep_start) * 1000, 2)
+        record_step(query_timings, 'response_preparation_ms', response_prep_start)
         
         # Add total query time and return comprehensive timing information
-        query_timings['total_time_ms'] = round((time.time() - start_time) * 1000, 2)
+        record_step(query_timings, 'total_time_ms', start_time)
+        query_timings['request_metrics'] = performance_snapshot()
         response_data['queryTimings'] = query_timings
         
         # PHASE 1 OPTIMIZATION: Enhanced caching with performance metadata
@@ -1931,7 +1920,7 @@ class SalaryDataViewSet(viewsets.ModelViewSet):
                     'cache_source': 'computed'
                 }
                 cache.set(cache_key, cache_response, 300)  # 5 minutes - reduced to prevent filter cache accumulation
-                query_timings['cache_store_ms'] = round((time.time() - cache_store_start) * 1000, 2)
+                record_step(query_timings, 'cache_store_ms', cache_store_start)
                 logger.info(f"Frontend charts cache stored for key: {cache_key} - Original time: {query_timings['total_time_ms']}ms")
             except Exception as e:
                 query_timings['cache_store_error'] = str(e)
@@ -1995,7 +1984,7 @@ class SalaryDataViewSet(viewsets.ModelViewSet):
             total_late_minutes=Sum('late_minutes'),
             avg_salary=Avg('net_payable')
         )
-        query_timings['current_stats_aggregate_ms'] = round((time.time() - current_stats_start) * 1000, 2)
+        record_step(query_timings, 'current_stats_aggregate_ms', current_stats_start)
         
         total_employees = current_stats['total_employees'] or 0
         total_present = float(current_stats['total_present_days'] or 0)
@@ -2061,7 +2050,7 @@ class SalaryDataViewSet(viewsets.ModelViewSet):
             # On any error, leave previous_period_stats empty; deltas will remain 0
             pass
         
-        query_timings['previous_period_analysis_ms'] = round((time.time() - previous_period_start) * 1000, 2)
+        record_step(query_timings, 'previous_period_analysis_ms', previous_period_start)
         
         # Calculate percentage changes
         employees_change = 0
@@ -2095,7 +2084,7 @@ class SalaryDataViewSet(viewsets.ModelViewSet):
             total_present_days=Sum('present_days'),
             total_working_days=Sum('total_working_days')
         ).order_by('-total_salary')
-        query_timings['department_analysis_ms'] = round((time.time() - dept_analysis_start) * 1000, 2)
+        record_step(query_timings, 'department_analysis_ms', dept_analysis_start)
         
         # Format department data
         department_data = []
@@ -2143,7 +2132,7 @@ class SalaryDataViewSet(viewsets.ModelViewSet):
             }
             for emp in employee_max_salaries
         ]
-        query_timings['top_employees_ms'] = round((time.time() - top_employees_start) * 1000, 2)
+        record_step(query_timings, 'top_employees_ms', top_employees_start)
         
         # FAST: Top attendance (using pre-calculated percentage!)
         top_attendance_start = time.time()
@@ -2157,7 +2146,7 @@ class SalaryDataViewSet(viewsets.ModelViewSet):
             }
             for emp in top_attendance_employees
         ]
-        query_timings['top_attendance_employees_ms'] = round((time.time() - top_attendance_start) * 1000, 2)
+        record_step(query_timings, 'top_attendance_employees_ms', top_attendance_start)
         
         # ULTRA-FAST: Salary distribution (single query with Case/When)
         salary_dist_start = time.time()
@@ -2176,7 +2165,7 @@ class SalaryDataViewSet(viewsets.ModelViewSet):
             {'range': '75K-100K', 'count': salary_dist_stats['range_75_100k'] or 0},
             {'range': '100K+', 'count': salary_dist_stats['range_100k_plus'] or 0}
         ]
-        query_timings['salary_distribution_ms'] = round((time.time() - salary_dist_start) * 1000, 2)
+        record_step(query_timings, 'salary_distribution_ms', salary_dist_start)
         
         # FAST: Monthly trends
         trends_start = time.time()
@@ -2234,7 +2223,7 @@ class SalaryDataViewSet(viewsets.ModelViewSet):
                 avg_late=Avg('late_minutes'),
                 month_num=Case(*when_conditions, default=13, output_field=IntegerField())
             ).order_by('-year', '-month_num')
-            query_timings['trends_query_ms'] = round((time.time() - trends_query_start) * 1000, 2)
+            record_step(query_timings, 'trends_query_ms', trends_query_start)
             
             for trend_stat in trends_stats:
                 if trend_stat['avg_salary'] is not None:
@@ -2263,7 +2252,7 @@ class SalaryDataViewSet(viewsets.ModelViewSet):
             ot_trends.reverse()
             late_trends.reverse()
         
-        query_timings['total_trends_ms'] = round((time.time() - trends_start) * 1000, 2)
+        record_step(query_timings, 'total_trends_ms', trends_start)
         
         # Today's attendance (dynamic from DailyAttendance)
         today_attendance = _build_today_attendance(tenant, selected_department)
@@ -2383,10 +2372,11 @@ class SalaryDataViewSet(viewsets.ModelViewSet):
             },
             "dataSource": "ChartAggregatedData"  # NEW: Indicate optimized source
         }
-        query_timings['response_preparation_ms'] = round((time.time() - response_prep_start) * 1000, 2)
+        record_step(query_timings, 'response_preparation_ms', response_prep_start)
         
         # Add timing info
-        query_timings['total_time_ms'] = round((time.time() - start_time) * 1000, 2)
+        record_step(query_timings, 'total_time_ms', start_time)
+        query_timings['request_metrics'] = performance_snapshot()
         response_data['queryTimings'] = query_timings
         
         # Cache the response
@@ -2401,7 +2391,7 @@ class SalaryDataViewSet(viewsets.ModelViewSet):
                     'cache_source': 'computed_aggregated'
                 }
                 cache.set(cache_key, cache_response, 300)  # 5 minutes
-                query_timings['cache_store_ms'] = round((time.time() - cache_store_start) * 1000, 2)
+                record_step(query_timings, 'cache_store_ms', cache_store_start)
                 logger.info(f"✨ ChartAggregatedData cached - Query time: {query_timings['total_time_ms']}ms")
             except Exception as e:
                 query_timings['cache_store_error'] = str(e)
@@ -2560,7 +2550,7 @@ class SalaryDataViewSet(viewsets.ModelViewSet):
         return month_names[month_number] if 1 <= month_number <= 12 else 'Unknown'
 
 
-class EmployeeProfileViewSet(viewsets.ModelViewSet):
+class EmployeeProfileViewSet(ProjectedListMixin, viewsets.ModelViewSet):
 
     """
 
@@ -2814,15 +2804,20 @@ class EmployeeProfileViewSet(viewsets.ModelViewSet):
         }, status=status.HTTP_200_OK)
 
     @action(detail=False, methods=['get'])
+    @query_budget(8)
     def directory_data(self, request):
         """
         ULTRA-OPTIMIZED employee directory data with recent salary info.
         Includes comprehensive performance tracking and advanced caching strategies.
+        
+        Pass ?cursor= (empty for the first page) for keyset pagination; see
+        _directory_data_keyset. Pass ?stream=true to stream the full directory;
+        see _directory_data_stream. offset/limit slicing of the full dataset is
+        kept for backward compatibility.
         """
-        from django.db.models import Prefetch, Q, Subquery, OuterRef, Case, When, IntegerField
+        from django.db.models import Prefetch, Case, When, IntegerField
         from django.core.paginator import Paginator
         from django.core.cache import cache
-        from django.utils import timezone
         from datetime import datetime
         import hashlib
         
@@ -2857,6 +2852,16 @@ class EmployeeProfileViewSet(viewsets.ModelViewSet):
         
         timing_breakdown['setup_ms'] = round((time.time() - step_start) * 1000, 2)
         
+        # KEYSET PAGINATION: ?cursor= (empty for the first page) switches to cursor mode,
+        # where each page is an index-backed query instead of a slice of the full dataset
+        if 'cursor' in request.GET:
+            return self._directory_data_keyset(request, tenant, start_time)
+        
+        # STREAMING MODE: ?stream=true encodes rows chunk by chunk (bounded memory)
+        from ..utils.streaming_json import is_stream_requested
+        if is_stream_requested(request):
+            return self._directory_data_stream(tenant, start_time)
+        
         # STEP 2: Check for FULL dataset cache (like attendance tracker)
         step_start = time.time()
         use_cache = request.GET.get('no_cache', '').lower() != 'true'
@@ -2896,39 +2901,225 @@ class EmployeeProfileViewSet(viewsets.ModelViewSet):
         
         timing_breakdown['cache_check_ms'] = round((time.time() - step_start) * 1000, 2)
         
-        # STEP 3: OPTIMIZED EMPLOYEE QUERY - Selective field loading
+        # STEP 3-4: OPTIMIZED EMPLOYEE QUERY + LIGHTNING-FAST SALARY SUBQUERY
         step_start = time.time()
+        employees_with_salary = self._directory_employee_queryset(tenant).order_by('first_name', 'last_name')
+        timing_breakdown['employee_query_setup_ms'] = round((time.time() - step_start) * 1000, 2)
+        
+        # STEP 5: FETCH ALL EMPLOYEES (like attendance tracker - build full dataset first)
+        step_start = time.time()
+        total_count = employees_with_salary.count()
+        
+        # Always fetch ALL employees to build full dataset for caching
+        employees_page = employees_with_salary  # Full queryset
+        timing_breakdown['query_execution_ms'] = round((time.time() - step_start) * 1000, 2)
+        
+        # STEP 6-7: AGGREGATED ATTENDANCE + ROW BUILDING (shared with cursor pagination)
+        data = self._build_directory_rows(tenant, list(employees_page), timing_breakdown)
+        
+        # STEP 8: SMART CACHING & RESPONSE (like attendance tracker)
+        step_start = time.time()
+        total_time_ms = round((time.time() - start_time) * 1000, 2)
+        
+        # Store FULL dataset in cache for fast subsequent requests
+        full_response_data = {
+            'results': data,  # Full dataset
+            'total_count': total_count,
+            'performance': {
+                'query_time': f"{(time.time() - start_time):.3f}s",
+                'total_time_ms': total_time_ms,
+                'timing_breakdown': timing_breakdown,
+                'total_employees': total_count,
+                'cached': False,
+                'data_source': 'database_query',
+                'optimization_level': 'ULTRA_OPTIMIZED_v2.1_FULL_CACHE',
+                'request_metrics': performance_snapshot(),
+            }
+        }
+        
+        # Cache the full dataset (like attendance tracker)
+        if use_cache and total_count <= 2000:  # Cache if reasonable size
+            cache.set(full_cache_key, full_response_data, 600)  # 10 minutes
+            logger.info(f"💾 Cached full directory dataset: {total_count} employees")
+        
+        # Now slice for the requested offset/limit
+        if use_offset_limit and limit > 0:
+            end_index = offset + limit
+            paginated_results = data[offset:end_index] if offset < len(data) else []
+            has_more_sliced = end_index < len(data)
+            calculated_offset = offset
+        else:
+            paginated_results = data
+            has_more_sliced = False
+            calculated_offset = 0
+        
+        # Build final response
+        response_data = {
+            'results': paginated_results,
+            'count': len(paginated_results),  # Records in current response
+            'total_count': total_count,  # Total records available
+            'has_more': has_more_sliced,  # For progressive loading
+            'offset': calculated_offset,  # For progressive loading
+            'performance': full_response_data['performance']
+        }
+        
+        timing_breakdown['response_building_ms'] = round((time.time() - step_start) * 1000, 2)
+        
+        # Performance logging
+        logger.info(f"directory_data API Performance - Total: {total_time_ms}ms, Offset: {offset}, Limit: {limit}, Records: {len(paginated_results)}/{total_count}")
+        
+        return Response(response_data)
+    
+    def _directory_employee_queryset(self, tenant):
+        """
+        Employee queryset for the directory with selective field loading and the
+        latest uploaded salary annotated via a per-row subquery.
+        """
+        from django.db.models import Subquery, OuterRef
+
         employees_query = self.get_queryset().only(
             'id', 'employee_id', 'first_name', 'last_name', 'department', 
             'designation', 'mobile_number', 'email', 'is_active', 'basic_salary',
             'shift_start_time', 'shift_end_time', 'tenant_id', 'employment_type',
             'date_of_joining', 'location_branch', 'inactive_marked_at', 'off_monday', 'off_tuesday', 'off_wednesday', 'off_thursday',
             'off_friday', 'off_saturday', 'off_sunday', 'weekly_rules_enabled'
-        ).order_by('first_name', 'last_name')
-        timing_breakdown['employee_query_setup_ms'] = round((time.time() - step_start) * 1000, 2)
+        )
         
-        # STEP 4: LIGHTNING-FAST SALARY SUBQUERY
-        step_start = time.time()
         latest_salary_subquery = SalaryData.objects.filter(
             tenant=tenant,  # Critical: Add tenant filter to subquery
             employee_id=OuterRef('employee_id')
         ).only('nett_payable', 'month', 'year').order_by('-year', '-month')[:1]
         
-        employees_with_salary = employees_query.annotate(
+        return employees_query.annotate(
             latest_salary_amount=Subquery(latest_salary_subquery.values('nett_payable')),
             latest_salary_month=Subquery(latest_salary_subquery.values('month')),
             latest_salary_year=Subquery(latest_salary_subquery.values('year'))
         )
-        timing_breakdown['salary_subquery_ms'] = round((time.time() - step_start) * 1000, 2)
+
+    def _directory_data_keyset(self, request, tenant, start_time):
+        """
+        Cursor-paginated directory_data.
+
+        Rows are ordered by (first_name, last_name, id) with NULL last names sorted
+        as ''. Each page is a single ``WHERE (key) > cursor LIMIT n`` query backed by
+        ``employee_directory_keyset_idx``, and attendance is aggregated for the page's
+        employees only. Pages are cached per cursor under the directory dataset
+        version, which the usual ``directory_data_{tenant_id}`` invalidation retires.
+
+        Query params: cursor (opaque, empty for the first page), limit (default 100,
+        max 500), no_cache=true.
+        """
+        from django.db.models import Value
+        from django.db.models.functions import Coalesce
+        from ..utils.keyset_pagination import (
+            InvalidCursor, decode_cursor, fetch_keyset_page, get_dataset_version, page_cache_key,
+        )
+
+        timing_breakdown = {}
+        key_fields = ('first_name', 'directory_last_name', 'id')
+        cursor = request.GET.get('cursor', '')
+        try:
+            limit = min(max(int(request.GET.get('limit', 100)), 1), 500)
+        except ValueError:
+            limit = 100
+        try:
+            after = decode_cursor(cursor, len(key_fields))
+        except InvalidCursor as exc:
+            return Response({"error": str(exc)}, status=400)
+        
+        use_cache = request.GET.get('no_cache', '').lower() != 'true'
+        cache_key = None
+        if use_cache:
+            version = get_dataset_version(f"directory_data_{tenant.id}")
+            cache_key = page_cache_key(f"directory_data_page_{tenant.id}", version, cursor, limit)
+            cached_page = cache.get(cache_key)
+            if cached_page:
+                cached_page['performance']['cached'] = True
+                cached_page['performance']['query_time'] = f"{(time.time() - start_time):.3f}s"
+                return Response(cached_page)
         
-        # STEP 5: FETCH ALL EMPLOYEES (like attendance tracker - build full dataset first)
         step_start = time.time()
-        total_count = employees_with_salary.count()
+        employees_qs = self._directory_employee_queryset(tenant).annotate(
+            directory_last_name=Coalesce('last_name', Value(''))
+        )
+        employees, next_cursor = fetch_keyset_page(employees_qs, key_fields, after, limit)
+        timing_breakdown['page_query_ms'] = round((time.time() - step_start) * 1000, 2)
         
-        # Always fetch ALL employees to build full dataset for caching
-        employees_page = employees_with_salary  # Full queryset
-        timing_breakdown['query_execution_ms'] = round((time.time() - step_start) * 1000, 2)
+        data = self._build_directory_rows(tenant, employees, timing_breakdown)
+        
+        response_data = {
+            'results': data,
+            'count': len(data),
+            'has_more': next_cursor is not None,
+            'next_cursor': next_cursor,
+            'cursor': cursor,
+            'limit': limit,
+            'performance': {
+                'query_time': f"{(time.time() - start_time):.3f}s",
+                'total_time_ms': round((time.time() - start_time) * 1000, 2),
+                'timing_breakdown': timing_breakdown,
+                'cached': False,
+                'data_source': 'keyset_page_query',
+                'request_metrics': performance_snapshot(),
+            }
+        }
+        # Total count is only computed for the first page; later pages don't need it
+        if after is None:
+            response_data['total_count'] = self.get_queryset().count()
+        
+        if cache_key:
+            cache.set(cache_key, response_data, 600)
         
+        logger.info(f"directory_data keyset page - {len(data)} records, has_more={next_cursor is not None}, {response_data['performance']['total_time_ms']}ms")
+        return Response(response_data)
+
+    def _directory_data_stream(self, tenant, start_time):
+        """
+        Streaming directory_data (?stream=true).
+
+        Employees are read with .iterator(chunk_size=...) and each chunk's attendance
+        is aggregated and encoded before the next chunk is fetched, so peak memory is
+        one chunk regardless of tenant size. The envelope matches the full response;
+        count/total_count/performance are emitted after the results.
+        """
+        from ..utils.streaming_json import DEFAULT_CHUNK_SIZE, iter_chunks, stream_json_response
+
+        timing_breakdown = {}
+        streamed = {'count': 0}
+        # Queryset is built now, while the tenant thread-local is still set
+        employees_qs = self._directory_employee_queryset(tenant).order_by('first_name', 'last_name', 'id')
+
+        def rows():
+            for chunk in iter_chunks(employees_qs.iterator(chunk_size=DEFAULT_CHUNK_SIZE), DEFAULT_CHUNK_SIZE):
+                for row in self._build_directory_rows(tenant, chunk, timing_breakdown):
+                    streamed['count'] += 1
+                    yield row
+
+        def tail():
+            total_time_ms = round((time.time() - start_time) * 1000, 2)
+            logger.info(f"directory_data streamed {streamed['count']} employees in {total_time_ms}ms")
+            return {
+                'count': streamed['count'],
+                'total_count': streamed['count'],
+                'has_more': False,
+                'offset': 0,
+                'performance': {
+                    'query_time': f"{(time.time() - start_time):.3f}s",
+                    'total_time_ms': total_time_ms,
+                    'cached': False,
+                    'data_source': 'streaming_query',
+                    'chunk_size': DEFAULT_CHUNK_SIZE,
+                }
+            }
+
+        return stream_json_response({}, 'results', rows(), tail)
+
+    def _build_directory_rows(self, tenant, employees_page, timing_breakdown):
+        """
+        Build directory rows (profile fields + current-month attendance) for the given
+        employees. All attendance lookups are scoped to these employees, so the cost
+        is proportional to the page size rather than the tenant size.
+        """
         # STEP 6: AGGREGATED ATTENDANCE DATA FROM MULTIPLE SOURCES
         step_start = time.time()
         current_month = timezone.now().month
@@ -2943,7 +3134,7 @@ class EmployeeProfileViewSet(viewsets.ModelViewSet):
         # 2. DailyAttendance (manually marked attendance)
         # 3. Attendance (uploaded attendance Excel)
         from ..models import Attendance, DailyAttendance
-        from django.db.models import Max, Count, Q
+        from django.db.models import Max, Count
         
         # Initialize aggregated lookup dictionary
         attendance_lookup = {}
@@ -2981,8 +3172,7 @@ class EmployeeProfileViewSet(viewsets.ModelViewSet):
         daily_attendance_current_month = DailyAttendance.objects.filter(
             tenant=tenant,
             employee_id__in=employee_ids,
-            date__year=current_year,
-            date__month=current_month
+            **month_filter(current_year, current_month)
         ).values('employee_id', 'attendance_status', 'ot_hours', 'late_minutes')
         
         # Get all records from DOJ onwards to aggregate OT/late totals (cumulative from DOJ)
@@ -3268,59 +3458,10 @@ class EmployeeProfileViewSet(viewsets.ModelViewSet):
         
         timing_breakdown['data_processing_ms'] = round((time.time() - step_start) * 1000, 2)
         timing_breakdown['records_processed'] = len(data)
-        
-        # STEP 8: SMART CACHING & RESPONSE (like attendance tracker)
-        step_start = time.time()
-        total_time_ms = round((time.time() - start_time) * 1000, 2)
-        
-        # Store FULL dataset in cache for fast subsequent requests
-        full_response_data = {
-            'results': data,  # Full dataset
-            'total_count': total_count,
-            'performance': {
-                'query_time': f"{(time.time() - start_time):.3f}s",
-                'total_time_ms': total_time_ms,
-                'timing_breakdown': timing_breakdown,
-                'total_employees': total_count,
-                'cached': False,
-                'data_source': 'database_query',
-                'optimization_level': 'ULTRA_OPTIMIZED_v2.1_FULL_CACHE'
-            }
-        }
-        
-        # Cache the full dataset (like attendance tracker)
-        if use_cache and total_count <= 2000:  # Cache if reasonable size
-            cache.set(full_cache_key, full_response_data, 600)  # 10 minutes
-            logger.info(f"💾 Cached full directory dataset: {total_count} employees")
-        
-        # Now slice for the requested offset/limit
-        if use_offset_limit and limit > 0:
-            end_index = offset + limit
-            paginated_results = data[offset:end_index] if offset < len(data) else []
-            has_more_sliced = end_index < len(data)
-            calculated_offset = offset
-        else:
-            paginated_results = data
-            has_more_sliced = False
-            calculated_offset = 0
-        
-        # Build final response
-        response_data = {
-            'results': paginated_results,
-            'count': len(paginated_results),  # Records in current response
-            'total_count': total_count,  # Total records available
-            'has_more': has_more_sliced,  # For progressive loading
-            'offset': calculated_offset,  # For progressive loading
-            'performance': full_response_data['performance']
-        }
-        
-        timing_breakdown['response_building_ms'] = round((time.time() - step_start) * 1000, 2)
-        
-        # Performance logging
-        logger.info(f"directory_data API Performance - Total: {total_time_ms}ms, Offset: {offset}, Limit: {limit}, Records: {len(paginated_results)}/{total_count}")
-        
-        return Response(response_data)
-    
+
+        return data
+
+
     @action(detail=True, methods=['get'])
     def profile_detail(self, request, pk=None):
         """
@@ -3501,6 +3642,10 @@ class EmployeeProfileViewSet(viewsets.ModelViewSet):
                 
                 if cursor.rowcount == 0:
                     return Response({"error": "Employee not found or update failed"}, status=404)
+            
+            # Raw SQL skips the EmployeeProfile signals: mark the employee's payroll for recalculation
+            from ..services.payroll_dirty import mark_employees_dirty_all_periods
+            mark_employees_dirty_all_periods(tenant, [employee.employee_id], 'employee_status')
         
         # Prepare response data immediately
         response_data = {
@@ -3639,6 +3784,14 @@ class EmployeeProfileViewSet(viewsets.ModelViewSet):
                 
                 cursor.execute(sql, params)
                 updated_count = cursor.rowcount
+            
+            # Raw SQL skips the EmployeeProfile signals: mark their payroll for recalculation
+            from ..services.payroll_dirty import mark_employees_dirty_all_periods
+            mark_employees_dirty_all_periods(
+                tenant,
+                EmployeeProfile.objects.filter(tenant=tenant, id__in=employee_ids).values_list('employee_id', flat=True),
+                'employee_status',
+            )
         
         if updated_count == 0:
             return Response({"error": "No employees were updated"}, status=400)
@@ -4033,6 +4186,7 @@ class EmployeeProfileViewSet(viewsets.ModelViewSet):
             
             logger.info(f"✨ Cleared directory and charts cache for tenant {tenant.id} after bulk employee upload")
             
+            SSENotifier.notify_upload_finished(tenant, 'employees', employees_created=len(created_employees))
             return Response({
                 'message': 'Bulk upload completed successfully!',
                 'employees_created': len(created_employees),
@@ -4208,6 +4362,15 @@ class EmployeeProfileViewSet(viewsets.ModelViewSet):
                     cursor.execute(sql, params)
                     updated_count = cursor.rowcount
                 
+                # Raw SQL skips the EmployeeProfile signals: mark their payroll for recalculation
+                from ..services.payroll_dirty import EMPLOYEE_PAYROLL_FIELDS, mark_employees_dirty_all_periods
+                if set(update_fields) & set(EMPLOYEE_PAYROLL_FIELDS):
+                    mark_employees_dirty_all_periods(
+                        tenant,
+                        EmployeeProfile.objects.filter(tenant=tenant, id__in=employee_ids).values_list('employee_id', flat=True),
+                        'employee_bulk_update',
+                    )
+                
                 # Create audit log
                 bulk_log = BulkUpdateLog.objects.create(
                     tenant=tenant,
@@ -4301,6 +4464,8 @@ class EmployeeProfileViewSet(viewsets.ModelViewSet):
             
             # Revert each employee's values
             reverted_count = 0
+            payroll_changed_ids = []
+            from ..services.payroll_dirty import EMPLOYEE_PAYROLL_FIELDS, mark_employees_dirty_all_periods
             with transaction.atomic():
                 for old_data in old_values:
                     employee_id = old_data.pop('id')
@@ -4310,6 +4475,16 @@ class EmployeeProfileViewSet(viewsets.ModelViewSet):
                         id=employee_id
                     ).update(**old_data)
                     reverted_count += 1
+                    if set(old_data) & set(EMPLOYEE_PAYROLL_FIELDS):
+                        payroll_changed_ids.append(employee_id)
+                
+                # update() skips the EmployeeProfile signals: mark their payroll for recalculation
+                if payroll_changed_ids:
+                    mark_employees_dirty_all_periods(
+                        tenant,
+                        EmployeeProfile.objects.filter(tenant=tenant, id__in=payroll_changed_ids).values_list('employee_id', flat=True),
+                        'employee_bulk_update',
+                    )
                 
                 # Mark as reverted
                 bulk_log.reverted = True
@@ -4713,7 +4888,7 @@ class AttendanceViewSet(viewsets.ReadOnlyModelViewSet):
                 page_number = (offset // limit) + 1
                 page = paginator.get_page(page_number)
                 
-                serializer = self.get_serializer(page.object_list, many=True)
+                results = self.get_serializer(page.object_list, many=True).data
                 total_count = paginator.count
                 has_more = page.has_next()
                 
@@ -4723,18 +4898,21 @@ class AttendanceViewSet(viewsets.ReadOnlyModelViewSet):
                 
                 # Apply offset and limit
                 total_count = queryset.count()
-                paginated_queryset = queryset[offset:offset + limit]
                 has_more = (offset + limit) < total_count
                 
-                serializer = self.get_serializer(paginated_queryset, many=True)
+                # Fast path: .values() projection instead of per-object serialization
+                if queryset.model is Attendance:
+                    results = ATTENDANCE_PROJECTION.render(ATTENDANCE_PROJECTION.project(queryset)[offset:offset + limit])
+                else:
+                    results = self.get_serializer(queryset[offset:offset + limit], many=True).data
             
             db_time = time.time() - step_start
             timing_breakdown['db_time_ms'] = round(db_time * 1000, 2)
             
             # Prepare response data
             response_data = {
-                'results': serializer.data,
-                'count': len(serializer.data),
+                'results': results,
+                'count': len(results),
                 'total_count': total_count,
                 'offset': offset,
                 'limit': limit,
@@ -4825,8 +5003,7 @@ class AttendanceViewSet(viewsets.ReadOnlyModelViewSet):
         if month_param and year_param:
             try:
                 monthly_attendance_qs = monthly_attendance_qs.filter(
-                    date__year=int(year_param),
-                    date__month=int(month_param)
+                    **month_filter(int(year_param), int(month_param))
                 )
             except ValueError:
                 pass
@@ -4955,14 +5132,10 @@ class AttendanceViewSet(viewsets.ReadOnlyModelViewSet):
             })
         
         # STEP 2: Get data from Attendance model (Excel uploads) for combinations NOT in MonthlyAttendanceSummary
-        month_filter = Q()
-        for y, m in selected_months:
-            month_filter |= Q(date__year=y, date__month=m)
-        
         excel_records = Attendance.objects.filter(
             tenant=tenant,
             employee_id__in=active_employees.values_list('employee_id', flat=True)
-        ).filter(month_filter)
+        ).filter(months_q(selected_months))
         
         for record in excel_records:
             emp_id = record.employee_id
@@ -5036,8 +5209,7 @@ class AttendanceViewSet(viewsets.ReadOnlyModelViewSet):
         daily_aggregated = DailyAttendance.objects.filter(
             tenant=tenant,
             employee_id__in=active_employees.values_list('employee_id', flat=True),
-            date__year=current_year,
-            date__month=current_month
+            **month_filter(current_year, current_month)
         ).values('employee_id', 'employee_name', 'department').annotate(
             present_days=Sum(
                 Case(
@@ -5419,7 +5591,7 @@ class AttendanceViewSet(viewsets.ReadOnlyModelViewSet):
         return Response(weekly_attendance)
 
 
-class DailyAttendanceViewSet(viewsets.ModelViewSet):
+class DailyAttendanceViewSet(ProjectedListMixin, viewsets.ModelViewSet):
 
     queryset = DailyAttendance.objects.all()
     
@@ -5760,6 +5932,7 @@ class DailyAttendanceViewSet(viewsets.ModelViewSet):
             cache.delete(f"attendance_list_{tenant_for_cache.id}_offset_0_limit_100")
 
     @action(detail=False, methods=['get'])
+    @query_budget(12)
     def all_records(self, request):
         """
         Return attendance summaries for the current tenant with PROGRESSIVE LOADING support.
@@ -5771,6 +5944,10 @@ class DailyAttendanceViewSet(viewsets.ModelViewSet):
         4. no_cache=true  : Bypass the cache.
         5. offset=N : Skip first N records (for progressive loading, default: 0)
         6. limit=N  : Return max N records (for progressive loading, default: all)
+        7. cursor=...: Keyset pagination (empty for the first page). Employees are paged by
+           employee_id with an index-backed query and only the page's employees are
+           aggregated; the response carries next_cursor and omits kpi_totals.
+        8. stream=true : Stream the full dataset, aggregated and encoded one chunk of employees at a time (bypasses the full cache).
         
         NOTE: custom_month uses DailyAttendance (real-time) logic to avoid double-counting, same as custom_range.
         """
@@ -5792,7 +5969,7 @@ class DailyAttendanceViewSet(viewsets.ModelViewSet):
         tenant = getattr(request, 'tenant', None)
         if not tenant:
             return Response({"error": "No tenant found"}, status=400)
-        timing_breakdown['tenant_validation_ms'] = round((time.time() - step_start) * 1000, 2)
+        record_step(timing_breakdown, 'tenant_validation_ms', step_start)
 
         # --------------------------------------------------
         # Extract query params
@@ -5821,10 +5998,38 @@ class DailyAttendanceViewSet(viewsets.ModelViewSet):
         # Include prefer_realtime in the cache key signature to avoid mixing modes
         param_signature = f"{time_period}_{month_param}_{year_param}_{start_date_str}_{end_date_str}_rt_{int(prefer_realtime)}"
         cache_key       = f"attendance_all_records_{tenant.id}_{param_signature}"
-        timing_breakdown['params_extraction_ms'] = round((time.time() - step_start) * 1000, 2)
+        
+        # KEYSET PAGINATION: cursor mode pages employees by employee_id and caches
+        # each page under the attendance dataset version instead of the full blob
+        cursor_mode = 'cursor' in request.query_params
+        cursor = request.query_params.get('cursor', '')
+        # STREAMING MODE: ?stream=true aggregates and encodes the full dataset chunk by chunk
+        from ..utils.streaming_json import is_stream_requested
+        stream_mode = not cursor_mode and is_stream_requested(request)
+        cursor_after = None
+        if cursor_mode:
+            from ..utils.keyset_pagination import (
+                InvalidCursor, decode_cursor, get_dataset_version, page_cache_key,
+            )
+            try:
+                cursor_after = decode_cursor(cursor, 1)
+            except InvalidCursor as exc:
+                return Response({"error": str(exc)}, status=400)
+            limit = min(max(limit or 100, 1), 500)
+            offset = 0
+            if use_cache:
+                dataset_version = get_dataset_version(f"attendance_all_records_{tenant.id}")
+                cache_key = page_cache_key(f"attendance_all_records_{tenant.id}_page", dataset_version, cursor, limit, [param_signature])
+        record_step(timing_breakdown, 'params_extraction_ms', step_start)
 
         step_start = time.time()
-        if use_cache:
+        if use_cache and cursor_mode:
+            cached_page = cache.get(cache_key)
+            if cached_page:
+                cached_page['performance']['cached'] = True
+                cached_page['performance']['query_time'] = f"{(time.time() - start_time):.3f}s"
+                return Response(cached_page)
+        elif use_cache and not stream_mode:
             cached = cache.get(cache_key)
             if cached:
                 # PROGRESSIVE LOADING: Apply offset/limit to cached data
@@ -5864,7 +6069,7 @@ class DailyAttendanceViewSet(viewsets.ModelViewSet):
                 response_data['performance']['cached'] = True
                 response_data['performance']['query_time'] = f"{(time.time() - start_time):.3f}s"
                 return Response(response_data)
-        timing_breakdown['cache_check_ms'] = round((time.time() - step_start) * 1000, 2)
+        record_step(timing_breakdown, 'cache_check_ms', step_start)
 
         # --------------------------------------------------
         # Helper for generating previous months list
@@ -5964,7 +6169,7 @@ class DailyAttendanceViewSet(viewsets.ModelViewSet):
             # Unknown time_period – default to this month
             now = timezone.now()
             selected_months = [(now.year, now.month)]
-        timing_breakdown['date_range_processing_ms'] = round((time.time() - step_start) * 1000, 2)
+        record_step(timing_breakdown, 'date_range_processing_ms', step_start)
 
         # --------------------------------------------------
         # Fetch employee master data once - OPTIMIZED WITH CACHING
@@ -5974,9 +6179,30 @@ class DailyAttendanceViewSet(viewsets.ModelViewSet):
         # OPTIMIZATION: Cache employee data for 15 minutes (employees don't change often)
         from django.core.cache import cache
         employee_cache_key = f"employee_profiles_{tenant.id}_{time_period}"
-        employees_dict = cache.get(employee_cache_key)
+        employees_dict = None if cursor_mode or stream_mode else cache.get(employee_cache_key)
+        page_employee_ids = None
+        next_cursor = None
+        keyset_employees_qs = EmployeeProfile.objects.filter(
+            tenant=tenant,
+            is_active=True,
+            employee_id__isnull=False
+        ).values(
+            'employee_id', 'first_name', 'last_name', 'department', 'designation',
+            'date_of_joining', 'shift_start_time', 'shift_end_time',
+            'off_monday', 'off_tuesday', 'off_wednesday', 'off_thursday', 
+            'off_friday', 'off_saturday', 'off_sunday', 'weekly_rules_enabled'
+        )
         
-        if employees_dict is None:
+        if cursor_mode:
+            from ..utils.keyset_pagination import fetch_keyset_page
+            page_rows, next_cursor = fetch_keyset_page(keyset_employees_qs, ('employee_id',), cursor_after, limit)
+            employees_dict = {emp['employee_id']: emp for emp in page_rows}
+            page_employee_ids = list(employees_dict.keys())
+            timing_breakdown['employee_fetch_keyset_page'] = True
+        elif stream_mode:
+            # Fetched one chunk at a time while streaming (iter_streamed_records)
+            employees_dict = {}
+        elif employees_dict is None:
             # Cache miss - fetch from database with selective fields only
             employees_qs = EmployeeProfile.objects.filter(
                 tenant=tenant,
@@ -6001,586 +6227,280 @@ class DailyAttendanceViewSet(viewsets.ModelViewSet):
         else:
             timing_breakdown['employee_fetch_cache_hit'] = True
             
-        timing_breakdown['employee_fetch_ms'] = round((time.time() - step_start) * 1000, 2)
-        timing_breakdown['employee_count'] = len(employees_dict)
+        record_step(timing_breakdown, 'employee_fetch_ms', step_start)
+        if not stream_mode:
+            timing_breakdown['employee_count'] = len(employees_dict)
 
-        # --------------------------------------------------
-        # Aggregate attendance
-        # --------------------------------------------------
-        step_start = time.time()
-        aggregated = defaultdict(lambda: {'present_days': 0.0, 'absent_days': 0.0, 'unmarked_days': 0.0, 'ot_hours': 0.0, 'late_minutes': 0, 'holiday_days': 0, 'weekly_penalty_days': 0.0, 'data_sources': [], 'records_count': 0})
-        total_working_days = 0  # Used later for absent calculation
+        def build_attendance_records(employees_dict, page_employee_ids):
+            """
+            Aggregate attendance for ``employees_dict`` and return its records iterator.
+            ``page_employee_ids`` restricts the aggregation queries to one keyset page
+            or streamed chunk; None aggregates the whole tenant.
+            """
+            def scoped(qs):
+                """Restrict an aggregation queryset to the current keyset page's employees."""
+                if page_employee_ids is None:
+                    return qs
+                return qs.filter(employee_id__in=page_employee_ids)
+
+            # --------------------------------------------------
+            # Aggregate attendance
+            # --------------------------------------------------
+            step_start = time.time()
+            aggregated = defaultdict(lambda: {'present_days': 0.0, 'absent_days': 0.0, 'unmarked_days': 0.0, 'ot_hours': 0.0, 'late_minutes': 0, 'holiday_days': 0, 'weekly_penalty_days': 0.0, 'data_sources': [], 'records_count': 0})
+            total_working_days = 0  # Used later for absent calculation
 
-        if use_daily_data:
-            # ---------------- Custom Range: Check BOTH DailyAttendance AND Attendance (Excel) ----------------
-            from ..models import DailyAttendance, MonthlyAttendanceSummary, Attendance
+            if use_daily_data:
+                # ---------------- Custom Range: Check BOTH DailyAttendance AND Attendance (Excel) ----------------
+                from ..models import DailyAttendance, MonthlyAttendanceSummary, Attendance
             
-            # STEP 1: Get daily attendance data (logged attendance)
-            query_start = time.time()
-            daily_qs = DailyAttendance.objects.filter(
-                tenant=tenant,
-                date__range=[start_date_obj, end_date_obj]
-            )
+                # STEP 1: Get daily attendance data (logged attendance)
+                query_start = time.time()
+                daily_qs = scoped(DailyAttendance.objects.filter(
+                    tenant=tenant,
+                    date__range=[start_date_obj, end_date_obj]
+                ))
             
-            # Debug: Log the query and results
-            logger.info(f"DailyAttendance query - date range: {start_date_obj} to {end_date_obj}")
-            logger.info(f"DailyAttendance query - tenant: {tenant.id if tenant else 'None'}")
+                # Debug: Log the query and results
+                logger.info(f"DailyAttendance query - date range: {start_date_obj} to {end_date_obj}")
+                logger.info(f"DailyAttendance query - tenant: {tenant.id if tenant else 'None'}")
             
-            # Get sample records to debug
-            sample_records = daily_qs.values('employee_id', 'date', 'attendance_status')[:5]
-            logger.info(f"Sample records from query: {list(sample_records)}")
-            logger.info(f"Total records found: {daily_qs.count()}")
+                # Get sample records to debug
+                sample_records = daily_qs.values('employee_id', 'date', 'attendance_status')[:5]
+                logger.info(f"Sample records from query: {list(sample_records)}")
+                logger.info(f"Total records found: {daily_qs.count()}")
 
-            # Check if this is a single day request
-            is_single_day = start_date_obj == end_date_obj
+                # Check if this is a single day request
+                is_single_day = start_date_obj == end_date_obj
             
-            if is_single_day:
-                # For single day requests, return individual records WITHOUT aggregation
-                # to preserve the actual attendance_status field (PRESENT/ABSENT/etc.)
-                logger.info(f"Single day request detected for date: {start_date_obj}")
-                # Don't aggregate - get raw records to preserve attendance_status
-                daily_agg = daily_qs.values('employee_id', 'date', 'attendance_status', 'ot_hours', 'late_minutes')
-            else:
-                # For multi-day requests, aggregate by employee_id
-                daily_agg = daily_qs.values('employee_id').annotate(
-                    present_days=Sum(
-                        Case(
-                            When(attendance_status__in=['PRESENT', 'PAID_LEAVE'], then=Value(1.0)),
-                            When(attendance_status='HALF_DAY', then=Value(0.5)),
-                            default=Value(0.0),
-                            output_field=FloatField()
-                        )
-                    ),
-                    absent_days=Sum(
-                        Case(
-                            When(attendance_status='ABSENT', then=Value(1.0)),
-                            default=Value(0.0),
-                            output_field=FloatField()
-                        )
-                    ),
-                    unmarked_days=Sum(
-                        Case(
-                            When(attendance_status='UNMARKED', then=Value(1.0)),
-                            default=Value(0.0),
-                            output_field=FloatField()
-                        )
-                    ),
-                    ot_hours=Sum('ot_hours'),
-                    late_minutes=Sum('late_minutes'),
-                    records_count=Count('id')
-                )
-            timing_breakdown['daily_attendance_query_ms'] = round((time.time() - query_start) * 1000, 2)
+                if is_single_day:
+                    # For single day requests, return individual records WITHOUT aggregation
+                    # to preserve the actual attendance_status field (PRESENT/ABSENT/etc.)
+                    logger.info(f"Single day request detected for date: {start_date_obj}")
+                    # Don't aggregate - get raw records to preserve attendance_status
+                    daily_agg = daily_qs.values('employee_id', 'date', 'attendance_status', 'ot_hours', 'late_minutes')
+                else:
+                    # For multi-day requests, aggregate by employee_id
+                    daily_agg = daily_qs.values('employee_id').annotate(
+                        present_days=Sum(
+                            Case(
+                                When(attendance_status__in=['PRESENT', 'PAID_LEAVE'], then=Value(1.0)),
+                                When(attendance_status='HALF_DAY', then=Value(0.5)),
+                                default=Value(0.0),
+                                output_field=FloatField()
+                            )
+                        ),
+                        absent_days=Sum(
+                            Case(
+                                When(attendance_status='ABSENT', then=Value(1.0)),
+                                default=Value(0.0),
+                                output_field=FloatField()
+                            )
+                        ),
+                        unmarked_days=Sum(
+                            Case(
+                                When(attendance_status='UNMARKED', then=Value(1.0)),
+                                default=Value(0.0),
+                                output_field=FloatField()
+                            )
+                        ),
+                        ot_hours=Sum('ot_hours'),
+                        late_minutes=Sum('late_minutes'),
+                        records_count=Count('id')
+                    )
+                record_step(timing_breakdown, 'daily_attendance_query_ms', query_start)
 
-            process_start = time.time()
-            # OPTIMIZATION: Use list comprehension for faster processing
-            for row in daily_agg:
-                emp_id = row['employee_id']
-                agg_data = aggregated[emp_id]
+                process_start = time.time()
+                # OPTIMIZATION: Use list comprehension for faster processing
+                for row in daily_agg:
+                    emp_id = row['employee_id']
+                    agg_data = aggregated[emp_id]
                 
-                if is_single_day:
-                    # For single day: track that we have 1 record
-                    agg_data['records_count'] += 1
+                    if is_single_day:
+                        # For single day: track that we have 1 record
+                        agg_data['records_count'] += 1
                     
-                    # For single day: use raw attendance_status to calculate present/absent
-                    attendance_status = row.get('attendance_status', 'UNMARKED')
-                    if attendance_status in ['PRESENT', 'PAID_LEAVE']:
-                        agg_data['present_days'] += 1.0
-                    elif attendance_status == 'HALF_DAY':
-                        agg_data['present_days'] += 0.5
-                        agg_data['absent_days'] += 0.5
-                    elif attendance_status == 'ABSENT':
-                        agg_data['absent_days'] += 1.0
-                    elif attendance_status == 'UNMARKED':
-                        # Track unmarked days separately - don't count as absent
-                        agg_data['unmarked_days'] += 1.0
-                    else:
-                        # Unknown statuses are left unmarked (not counted)
-                        pass
+                        # For single day: use raw attendance_status to calculate present/absent
+                        attendance_status = row.get('attendance_status', 'UNMARKED')
+                        if attendance_status in ['PRESENT', 'PAID_LEAVE']:
+                            agg_data['present_days'] += 1.0
+                        elif attendance_status == 'HALF_DAY':
+                            agg_data['present_days'] += 0.5
+                            agg_data['absent_days'] += 0.5
+                        elif attendance_status == 'ABSENT':
+                            agg_data['absent_days'] += 1.0
+                        elif attendance_status == 'UNMARKED':
+                            # Track unmarked days separately - don't count as absent
+                            agg_data['unmarked_days'] += 1.0
+                        else:
+                            # Unknown statuses are left unmarked (not counted)
+                            pass
                     
-                    # Store the actual status for the frontend
-                    agg_data['attendance_status'] = attendance_status
-                    agg_data['date'] = row.get('date')
-                else:
-                    # For multi-day: use aggregated values and count from annotation
-                    agg_data['present_days'] += float(row['present_days'] or 0)
-                    agg_data['absent_days'] += float(row.get('absent_days') or 0)
-                    agg_data['unmarked_days'] += float(row.get('unmarked_days') or 0)
-                    agg_data['records_count'] += int(row.get('records_count') or 0)
+                        # Store the actual status for the frontend
+                        agg_data['attendance_status'] = attendance_status
+                        agg_data['date'] = row.get('date')
+                    else:
+                        # For multi-day: use aggregated values and count from annotation
+                        agg_data['present_days'] += float(row['present_days'] or 0)
+                        agg_data['absent_days'] += float(row.get('absent_days') or 0)
+                        agg_data['unmarked_days'] += float(row.get('unmarked_days') or 0)
+                        agg_data['records_count'] += int(row.get('records_count') or 0)
                 
-                agg_data['ot_hours'] += float(row['ot_hours'] or 0)
-                agg_data['late_minutes'] += int(row['late_minutes'] or 0)
-                # Track that this employee has daily attendance data
-                if 'daily_attendance' not in agg_data['data_sources']:
-                    agg_data['data_sources'].append('daily_attendance')
-                # Note: total_working_days will be calculated per employee in final response building
+                    agg_data['ot_hours'] += float(row['ot_hours'] or 0)
+                    agg_data['late_minutes'] += int(row['late_minutes'] or 0)
+                    # Track that this employee has daily attendance data
+                    if 'daily_attendance' not in agg_data['data_sources']:
+                        agg_data['data_sources'].append('daily_attendance')
+                    # Note: total_working_days will be calculated per employee in final response building
                     
-            timing_breakdown['daily_data_processing_ms'] = round((time.time() - process_start) * 1000, 2)
-            timing_breakdown['daily_attendance_count'] = len(aggregated)
+                record_step(timing_breakdown, 'daily_data_processing_ms', process_start)
+                timing_breakdown['daily_attendance_count'] = len(aggregated)
 
-            # STEP 1.5: Get weekly penalty and bonus days from MonthlyAttendanceSummary for the date range
-            # This ensures penalty/bonus days are included even when using daily data
-            from datetime import date as _date
-            import calendar
-            monthly_summary_penalty_start = time.time()
-            months_in_range = set()
-            current = start_date_obj
-            while current <= end_date_obj:
-                months_in_range.add((current.year, current.month))
-                # Move to next month
-                if current.month == 12:
-                    current = _date(current.year + 1, 1, 1)
-                else:
-                    current = _date(current.year, current.month + 1, 1)
+                # STEP 1.5: Get weekly penalty and bonus days from MonthlyAttendanceSummary for the date range
+                # This ensures penalty/bonus days are included even when using daily data
+                from datetime import date as _date
+                import calendar
+                monthly_summary_penalty_start = time.time()
+                months_in_range = set()
+                current = start_date_obj
+                while current <= end_date_obj:
+                    months_in_range.add((current.year, current.month))
+                    # Move to next month
+                    if current.month == 12:
+                        current = _date(current.year + 1, 1, 1)
+                    else:
+                        current = _date(current.year, current.month + 1, 1)
             
-            if months_in_range:
-                # Build OR filter for all months in range
-                month_filter = Q()
-                for y, m in months_in_range:
-                    month_filter |= Q(year=y, month=m)
+                if months_in_range:
+                    # Build OR filter for all months in range
+                    summary_month_q = Q()
+                    for y, m in months_in_range:
+                        summary_month_q |= Q(year=y, month=m)
                 
-                # Aggregate penalty/bonus days by employee_id (sum across all months in range)
-                # IMPORTANT: Query ALL employees in MonthlyAttendanceSummary, not just those in aggregated
-                # This ensures we get penalty/bonus days even if employee has no DailyAttendance in range
-                from django.db.models import Sum
-                monthly_penalty_qs = MonthlyAttendanceSummary.objects.filter(
-                    tenant=tenant
-                ).filter(month_filter).values('employee_id').annotate(
-                    total_penalty=Sum('weekly_penalty_days')
-                )
+                    # Aggregate penalty/bonus days by employee_id (sum across all months in range)
+                    # IMPORTANT: Query ALL employees in MonthlyAttendanceSummary, not just those in aggregated
+                    # This ensures we get penalty/bonus days even if employee has no DailyAttendance in range
+                    monthly_penalty_qs = scoped(MonthlyAttendanceSummary.objects.filter(
+                        tenant=tenant
+                    )).filter(summary_month_q).values('employee_id').annotate(
+                        total_penalty=Sum('weekly_penalty_days')
+                    )
                 
-                # Debug: Log query details
-                logger.debug(f"📊 Querying MonthlyAttendanceSummary for months {months_in_range}")
-                logger.debug(f"📊 Month filter: {month_filter}")
+                    # Debug: Log query details
+                    logger.debug(f"📊 Querying MonthlyAttendanceSummary for months {months_in_range}")
+                    logger.debug(f"📊 Month filter: {summary_month_q}")
                 
-                # Debug: Log query results
-                penalty_records_count = 0
-                total_records_found = 0
-                for record in monthly_penalty_qs:
-                    total_records_found += 1
-                    emp_id = record['employee_id']
-                    # Ensure employee is in aggregated dict (create if not exists)
-                    if emp_id not in aggregated:
-                        aggregated[emp_id] = {'present_days': 0.0, 'absent_days': 0.0, 'unmarked_days': 0.0, 'ot_hours': 0.0, 'late_minutes': 0, 'holiday_days': 0, 'weekly_penalty_days': 0.0, 'data_sources': [], 'records_count': 0}
+                    # Debug: Log query results
+                    penalty_records_count = 0
+                    total_records_found = 0
+                    for record in monthly_penalty_qs:
+                        total_records_found += 1
+                        emp_id = record['employee_id']
+                        # Ensure employee is in aggregated dict (create if not exists)
+                        if emp_id not in aggregated:
+                            aggregated[emp_id] = {'present_days': 0.0, 'absent_days': 0.0, 'unmarked_days': 0.0, 'ot_hours': 0.0, 'late_minutes': 0, 'holiday_days': 0, 'weekly_penalty_days': 0.0, 'data_sources': [], 'records_count': 0}
                     
-                    agg_data = aggregated[emp_id]
-                    penalty_val = float(record.get('total_penalty') or 0)
-                    agg_data['weekly_penalty_days'] += penalty_val
-                    if penalty_val > 0:
-                        penalty_records_count += 1
-                        logger.info(f"📊 Added penalty for {emp_id}: penalty={penalty_val}")
-                    else:
-                        logger.debug(f"📊 Found record for {emp_id} but values are 0: penalty={penalty_val}")
+                        agg_data = aggregated[emp_id]
+                        penalty_val = float(record.get('total_penalty') or 0)
+                        agg_data['weekly_penalty_days'] += penalty_val
+                        if penalty_val > 0:
+                            penalty_records_count += 1
+                            logger.info(f"📊 Added penalty for {emp_id}: penalty={penalty_val}")
+                        else:
+                            logger.debug(f"📊 Found record for {emp_id} but values are 0: penalty={penalty_val}")
                 
-                if penalty_records_count > 0:
-                    logger.info(f"📊 Found {penalty_records_count} employees with penalty days in MonthlyAttendanceSummary (out of {total_records_found} total records)")
-                else:
-                    logger.warning(f"📊 No penalty days found in MonthlyAttendanceSummary for months {months_in_range}. Found {total_records_found} MonthlyAttendanceSummary records but all had 0 values.")
+                    if penalty_records_count > 0:
+                        logger.info(f"📊 Found {penalty_records_count} employees with penalty days in MonthlyAttendanceSummary (out of {total_records_found} total records)")
+                    else:
+                        logger.warning(f"📊 No penalty days found in MonthlyAttendanceSummary for months {months_in_range}. Found {total_records_found} MonthlyAttendanceSummary records but all had 0 values.")
             
-            timing_breakdown['monthly_penalty_query_ms'] = round((time.time() - monthly_summary_penalty_start) * 1000, 2)
+                record_step(timing_breakdown, 'monthly_penalty_query_ms', monthly_summary_penalty_start)
 
-            # STEP 2: Also check Attendance model (Excel uploads) for the date range
-            # This handles cases where some months have Excel data and others have logged data
-            excel_query_start = time.time()
+                # STEP 2: Also check Attendance model (Excel uploads) for the date range
+                # This handles cases where some months have Excel data and others have logged data
+                excel_query_start = time.time()
             
-            # OPTIMIZED: Get all (employee_id, year, month) combinations that have DailyAttendance
-            # in a single efficient query
-            months_with_daily = set()
-            daily_months_qs = DailyAttendance.objects.filter(
-                tenant=tenant,
-                date__range=[start_date_obj, end_date_obj]
-            ).extra(
-                select={
-                    'year': "EXTRACT(year FROM date)",
-                    'month': "EXTRACT(month FROM date)"
-                }
-            ).values('employee_id', 'year', 'month').distinct()
+                # OPTIMIZED: Get all (employee_id, year, month) combinations that have DailyAttendance
+                # in a single efficient query
+                months_with_daily = set()
+                daily_months_qs = scoped(DailyAttendance.objects.filter(
+                    tenant=tenant,
+                    date__range=[start_date_obj, end_date_obj]
+                )).extra(
+                    select={
+                        'year': "EXTRACT(year FROM date)",
+                        'month': "EXTRACT(month FROM date)"
+                    }
+                ).values('employee_id', 'year', 'month').distinct()
             
-            for record in daily_months_qs:
-                months_with_daily.add((record['employee_id'], int(record['year']), int(record['month'])))
+                for record in daily_months_qs:
+                    months_with_daily.add((record['employee_id'], int(record['year']), int(record['month'])))
             
-            timing_breakdown['daily_month_tracking_ms'] = round((time.time() - excel_query_start) * 1000, 2)
-            timing_breakdown['months_with_daily_count'] = len(months_with_daily)
+                record_step(timing_breakdown, 'daily_month_tracking_ms', excel_query_start)
+                timing_breakdown['months_with_daily_count'] = len(months_with_daily)
             
-            # Query Attendance model for the date range (include total_working_days for Excel working days and holiday_days)
-            attendance_qs = Attendance.objects.filter(
-                tenant=tenant,
-                date__range=[start_date_obj, end_date_obj]
-            ).values('employee_id', 'date', 'present_days', 'absent_days', 'ot_hours', 'late_minutes', 'total_working_days', 'holiday_days')
-            
-            # Track Excel working days by (employee_id, year, month) for custom range
-            excel_working_days_by_emp_month = {}
-            
-            # Process Excel attendance records, skipping months that have daily data
-            excel_count = 0
-            for record in attendance_qs:
-                emp_id = record['employee_id']
-                year = record['date'].year
-                month = record['date'].month
-                excel_key = (emp_id, year, month)
-                
-                # Store Excel working days for this month (use raw value from Excel)
-                if record.get('total_working_days'):
-                    excel_working_days_by_emp_month[excel_key] = int(record['total_working_days'])
-                
-                # Only use Excel data if we don't have DailyAttendance for this (employee, year, month)
-                if (emp_id, year, month) not in months_with_daily:
-                    agg_data = aggregated[emp_id]
-                    agg_data['present_days'] += float(record['present_days'])
-                    agg_data['absent_days'] += float(record.get('absent_days') or 0)
-                    agg_data['ot_hours'] += float(record['ot_hours'])
-                    agg_data['late_minutes'] += record['late_minutes']
-                    agg_data['holiday_days'] += int(record.get('holiday_days') or 0)
-                    # Track that this employee has Excel data
-                    if 'excel_upload' not in agg_data['data_sources']:
-                        agg_data['data_sources'].append('excel_upload')
-                    excel_count += 1
-            
-            # Also check SalaryData for working days (days + absent = total working days)
-            from ..models import SalaryData
-            from django.db.models import Q
-            month_name_map = {1: 'JAN', 2: 'FEB', 3: 'MAR', 4: 'APR', 5: 'MAY', 6: 'JUN',
-                            7: 'JUL', 8: 'AUG', 9: 'SEP', 10: 'OCT', 11: 'NOV', 12: 'DEC'}
-            
-            # Get months in the custom range
-            current_date = start_date_obj
-            months_in_range = set()
-            while current_date <= end_date_obj:
-                months_in_range.add((current_date.year, current_date.month))
-                # Move to first day of next month
-                if current_date.month == 12:
-                    current_date = current_date.replace(year=current_date.year + 1, month=1, day=1)
-                else:
-                    current_date = current_date.replace(month=current_date.month + 1, day=1)
+                # Query Attendance model for the date range (include total_working_days for Excel working days and holiday_days)
+                attendance_qs = scoped(Attendance.objects.filter(
+                    tenant=tenant,
+                    date__range=[start_date_obj, end_date_obj]
+                )).values('employee_id', 'date', 'present_days', 'absent_days', 'ot_hours', 'late_minutes', 'total_working_days', 'holiday_days')
             
-            # Query SalaryData for these months
-            salary_filter = Q()
-            for y, m in months_in_range:
-                month_str = month_name_map.get(m, '')
-                salary_filter |= (Q(year=y) & (Q(month=str(m)) | Q(month=month_str)))
+                # Track Excel working days by (employee_id, year, month) for custom range
+                excel_working_days_by_emp_month = {}
             
-            if salary_filter:
-                salary_qs = SalaryData.objects.filter(
-                    tenant=tenant,
-                    employee_id__in=list(employees_dict.keys())
-                ).filter(salary_filter).values('employee_id', 'year', 'month', 'days', 'absent')
-                
-                for record in salary_qs:
+                # Process Excel attendance records, skipping months that have daily data
+                excel_count = 0
+                for record in attendance_qs:
                     emp_id = record['employee_id']
-                    year = int(record['year'])
-                    month_val = record['month']
-                    # Normalize month to integer
-                    if isinstance(month_val, str):
-                        month_int = next((k for k, v in month_name_map.items() if v == month_val.upper()), None)
-                        if month_int is None:
-                            try:
-                                month_int = int(month_val)
-                            except:
-                                continue
-                    else:
-                        month_int = int(month_val)
-                    
-                    salary_key = (emp_id, year, month_int)
-                    # SalaryData: working days = days (present) + absent (raw value from Excel)
-                    salary_working_days = int(record.get('days') or 0) + int(record.get('absent') or 0)
-                    if salary_working_days > 0:
-                        # Only use if not already set from Attendance model (Attendance takes precedence)
-                        if salary_key not in excel_working_days_by_emp_month:
-                            excel_working_days_by_emp_month[salary_key] = salary_working_days
-            
-            timing_breakdown['excel_attendance_query_ms'] = round((time.time() - excel_query_start) * 1000, 2)
-            timing_breakdown['excel_attendance_count'] = excel_count
-            timing_breakdown['total_custom_range_employees'] = len(aggregated)
-
-            # Calculate working days per employee based on their joining dates
-            # This is handled per employee in the final response building
-            total_working_days = 0  # Will be calculated per employee
-        else:
-            # ---------------- Attendance aggregation (combining Excel uploads and attendance log) --------------------
-            from ..models import Attendance, MonthlyAttendanceSummary
-            from django.db.models import Q
-
-            query_start = time.time()
-            
-            # Decide which months to query from MonthlyAttendanceSummary/Attendance.
-            # If prefer_realtime is enabled and current month is in the selection, we'll exclude it
-            # from summary/excel queries and compute it from DailyAttendance directly (real-time).
-            now_dt = timezone.now()
-            current_year, current_month = now_dt.year, now_dt.month
-            current_month_in_selection = any((y == current_year and m == current_month) for (y, m) in selected_months)
-            months_for_stored_sources = [
-                (y, m) for (y, m) in selected_months
-                if not (prefer_realtime and y == current_year and m == current_month)
-            ]
-
-            # STEP 0: Query SalaryData (from salary Excel uploads) - has attendance data for multiple months
-            salary_data_start = time.time()
-            from ..models import SalaryData
-            
-            # Build month filter for SalaryData (month can be string like 'APR' or integer)
-            month_name_map = {1: 'JAN', 2: 'FEB', 3: 'MAR', 4: 'APR', 5: 'MAY', 6: 'JUN',
-                            7: 'JUL', 8: 'AUG', 9: 'SEP', 10: 'OCT', 11: 'NOV', 12: 'DEC'}
-            
-            salary_filter = Q()
-            for y, m in months_for_stored_sources:
-                month_str = month_name_map.get(m, '')
-                # Try both string month (APR) and integer month (4)
-                salary_filter |= (Q(year=y) & (Q(month=str(m)) | Q(month=month_str)))
-            
-            salary_qs = SalaryData.objects.filter(
-                tenant=tenant
-            ).filter(salary_filter).values('employee_id', 'year', 'month', 'days', 'absent', 'ot', 'late')
-            
-            salary_keys = set()  # Track which (employee_id, year, month) combinations we got from SalaryData
-            
-            for record in salary_qs:
-                emp_id = record['employee_id']
-                year = record['year']
-                # Normalize month to integer for consistent tracking
-                month_val = record['month']
-                if isinstance(month_val, str):
-                    # Convert 'APR' to 4
-                    month_int = next((k for k, v in month_name_map.items() if v == month_val.upper()), None)
-                    if month_int is None:
-                        try:
-                            month_int = int(month_val)
-                        except:
-                            continue
-                else:
-                    month_int = int(month_val)
-                
-                salary_key = (emp_id, int(year), month_int)
-                salary_keys.add(salary_key)
-                
-                agg_data = aggregated[emp_id]
-                agg_data['present_days'] += float(record['days'] or 0)
-                agg_data['absent_days'] += float(record.get('absent') or 0)
-                agg_data['ot_hours'] += float(record.get('ot') or 0)
-                agg_data['late_minutes'] += int(record.get('late') or 0)
-                # Track that this employee has salary Excel data
-                if 'salary_excel' not in agg_data['data_sources']:
-                    agg_data['data_sources'].append('salary_excel')
-            
-            timing_breakdown['salary_data_query_ms'] = round((time.time() - salary_data_start) * 1000, 2)
-            timing_breakdown['salary_data_records'] = len(salary_keys)
-
-            # STEP 1: Query MonthlyAttendanceSummary (from DailyAttendance/attendance log)
-            monthly_summary_filter = Q()
-            for y, m in months_for_stored_sources:
-                monthly_summary_filter |= Q(year=y, month=m)
-            
-            monthly_summary_qs = MonthlyAttendanceSummary.objects.filter(
-                tenant=tenant
-            ).filter(monthly_summary_filter).values('employee_id', 'year', 'month', 'present_days', 'ot_hours', 'late_minutes', 'weekly_penalty_days')
-            
-            # Create a set to track which (employee_id, year, month) combinations we got from MonthlyAttendanceSummary
-            summary_keys = set()
-            
-            for record in monthly_summary_qs:
-                emp_id = record['employee_id']
-                year = record['year']
-                month = record['month']
-                summary_key = (emp_id, year, month)
-                summary_keys.add(summary_key)
+                    year = record['date'].year
+                    month = record['date'].month
+                    excel_key = (emp_id, year, month)
                 
-                # Only add if not already in SalaryData (SalaryData takes precedence)
-                if summary_key not in salary_keys:
-                    agg_data = aggregated[emp_id]
-                    agg_data['present_days'] += float(record['present_days'])
-                    agg_data['ot_hours'] += float(record['ot_hours'])
-                    agg_data['late_minutes'] += record['late_minutes']
-                    agg_data['weekly_penalty_days'] += float(record.get('weekly_penalty_days') or 0)
-                    # Sunday bonus already included in present_days (Sundays are marked as PRESENT)
-                    # Track that this employee has attendance log data
-                    if 'attendance_log' not in agg_data['data_sources']:
-                        agg_data['data_sources'].append('attendance_log')
-            
-            timing_breakdown['monthly_summary_query_ms'] = round((time.time() - query_start) * 1000, 2)
-            timing_breakdown['monthly_summary_records'] = len(summary_keys)
-            
-            # STEP 2: Query Attendance model (from Excel uploads) - Only use if SalaryData doesn't exist for that month
-            attendance_query_start = time.time()
-            
-            # Build ORed Q for (year, month) combinations from selected_months
-            month_filter = Q()
-            for y, m in months_for_stored_sources:
-                month_filter |= Q(date__year=y, date__month=m)
-
-            attendance_qs = Attendance.objects.filter(
-                tenant=tenant
-            ).filter(month_filter).values('employee_id', 'date', 'present_days', 'absent_days', 'ot_hours', 'late_minutes', 'total_working_days', 'holiday_days', 'unmarked_days')
-            timing_breakdown['attendance_query_ms'] = round((time.time() - attendance_query_start) * 1000, 2)
-
-            process_start = time.time()
-            attendance_count = 0
-            
-            # FIXED LOGIC: Only use Attendance model if SalaryData doesn't exist for that (employee, year, month)
-            # This prevents double-counting when both SalaryData and Attendance model have data for the same month
-            for record in attendance_qs:
-                emp_id = record['employee_id']
-                year = record['date'].year
-                month = record['date'].month
-                record_key = (emp_id, year, month)
-                
-                # Only use Attendance record if we don't have SalaryData OR MonthlyAttendanceSummary for this (employee, year, month)
-                # Priority: SalaryData > MonthlyAttendanceSummary > Attendance model
-                if record_key not in salary_keys and record_key not in summary_keys:
-                    agg_data = aggregated[emp_id]
-                    agg_data['present_days'] += float(record['present_days'])
-                    agg_data['absent_days'] += float(record.get('absent_days') or 0)
-                    agg_data['unmarked_days'] += float(record.get('unmarked_days') or 0)
-                    agg_data['ot_hours'] += float(record['ot_hours'])
-                    agg_data['late_minutes'] += record['late_minutes']
-                    agg_data['holiday_days'] += int(record.get('holiday_days') or 0)
-                    # Track that this employee has Excel attendance data
-                    if 'excel_upload' not in agg_data['data_sources']:
-                        agg_data['data_sources'].append('excel_upload')
-                    attendance_count += 1
-            
-            timing_breakdown['attendance_data_processing_ms'] = round((time.time() - process_start) * 1000, 2)
-            timing_breakdown['attendance_records_used'] = attendance_count
-
-            # STEP 3: Handle CURRENT MONTH - check for Attendance Excel first, then DailyAttendance if prefer_realtime
-            if current_month_in_selection:
-                current_month_start = time.time()
+                    # Store Excel working days for this month (use raw value from Excel)
+                    if record.get('total_working_days'):
+                        excel_working_days_by_emp_month[excel_key] = int(record['total_working_days'])
                 
-                # STEP 3a: Check if Attendance Excel exists for current month (even when prefer_realtime=True)
-                # This allows Attendance Excel uploads to be used for current month
-                current_attendance_excel = Attendance.objects.filter(
-                    tenant=tenant,
-                    date__year=current_year,
-                    date__month=current_month
-                ).values('employee_id', 'present_days', 'absent_days', 'ot_hours', 'late_minutes', 'unmarked_days')
-                
-                # Track which employees have Attendance Excel for current month
-                employees_with_excel_current = set()
-                for record in current_attendance_excel:
-                    emp_id = record['employee_id']
-                    record_key = (emp_id, current_year, current_month)
-                    employees_with_excel_current.add(emp_id)
-                    
-                    # Only use if no SalaryData or MonthlyAttendanceSummary (already handled in STEP 0/1)
-                    if record_key not in salary_keys and record_key not in summary_keys:
+                    # Only use Excel data if we don't have DailyAttendance for this (employee, year, month)
+                    if (emp_id, year, month) not in months_with_daily:
                         agg_data = aggregated[emp_id]
-                        agg_data['present_days'] += float(record['present_days'] or 0)
+                        agg_data['present_days'] += float(record['present_days'])
                         agg_data['absent_days'] += float(record.get('absent_days') or 0)
-                        agg_data['unmarked_days'] += float(record.get('unmarked_days') or 0)
-                        agg_data['ot_hours'] += float(record['ot_hours'] or 0)
-                        agg_data['late_minutes'] += int(record['late_minutes'] or 0)
+                        agg_data['ot_hours'] += float(record['ot_hours'])
+                        agg_data['late_minutes'] += record['late_minutes']
+                        agg_data['holiday_days'] += int(record.get('holiday_days') or 0)
+                        # Track that this employee has Excel data
                         if 'excel_upload' not in agg_data['data_sources']:
                             agg_data['data_sources'].append('excel_upload')
-                
-                timing_breakdown['current_month_excel_check_ms'] = round((time.time() - current_month_start) * 1000, 2)
-                
-                # STEP 3b: If prefer_realtime=True, also add DailyAttendance for employees WITHOUT Attendance Excel
-                if prefer_realtime:
-                    realtime_start = time.time()
-                    from ..models import DailyAttendance
-                    # Aggregate present/OT/late for the current month directly from DailyAttendance
-                    daily_current_agg = DailyAttendance.objects.filter(
-                        tenant=tenant,
-                        date__year=current_year,
-                        date__month=current_month
-                    ).values('employee_id').annotate(
-                        present_days=Sum(
-                            Case(
-                                When(attendance_status__in=['PRESENT', 'PAID_LEAVE'], then=Value(1.0)),
-                                When(attendance_status='HALF_DAY', then=Value(0.5)),
-                                default=Value(0.0),
-                                output_field=FloatField()
-                            )
-                        ),
-                        absent_days=Sum(
-                            Case(
-                                When(attendance_status='ABSENT', then=Value(1.0)),
-                                default=Value(0.0),
-                                output_field=FloatField()
-                            )
-                        ),
-                        ot_hours=Sum('ot_hours'),
-                        late_minutes=Sum('late_minutes')
-                    )
-
-                    # Only add DailyAttendance for employees who DON'T have Attendance Excel for current month
-                    # This gives priority to Attendance Excel uploads
-                    for row in daily_current_agg:
-                        emp_id = row['employee_id']
-                        # Skip if employee already has Attendance Excel for current month
-                        if emp_id in employees_with_excel_current:
-                            continue
-                        
-                        record_key = (emp_id, current_year, current_month)
-                        # Also skip if SalaryData or MonthlyAttendanceSummary exists
-                        if record_key in salary_keys or record_key in summary_keys:
-                            continue
-                        
-                        agg_data = aggregated[emp_id]
-                        agg_data['present_days'] += float(row['present_days'] or 0)
-                        agg_data['absent_days'] += float(row.get('absent_days') or 0)
-                        agg_data['ot_hours'] += float(row['ot_hours'] or 0)
-                        agg_data['late_minutes'] += int(row['late_minutes'] or 0)
-                        if 'attendance_log' not in agg_data['data_sources']:
-                            agg_data['data_sources'].append('attendance_log')
-
-                    timing_breakdown['realtime_current_month_ms'] = round((time.time() - realtime_start) * 1000, 2)
-                    timing_breakdown['realtime_current_month'] = True
-                else:
-                    timing_breakdown['realtime_current_month'] = False
-
-            # Calculate working days per employee based on their joining dates
-            # This is handled per employee in the final response building
-            total_working_days = 0  # Will be calculated per employee
-
-        # Note: Penalty/bonus days are read from MonthlyAttendanceSummary only (not CalculatedSalary)
-        # This is done in the MonthlyAttendanceSummary query above for stored sources
-        # and in the custom date range section above for daily data
-
-        timing_breakdown['total_aggregation_ms'] = round((time.time() - step_start) * 1000, 2)
-
-        # --------------------------------------------------
-        # Build response records - OPTIMIZED
-        # --------------------------------------------------
-        step_start = time.time()
-        attendance_records = []
-        
-        # OPTIMIZATION: Pre-calculate common values to avoid repeated operations
-        default_data = {'present_days': 0.0, 'absent_days': 0.0, 'unmarked_days': 0.0, 'ot_hours': 0.0, 'late_minutes': 0, 'holiday_days': 0, 'weekly_penalty_days': 0.0, 'data_sources': [], 'records_count': 0}
-        
-        # Preload Excel Attendance working days for selected months for all employees (fast path)
-        attendance_working_days_by_emp_month = {}
-        if not use_daily_data and selected_months:
-            try:
-                from ..models import Attendance as ExcelAttendance
-                from datetime import date as _date
-                month_first_dates = [_date(y, m, 1) for (y, m) in selected_months]
-                attendance_qs = ExcelAttendance.objects.filter(
-                    tenant=tenant,
-                    employee_id__in=list(employees_dict.keys()),
-                    date__in=month_first_dates
-                ).values('employee_id', 'date', 'total_working_days')
-                for row in attendance_qs:
-                    emp = row['employee_id']
-                    dt = row['date']
-                    key = (emp, dt.year, dt.month)
-                    # Use raw working days value from Excel (don't calculate)
-                    attendance_working_days_by_emp_month[key] = int(row['total_working_days'] or 0)
-                
+                        excel_count += 1
+            
                 # Also check SalaryData for working days (days + absent = total working days)
                 from ..models import SalaryData
-                from django.db.models import Q
                 month_name_map = {1: 'JAN', 2: 'FEB', 3: 'MAR', 4: 'APR', 5: 'MAY', 6: 'JUN',
                                 7: 'JUL', 8: 'AUG', 9: 'SEP', 10: 'OCT', 11: 'NOV', 12: 'DEC'}
-                
+            
+                # Get months in the custom range
+                current_date = start_date_obj
+                months_in_range = set()
+                while current_date <= end_date_obj:
+                    months_in_range.add((current_date.year, current_date.month))
+                    # Move to first day of next month
+                    if current_date.month == 12:
+                        current_date = current_date.replace(year=current_date.year + 1, month=1, day=1)
+                    else:
+                        current_date = current_date.replace(month=current_date.month + 1, day=1)
+            
+                # Query SalaryData for these months
                 salary_filter = Q()
-                for y, m in selected_months:
+                for y, m in months_in_range:
                     month_str = month_name_map.get(m, '')
                     salary_filter |= (Q(year=y) & (Q(month=str(m)) | Q(month=month_str)))
-                
+            
                 if salary_filter:
                     salary_qs = SalaryData.objects.filter(
                         tenant=tenant,
                         employee_id__in=list(employees_dict.keys())
                     ).filter(salary_filter).values('employee_id', 'year', 'month', 'days', 'absent')
-                    
+                
                     for record in salary_qs:
                         emp_id = record['employee_id']
                         year = int(record['year'])
@@ -6595,371 +6515,703 @@ class DailyAttendanceViewSet(viewsets.ModelViewSet):
                                     continue
                         else:
                             month_int = int(month_val)
-                        
+                    
                         salary_key = (emp_id, year, month_int)
                         # SalaryData: working days = days (present) + absent (raw value from Excel)
                         salary_working_days = int(record.get('days') or 0) + int(record.get('absent') or 0)
                         if salary_working_days > 0:
                             # Only use if not already set from Attendance model (Attendance takes precedence)
-                            if salary_key not in attendance_working_days_by_emp_month:
-                                attendance_working_days_by_emp_month[salary_key] = salary_working_days
-            except Exception:
-                attendance_working_days_by_emp_month = {}
-        
-        # Check if this is a single day request for response construction
-        is_single_day_response = use_daily_data and start_date_obj == end_date_obj
-
-        # ---------------------------------------------------------------------
-        # PRECOMPUTE HOLIDAY COUNTS (bulk) to avoid per-employee DB work in loop
-        # Strategy:
-        # - For custom ranges (use_daily_data): fetch holidays in date range once
-        #   and count company-wide and department-specific holidays.
-        # - For monthly aggregation: fetch holidays for all selected months once
-        #   and build counts keyed by (year, month) and department.
-        # Result: O(#holidays + #employees * #months) CPU, ZERO per-employee DB queries.
-        # ---------------------------------------------------------------------
-        holiday_counts_range_all = 0
-        holiday_counts_range_dept = {}
-        holiday_counts_by_month_all = {}
-        holiday_counts_by_month_dept = {}
-        try:
-            from ..models import Holiday
-            import calendar as _calendar
-            from datetime import date as _date
-            from collections import defaultdict
+                            if salary_key not in excel_working_days_by_emp_month:
+                                excel_working_days_by_emp_month[salary_key] = salary_working_days
+            
+                record_step(timing_breakdown, 'excel_attendance_query_ms', excel_query_start)
+                timing_breakdown['excel_attendance_count'] = excel_count
+                timing_breakdown['total_custom_range_employees'] = len(aggregated)
 
-            if use_daily_data:
-                # Get all holidays within the requested date range
-                holidays_qs = Holiday.objects.filter(
-                    tenant=tenant,
-                    is_active=True,
-                    date__range=[start_date_obj, end_date_obj]
-                ).values('date', 'applies_to_all', 'specific_departments')
+                # Calculate working days per employee based on their joining dates
+                # This is handled per employee in the final response building
+                total_working_days = 0  # Will be calculated per employee
+            else:
+                # ---------------- Attendance aggregation (combining Excel uploads and attendance log) --------------------
+                from ..models import Attendance, MonthlyAttendanceSummary
+
+                query_start = time.time()
+            
+                # Decide which months to query from MonthlyAttendanceSummary/Attendance.
+                # If prefer_realtime is enabled and current month is in the selection, we'll exclude it
+                # from summary/excel queries and compute it from DailyAttendance directly (real-time).
+                now_dt = timezone.now()
+                current_year, current_month = now_dt.year, now_dt.month
+                current_month_in_selection = any((y == current_year and m == current_month) for (y, m) in selected_months)
+                months_for_stored_sources = [
+                    (y, m) for (y, m) in selected_months
+                    if not (prefer_realtime and y == current_year and m == current_month)
+                ]
 
-                dept_counter = defaultdict(int)
-                company_count = 0
-                for h in holidays_qs:
-                    if h.get('applies_to_all'):
-                        company_count += 1
+                # STEP 0: Query SalaryData (from salary Excel uploads) - has attendance data for multiple months
+                salary_data_start = time.time()
+                from ..models import SalaryData
+            
+                # Build month filter for SalaryData (month can be string like 'APR' or integer)
+                month_name_map = {1: 'JAN', 2: 'FEB', 3: 'MAR', 4: 'APR', 5: 'MAY', 6: 'JUN',
+                                7: 'JUL', 8: 'AUG', 9: 'SEP', 10: 'OCT', 11: 'NOV', 12: 'DEC'}
+            
+                salary_filter = Q()
+                for y, m in months_for_stored_sources:
+                    month_str = month_name_map.get(m, '')
+                    # Try both string month (APR) and integer month (4)
+                    salary_filter |= (Q(year=y) & (Q(month=str(m)) | Q(month=month_str)))
+            
+                salary_qs = scoped(SalaryData.objects.filter(
+                    tenant=tenant
+                )).filter(salary_filter).values('employee_id', 'year', 'month', 'days', 'absent', 'ot', 'late')
+            
+                salary_keys = set()  # Track which (employee_id, year, month) combinations we got from SalaryData
+            
+                for record in salary_qs:
+                    emp_id = record['employee_id']
+                    year = record['year']
+                    # Normalize month to integer for consistent tracking
+                    month_val = record['month']
+                    if isinstance(month_val, str):
+                        # Convert 'APR' to 4
+                        month_int = next((k for k, v in month_name_map.items() if v == month_val.upper()), None)
+                        if month_int is None:
+                            try:
+                                month_int = int(month_val)
+                            except:
+                                continue
                     else:
-                        s = h.get('specific_departments') or ''
-                        for dept in [d.strip() for d in s.split(',') if d.strip()]:
-                            dept_counter[dept] += 1
+                        month_int = int(month_val)
+                
+                    salary_key = (emp_id, int(year), month_int)
+                    salary_keys.add(salary_key)
+                
+                    agg_data = aggregated[emp_id]
+                    agg_data['present_days'] += float(record['days'] or 0)
+                    agg_data['absent_days'] += float(record.get('absent') or 0)
+                    agg_data['ot_hours'] += float(record.get('ot') or 0)
+                    agg_data['late_minutes'] += int(record.get('late') or 0)
+                    # Track that this employee has salary Excel data
+                    if 'salary_excel' not in agg_data['data_sources']:
+                        agg_data['data_sources'].append('salary_excel')
+            
+                record_step(timing_breakdown, 'salary_data_query_ms', salary_data_start)
+                timing_breakdown['salary_data_records'] = len(salary_keys)
+
+                # STEP 1: Query MonthlyAttendanceSummary (from DailyAttendance/attendance log)
+                monthly_summary_filter = Q()
+                for y, m in months_for_stored_sources:
+                    monthly_summary_filter |= Q(year=y, month=m)
+            
+                monthly_summary_qs = scoped(MonthlyAttendanceSummary.objects.filter(
+                    tenant=tenant
+                )).filter(monthly_summary_filter).values('employee_id', 'year', 'month', 'present_days', 'ot_hours', 'late_minutes', 'weekly_penalty_days')
+            
+                # Create a set to track which (employee_id, year, month) combinations we got from MonthlyAttendanceSummary
+                summary_keys = set()
+            
+                for record in monthly_summary_qs:
+                    emp_id = record['employee_id']
+                    year = record['year']
+                    month = record['month']
+                    summary_key = (emp_id, year, month)
+                    summary_keys.add(summary_key)
+                
+                    # Only add if not already in SalaryData (SalaryData takes precedence)
+                    if summary_key not in salary_keys:
+                        agg_data = aggregated[emp_id]
+                        agg_data['present_days'] += float(record['present_days'])
+                        agg_data['ot_hours'] += float(record['ot_hours'])
+                        agg_data['late_minutes'] += record['late_minutes']
+                        agg_data['weekly_penalty_days'] += float(record.get('weekly_penalty_days') or 0)
+                        # Sunday bonus already included in present_days (Sundays are marked as PRESENT)
+                        # Track that this employee has attendance log data
+                        if 'attendance_log' not in agg_data['data_sources']:
+                            agg_data['data_sources'].append('attendance_log')
+            
+                record_step(timing_breakdown, 'monthly_summary_query_ms', query_start)
+                timing_breakdown['monthly_summary_records'] = len(summary_keys)
+            
+                # STEP 2: Query Attendance model (from Excel uploads) - Only use if SalaryData doesn't exist for that month
+                attendance_query_start = time.time()
+            
+                # Date ranges for the (year, month) combinations from selected_months
+                attendance_qs = scoped(Attendance.objects.filter(
+                    tenant=tenant
+                )).filter(months_q(months_for_stored_sources)).values('employee_id', 'date', 'present_days', 'absent_days', 'ot_hours', 'late_minutes', 'total_working_days', 'holiday_days', 'unmarked_days')
+                record_step(timing_breakdown, 'attendance_query_ms', attendance_query_start)
 
-                holiday_counts_range_all = company_count
-                holiday_counts_range_dept = dict(dept_counter)
-            else:
-                # Monthly mode: compute counts per (year, month) and department
-                if selected_months:
-                    # Determine overall date window covering all selected months
-                    # selected_months is ordered newest-first, so [0] is newest, [-1] is oldest
-                    newest_year, newest_month = selected_months[0]
-                    oldest_year, oldest_month = selected_months[-1]
-                    # Build actual date bounds (oldest to newest)
-                    range_start = _date(oldest_year, oldest_month, 1)
-                    # last day of newest_month
-                    last_day = _calendar.monthrange(newest_year, newest_month)[1]
-                    range_end = _date(newest_year, newest_month, last_day)
+                process_start = time.time()
+                attendance_count = 0
+            
+                # FIXED LOGIC: Only use Attendance model if SalaryData doesn't exist for that (employee, year, month)
+                # This prevents double-counting when both SalaryData and Attendance model have data for the same month
+                for record in attendance_qs:
+                    emp_id = record['employee_id']
+                    year = record['date'].year
+                    month = record['date'].month
+                    record_key = (emp_id, year, month)
+                
+                    # Only use Attendance record if we don't have SalaryData OR MonthlyAttendanceSummary for this (employee, year, month)
+                    # Priority: SalaryData > MonthlyAttendanceSummary > Attendance model
+                    if record_key not in salary_keys and record_key not in summary_keys:
+                        agg_data = aggregated[emp_id]
+                        agg_data['present_days'] += float(record['present_days'])
+                        agg_data['absent_days'] += float(record.get('absent_days') or 0)
+                        agg_data['unmarked_days'] += float(record.get('unmarked_days') or 0)
+                        agg_data['ot_hours'] += float(record['ot_hours'])
+                        agg_data['late_minutes'] += record['late_minutes']
+                        agg_data['holiday_days'] += int(record.get('holiday_days') or 0)
+                        # Track that this employee has Excel attendance data
+                        if 'excel_upload' not in agg_data['data_sources']:
+                            agg_data['data_sources'].append('excel_upload')
+                        attendance_count += 1
+            
+                record_step(timing_breakdown, 'attendance_data_processing_ms', process_start)
+                timing_breakdown['attendance_records_used'] = attendance_count
+
+                # STEP 3: Handle CURRENT MONTH - check for Attendance Excel first, then DailyAttendance if prefer_realtime
+                if current_month_in_selection:
+                    current_month_start = time.time()
+                
+                    # STEP 3a: Check if Attendance Excel exists for current month (even when prefer_realtime=True)
+                    # This allows Attendance Excel uploads to be used for current month
+                    current_attendance_excel = scoped(Attendance.objects.filter(
+                        tenant=tenant,
+                        **month_filter(current_year, current_month)
+                    )).values('employee_id', 'present_days', 'absent_days', 'ot_hours', 'late_minutes', 'unmarked_days')
+                
+                    # Track which employees have Attendance Excel for current month
+                    employees_with_excel_current = set()
+                    for record in current_attendance_excel:
+                        emp_id = record['employee_id']
+                        record_key = (emp_id, current_year, current_month)
+                        employees_with_excel_current.add(emp_id)
+                    
+                        # Only use if no SalaryData or MonthlyAttendanceSummary (already handled in STEP 0/1)
+                        if record_key not in salary_keys and record_key not in summary_keys:
+                            agg_data = aggregated[emp_id]
+                            agg_data['present_days'] += float(record['present_days'] or 0)
+                            agg_data['absent_days'] += float(record.get('absent_days') or 0)
+                            agg_data['unmarked_days'] += float(record.get('unmarked_days') or 0)
+                            agg_data['ot_hours'] += float(record['ot_hours'] or 0)
+                            agg_data['late_minutes'] += int(record['late_minutes'] or 0)
+                            if 'excel_upload' not in agg_data['data_sources']:
+                                agg_data['data_sources'].append('excel_upload')
+                
+                    record_step(timing_breakdown, 'current_month_excel_check_ms', current_month_start)
+                
+                    # STEP 3b: If prefer_realtime=True, also add DailyAttendance for employees WITHOUT Attendance Excel
+                    if prefer_realtime:
+                        realtime_start = time.time()
+                        from ..models import DailyAttendance
+                        # Aggregate present/OT/late for the current month directly from DailyAttendance
+                        daily_current_agg = scoped(DailyAttendance.objects.filter(
+                            tenant=tenant,
+                            **month_filter(current_year, current_month)
+                        )).values('employee_id').annotate(
+                            present_days=Sum(
+                                Case(
+                                    When(attendance_status__in=['PRESENT', 'PAID_LEAVE'], then=Value(1.0)),
+                                    When(attendance_status='HALF_DAY', then=Value(0.5)),
+                                    default=Value(0.0),
+                                    output_field=FloatField()
+                                )
+                            ),
+                            absent_days=Sum(
+                                Case(
+                                    When(attendance_status='ABSENT', then=Value(1.0)),
+                                    default=Value(0.0),
+                                    output_field=FloatField()
+                                )
+                            ),
+                            ot_hours=Sum('ot_hours'),
+                            late_minutes=Sum('late_minutes')
+                        )
 
+                        # Only add DailyAttendance for employees who DON'T have Attendance Excel for current month
+                        # This gives priority to Attendance Excel uploads
+                        for row in daily_current_agg:
+                            emp_id = row['employee_id']
+                            # Skip if employee already has Attendance Excel for current month
+                            if emp_id in employees_with_excel_current:
+                                continue
+                        
+                            record_key = (emp_id, current_year, current_month)
+                            # Also skip if SalaryData or MonthlyAttendanceSummary exists
+                            if record_key in salary_keys or record_key in summary_keys:
+                                continue
+                        
+                            agg_data = aggregated[emp_id]
+                            agg_data['present_days'] += float(row['present_days'] or 0)
+                            agg_data['absent_days'] += float(row.get('absent_days') or 0)
+                            agg_data['ot_hours'] += float(row['ot_hours'] or 0)
+                            agg_data['late_minutes'] += int(row['late_minutes'] or 0)
+                            if 'attendance_log' not in agg_data['data_sources']:
+                                agg_data['data_sources'].append('attendance_log')
+
+                        record_step(timing_breakdown, 'realtime_current_month_ms', realtime_start)
+                        timing_breakdown['realtime_current_month'] = True
+                    else:
+                        timing_breakdown['realtime_current_month'] = False
+
+                # Calculate working days per employee based on their joining dates
+                # This is handled per employee in the final response building
+                total_working_days = 0  # Will be calculated per employee
+
+            # Note: Penalty/bonus days are read from MonthlyAttendanceSummary only (not CalculatedSalary)
+            # This is done in the MonthlyAttendanceSummary query above for stored sources
+            # and in the custom date range section above for daily data
+
+            record_step(timing_breakdown, 'total_aggregation_ms', step_start)
+
+            # --------------------------------------------------
+            # Build response records - OPTIMIZED
+            # --------------------------------------------------
+            step_start = time.time()
+            attendance_records = []
+        
+            # OPTIMIZATION: Pre-calculate common values to avoid repeated operations
+            default_data = {'present_days': 0.0, 'absent_days': 0.0, 'unmarked_days': 0.0, 'ot_hours': 0.0, 'late_minutes': 0, 'holiday_days': 0, 'weekly_penalty_days': 0.0, 'data_sources': [], 'records_count': 0}
+        
+            # Preload Excel Attendance working days for selected months for all employees (fast path)
+            attendance_working_days_by_emp_month = {}
+            if not use_daily_data and selected_months:
+                try:
+                    from ..models import Attendance as ExcelAttendance
+                    from datetime import date as _date
+                    month_first_dates = [_date(y, m, 1) for (y, m) in selected_months]
+                    attendance_qs = ExcelAttendance.objects.filter(
+                        tenant=tenant,
+                        employee_id__in=list(employees_dict.keys()),
+                        date__in=month_first_dates
+                    ).values('employee_id', 'date', 'total_working_days')
+                    for row in attendance_qs:
+                        emp = row['employee_id']
+                        dt = row['date']
+                        key = (emp, dt.year, dt.month)
+                        # Use raw working days value from Excel (don't calculate)
+                        attendance_working_days_by_emp_month[key] = int(row['total_working_days'] or 0)
+                
+                    # Also check SalaryData for working days (days + absent = total working days)
+                    from ..models import SalaryData
+                    month_name_map = {1: 'JAN', 2: 'FEB', 3: 'MAR', 4: 'APR', 5: 'MAY', 6: 'JUN',
+                                    7: 'JUL', 8: 'AUG', 9: 'SEP', 10: 'OCT', 11: 'NOV', 12: 'DEC'}
+                
+                    salary_filter = Q()
+                    for y, m in selected_months:
+                        month_str = month_name_map.get(m, '')
+                        salary_filter |= (Q(year=y) & (Q(month=str(m)) | Q(month=month_str)))
+                
+                    if salary_filter:
+                        salary_qs = SalaryData.objects.filter(
+                            tenant=tenant,
+                            employee_id__in=list(employees_dict.keys())
+                        ).filter(salary_filter).values('employee_id', 'year', 'month', 'days', 'absent')
+                    
+                        for record in salary_qs:
+                            emp_id = record['employee_id']
+                            year = int(record['year'])
+                            month_val = record['month']
+                            # Normalize month to integer
+                            if isinstance(month_val, str):
+                                month_int = next((k for k, v in month_name_map.items() if v == month_val.upper()), None)
+                                if month_int is None:
+                                    try:
+                                        month_int = int(month_val)
+                                    except:
+                                        continue
+                            else:
+                                month_int = int(month_val)
+                        
+                            salary_key = (emp_id, year, month_int)
+                            # SalaryData: working days = days (present) + absent (raw value from Excel)
+                            salary_working_days = int(record.get('days') or 0) + int(record.get('absent') or 0)
+                            if salary_working_days > 0:
+                                # Only use if not already set from Attendance model (Attendance takes precedence)
+                                if salary_key not in attendance_working_days_by_emp_month:
+                                    attendance_working_days_by_emp_month[salary_key] = salary_working_days
+                except Exception:
+                    attendance_working_days_by_emp_month = {}
+        
+            # Check if this is a single day request for response construction
+            is_single_day_response = use_daily_data and start_date_obj == end_date_obj
+
+            # ---------------------------------------------------------------------
+            # PRECOMPUTE HOLIDAY COUNTS (bulk) to avoid per-employee DB work in loop
+            # Strategy:
+            # - For custom ranges (use_daily_data): fetch holidays in date range once
+            #   and count company-wide and department-specific holidays.
+            # - For monthly aggregation: fetch holidays for all selected months once
+            #   and build counts keyed by (year, month) and department.
+            # Result: O(#holidays + #employees * #months) CPU, ZERO per-employee DB queries.
+            # ---------------------------------------------------------------------
+            holiday_counts_range_all = 0
+            holiday_counts_range_dept = {}
+            holiday_counts_by_month_all = {}
+            holiday_counts_by_month_dept = {}
+            try:
+                from ..models import Holiday
+                import calendar as _calendar
+                from datetime import date as _date
+
+                if use_daily_data:
+                    # Get all holidays within the requested date range
                     holidays_qs = Holiday.objects.filter(
                         tenant=tenant,
                         is_active=True,
-                        date__range=[range_start, range_end]
+                        date__range=[start_date_obj, end_date_obj]
                     ).values('date', 'applies_to_all', 'specific_departments')
 
-                    month_all = defaultdict(int)
-                    month_dept = defaultdict(int)
+                    dept_counter = defaultdict(int)
+                    company_count = 0
                     for h in holidays_qs:
-                        d = h.get('date')
-                        y, m = d.year, d.month
-                        key_all = (y, m)
                         if h.get('applies_to_all'):
-                            month_all[key_all] += 1
+                            company_count += 1
                         else:
                             s = h.get('specific_departments') or ''
-                            for dept in [dp.strip() for dp in s.split(',') if dp.strip()]:
-                                month_dept[(y, m, dept)] += 1
+                            for dept in [d.strip() for d in s.split(',') if d.strip()]:
+                                dept_counter[dept] += 1
 
-                    holiday_counts_by_month_all = dict(month_all)
-                    holiday_counts_by_month_dept = dict(month_dept)
-        except Exception as e:
-            # If anything goes wrong, fall back to zero counts; don't block main response
-            logger.warning(f"Holiday precomputation failed: {str(e)}")
-            holiday_counts_range_all = 0
-            holiday_counts_range_dept = {}
-            holiday_counts_by_month_all = {}
-            holiday_counts_by_month_dept = {}
-        
-        timing_breakdown['holiday_precomputation_ms'] = round((time.time() - step_start) * 1000, 2)
-        logger.info(f"Holiday precomputation: {timing_breakdown['holiday_precomputation_ms']}ms")
-        
-        # OPTIMIZATION: Pre-calculate calendar days per month to avoid repeated calculations
-        # This is especially important for multi-year queries (e.g., last_5_years with 60 months)
-        calendar_days_per_month = {}
-        if not use_daily_data and selected_months:
-            import calendar
-            from datetime import date as _date
-            for year, month in selected_months:
-                calendar_days_per_month[(year, month)] = calendar.monthrange(year, month)[1]
+                    holiday_counts_range_all = company_count
+                    holiday_counts_range_dept = dict(dept_counter)
+                else:
+                    # Monthly mode: compute counts per (year, month) and department
+                    if selected_months:
+                        # Determine overall date window covering all selected months
+                        # selected_months is ordered newest-first, so [0] is newest, [-1] is oldest
+                        newest_year, newest_month = selected_months[0]
+                        oldest_year, oldest_month = selected_months[-1]
+                        # Build actual date bounds (oldest to newest)
+                        range_start = _date(oldest_year, oldest_month, 1)
+                        # last day of newest_month
+                        last_day = _calendar.monthrange(newest_year, newest_month)[1]
+                        range_end = _date(newest_year, newest_month, last_day)
+
+                        holidays_qs = Holiday.objects.filter(
+                            tenant=tenant,
+                            is_active=True,
+                            date__range=[range_start, range_end]
+                        ).values('date', 'applies_to_all', 'specific_departments')
+
+                        month_all = defaultdict(int)
+                        month_dept = defaultdict(int)
+                        for h in holidays_qs:
+                            d = h.get('date')
+                            y, m = d.year, d.month
+                            key_all = (y, m)
+                            if h.get('applies_to_all'):
+                                month_all[key_all] += 1
+                            else:
+                                s = h.get('specific_departments') or ''
+                                for dept in [dp.strip() for dp in s.split(',') if dp.strip()]:
+                                    month_dept[(y, m, dept)] += 1
+
+                        holiday_counts_by_month_all = dict(month_all)
+                        holiday_counts_by_month_dept = dict(month_dept)
+            except Exception as e:
+                # If anything goes wrong, fall back to zero counts; don't block main response
+                logger.warning(f"Holiday precomputation failed: {str(e)}")
+                holiday_counts_range_all = 0
+                holiday_counts_range_dept = {}
+                holiday_counts_by_month_all = {}
+                holiday_counts_by_month_dept = {}
+        
+            record_step(timing_breakdown, 'holiday_precomputation_ms', step_start)
+            logger.info(f"Holiday precomputation: {timing_breakdown['holiday_precomputation_ms']}ms")
+        
+            # OPTIMIZATION: Pre-calculate calendar days per month to avoid repeated calculations
+            # This is especially important for multi-year queries (e.g., last_5_years with 60 months)
+            calendar_days_per_month = {}
+            if not use_daily_data and selected_months:
+                import calendar
+                from datetime import date as _date
+                for year, month in selected_months:
+                    calendar_days_per_month[(year, month)] = calendar.monthrange(year, month)[1]
         
-        step_start = time.time()
-        for emp_id, emp_info in employees_dict.items():
-            # Get aggregated attendance data for this employee
-            data = aggregated.get(emp_id, default_data)
+            def iter_attendance_records():
+                """Build one response record per employee; shared by the list and streaming modes."""
+                for emp_id, emp_info in employees_dict.items():
+                    # Get aggregated attendance data for this employee
+                    data = aggregated.get(emp_id, default_data)
 
-            # SMART CALCULATION: Employee-specific working days with DOJ awareness
-            try:
-                from ..services.salary_service import SalaryCalculationService
-                month_names = ['JANUARY', 'FEBRUARY', 'MARCH', 'APRIL', 'MAY', 'JUNE', 'JULY', 'AUGUST', 'SEPTEMBER', 'OCTOBER', 'NOVEMBER', 'DECEMBER']
-                
-                if use_daily_data:
-                    # For custom range: Use Excel working days if available; otherwise DOJ-aware calculation
-                    # Check if Excel data exists for any months in the range
-                    excel_working_days_total = 0
-                    calculated_working_days_total = 0
-                    
-                    # Get months in the custom range
-                    current_date = start_date_obj
-                    months_in_range = []
-                    while current_date <= end_date_obj:
-                        months_in_range.append((current_date.year, current_date.month))
-                        # Move to first day of next month
-                        if current_date.month == 12:
-                            current_date = current_date.replace(year=current_date.year + 1, month=1, day=1)
-                        else:
-                            current_date = current_date.replace(month=current_date.month + 1, day=1)
-                    
-                    # Check each month in the range for Excel working days
-                    from datetime import timedelta, date
-                    doj = emp_info.get('date_of_joining')
+                    # SMART CALCULATION: Employee-specific working days with DOJ awareness
+                    try:
+                        from ..services.salary_service import SalaryCalculationService
+                        month_names = ['JANUARY', 'FEBRUARY', 'MARCH', 'APRIL', 'MAY', 'JUNE', 'JULY', 'AUGUST', 'SEPTEMBER', 'OCTOBER', 'NOVEMBER', 'DECEMBER']
                     
-                    for year, month in months_in_range:
-                        excel_key = (emp_id, year, month)
-                        if excel_key in excel_working_days_by_emp_month:
-                            # Use Excel working days directly (raw value from Excel)
-                            excel_working_days_total += excel_working_days_by_emp_month[excel_key]
+                        if use_daily_data:
+                            # For custom range: Use Excel working days if available; otherwise DOJ-aware calculation
+                            # Check if Excel data exists for any months in the range
+                            excel_working_days_total = 0
+                            calculated_working_days_total = 0
+                        
+                            # Get months in the custom range
+                            current_date = start_date_obj
+                            months_in_range = []
+                            while current_date <= end_date_obj:
+                                months_in_range.append((current_date.year, current_date.month))
+                                # Move to first day of next month
+                                if current_date.month == 12:
+                                    current_date = current_date.replace(year=current_date.year + 1, month=1, day=1)
+                                else:
+                                    current_date = current_date.replace(month=current_date.month + 1, day=1)
+                        
+                            # Check each month in the range for Excel working days
+                            from datetime import date
+                            doj = emp_info.get('date_of_joining')
+                        
+                            for year, month in months_in_range:
+                                excel_key = (emp_id, year, month)
+                                if excel_key in excel_working_days_by_emp_month:
+                                    # Use Excel working days directly (raw value from Excel)
+                                    excel_working_days_total += excel_working_days_by_emp_month[excel_key]
+                                else:
+                                    # No Excel data for this month - calculate using DOJ-aware logic
+                                    if is_single_day_response and year == end_date_obj.year and month == end_date_obj.month:
+                                        # Single day: count 1 only if DOJ is on/before the day; otherwise 0
+                                        if doj and doj > end_date_obj:
+                                            calculated_working_days_total += 0
+                                        else:
+                                            calculated_working_days_total += 1
+                                    else:
+                                        # For full month: calculate using DOJ-aware logic
+                                        month_start = date(year, month, 1)
+                                        import calendar
+                                        month_end = date(year, month, calendar.monthrange(year, month)[1])
+                                        # Clamp to actual range
+                                        month_start = max(month_start, start_date_obj)
+                                        month_end = min(month_end, end_date_obj)
+                                    
+                                        # Determine effective start considering DOJ
+                                        effective_start = month_start
+                                        if doj and doj > month_start:
+                                            if doj > month_end:
+                                                # DOJ is after this month - 0 working days
+                                                calculated_working_days_total += 0
+                                                continue
+                                            effective_start = doj
+                                    
+                                        month_working_days = SalaryCalculationService._calculate_employee_working_days_for_period(
+                                            emp_info, effective_start, month_end
+                                        )
+                                        calculated_working_days_total += month_working_days
+                        
+                            # Total working days = Excel working days (if any) + calculated working days (for months without Excel)
+                            employee_working_days = excel_working_days_total + calculated_working_days_total
                         else:
-                            # No Excel data for this month - calculate using DOJ-aware logic
-                            if is_single_day_response and year == end_date_obj.year and month == end_date_obj.month:
-                                # Single day: count 1 only if DOJ is on/before the day; otherwise 0
-                                if doj and doj > end_date_obj:
-                                    calculated_working_days_total += 0
+                            # For monthly aggregation: For each month, prefer Excel upload working days; otherwise DOJ-aware calc
+                            from datetime import datetime as _dt
+                            # Normalize DOJ if string
+                            doj_value = emp_info.get('date_of_joining')
+                            if isinstance(doj_value, str):
+                                try:
+                                    doj_value = _dt.fromisoformat(doj_value).date()
+                                except Exception:
+                                    doj_value = emp_info.get('date_of_joining')
+                            employee_working_days = 0
+                            for year, month in selected_months:
+                                excel_key = (emp_id, year, month)
+                                excel_days = attendance_working_days_by_emp_month.get(excel_key)
+                                if excel_days is not None and excel_days > 0:
+                                    employee_working_days += int(excel_days)
                                 else:
-                                    calculated_working_days_total += 1
+                                    month_working_days = SalaryCalculationService._calculate_employee_working_days(
+                                        emp_info, year, month_names[month - 1]
+                                    )
+                                    employee_working_days += month_working_days
+                    except Exception as e:
+                        # Fallback: Use calendar days per month for accurate calculation
+                        import calendar
+                        if use_daily_data:
+                            if is_single_day_response:
+                                employee_working_days = 1
                             else:
-                                # For full month: calculate using DOJ-aware logic
-                                month_start = date(year, month, 1)
-                                import calendar
-                                month_end = date(year, month, calendar.monthrange(year, month)[1])
-                                # Clamp to actual range
-                                month_start = max(month_start, start_date_obj)
-                                month_end = min(month_end, end_date_obj)
-                                
-                                # Determine effective start considering DOJ
-                                effective_start = month_start
-                                if doj and doj > month_start:
-                                    if doj > month_end:
-                                        # DOJ is after this month - 0 working days
-                                        calculated_working_days_total += 0
-                                        continue
-                                    effective_start = doj
-                                
-                                month_working_days = SalaryCalculationService._calculate_employee_working_days_for_period(
-                                    emp_info, effective_start, month_end
-                                )
-                                calculated_working_days_total += month_working_days
-                    
-                    # Total working days = Excel working days (if any) + calculated working days (for months without Excel)
-                    employee_working_days = excel_working_days_total + calculated_working_days_total
-                else:
-                    # For monthly aggregation: For each month, prefer Excel upload working days; otherwise DOJ-aware calc
-                    from datetime import datetime as _dt
-                    # Normalize DOJ if string
-                    doj_value = emp_info.get('date_of_joining')
-                    if isinstance(doj_value, str):
-                        try:
-                            doj_value = _dt.fromisoformat(doj_value).date()
-                        except Exception:
-                            doj_value = emp_info.get('date_of_joining')
-                    employee_working_days = 0
-                    for year, month in selected_months:
-                        excel_key = (emp_id, year, month)
-                        excel_days = attendance_working_days_by_emp_month.get(excel_key)
-                        if excel_days is not None and excel_days > 0:
-                            employee_working_days += int(excel_days)
+                                employee_working_days = (end_date_obj - start_date_obj).days + 1
                         else:
-                            month_working_days = SalaryCalculationService._calculate_employee_working_days(
-                                emp_info, year, month_names[month - 1]
-                            )
-                            employee_working_days += month_working_days
-            except Exception as e:
-                # Fallback: Use calendar days per month for accurate calculation
-                import calendar
-                if use_daily_data:
-                    if is_single_day_response:
-                        employee_working_days = 1
-                    else:
-                        employee_working_days = (end_date_obj - start_date_obj).days + 1
-                else:
-                    employee_working_days = sum(calendar.monthrange(y, m)[1] for (y, m) in selected_months)
+                            employee_working_days = sum(calendar.monthrange(y, m)[1] for (y, m) in selected_months)
 
-            absent_days = float(data.get('absent_days') or 0)
-            attendance_percentage = (data['present_days'] / employee_working_days * 100) if employee_working_days > 0 else 0
+                    absent_days = float(data.get('absent_days') or 0)
+                    attendance_percentage = (data['present_days'] / employee_working_days * 100) if employee_working_days > 0 else 0
 
-            # FRONTEND COMPATIBILITY: Add year/month for current period
-            current_time = timezone.now()
-            display_year = selected_months[0][0] if selected_months else current_time.year
-            display_month = selected_months[0][1] if selected_months else current_time.month
+                    # FRONTEND COMPATIBILITY: Add year/month for current period
+                    current_time = timezone.now()
+                    display_year = selected_months[0][0] if selected_months else current_time.year
+                    display_month = selected_months[0][1] if selected_months else current_time.month
 
-            # For single day requests, include the specific date
-            record_date = data.get('date', start_date_obj) if is_single_day_response else None
-            
-            # Generate appropriate ID for single day vs multi-day requests
-            record_id = f"{emp_id}_{start_date_obj.isoformat()}" if is_single_day_response else f"{emp_id}_{param_signature}"
-            
-            # Determine data source description
-            data_sources = data.get('data_sources', [])
-            if use_daily_data:
-                # For custom_range, check if we have combined sources
-                if 'daily_attendance' in data_sources and 'excel_upload' in data_sources:
-                    data_source = 'combined (daily_attendance + excel)'
-                elif 'daily_attendance' in data_sources:
-                    data_source = 'daily_attendance'
-                elif 'excel_upload' in data_sources:
-                    data_source = 'excel_upload'
-                else:
-                    data_source = 'no_data'
-            elif 'attendance_log' in data_sources and 'excel_upload' in data_sources:
-                data_source = 'combined (attendance_log + excel)'
-            elif 'attendance_log' in data_sources:
-                data_source = 'attendance_log'
-            elif 'excel_upload' in data_sources:
-                data_source = 'excel_upload'
-            else:
-                data_source = 'no_data'
-            
-            # FILTER: Only include employees with attendance data (present_days > 0)
-            # Skip employees with no attendance records
-            if data['present_days'] == 0 and data_source == 'no_data':
-                continue
-            
-            # Calculate holiday_days using precomputed holiday maps (fast, bulk lookup)
-            try:
-                dept = emp_info.get('department') or ''
-                if use_daily_data:
-                    # For custom ranges: company-wide holidays + department-specific holidays
-                    holiday_count = int(holiday_counts_range_all or 0) + int(holiday_counts_range_dept.get(dept, 0) or 0)
-                else:
-                    # For monthly aggregation: sum counts for each selected month
-                    holiday_count = 0
-                    for year, month in selected_months:
-                        holiday_count += int(holiday_counts_by_month_all.get((year, month), 0) or 0)
-                        holiday_count += int(holiday_counts_by_month_dept.get((year, month, dept), 0) or 0)
-            except Exception:
-                holiday_count = 0
-            
-            # IMPORTANT: Calculate net working days (total working days - holidays)
-            # This ensures consistent behavior regardless of data source
-            net_working_days = max(0, employee_working_days - holiday_count)
-            
-            # Calculate calendar days (total days in the period including weekends)
-            # CRITICAL: Calendar days should be calculated from DOJ if employee joined during the period
-            doj = emp_info.get('date_of_joining')
-            calendar_days = 0  # Initialize to ensure it's always defined
-            if use_daily_data:
-                if is_single_day_response:
-                    # For single day: check if employee has joined by this date
-                    if doj and doj > end_date_obj:
-                        calendar_days = 0  # Employee not yet joined
+                    # For single day requests, include the specific date
+                    record_date = data.get('date', start_date_obj) if is_single_day_response else None
+                
+                    # Generate appropriate ID for single day vs multi-day requests
+                    record_id = f"{emp_id}_{start_date_obj.isoformat()}" if is_single_day_response else f"{emp_id}_{param_signature}"
+                
+                    # Determine data source description
+                    data_sources = data.get('data_sources', [])
+                    if use_daily_data:
+                        # For custom_range, check if we have combined sources
+                        if 'daily_attendance' in data_sources and 'excel_upload' in data_sources:
+                            data_source = 'combined (daily_attendance + excel)'
+                        elif 'daily_attendance' in data_sources:
+                            data_source = 'daily_attendance'
+                        elif 'excel_upload' in data_sources:
+                            data_source = 'excel_upload'
+                        else:
+                            data_source = 'no_data'
+                    elif 'attendance_log' in data_sources and 'excel_upload' in data_sources:
+                        data_source = 'combined (attendance_log + excel)'
+                    elif 'attendance_log' in data_sources:
+                        data_source = 'attendance_log'
+                    elif 'excel_upload' in data_sources:
+                        data_source = 'excel_upload'
                     else:
-                        calendar_days = 1
-                else:
-                    # For date range: calculate from DOJ if employee joined during the period
-                    effective_start = start_date_obj
-                    if doj and doj > start_date_obj:
-                        if doj > end_date_obj:
-                            calendar_days = 0  # Employee not yet joined
+                        data_source = 'no_data'
+                
+                    # FILTER: Only include employees with attendance data (present_days > 0)
+                    # Skip employees with no attendance records
+                    if data['present_days'] == 0 and data_source == 'no_data':
+                        continue
+                
+                    # Calculate holiday_days using precomputed holiday maps (fast, bulk lookup)
+                    try:
+                        dept = emp_info.get('department') or ''
+                        if use_daily_data:
+                            # For custom ranges: company-wide holidays + department-specific holidays
+                            holiday_count = int(holiday_counts_range_all or 0) + int(holiday_counts_range_dept.get(dept, 0) or 0)
                         else:
-                            effective_start = doj
-                    # Only calculate calendar_days if not already set to 0 above
-                    if not (doj and doj > end_date_obj):
-                        calendar_days = (end_date_obj - effective_start).days + 1
-            else:
-                # For monthly aggregation, calculate calendar days from DOJ
-                # OPTIMIZED: Use pre-calculated calendar days per month
-                from datetime import date as _date
+                            # For monthly aggregation: sum counts for each selected month
+                            holiday_count = 0
+                            for year, month in selected_months:
+                                holiday_count += int(holiday_counts_by_month_all.get((year, month), 0) or 0)
+                                holiday_count += int(holiday_counts_by_month_dept.get((year, month, dept), 0) or 0)
+                    except Exception:
+                        holiday_count = 0
                 
-                calendar_days = 0
-                for year, month in selected_months:
-                    month_days = calendar_days_per_month[(year, month)]
-                    month_start = _date(year, month, 1)
-                    month_end = _date(year, month, month_days)
-                    
-                    # Check if employee has joined by this month
-                    if doj and doj > month_end:
-                        continue  # Employee not yet joined in this month
+                    # IMPORTANT: Calculate net working days (total working days - holidays)
+                    # This ensures consistent behavior regardless of data source
+                    net_working_days = max(0, employee_working_days - holiday_count)
+                
+                    # Calculate calendar days (total days in the period including weekends)
+                    # CRITICAL: Calendar days should be calculated from DOJ if employee joined during the period
+                    doj = emp_info.get('date_of_joining')
+                    calendar_days = 0  # Initialize to ensure it's always defined
+                    if use_daily_data:
+                        if is_single_day_response:
+                            # For single day: check if employee has joined by this date
+                            if doj and doj > end_date_obj:
+                                calendar_days = 0  # Employee not yet joined
+                            else:
+                                calendar_days = 1
+                        else:
+                            # For date range: calculate from DOJ if employee joined during the period
+                            effective_start = start_date_obj
+                            if doj and doj > start_date_obj:
+                                if doj > end_date_obj:
+                                    calendar_days = 0  # Employee not yet joined
+                                else:
+                                    effective_start = doj
+                            # Only calculate calendar_days if not already set to 0 above
+                            if not (doj and doj > end_date_obj):
+                                calendar_days = (end_date_obj - effective_start).days + 1
+                    else:
+                        # For monthly aggregation, calculate calendar days from DOJ
+                        # OPTIMIZED: Use pre-calculated calendar days per month
+                        from datetime import date as _date
                     
-                    # Calculate calendar days from DOJ if employee joined during this month
-                    if doj and month_start <= doj <= month_end:
-                        # Employee joined during this month - count from DOJ to month end
-                        calendar_days += (month_end - doj).days + 1
+                        calendar_days = 0
+                        for year, month in selected_months:
+                            month_days = calendar_days_per_month[(year, month)]
+                            month_start = _date(year, month, 1)
+                            month_end = _date(year, month, month_days)
+                        
+                            # Check if employee has joined by this month
+                            if doj and doj > month_end:
+                                continue  # Employee not yet joined in this month
+                        
+                            # Calculate calendar days from DOJ if employee joined during this month
+                            if doj and month_start <= doj <= month_end:
+                                # Employee joined during this month - count from DOJ to month end
+                                calendar_days += (month_end - doj).days + 1
+                            else:
+                                # Employee already joined before this month - count full month
+                                calendar_days += month_days
+                
+                    # Calculate off days (calendar days - total working days - holidays)
+                    # Off days = weekends and other non-working days (excluding holidays)
+                    # This is DOJ-aware since both calendar_days and employee_working_days are DOJ-aware
+                    off_days = max(0, calendar_days - employee_working_days)
+                
+                    # Calculate unmarked days based on data source
+                    if data_source == 'daily_attendance':
+                        # For daily attendance, use records_count (actual days with records)
+                        unmarked_days_value = max(0, calendar_days - data.get('records_count', 0) - off_days)
                     else:
-                        # Employee already joined before this month - count full month
-                        calendar_days += month_days
-            
-            # Calculate off days (calendar days - total working days - holidays)
-            # Off days = weekends and other non-working days (excluding holidays)
-            # This is DOJ-aware since both calendar_days and employee_working_days are DOJ-aware
-            off_days = max(0, calendar_days - employee_working_days)
-            
-            # Calculate unmarked days based on data source
-            if data_source == 'daily_attendance':
-                # For daily attendance, use records_count (actual days with records)
-                unmarked_days_value = max(0, calendar_days - data.get('records_count', 0) - off_days)
-            else:
-                # For other sources, check if unmarked_days is already in aggregated data
-                # If not (old data), calculate it: working days - present - absent
-                if data.get('unmarked_days', 0) > 0:
-                    unmarked_days_value = data['unmarked_days']
-                else:
-                    # Calculate: working days that have no attendance record
-                    unmarked_days_value = max(0, net_working_days - data['present_days'] - data['absent_days'])
-            
-            # Calculate penalty days: Get existing weekly penalty days from aggregated data
-            # Note: weekly_penalty_days should already be calculated correctly in the aggregation phase
-            # by checking weekly absent counts against weekly_absent_threshold (not monthly totals)
-            weekly_penalty_days = float(data.get('weekly_penalty_days', 0) or 0)
-            
-            attendance_records.append({
-                'id': record_id,
-                'employee_id': emp_id,
-                'employee_name': f"{emp_info['first_name']} {emp_info['last_name']}",
-                'department': emp_info['department'] or 'General',
-                'designation': emp_info['designation'] or 'Employee',
-                'date_of_joining': emp_info['date_of_joining'],
-                'shift_start_time': emp_info['shift_start_time'],
-                'shift_end_time': emp_info['shift_end_time'],
-                'year': display_year,  # Added for frontend compatibility
-                'month': display_month,  # Added for frontend compatibility
-                'date': record_date.isoformat() if record_date else None,  # Include specific date for single day requests
-                'calendar_days': calendar_days,  # NEW: Total calendar days (e.g., 31 for January)
-                'off_days': off_days,  # NEW: Off days (weekends, etc.)
-                'present_days': round(data['present_days'], 1),
-                'absent_days': round(absent_days, 1),
-                'unmarked_days': round(unmarked_days_value, 1),
-                'total_working_days': net_working_days,  # Net working days (after holidays)
-                'holiday_days': holiday_count,
-                'weekly_penalty_days': round(weekly_penalty_days, 1),
-                'employee_weekly_rules_enabled': employees_dict.get(emp_id, {}).get('weekly_rules_enabled', True) if emp_id in employees_dict else True,
-                # Sunday bonus already included in present_days (Sundays are marked as PRESENT)
-                'attendance_percentage': round(attendance_percentage, 1),
-                'total_ot_hours': round(data['ot_hours'], 2),
-                'total_late_minutes': data['late_minutes'],
-                'data_source': data_source,
-                'last_updated': timezone.now().isoformat(),
-                'status': data.get('attendance_status', None) if is_single_day_response else None  # Include status for single day
-            })
-        timing_breakdown['response_building_ms'] = round((time.time() - step_start) * 1000, 2)
+                        # For other sources, check if unmarked_days is already in aggregated data
+                        # If not (old data), calculate it: working days - present - absent
+                        if data.get('unmarked_days', 0) > 0:
+                            unmarked_days_value = data['unmarked_days']
+                        else:
+                            # Calculate: working days that have no attendance record
+                            unmarked_days_value = max(0, net_working_days - data['present_days'] - data['absent_days'])
+                
+                    # Calculate penalty days: Get existing weekly penalty days from aggregated data
+                    # Note: weekly_penalty_days should already be calculated correctly in the aggregation phase
+                    # by checking weekly absent counts against weekly_absent_threshold (not monthly totals)
+                    weekly_penalty_days = float(data.get('weekly_penalty_days', 0) or 0)
+                
+                    yield {
+                        'id': record_id,
+                        'employee_id': emp_id,
+                        'employee_name': f"{emp_info['first_name']} {emp_info['last_name']}",
+                        'department': emp_info['department'] or 'General',
+                        'designation': emp_info['designation'] or 'Employee',
+                        'date_of_joining': emp_info['date_of_joining'],
+                        'shift_start_time': emp_info['shift_start_time'],
+                        'shift_end_time': emp_info['shift_end_time'],
+                        'year': display_year,  # Added for frontend compatibility
+                        'month': display_month,  # Added for frontend compatibility
+                        'date': record_date.isoformat() if record_date else None,  # Include specific date for single day requests
+                        'calendar_days': calendar_days,  # NEW: Total calendar days (e.g., 31 for January)
+                        'off_days': off_days,  # NEW: Off days (weekends, etc.)
+                        'present_days': round(data['present_days'], 1),
+                        'absent_days': round(absent_days, 1),
+                        'unmarked_days': round(unmarked_days_value, 1),
+                        'total_working_days': net_working_days,  # Net working days (after holidays)
+                        'holiday_days': holiday_count,
+                        'weekly_penalty_days': round(weekly_penalty_days, 1),
+                        'employee_weekly_rules_enabled': employees_dict.get(emp_id, {}).get('weekly_rules_enabled', True) if emp_id in employees_dict else True,
+                        # Sunday bonus already included in present_days (Sundays are marked as PRESENT)
+                        'attendance_percentage': round(attendance_percentage, 1),
+                        'total_ot_hours': round(data['ot_hours'], 2),
+                        'total_late_minutes': data['late_minutes'],
+                        'data_source': data_source,
+                        'last_updated': timezone.now().isoformat(),
+                        'status': data.get('attendance_status', None) if is_single_day_response else None  # Include status for single day
+                    }
+
+            return iter_attendance_records()
+
+        if stream_mode:
+            from ..utils.streaming_json import DEFAULT_CHUNK_SIZE, iter_chunks
+
+            def iter_streamed_records():
+                """Aggregate and build the records one chunk of employees at a time, in employee_id order."""
+                employees_iter = keyset_employees_qs.order_by('employee_id').iterator(chunk_size=DEFAULT_CHUNK_SIZE)
+                for chunk in iter_chunks(employees_iter, DEFAULT_CHUNK_SIZE):
+                    chunk_employees = {emp['employee_id']: emp for emp in chunk}
+                    yield from build_attendance_records(chunk_employees, list(chunk_employees))
+
+            context_info_base = {
+                'time_period': time_period,
+                'selected_months': selected_months if not use_daily_data else None,
+                'start_date': start_date_str if use_daily_data else None,
+                'end_date': end_date_str if use_daily_data else None,
+            }
+            return self._stream_all_records(iter_streamed_records(), context_info_base, start_time, timing_breakdown)
+
+        step_start = time.time()
+        attendance_records = list(build_attendance_records(employees_dict, page_employee_ids))
+        record_step(timing_breakdown, 'response_building_ms', step_start)
         timing_breakdown['total_records_created'] = len(attendance_records)
         logger.info(f"Response building: {timing_breakdown['response_building_ms']}ms for {len(attendance_records)} records")
 
@@ -6979,7 +7231,7 @@ class DailyAttendanceViewSet(viewsets.ModelViewSet):
         }
 
         total_time_ms = round((time.time() - start_time) * 1000, 2)
-        timing_breakdown['context_building_ms'] = round((time.time() - step_start) * 1000, 2)
+        record_step(timing_breakdown, 'context_building_ms', step_start)
 
         # PROGRESSIVE LOADING: Apply offset and limit
         total_count = len(attendance_records)
@@ -7005,6 +7257,30 @@ class DailyAttendanceViewSet(viewsets.ModelViewSet):
             'presentees_count': presentees_count  # Total count from ALL records
         }
         
+        if cursor_mode:
+            # Keyset page: records already belong to this page's employees only
+            cursor_response = {
+                'results': attendance_records,
+                'count': total_count,
+                'cursor': cursor,
+                'next_cursor': next_cursor,
+                'limit': limit,
+                'has_more': next_cursor is not None,
+                'month_context': context_info,
+                'performance': {
+                    'cached': False,
+                    'query_time': f"{(time.time() - start_time):.3f}s",
+                    'total_time_ms': round((time.time() - start_time) * 1000, 2),
+                    'timing_breakdown': timing_breakdown,
+                    'data_source': 'keyset_page_query',
+                    'request_metrics': performance_snapshot(),
+                }
+            }
+            if use_cache:
+                cache.set(cache_key, cursor_response, 600)
+            logger.info(f"all_records keyset page - {total_count} records, has_more={next_cursor is not None}, {total_time_ms}ms")
+            return Response(cursor_response)
+
         if limit > 0:
             # Apply pagination
             end_index = offset + limit
@@ -7050,12 +7326,13 @@ class DailyAttendanceViewSet(viewsets.ModelViewSet):
                 'cached': False,  # Will be set to True when retrieved from cache
                 'query_time': f"{(time.time() - start_time):.3f}s",
                 'total_time_ms': round((time.time() - start_time) * 1000, 2),
-                'timing_breakdown': timing_breakdown
+                'timing_breakdown': timing_breakdown,
+                'request_metrics': performance_snapshot(),
             }
             
             # Cache for 10 minutes (600 seconds)
             cache.set(cache_key, full_response, 600)
-        timing_breakdown['cache_save_ms'] = round((time.time() - step_start) * 1000, 2)
+        record_step(timing_breakdown, 'cache_save_ms', step_start)
 
         # Add total processing time after all optimizations
         timing_breakdown['total_backend_ms'] = total_time_ms
@@ -7067,6 +7344,72 @@ class DailyAttendanceViewSet(viewsets.ModelViewSet):
         # OPTIMIZATION: Always use DRF Response for consistency (JsonResponse can cause frontend issues)
         return Response(response_data)
 
+    def _stream_all_records(self, records, context_info_base, start_time, timing_breakdown):
+        """
+        Stream all_records (?stream=true).
+
+        Records are aggregated and encoded one chunk of employees at a time and KPI
+        totals are accumulated on the fly, so peak memory is one chunk's employees
+        and aggregates regardless of tenant size. kpi_totals,
+        month_context and performance follow the results in the envelope.
+        """
+        from ..utils.streaming_json import stream_json_response
+
+        totals = {
+            'count': 0, 'ot_hours': 0.0, 'late_minutes': 0, 'present_days': 0.0,
+            'working_days': 0, 'absentees': set(), 'presentees': set(),
+        }
+
+        def counted():
+            for record in records:
+                totals['count'] += 1
+                totals['ot_hours'] += record['total_ot_hours']
+                totals['late_minutes'] += record['total_late_minutes']
+                totals['present_days'] += record['present_days']
+                totals['working_days'] += record['total_working_days']
+                if record.get('absent_days', 0) > 0:
+                    totals['absentees'].add(record['employee_id'])
+                if record.get('present_days', 0) > 0:
+                    totals['presentees'].add(record['employee_id'])
+                yield record
+
+        def tail():
+            count = totals['count']
+            working_days = totals['working_days']
+            context_info = dict(context_info_base)
+            context_info['working_days'] = round(working_days / count, 1) if count else 0
+            total_time_ms = round((time.time() - start_time) * 1000, 2)
+            timing_breakdown['total_backend_ms'] = total_time_ms
+            logger.info(f"all_records streamed {count} records in {total_time_ms}ms")
+            return {
+                'count': count,
+                'total_count': count,
+                'offset': 0,
+                'limit': count,
+                'has_more': False,
+                'kpi_totals': {
+                    'total_employees': count,
+                    'total_ot_hours': totals['ot_hours'],
+                    'total_late_minutes': totals['late_minutes'],
+                    'total_present_days': totals['present_days'],
+                    'total_working_days': working_days,
+                    'avg_attendance_percentage': (totals['present_days'] / working_days * 100) if working_days > 0 else 0,
+                    'absentees_count': len(totals['absentees']),
+                    'presentees_count': len(totals['presentees']),
+                },
+                'month_context': context_info,
+                'performance': {
+                    'cached': False,
+                    'streamed': True,
+                    'query_time': f"{(time.time() - start_time):.3f}s",
+                    'total_time_ms': total_time_ms,
+                    'timing_breakdown': timing_breakdown,
+                    'request_metrics': performance_snapshot(),
+                }
+            }
+
+        return stream_json_response({}, 'results', counted(), tail)
+
 class AdvanceLedgerViewSet(viewsets.ModelViewSet):
     serializer_class = AdvanceLedgerSerializer
     permission_classes = [IsAuthenticated]
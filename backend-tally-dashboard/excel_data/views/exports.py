@@ -0,0 +1,165 @@
+# exports.py
+# Server-side spreadsheet exports (CSV / XLSX), streamed in constant memory:
+# - export_payroll_period
+# - export_daily_attendance
+
+import calendar
+import logging
+from datetime import date
+
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from ..models import CalculatedSalary, DailyAttendance, PayrollPeriod
+from ..utils.streaming_export import EXPORT_FORMATS, export_response
+from ..utils.streaming_json import DEFAULT_CHUNK_SIZE
+
+logger = logging.getLogger(__name__)
+
+# (header, CalculatedSalary field) in register column order
+PAYROLL_EXPORT_COLUMNS = [
+    ('Employee ID', 'employee_id'),
+    ('Name', 'employee_name'),
+    ('Department', 'department'),
+    ('Basic Salary', 'basic_salary'),
+    ('Working Days', 'total_working_days'),
+    ('Present Days', 'present_days'),
+    ('Absent Days', 'absent_days'),
+    ('Holiday Days', 'holiday_days'),
+    ('Weekly Penalty Days', 'weekly_penalty_days'),
+    ('OT Hours', 'ot_hours'),
+    ('OT Rate', 'employee_ot_rate'),
+    ('OT Charges', 'ot_charges'),
+    ('Late Minutes', 'late_minutes'),
+    ('Late Deduction', 'late_deduction'),
+    ('Incentive', 'incentive'),
+    ('Gross Salary', 'gross_salary'),
+    ('TDS %', 'employee_tds_rate'),
+    ('TDS Amount', 'tds_amount'),
+    ('Salary After TDS', 'salary_after_tds'),
+    ('Total Advance Balance', 'total_advance_balance'),
+    ('Advance Deduction', 'advance_deduction_amount'),
+    ('Remaining Advance', 'remaining_advance_balance'),
+    ('Net Payable', 'net_payable'),
+    ('Paid', 'is_paid'),
+    ('Payment Date', 'payment_date'),
+]
+
+ATTENDANCE_EXPORT_COLUMNS = [
+    ('Date', 'date'),
+    ('Employee ID', 'employee_id'),
+    ('Name', 'employee_name'),
+    ('Department', 'department'),
+    ('Designation', 'designation'),
+    ('Status', 'attendance_status'),
+    ('Check In', 'check_in'),
+    ('Check Out', 'check_out'),
+    ('Working Hours', 'working_hours'),
+    ('Time Status', 'time_status'),
+    ('OT Hours', 'ot_hours'),
+    ('Late Minutes', 'late_minutes'),
+]
+
+
+def _export_format(request):
+    # Not ?format=: DRF reserves it for renderer negotiation and 404s on unknown values
+    return request.GET.get('file_format', 'xlsx').lower()
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def export_payroll_period(request, period_id):
+    """
+    Export a payroll period's CalculatedSalary register.
+
+    Query params:
+        file_format: 'xlsx' (default) or 'csv'
+    """
+    try:
+        tenant = getattr(request, 'tenant', None)
+        if not tenant:
+            return Response({"error": "No tenant found"}, status=400)
+
+        export_format = _export_format(request)
+        if export_format not in EXPORT_FORMATS:
+            return Response({"error": f"Unsupported format. Use one of: {', '.join(EXPORT_FORMATS)}"}, status=400)
+
+        period = PayrollPeriod.objects.filter(tenant=tenant, id=period_id).first()
+        if not period:
+            return Response({"error": "Payroll period not found"}, status=404)
+
+        rows = CalculatedSalary.objects.filter(
+            tenant=tenant,
+            payroll_period=period
+        ).order_by('employee_name', 'employee_id').values_list(
+            *[field for _, field in PAYROLL_EXPORT_COLUMNS]
+        ).iterator(chunk_size=DEFAULT_CHUNK_SIZE)
+
+        logger.info(f"📤 Payroll export: tenant={tenant.id} period={period.month} {period.year} format={export_format}")
+        return export_response(
+            export_format,
+            f"payroll_{period.year}_{period.month.lower()}",
+            f"Payroll {period.month.title()} {period.year}",
+            [header for header, _ in PAYROLL_EXPORT_COLUMNS],
+            rows,
+        )
+
+    except Exception as e:
+        logger.error(f"Error in export_payroll_period: {str(e)}")
+        return Response({"error": f"Failed to export payroll period: {str(e)}"}, status=500)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def export_daily_attendance(request):
+    """
+    Export one month of DailyAttendance.
+
+    Query params:
+        year, month: month to export (month as 1-12), required
+        file_format: 'xlsx' (default) or 'csv'
+        employee_id: optional, restrict to one employee
+    """
+    try:
+        tenant = getattr(request, 'tenant', None)
+        if not tenant:
+            return Response({"error": "No tenant found"}, status=400)
+
+        export_format = _export_format(request)
+        if export_format not in EXPORT_FORMATS:
+            return Response({"error": f"Unsupported format. Use one of: {', '.join(EXPORT_FORMATS)}"}, status=400)
+
+        try:
+            year = int(request.GET.get('year', ''))
+            month = int(request.GET.get('month', ''))
+            month_start = date(year, month, 1)
+        except ValueError:
+            return Response({"error": "year and month (1-12) are required"}, status=400)
+        month_end = date(year, month, calendar.monthrange(year, month)[1])
+
+        queryset = DailyAttendance.objects.filter(
+            tenant=tenant,
+            date__gte=month_start,
+            date__lte=month_end
+        )
+        employee_id = request.GET.get('employee_id')
+        if employee_id:
+            queryset = queryset.filter(employee_id=employee_id)
+
+        rows = queryset.order_by('date', 'employee_name', 'employee_id').values_list(
+            *[field for _, field in ATTENDANCE_EXPORT_COLUMNS]
+        ).iterator(chunk_size=DEFAULT_CHUNK_SIZE)
+
+        logger.info(f"📤 Attendance export: tenant={tenant.id} month={year}-{month:02d} format={export_format}")
+        return export_response(
+            export_format,
+            f"attendance_{year}_{month:02d}",
+            f"Attendance {calendar.month_name[month]} {year}",
+            [header for header, _ in ATTENDANCE_EXPORT_COLUMNS],
+            rows,
+        )
+
+    except Exception as e:
+        logger.error(f"Error in export_daily_attendance: {str(e)}")
+        return Response({"error": f"Failed to export attendance: {str(e)}"}, status=500)
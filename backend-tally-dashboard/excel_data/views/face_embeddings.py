@@ -1,20 +1,31 @@
+import calendar
+from collections import defaultdict
+from datetime import timedelta, timezone as dt_timezone
 from typing import List, Optional
 
 import logging
+import numpy as np
+from django.conf import settings
+from django.http import HttpResponse
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from django.db import transaction
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 
-from ..models import EmployeeProfile
+from ..models import EmployeeProfile, PayrollPeriod
 from ..models.face_embedding import FaceEmbedding
-from ..models.face_log import FaceAttendanceLog
 from ..models.pending_attendance import PendingAttendanceUpdate
 from ..utils.face_embedding_crypto import encrypt_embedding
-from ..utils.face_embedding_cache import get_cached_embeddings, clear_tenant_cache
-from ..utils.face_attendance import is_off_day, mark_face_attendance
+from ..utils.face_embedding_cache import get_cached_embeddings, get_embedding_matrices
+from ..utils.face_attendance import is_off_day, local_event_time, mark_face_attendance
+from ..utils.query_budget import query_budget
+from ..services.face_attendance_writer import ClockEvent, FaceAttendanceBatchWriter, apply_clock_events, store_pending
+from ..services.face_duplicates import find_duplicate
+from ..services.face_gallery import build_gallery_pack, next_embedding_version
+from ..services.face_log_sink import record_face_log
 
 
 logger = logging.getLogger(__name__)
@@ -40,8 +51,14 @@ class FaceEmbeddingRegisterView(APIView):
     Request:
     {
       "employee_id": "<id>",
-      "embedding": [float, float, ...]
+      "embedding": [float, float, ...],
+      "allow_duplicate": false
     }
+
+    A face that scores FACE_DUPLICATE_SIMILARITY or more against another
+    employee's embedding is rejected with 409 (FACE_DUPLICATE_ACTION 'reject',
+    unless allow_duplicate), or saved and returned as ``possible_duplicate``
+    ('flag', or an allowed duplicate).
     """
 
     permission_classes = [IsAuthenticated]
@@ -51,18 +68,15 @@ class FaceEmbeddingRegisterView(APIView):
         if not tenant:
             return Response({"error": "Tenant not found"}, status=status.HTTP_400_BAD_REQUEST)
         if not getattr(tenant, "face_attendance_enabled", False):
-            try:
-                FaceAttendanceLog.objects.create(
-                    tenant=tenant,
-                    event_type="registration",
-                    recognized=False,
-                    employee_identifier=None,
-                    message="Face attendance is disabled for this tenant.",
-                    source="mobile",
-                    event_time=timezone.now(),
-                )
-            except Exception:
-                pass
+            record_face_log(
+                tenant=tenant,
+                event_type="registration",
+                recognized=False,
+                employee_identifier=None,
+                message="Face attendance is disabled for this tenant.",
+                source="mobile",
+                event_time=timezone.now(),
+            )
             return Response(
                 {"error": "Face attendance is disabled for this tenant"},
                 status=status.HTTP_403_FORBIDDEN,
@@ -72,56 +86,96 @@ class FaceEmbeddingRegisterView(APIView):
         embedding = request.data.get("embedding")
 
         if not employee_id:
-            try:
-                FaceAttendanceLog.objects.create(
-                    tenant=tenant,
-                    event_type="registration",
-                    recognized=False,
-                    employee_identifier=None,
-                    message="Registration failed: employee_id is required",
-                    source="mobile",
-                    event_time=timezone.now(),
-                )
-            except Exception:
-                pass
+            record_face_log(
+                tenant=tenant,
+                event_type="registration",
+                recognized=False,
+                employee_identifier=None,
+                message="Registration failed: employee_id is required",
+                source="mobile",
+                event_time=timezone.now(),
+            )
             return Response({"error": "employee_id is required"}, status=status.HTTP_400_BAD_REQUEST)
         if not isinstance(embedding, list) or not embedding:
-            try:
-                FaceAttendanceLog.objects.create(
-                    tenant=tenant,
-                    event_type="registration",
-                    recognized=False,
-                    employee_identifier=str(employee_id),
-                    message="Registration failed: embedding must be a non-empty list",
-                    source="mobile",
-                    event_time=timezone.now(),
-                )
-            except Exception:
-                pass
+            record_face_log(
+                tenant=tenant,
+                event_type="registration",
+                recognized=False,
+                employee_identifier=str(employee_id),
+                message="Registration failed: embedding must be a non-empty list",
+                source="mobile",
+                event_time=timezone.now(),
+            )
             return Response({"error": "embedding must be a non-empty list"}, status=status.HTTP_400_BAD_REQUEST)
 
         try:
             employee = EmployeeProfile.objects.get(id=employee_id, tenant=tenant)
         except EmployeeProfile.DoesNotExist:
+            record_face_log(
+                tenant=tenant,
+                event_type="registration",
+                recognized=False,
+                employee_identifier=str(employee_id),
+                message="Registration failed: employee not found for this tenant",
+                source="mobile",
+                event_time=timezone.now(),
+            )
+            return Response(
+                {"error": "Employee not found for this tenant"},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+
+        # Same face already enrolled under another employee? (services.face_duplicates)
+        duplicate = None
+        duplicate_action = getattr(settings, "FACE_DUPLICATE_ACTION", "reject")
+        if duplicate_action != "off":
             try:
-                FaceAttendanceLog.objects.create(
+                duplicate = find_duplicate(
+                    tenant,
+                    embedding,
+                    getattr(settings, "FACE_DUPLICATE_SIMILARITY", 0.8),
+                    exclude_employee_id=employee.id,
+                )
+            except (TypeError, ValueError):
+                return Response({"error": "embedding must be a list of numbers"}, status=status.HTTP_400_BAD_REQUEST)
+        if duplicate:
+            other = EmployeeProfile.objects.filter(id=duplicate.employee_id, tenant=tenant).first()
+            duplicate_info = {
+                "employee_id": duplicate.employee_id,
+                "employee_code": other.employee_id if other else None,
+                "employee_name": f"{other.first_name} {other.last_name}".strip() if other else None,
+                "similarity": duplicate.similarity,
+            }
+            label = (other.employee_id if other else None) or duplicate.employee_id
+            allow = bool(request.data.get("allow_duplicate"))
+            if duplicate_action == "reject" and not allow:
+                record_face_log(
                     tenant=tenant,
+                    employee=employee,
+                    employee_identifier=employee.employee_id or str(employee.id),
                     event_type="registration",
                     recognized=False,
-                    employee_identifier=str(employee_id),
-                    message="Registration failed: employee not found for this tenant",
+                    confidence=duplicate.similarity,
+                    message=f"Registration rejected: face already registered for employee {label}",
                     source="mobile",
                     event_time=timezone.now(),
                 )
-            except Exception:
-                pass
-            return Response(
-                {"error": "Employee not found for this tenant"},
-                status=status.HTTP_404_NOT_FOUND,
+                return Response(
+                    {
+                        "error": "This face is already registered for another employee",
+                        "duplicate": duplicate_info,
+                    },
+                    status=status.HTTP_409_CONFLICT,
+                )
+            logger.warning(
+                f"⚠️ [Face] Registration of employee {employee.employee_id or employee.id} matches "
+                f"employee {label} (similarity {duplicate.similarity:.3f})"
             )
 
         encrypted = encrypt_embedding(embedding)
 
+        # The new cache version is also the embedding's change version (delta gallery sync);
+        # the local verify cache of this tenant is cleared on commit
         with transaction.atomic():
             obj, created = FaceEmbedding.objects.select_for_update().get_or_create(
                 tenant=tenant,
@@ -130,47 +184,37 @@ class FaceEmbeddingRegisterView(APIView):
                     "embedding_encrypted": encrypted,
                 },
             )
-            if not created:
-                obj.embedding_encrypted = encrypted
-                obj.updated_at = timezone.now()
-                obj.save(update_fields=["embedding_encrypted", "updated_at"])
-
-        # Bump cache version and clear local cache for this tenant
-        try:
-            from django.db.models import F
-            from ..models import Tenant
-            Tenant.objects.filter(id=tenant.id).update(
-                embedding_cache_version=F("embedding_cache_version") + 1
-            )
-            clear_tenant_cache(tenant.id)
-        except Exception as exc:
-            logger.warning("Failed to bump embedding cache version for tenant %s: %s", tenant.id, exc)
+            obj.embedding_encrypted = encrypted
+            obj.updated_at = timezone.now()
+            obj.change_version = next_embedding_version(tenant.id)
+            obj.save(update_fields=["embedding_encrypted", "updated_at", "change_version"])
 
         # Log successful registration
-        try:
-            FaceAttendanceLog.objects.create(
-                tenant=tenant,
-                employee=employee,
-                employee_identifier=employee.employee_id or str(employee.id),
-                event_type="registration",
-                recognized=True,
-                message="Face embedding registered successfully.",
-                source="mobile",
-                event_time=timezone.now(),
-            )
-        except Exception as exc:
-            logger.warning("Failed to create FaceAttendanceLog for registration: %s", exc)
-
-        return Response(
-            {
-                "success": True,
-                "employee_id": employee.id,
-                "employee_name": f"{employee.first_name} {employee.last_name}".strip(),
-                "message": "Face embedding stored securely.",
-            },
-            status=status.HTTP_200_OK,
+        record_face_log(
+            tenant=tenant,
+            employee=employee,
+            employee_identifier=employee.employee_id or str(employee.id),
+            event_type="registration",
+            recognized=True,
+            confidence=duplicate.similarity if duplicate else None,
+            message=(
+                f"Face embedding registered; possible duplicate of employee {label}."
+                if duplicate else "Face embedding registered successfully."
+            ),
+            source="mobile",
+            event_time=timezone.now(),
         )
 
+        response = {
+            "success": True,
+            "employee_id": employee.id,
+            "employee_name": f"{employee.first_name} {employee.last_name}".strip(),
+            "message": "Face embedding stored securely.",
+        }
+        if duplicate:
+            response["possible_duplicate"] = duplicate_info
+        return Response(response, status=status.HTTP_200_OK)
+
 
 class FaceEmbeddingVerifyView(APIView):
     """
@@ -187,22 +231,20 @@ class FaceEmbeddingVerifyView(APIView):
 
     DEFAULT_THRESHOLD = 0.65
 
+    @query_budget(12)
     def post(self, request, *args, **kwargs):
         tenant = getattr(request, "tenant", None)
         if not tenant:
             return Response({"error": "Tenant not found"}, status=status.HTTP_400_BAD_REQUEST)
         if not getattr(tenant, "face_attendance_enabled", False):
-            try:
-                FaceAttendanceLog.objects.create(
-                    tenant=tenant,
-                    event_type="verification",
-                    recognized=False,
-                    message="Face attendance is disabled for this tenant.",
-                    source="mobile",
-                    event_time=timezone.now(),
-                )
-            except Exception:
-                pass
+            record_face_log(
+                tenant=tenant,
+                event_type="verification",
+                recognized=False,
+                message="Face attendance is disabled for this tenant.",
+                source="mobile",
+                event_time=timezone.now(),
+            )
             return Response(
                 {"error": "Face attendance is disabled for this tenant"},
                 status=status.HTTP_403_FORBIDDEN,
@@ -240,19 +282,16 @@ class FaceEmbeddingVerifyView(APIView):
 
         if not best_employee_id or best_score < threshold:
             # Persist centralized face log for failures as well
-            try:
-                FaceAttendanceLog.objects.create(
-                    tenant=tenant,
-                    event_type="verification",
-                    mode=mode,
-                    recognized=False,
-                    confidence=float(best_score),
-                    message="Face not recognized.",
-                    source="mobile",
-                    event_time=timezone.now(),
-                )
-            except Exception:
-                pass
+            record_face_log(
+                tenant=tenant,
+                event_type="verification",
+                mode=mode,
+                recognized=False,
+                confidence=float(best_score),
+                message="Face not recognized.",
+                source="mobile",
+                event_time=timezone.now(),
+            )
             return Response(
                 {
                     "recognized": False,
@@ -265,19 +304,16 @@ class FaceEmbeddingVerifyView(APIView):
 
         employee = EmployeeProfile.objects.filter(id=best_employee_id, tenant=tenant).first()
         if not employee:
-            try:
-                FaceAttendanceLog.objects.create(
-                    tenant=tenant,
-                    event_type="verification",
-                    mode=mode,
-                    recognized=False,
-                    confidence=float(best_score),
-                    message="Face matched to missing employee record.",
-                    source="mobile",
-                    event_time=timezone.now(),
-                )
-            except Exception:
-                pass
+            record_face_log(
+                tenant=tenant,
+                event_type="verification",
+                mode=mode,
+                recognized=False,
+                confidence=float(best_score),
+                message="Face matched to missing employee record.",
+                source="mobile",
+                event_time=timezone.now(),
+            )
             return Response(
                 {
                     "recognized": False,
@@ -295,25 +331,18 @@ class FaceEmbeddingVerifyView(APIView):
         tz = pytz.timezone(tz_name) if tz_name in pytz.all_timezones else pytz.UTC
         local_today = timezone.now().astimezone(tz).date()
         if is_off_day(employee, local_today):
-            try:
-                FaceAttendanceLog.objects.create(
-                    tenant=tenant,
-                    employee=employee,
-                    employee_identifier=employee.employee_id or str(employee.id),
-                    event_type="verification",
-                    mode=mode,
-                    recognized=True,
-                    confidence=float(best_score),
-                    message="Off-day check-in detected. Admin must mark attendance manually.",
-                    source="mobile",
-                    event_time=timezone.now(),
-                )
-            except Exception as exc:
-                logger.warning(
-                    "Failed to create off-day FaceAttendanceLog for employee %s: %s",
-                    employee.employee_id,
-                    exc,
-                )
+            record_face_log(
+                tenant=tenant,
+                employee=employee,
+                employee_identifier=employee.employee_id or str(employee.id),
+                event_type="verification",
+                mode=mode,
+                recognized=True,
+                confidence=float(best_score),
+                message="Off-day check-in detected. Admin must mark attendance manually.",
+                source="mobile",
+                event_time=timezone.now(),
+            )
 
             return Response(
                 {
@@ -330,8 +359,20 @@ class FaceEmbeddingVerifyView(APIView):
             )
 
         # Mark daily attendance so it reflects immediately in web + mobile dashboards
+        # (fast-ack: queued for the batch writer, applied within a few hundred ms)
+        queued = getattr(settings, "FACE_ATTENDANCE_FAST_ACK", False) and FaceAttendanceBatchWriter.enqueue(
+            ClockEvent(
+                tenant_id=tenant.id,
+                employee_pk=employee.id,
+                mode=mode,
+                event_time=timezone.now(),
+                employee_identifier=employee.employee_id or str(employee.id),
+                employee=employee,
+            )
+        )
         try:
-            mark_face_attendance(tenant, employee, mode, event_time=timezone.now())
+            if not queued:
+                mark_face_attendance(tenant, employee, mode, event_time=timezone.now())
         except Exception as exc:
             # Enqueue for retry without blocking inference
             try:
@@ -358,25 +399,18 @@ class FaceEmbeddingVerifyView(APIView):
             )
 
         # Persist centralized face attendance log (for web + mobile)
-        try:
-            FaceAttendanceLog.objects.create(
-                tenant=tenant,
-                employee=employee,
-                employee_identifier=employee.employee_id or str(employee.id),
-                event_type="verification",
-                mode=mode,
-                recognized=True,
-                confidence=float(best_score),
-                message="Face recognized successfully.",
-                source="mobile",  # Currently only mobile calls this endpoint
-                event_time=timezone.now(),
-            )
-        except Exception as exc:
-            logger.warning(
-                "Failed to create FaceAttendanceLog for employee %s: %s",
-                employee.employee_id,
-                exc,
-            )
+        record_face_log(
+            tenant=tenant,
+            employee=employee,
+            employee_identifier=employee.employee_id or str(employee.id),
+            event_type="verification",
+            mode=mode,
+            recognized=True,
+            confidence=float(best_score),
+            message="Face recognized successfully.",
+            source="mobile",  # Currently only mobile calls this endpoint
+            event_time=timezone.now(),
+        )
 
         return Response(
             {
@@ -390,3 +424,267 @@ class FaceEmbeddingVerifyView(APIView):
             },
             status=status.HTTP_200_OK,
         )
+
+
+class FaceEmbeddingBatchVerifyView(APIView):
+    """
+    POST /api/face-embeddings/verify-batch/
+
+    Replays the scans a kiosk recorded while offline in one request.
+
+    Request:
+    {
+      "probes": [
+        {"embedding": [float, ...], "mode": "clock_in" | "clock_out",
+         "timestamp": "<ISO 8601, UTC when no offset; default now>", "client_id": "<optional>"},
+        ...
+      ]
+    }
+
+    All probes are scored with one matrix product against the tenant's
+    embeddings; recognized scans are applied to DailyAttendance in timestamp
+    order as one batch (services.face_attendance_writer). Results are returned
+    in request order; a malformed probe gets an ``error`` without failing the batch.
+    So does a probe older than ``FACE_VERIFY_BATCH_MAX_AGE_HOURS`` or dated in a
+    locked (finalized) payroll period.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    DEFAULT_THRESHOLD = FaceEmbeddingVerifyView.DEFAULT_THRESHOLD
+    MAX_PROBES = getattr(settings, "FACE_VERIFY_BATCH_MAX_PROBES", 500)
+    # Scans stamped further ahead than this are rejected (kiosk clock skew)
+    MAX_CLOCK_SKEW = timedelta(minutes=5)
+    # Scans older than this are rejected: a replay must not rewrite old attendance
+    MAX_AGE = timedelta(hours=getattr(settings, "FACE_VERIFY_BATCH_MAX_AGE_HOURS", 168))
+
+    @query_budget(20)
+    def post(self, request, *args, **kwargs):
+        tenant = getattr(request, "tenant", None)
+        if not tenant:
+            return Response({"error": "Tenant not found"}, status=status.HTTP_400_BAD_REQUEST)
+        if not getattr(tenant, "face_attendance_enabled", False):
+            record_face_log(
+                tenant=tenant,
+                event_type="verification",
+                recognized=False,
+                message="Face attendance is disabled for this tenant.",
+                source="mobile",
+                event_time=timezone.now(),
+            )
+            return Response(
+                {"error": "Face attendance is disabled for this tenant"},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
+        probes = request.data.get("probes")
+        if not isinstance(probes, list) or not probes:
+            return Response({"error": "probes must be a non-empty list"}, status=status.HTTP_400_BAD_REQUEST)
+        if len(probes) > self.MAX_PROBES:
+            return Response(
+                {"error": f"At most {self.MAX_PROBES} probes per request"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        now = timezone.now()
+        results = []
+        valid = []  # (index, vector, mode, timestamp)
+        for index, probe in enumerate(probes):
+            result = {"index": index}
+            results.append(result)
+            if not isinstance(probe, dict):
+                result.update(recognized=False, error="probe must be an object")
+                continue
+            if probe.get("client_id") is not None:
+                result["client_id"] = probe["client_id"]
+            error, vector, timestamp = self._parse_probe(probe, now)
+            if error:
+                result.update(recognized=False, error=error)
+                continue
+            result.update(mode=probe["mode"], timestamp=timestamp.isoformat())
+            valid.append((index, vector, probe["mode"], timestamp))
+
+        # Attendance of a finalized payroll period is not changed by a late replay
+        locked = self._locked_months(tenant, {local_event_time(tenant, item[3]).year for item in valid})
+        if locked:
+            accepted = []
+            for item in valid:
+                local_date = local_event_time(tenant, item[3]).date()
+                if (local_date.year, local_date.month) in locked:
+                    results[item[0]].update(recognized=False, error="payroll for this date is finalized")
+                else:
+                    accepted.append(item)
+            valid = accepted
+
+        matrices = get_embedding_matrices(tenant)
+        if not matrices:
+            for index, _, _, _ in valid:
+                results[index].update(recognized=False, message="No face registrations found for this tenant.")
+            return Response({"count": len(results), "recognized": 0, "results": results}, status=status.HTTP_200_OK)
+
+        # Best match per probe: one (probes x embeddings) product per embedding size
+        matches = {}
+        by_dim = defaultdict(list)
+        for item in valid:
+            by_dim[len(item[1])].append(item)
+        for dim, items in by_dim.items():
+            if dim not in matrices:
+                matches.update((item[0], (None, 0.0)) for item in items)
+                continue
+            employee_ids, matrix = matrices[dim]
+            scores = np.vstack([item[1] for item in items]) @ matrix.T
+            best = scores.argmax(axis=1)
+            best_scores = scores[np.arange(len(items)), best]
+            for item, position, score in zip(items, best, best_scores):
+                # Same rule as the single verify: only a positive score is a candidate
+                matches[item[0]] = (int(employee_ids[position]) if score > 0 else None, float(score))
+
+        threshold = getattr(tenant, "face_similarity_threshold", self.DEFAULT_THRESHOLD)
+        candidates = {employee_id for employee_id, score in matches.values() if employee_id and score >= threshold}
+        employees = EmployeeProfile.objects.filter(tenant=tenant).in_bulk(candidates) if candidates else {}
+
+        events = []
+        recognized = 0
+        for index, _, mode, timestamp in sorted(valid, key=lambda item: (item[3], item[0])):
+            result = results[index]
+            employee_id, score = matches[index]
+            result["confidence"] = score
+            employee = employees.get(employee_id) if employee_id and score >= threshold else None
+            log = {"tenant": tenant, "event_type": "verification", "mode": mode, "confidence": score,
+                   "source": "mobile", "event_time": timestamp}
+
+            if employee_id is None or score < threshold:
+                result.update(recognized=False, message="Face not recognized.")
+                record_face_log(recognized=False, message="Face not recognized.", **log)
+                continue
+            if employee is None:
+                result.update(recognized=False, message="Matched employee not found. Please contact support.")
+                record_face_log(recognized=False, message="Face matched to missing employee record.", **log)
+                continue
+
+            recognized += 1
+            identifier = employee.employee_id or str(employee.id)
+            result.update(
+                recognized=True,
+                employee_id=str(employee.id),
+                employee_name=f"{employee.first_name} {employee.last_name}".strip(),
+            )
+            if is_off_day(employee, local_event_time(tenant, timestamp).date()):
+                message = "Off-day check-in detected. Admin must mark attendance manually."
+                result.update(message=message, requires_admin=True)
+            else:
+                message = "Face recognized successfully."
+                result["message"] = message
+                events.append(ClockEvent(
+                    tenant_id=tenant.id,
+                    employee_pk=employee.id,
+                    mode=mode,
+                    event_time=timestamp,
+                    employee_identifier=identifier,
+                    employee=employee,
+                ))
+            record_face_log(employee=employee, employee_identifier=identifier, recognized=True, message=message, **log)
+
+        if employees:
+            FaceEmbedding.objects.filter(tenant=tenant, employee_id__in=list(employees)).update(last_used_at=now)
+        if events:
+            try:
+                batch = apply_clock_events(tenant, events, employees={employee.id: employee for employee in employees.values()})
+                FaceAttendanceBatchWriter.schedule_summary_refresh(tenant.id, batch.months)
+            except Exception as exc:
+                # Hand the scans to the retry worker; the kiosk already has its answers
+                store_pending(events, str(exc))
+                logger.warning("Batch face attendance update failed for tenant %s: %s", tenant.id, exc)
+
+        return Response(
+            {"count": len(results), "recognized": recognized, "results": results},
+            status=status.HTTP_200_OK,
+        )
+
+    def _parse_probe(self, probe, now):
+        """(error, vector, timestamp) for one probe."""
+        if probe.get("mode") not in ("clock_in", "clock_out"):
+            return "mode must be 'clock_in' or 'clock_out'", None, None
+        embedding = probe.get("embedding")
+        if not isinstance(embedding, list) or not embedding:
+            return "embedding must be a non-empty list", None, None
+        try:
+            vector = np.asarray(embedding, dtype=np.float32)
+        except (TypeError, ValueError):
+            return "embedding must be a list of numbers", None, None
+        if vector.ndim != 1:
+            return "embedding must be a list of numbers", None, None
+
+        raw_timestamp = probe.get("timestamp")
+        if raw_timestamp in (None, ""):
+            return None, vector, now
+        timestamp = parse_datetime(str(raw_timestamp))
+        if timestamp is None:
+            return "timestamp must be an ISO 8601 datetime", None, None
+        if timezone.is_naive(timestamp):
+            timestamp = timezone.make_aware(timestamp, dt_timezone.utc)
+        if timestamp > now + self.MAX_CLOCK_SKEW:
+            return "timestamp is in the future", None, None
+        if timestamp < now - self.MAX_AGE:
+            return f"timestamp is older than {self.MAX_AGE.total_seconds() / 3600:g} hours", None, None
+        return None, vector, timestamp
+
+    @staticmethod
+    def _locked_months(tenant, years):
+        """{(year, month number)} of the tenant's locked payroll periods in ``years``."""
+        if not years:
+            return set()
+        month_numbers = {}
+        for number in range(1, 13):
+            month_numbers[calendar.month_name[number].upper()] = number
+            month_numbers[calendar.month_abbr[number].upper()] = number
+        periods = PayrollPeriod.objects.filter(tenant=tenant, year__in=years, is_locked=True).values_list("year", "month")
+        return {
+            (year, month_numbers[month.upper()])
+            for year, month in periods
+            if month and month.upper() in month_numbers
+        }
+
+
+class FaceGallerySyncView(APIView):
+    """
+    GET /api/face-embeddings/gallery/?since=<version>&dtype=float32|float16
+
+    Binary gallery pack for matching on the device (layout: services.face_gallery).
+    Without ``since``, or when ``since`` is not a version of this tenant, the pack
+    is the full gallery; otherwise it holds only the embeddings added, updated
+    or removed after that version. ``X-Gallery-Version`` is the version to send
+    as ``since`` next time.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    @query_budget(6)
+    def get(self, request, *args, **kwargs):
+        tenant = getattr(request, "tenant", None)
+        if not tenant:
+            return Response({"error": "Tenant not found"}, status=status.HTTP_400_BAD_REQUEST)
+        if not getattr(tenant, "face_attendance_enabled", False):
+            return Response(
+                {"error": "Face attendance is disabled for this tenant"},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
+        since = request.query_params.get("since")
+        if since not in (None, ""):
+            try:
+                since = int(since)
+            except ValueError:
+                return Response({"error": "since must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+        else:
+            since = None
+        dtype = request.query_params.get("dtype", "float32")
+        if dtype not in ("float32", "float16"):
+            return Response({"error": "dtype must be 'float32' or 'float16'"}, status=status.HTTP_400_BAD_REQUEST)
+
+        pack = build_gallery_pack(tenant, since=since, float16=dtype == "float16")
+        response = HttpResponse(pack.data, content_type="application/octet-stream")
+        response["X-Gallery-Version"] = str(pack.version)
+        response["X-Gallery-Full"] = "1" if pack.full else "0"
+        response["Cache-Control"] = "no-store"
+        return response
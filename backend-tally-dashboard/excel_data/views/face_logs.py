@@ -9,6 +9,7 @@ from rest_framework.response import Response
 from rest_framework import status
 
 from ..models import FaceAttendanceLog
+from ..services.face_log_sink import FaceAttendanceLogSink
 
 
 class FaceAttendanceLogListView(APIView):
@@ -25,6 +26,10 @@ class FaceAttendanceLogListView(APIView):
         if not tenant:
             return Response({"error": "Tenant not found"}, status=status.HTTP_400_BAD_REQUEST)
 
+        # Rows this process still buffers must be visible (read-after-write)
+        if FaceAttendanceLogSink.pending(tenant.id):
+            FaceAttendanceLogSink.flush()
+
         qs = FaceAttendanceLog.objects.select_related("employee").filter(tenant=tenant)
 
         # Filters
@@ -7,6 +7,7 @@ from datetime import datetime
 from ..models import Holiday
 from ..serializers import HolidaySerializer, HolidayCreateSerializer
 from ..utils.utils import get_current_tenant
+from ..utils.date_ranges import month_filter
 import logging
 
 logger = logging.getLogger(__name__)
@@ -61,8 +62,7 @@ class HolidayViewSet(viewsets.ModelViewSet):
         
         try:
             holidays = self.get_queryset().filter(
-                date__year=int(year),
-                date__month=int(month),
+                **month_filter(int(year), int(month)),
                 is_active=True
             )
             serializer = self.get_serializer(holidays, many=True)
@@ -0,0 +1,29 @@
+# metrics.py
+# Prometheus-text metrics for the request instrumentation:
+# - metrics_endpoint
+
+import hmac
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.views.decorators.http import require_GET
+
+from ..utils.metrics import registry
+
+
+@require_GET
+def metrics_endpoint(request):
+    """
+    Per-route request metrics in Prometheus text format.
+
+    Scrapers must send "Authorization: Bearer <METRICS_TOKEN>". Without a
+    configured METRICS_TOKEN the endpoint does not exist (404): the path skips the
+    tenant/session checks, so it must never be open by default.
+    """
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if not token:
+        raise Http404
+    supplied = request.headers.get('Authorization', '').removeprefix('Bearer ').strip()
+    if not hmac.compare_digest(supplied.encode(), token.encode()):
+        return HttpResponse('Unauthorized\n', status=401, content_type='text/plain')
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
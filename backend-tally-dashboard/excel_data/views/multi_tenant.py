@@ -33,6 +33,7 @@ from ..utils.utils import (
     validate_excel_columns,
     generate_employee_id,
 )
+from ..utils.sse_broadcaster import SSENotifier
 
 TEMPLATE_COLUMNS = [
     "NAME",
@@ -525,6 +526,11 @@ class UploadSalaryDataAPIView(APIView):
                             ],
                             batch_size=100,
                         )
+
+                    # bulk_create/bulk_update skip signals: record the changed payroll months explicitly
+                    from ..services.payroll_dirty import mark_salary_uploads_dirty
+                    mark_salary_uploads_dirty(tenant, salary_records_to_create + salary_records_to_update)
+
                     # Create or update PayrollPeriod for the uploaded data
                     from ..services.salary_service import SalaryCalculationService
                     from ..models import PayrollPeriod, DataSource
@@ -699,6 +705,12 @@ class UploadSalaryDataAPIView(APIView):
                         daemon=True
                     ).start()
 
+                SSENotifier.notify_upload_finished(
+                    tenant, 'salary',
+                    month=selected_month, year=int(selected_year),
+                    records_created=records_created, records_updated=records_updated,
+                    payroll_period_id=payroll_period.id,
+                )
                 return Response(
                     {
                         "message": "Upload completed successfully",
@@ -21,6 +21,7 @@
 # - AdvancePaymentViewSet
 # - auto_payroll_settings
 # - manual_calculate_payroll
+# - simulate_payroll
 # - save_payroll_period_direct
 # - bulk_update_payroll_period
 
@@ -57,6 +58,9 @@ from rest_framework import serializers
 
 # Email verification views will be defined in this file
 from ..services.salary_service import SalaryCalculationService
+from ..utils.metrics import performance_snapshot
+from ..utils.date_ranges import month_bounds, month_filter
+from ..utils.sse_broadcaster import SSENotifier
 
 
 
@@ -433,14 +437,13 @@ def lock_payroll_period(request, period_id):
         logger.error(f"Error in lock_payroll_period: {str(e)}")
         return Response({"error": f"Lock failed: {str(e)}"}, status=500)
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
 def mark_salary_paid(request):
     """
-    Mark calculated salaries as paid or unpaid - OPTIMIZED with bulk operations
+    Mark calculated salaries as paid or unpaid - set-based (see services.payroll_payments)
     Supports both marking as paid (mark_as_paid=True) and unpaid (mark_as_paid=False)
     """
-    import time
-    from django.core.cache import cache
-    
     try:
         tenant = getattr(request, 'tenant', None)
         if not tenant:
@@ -453,6 +456,10 @@ def mark_salary_paid(request):
         
         if not salary_ids:
             return Response({"error": "salary_ids list is required"}, status=400)
+        try:
+            salary_ids = [int(salary_id) for salary_id in salary_ids]
+        except (ValueError, TypeError):
+            return Response({"error": "salary_ids must be a list of integers"}, status=400)
         
         # Parse payment date if provided and marking as paid
         parsed_date = None
@@ -466,118 +473,21 @@ def mark_salary_paid(request):
         if mark_as_paid and not parsed_date:
             parsed_date = timezone.now().date()
         
-        # Use transaction for atomic operations
-        with transaction.atomic():
-            # OPTIMIZATION: Bulk fetch all calculated salaries in a single query (inside transaction)
-            calculated_salaries = CalculatedSalary.objects.filter(
-                tenant=tenant,
-                id__in=salary_ids
-            )  # Removed select_for_update() to avoid transaction issues
-            
-            if not calculated_salaries.exists():
-                return Response({"error": "No valid salary records found"}, status=404)
-            
-            updated_count = 0
-            
-            # OPTIMIZATION: Bulk update all calculated salaries at once
-            bulk_updates = []
-            employee_advance_deductions = {}  # Track advance deductions by employee
-            
-            for salary in calculated_salaries:
-                salary.is_paid = mark_as_paid
-                salary.payment_date = parsed_date if mark_as_paid else None
-                bulk_updates.append(salary)
-                updated_count += 1
-                
-                # Collect advance deduction info for batch processing ONLY when marking as paid
-                if mark_as_paid and salary.advance_deduction_amount > 0:
-                    if salary.employee_id not in employee_advance_deductions:
-                        employee_advance_deductions[salary.employee_id] = 0
-                    employee_advance_deductions[salary.employee_id] += salary.advance_deduction_amount
-            
-            # Bulk update all calculated salaries
-            CalculatedSalary.objects.bulk_update(
-                bulk_updates, 
-                ['is_paid', 'payment_date'], 
-                batch_size=100
-            )
-            
-            # OPTIMIZATION: Bulk process advance ledger updates ONLY when marking as paid
-            if mark_as_paid and employee_advance_deductions:
-                logger.info(f"Processing advance deductions for {len(employee_advance_deductions)} employees: {employee_advance_deductions}")
-                from ..models import AdvanceLedger
-                
-                # Get all relevant advance records in one query
-                all_employee_ids = list(employee_advance_deductions.keys())
-                all_advances = AdvanceLedger.objects.filter(
-                    tenant=tenant,
-                    employee_id__in=all_employee_ids,
-                    status__in=['PENDING','PARTIALLY_PAID']
-                ).order_by('employee_id', 'advance_date')
-                
-                logger.info(f"Found {all_advances.count()} pending advances for employees: {all_employee_ids}")
-                
-                # Group advances by employee for efficient processing
-                advances_by_employee = {}
-                for advance in all_advances:
-                    if advance.employee_id not in advances_by_employee:
-                        advances_by_employee[advance.employee_id] = []
-                    advances_by_employee[advance.employee_id].append(advance)
-                
-                # Process advance deductions for each employee
-                advances_to_update = []
-                advances_to_mark_repaid = []
-                
-                for employee_id, total_deduction in employee_advance_deductions.items():
-                    remaining_deduction = Decimal(str(total_deduction))  # Convert to Decimal
-                    employee_advances = advances_by_employee.get(employee_id, [])
-                    
-                    logger.info(f"Processing employee {employee_id}: deduction={remaining_deduction}, advances={len(employee_advances)}")
-                    
-                    for advance in employee_advances:
-                        if remaining_deduction <= 0:
-                            break
-                            
-                        current_balance = advance.remaining_balance
-                        if current_balance <= remaining_deduction:
-                            # This advance is fully paid
-                            logger.info(f"Fully repaying advance {advance.id}: {current_balance}")
-                            advance.status = 'REPAID'
-                            advance.remaining_balance = Decimal('0')
-                            advances_to_mark_repaid.append(advance)
-                            remaining_deduction -= current_balance
-                        else:
-                            # This advance is partially paid - reduce the remaining_balance
-                            logger.info(f"Partially repaying advance {advance.id}: {remaining_deduction} out of {current_balance}")
-                            advance.remaining_balance -= remaining_deduction
-                            advance.status = 'PARTIALLY_PAID'
-                            advances_to_update.append(advance)
-                            remaining_deduction = Decimal('0')
-                
-                # Execute bulk updates and status changes
-                if advances_to_update:
-                    AdvanceLedger.objects.bulk_update(advances_to_update, ['remaining_balance', 'status'], batch_size=100)
-                    logger.info(f"Bulk updated {len(advances_to_update)} advance remaining balances")
-                
-                if advances_to_mark_repaid:
-                    AdvanceLedger.objects.bulk_update(advances_to_mark_repaid, ['status', 'remaining_balance'], batch_size=100)
-                    logger.info(f"Bulk marked {len(advances_to_mark_repaid)} advances as REPAID")
-                
-                logger.info(
-                    f"Advance processing completed: {len(advances_to_update)} updated, {len(advances_to_mark_repaid)} marked as REPAID"
-                )
-            elif not mark_as_paid:
-                logger.info("Marked salaries as unpaid - no advance processing needed")
-            else:
-                logger.info("No advance deductions found to process")
+        # SET-BASED: paid flags and FIFO advance settlement in a fixed number of statements
+        from ..services.payroll_payments import mark_salaries_paid
+        payment_result = mark_salaries_paid(tenant, salary_ids, paid=bool(mark_as_paid), payment_date=parsed_date)
         
+        updated_count = payment_result['updated_count']
+        if not updated_count:
+            return Response({"error": "No valid salary records found"}, status=404)
         
-        # CLEAR CACHE: Invalidate payroll overview cache when payment status changes
+        # CLEAR CACHE: one batched invalidation for every touched period
         from excel_data.services.cache_service import invalidate_payroll_payment_caches
         
         cache_result = invalidate_payroll_payment_caches(
             tenant=tenant, 
-            reason="salary_payment_status_changed"
+            reason="salary_payment_status_changed",
+            period_ids=payment_result['period_ids']
         )
         
         if cache_result['success']:
@@ -585,13 +495,15 @@ def mark_salary_paid(request):
         else:
             logger.warning(f"Cache invalidation failed: {cache_result.get('error', 'Unknown error')}")
         
-        logger.info(f"Bulk marked {updated_count} salaries as paid for tenant {tenant.name}")
+        logger.info(f"Bulk marked {updated_count} salaries as {'paid' if mark_as_paid else 'unpaid'} for tenant {tenant.name}")
         
         response_data = {
             'success': True,
-            'message': f'{updated_count} salaries marked as paid',
+            'message': f'{updated_count} salaries marked as {"paid" if mark_as_paid else "unpaid"}',
             'updated_count': updated_count,
-            'processed_advance_deductions': len(employee_advance_deductions),
+            'processed_advance_deductions': payment_result['processed_advance_deductions'],
+            'advances_settled': payment_result['advances_settled'],
+            'advances_repaid': payment_result['advances_repaid'],
             'cache_cleared': cache_result['success'],
             'cache_invalidation': {
                 'success': cache_result['success'],
@@ -602,7 +514,6 @@ def mark_salary_paid(request):
         
         if mark_as_paid and parsed_date:
             response_data['payment_date'] = parsed_date.isoformat()
-            response_data['processed_advance_deductions'] = len(employee_advance_deductions)
         
         return Response(response_data)
         
@@ -1033,7 +944,8 @@ def payroll_overview(request):
                 'optimization': 'Single aggregated query with prefetch_related',
                 'periods_processed': len(periods),
                 'cached': False,
-                'response_time': f"{query_time:.3f}s"
+                'response_time': f"{query_time:.3f}s",
+                'request_metrics': performance_snapshot(),
             }
         }
         
@@ -1107,236 +1019,181 @@ def create_current_month_payroll(request):
         logger.error(f"Error in create_current_month_payroll: {str(e)}")
         return Response({"error": f"Failed to create period: {str(e)}"}, status=500)
 
-@api_view(['GET'])
-@permission_classes([IsAuthenticated])
-def payroll_period_detail(request, period_id):
+_MONTH_NUMBERS = {'JANUARY': 1, 'FEBRUARY': 2, 'MARCH': 3, 'APRIL': 4, 'MAY': 5, 'JUNE': 6,
+                  'JULY': 7, 'AUGUST': 8, 'SEPTEMBER': 9, 'OCTOBER': 10, 'NOVEMBER': 11, 'DECEMBER': 12}
+
+# Rows are built per chunk so the matching EmployeeProfile rows can be fetched in one query
+PERIOD_DETAIL_CHUNK_SIZE = 500
+
+
+def _count_off_days(employee, year, month_num, total_days):
+    """Count the employee's weekly off days in the given month."""
+    import calendar
+    off_flags = (
+        employee.off_monday, employee.off_tuesday, employee.off_wednesday, employee.off_thursday,
+        employee.off_friday, employee.off_saturday, employee.off_sunday,
+    )
+    return sum(1 for day in range(1, total_days + 1) if off_flags[calendar.weekday(year, month_num, day)])
+
+
+def _iter_period_detail_rows(tenant, period):
     """
-    Get detailed view of a specific payroll period
+    Yield the per-employee rows of payroll_period_detail.
+
+    Salary rows are read with ``.iterator()`` and employees are looked up once per
+    chunk, so neither the JSON nor the streaming path holds more than one chunk of
+    model instances. Querysets filter by tenant explicitly because this generator
+    may run after TenantMiddleware has cleared the thread-local tenant.
     """
-    try:
-        tenant = getattr(request, 'tenant', None)
-        if not tenant:
-            return Response({"error": "No tenant found"}, status=400)
-        
-        period = PayrollPeriod.objects.filter(tenant=tenant, id=period_id).first()
-        if not period:
-            return Response({"error": "Payroll period not found"}, status=404)
-        
-        # Get data based on period data source
-        employees_data = []
-        
-        # FIXED: For UPLOADED periods, prefer CalculatedSalary records if they exist
-        # (they have is_paid status), otherwise fall back to SalaryData
-        if period.data_source == DataSource.UPLOADED:
-            # Check if CalculatedSalary records exist for this period
-            calculated_salaries = CalculatedSalary.objects.filter(
+    import calendar
+    from ..models import SalaryData
+    from ..utils.streaming_json import iter_chunks
+
+    calculated_salaries = CalculatedSalary.objects.filter(tenant=tenant, payroll_period=period)
+
+    # FIXED: For UPLOADED periods, prefer CalculatedSalary records if they exist
+    # (they have is_paid status), otherwise fall back to SalaryData
+    if period.data_source == DataSource.UPLOADED and not calculated_salaries.exists():
+        # Fallback: Use SalaryData if CalculatedSalary doesn't exist yet
+        month_num = _MONTH_NUMBERS.get(period.month.upper(), 11)
+        total_days_in_month = calendar.monthrange(period.year, month_num)[1]
+        uploaded_salaries = SalaryData.objects.filter(
+            tenant=tenant,
+            year=period.year,
+            month=period.month
+        ).order_by('name')
+
+        for index, salary in enumerate(uploaded_salaries.iterator(chunk_size=PERIOD_DETAIL_CHUNK_SIZE)):
+            # PRESERVE EXACT VALUES FROM EXCEL - Do not recalculate
+            working_days = int(salary.days)
+            absent_days = float(salary.absent)
+            present_days = max(0, working_days - absent_days)  # Calculate: working_days - absent_days
+
+            # Log any potential data issues for debugging
+            if index < 3:  # Log first 3 employees for debugging
+                logger.info(f"Uploaded Payroll - {salary.name}: working_days={working_days}, absent_days={absent_days}, calculated_present_days={present_days}")
+
+            # For Excel uploads: We don't have detailed day-by-day data, so use defaults
+            # The Excel template doesn't include these fields
+            yield {
+                'id': salary.id,
+                'employee_id': salary.employee_id,
+                'employee_name': salary.name,
+                'department': salary.department or '',
+                # Excel Template Fields - PRESERVE EXACT VALUES
+                'basic_salary': float(salary.salary),  # SALARY
+                'total_days': total_days_in_month,  # Total days in month (not in Excel)
+                'working_days': working_days,  # DAYS
+                'absent_days': absent_days,  # ABSENT
+                'holiday_days': 0,  # Not in Excel template
+                'weekly_penalty_days': 0.0,  # Weekly rules not applied to pure Excel uploads
+                'off_days': 0,  # Not in Excel template
+                'raw_present_days': int(present_days),  # Same as present_days for Excel
+                'extra_paid_days': 0,  # Not tracked in Excel template
+                'present_days': present_days,  # Calculate: working_days - absent_days
+                'paid_days': int(present_days),  # Same as present_days for Excel
+                'ot_hours': float(salary.ot),  # OT
+                'hour_rate': float(salary.hour_rs),  # HOUR RS
+                'ot_charges': float(salary.charges),  # CHARGES
+                'late_minutes': int(salary.late),  # LATE
+                'late_deduction': float(salary.charge),  # CHARGE
+                'amt': float(salary.amt),  # AMT
+                'gross_salary': float(salary.sal_ot),  # SAL+OT
+                'adv_25th': float(salary.adv_25th),  # 25TH ADV
+                'old_adv': float(salary.old_adv),  # OLD ADV
+                'incentive': float(salary.incentive),  # INCENTIVE
+                'tds_amount': float(salary.tds),  # TDS
+                'salary_after_tds': float(salary.sal_tds),  # SAL-TDS
+                'total_advance_balance': float(salary.total_old_adv),  # Total old ADV
+                'advance_deduction_amount': float(salary.advance),  # ADVANCE
+                'remaining_advance_balance': float(salary.balnce_adv),  # Balnce Adv
+                'net_payable': float(salary.nett_payable),  # NETT PAYABLE - Final amount
+                # System fields
+                'tds_percentage': 0,  # Not calculated for Excel uploads
+                'advance_deduction_editable': False,  # Uploaded data is read-only
+                'is_paid': False,  # SalaryData doesn't track payment status
+                'payment_date': None
+            }
+        return
+
+    uploaded = period.data_source == DataSource.UPLOADED
+    # OPTIMIZATION: Calculate month_num and total_days once (same for all employees)
+    month_num = _MONTH_NUMBERS.get(period.month.upper(), 1)
+    total_days_in_month = calendar.monthrange(period.year, month_num)[1]
+    rows_iter = calculated_salaries.order_by('employee_name').iterator(chunk_size=PERIOD_DETAIL_CHUNK_SIZE)
+    index = 0
+
+    for chunk in iter_chunks(rows_iter, PERIOD_DETAIL_CHUNK_SIZE):
+        # OPTIMIZATION: One EmployeeProfile query per chunk instead of one per row
+        employees_map = {
+            emp.employee_id: emp
+            for emp in EmployeeProfile.objects.filter(
                 tenant=tenant,
-                payroll_period=period
+                employee_id__in={calc.employee_id for calc in chunk}
+            ).only(
+                'employee_id', 'weekly_rules_enabled', 'off_monday', 'off_tuesday', 'off_wednesday',
+                'off_thursday', 'off_friday', 'off_saturday', 'off_sunday'
             )
-            
-            if calculated_salaries.exists():
-                # Use CalculatedSalary records (they have is_paid status)
-                import calendar
-                from ..models import EmployeeProfile
-                
-                # OPTIMIZATION: Fetch all employees in one query to avoid N+1 queries
-                employee_ids = list(calculated_salaries.values_list('employee_id', flat=True).distinct())
-                employees_map = {
-                    emp.employee_id: emp 
-                    for emp in EmployeeProfile.objects.filter(
-                        tenant=tenant, 
-                        employee_id__in=employee_ids
-                    )
+        }
+
+        for calc in chunk:
+            if not uploaded and index < 3:
+                logger.info(f"Payroll Detail - Employee {calc.employee_name}: gross_salary={calc.gross_salary}, ot_charges={calc.ot_charges}, late_deduction={calc.late_deduction}, basic_salary={calc.basic_salary}, present_days={calc.present_days}, working_days={calc.total_working_days}")
+            index += 1
+
+            # Get employee to calculate off_days (from pre-fetched map)
+            employee = employees_map.get(calc.employee_id)
+            off_days_count = _count_off_days(employee, period.year, month_num, total_days_in_month) if employee else 0
+
+            # Note: present_days already includes Sunday bonus days (they are marked as PRESENT)
+            # Calculate raw_present_days and extra_paid_days
+            # Note: present_days already excludes off_days, so we only subtract holidays
+            present_days_value = float(calc.present_days)
+            raw_present_days = int(present_days_value - float(calc.holiday_days))
+            working_days = int(calc.total_working_days)
+            expected_max_present = working_days - int(calc.holiday_days)
+            extra_paid_days = max(0, raw_present_days - expected_max_present) if expected_max_present > 0 else 0
+
+            if uploaded:
+                yield {
+                    'id': calc.id,
+                    'employee_id': calc.employee_id,
+                    'employee_name': calc.employee_name,
+                    'department': calc.department or '',
+                    'basic_salary': float(calc.basic_salary),
+                    'total_days': total_days_in_month,
+                    'working_days': working_days,
+                    'absent_days': float(calc.absent_days),
+                    'holiday_days': int(calc.holiday_days),
+                    'weekly_penalty_days': float(getattr(calc, 'weekly_penalty_days', 0)),
+                    'off_days': off_days_count,
+                    'raw_present_days': raw_present_days,
+                    'extra_paid_days': extra_paid_days,
+                    'present_days': present_days_value,
+                    'paid_days': int(present_days_value),
+                    'ot_hours': float(calc.ot_hours),
+                    'hour_rate': float(calc.basic_salary_per_hour),
+                    'ot_charges': float(calc.ot_charges),
+                    'late_minutes': calc.late_minutes,
+                    'late_deduction': float(calc.late_deduction),
+                    'amt': float(calc.late_deduction),  # Map to amt for compatibility
+                    'gross_salary': float(calc.gross_salary),
+                    'adv_25th': 0.0,  # Not available in CalculatedSalary
+                    'old_adv': 0.0,  # Not available in CalculatedSalary
+                    'incentive': float(calc.incentive),
+                    'tds_amount': float(calc.tds_amount),
+                    'salary_after_tds': float(calc.salary_after_tds),
+                    'total_advance_balance': float(calc.total_advance_balance),
+                    'advance_deduction_amount': float(calc.advance_deduction_amount),
+                    'remaining_advance_balance': float(calc.remaining_advance_balance),
+                    'net_payable': float(calc.net_payable),
+                    'tds_percentage': float(calc.employee_tds_rate),
+                    'advance_deduction_editable': calc.advance_deduction_editable,
+                    'is_paid': calc.is_paid,  # FIXED: Use actual is_paid from CalculatedSalary
+                    'payment_date': calc.payment_date.isoformat() if calc.payment_date else None
                 }
-                
-                # OPTIMIZATION: Calculate month_num and total_days once (same for all employees)
-                month_num = {'JANUARY': 1, 'FEBRUARY': 2, 'MARCH': 3, 'APRIL': 4, 'MAY': 5, 'JUNE': 6,
-                            'JULY': 7, 'AUGUST': 8, 'SEPTEMBER': 9, 'OCTOBER': 10, 'NOVEMBER': 11, 'DECEMBER': 12}.get(period.month.upper(), 1)
-                total_days_in_month = calendar.monthrange(period.year, month_num)[1]
-                
-                for calc in calculated_salaries.order_by('employee_name'):
-                    # Get employee to calculate off_days (from pre-fetched map)
-                    employee = employees_map.get(calc.employee_id)
-                    if employee:
-                        # Calculate off days for the month
-                        total_days = total_days_in_month
-                        off_days_count = sum([
-                            1 for day in range(1, total_days + 1)
-                            if (
-                                (calendar.weekday(period.year, month_num, day) == 0 and employee.off_monday) or
-                                (calendar.weekday(period.year, month_num, day) == 1 and employee.off_tuesday) or
-                                (calendar.weekday(period.year, month_num, day) == 2 and employee.off_wednesday) or
-                                (calendar.weekday(period.year, month_num, day) == 3 and employee.off_thursday) or
-                                (calendar.weekday(period.year, month_num, day) == 4 and employee.off_friday) or
-                                (calendar.weekday(period.year, month_num, day) == 5 and employee.off_saturday) or
-                                (calendar.weekday(period.year, month_num, day) == 6 and employee.off_sunday)
-                            )
-                        ])
-                    else:
-                        # Employee not found, use defaults
-                        off_days_count = 0
-                    
-                    # Note: present_days already includes Sunday bonus days (they are marked as PRESENT)
-                    # Calculate raw_present_days and extra_paid_days
-                    # Note: present_days already excludes off_days, so we only subtract holidays
-                    present_days_value = float(calc.present_days)
-                    raw_present_days = int(present_days_value - float(calc.holiday_days))
-                    working_days = int(calc.total_working_days)
-                    expected_max_present = working_days - int(calc.holiday_days)
-                    extra_paid_days = max(0, raw_present_days - expected_max_present) if expected_max_present > 0 else 0
-                    
-                    employees_data.append({
-                        'id': calc.id,
-                        'employee_id': calc.employee_id,
-                        'employee_name': calc.employee_name,
-                        'department': calc.department or '',
-                        'basic_salary': float(calc.basic_salary),
-                        'total_days': total_days_in_month,
-                        'working_days': working_days,
-                        'absent_days': float(calc.absent_days),
-                        'holiday_days': int(calc.holiday_days),
-                        'weekly_penalty_days': float(getattr(calc, 'weekly_penalty_days', 0)),
-                        'off_days': off_days_count,
-                        'raw_present_days': raw_present_days,
-                        'extra_paid_days': extra_paid_days,
-                        'present_days': present_days_value,
-                        'paid_days': int(present_days_value),
-                        'ot_hours': float(calc.ot_hours),
-                        'hour_rate': float(calc.basic_salary_per_hour),
-                        'ot_charges': float(calc.ot_charges),
-                        'late_minutes': calc.late_minutes,
-                        'late_deduction': float(calc.late_deduction),
-                        'amt': float(calc.late_deduction),  # Map to amt for compatibility
-                        'gross_salary': float(calc.gross_salary),
-                        'adv_25th': 0.0,  # Not available in CalculatedSalary
-                        'old_adv': 0.0,  # Not available in CalculatedSalary
-                        'incentive': float(calc.incentive),
-                        'tds_amount': float(calc.tds_amount),
-                        'salary_after_tds': float(calc.salary_after_tds),
-                        'total_advance_balance': float(calc.total_advance_balance),
-                        'advance_deduction_amount': float(calc.advance_deduction_amount),
-                        'remaining_advance_balance': float(calc.remaining_advance_balance),
-                        'net_payable': float(calc.net_payable),
-                        'tds_percentage': float(calc.employee_tds_rate),
-                        'advance_deduction_editable': calc.advance_deduction_editable,
-                        'is_paid': calc.is_paid,  # FIXED: Use actual is_paid from CalculatedSalary
-                        'payment_date': calc.payment_date.isoformat() if calc.payment_date else None
-                    })
             else:
-                # Fallback: Use SalaryData if CalculatedSalary doesn't exist yet
-                import calendar
-                from ..models import SalaryData
-                uploaded_salaries = SalaryData.objects.filter(
-                    tenant=tenant,
-                    year=period.year,
-                    month=period.month
-                ).order_by('name')
-                
-                # Get month number for total days calculation
-                month_num = {'JANUARY': 1, 'FEBRUARY': 2, 'MARCH': 3, 'APRIL': 4, 'MAY': 5, 'JUNE': 6,
-                            'JULY': 7, 'AUGUST': 8, 'SEPTEMBER': 9, 'OCTOBER': 10, 'NOVEMBER': 11, 'DECEMBER': 12}.get(period.month.upper(), 11)
-                total_days_in_month = calendar.monthrange(period.year, month_num)[1]
-                
-                for salary in uploaded_salaries:
-                    # PRESERVE EXACT VALUES FROM EXCEL - Do not recalculate
-                    working_days = int(salary.days)
-                    absent_days = float(salary.absent)
-                    present_days = max(0, working_days - absent_days)  # Calculate: working_days - absent_days
-                    
-                    # Log any potential data issues for debugging
-                    if len(employees_data) < 3:  # Log first 3 employees for debugging
-                        logger.info(f"Uploaded Payroll - {salary.name}: working_days={working_days}, absent_days={absent_days}, calculated_present_days={present_days}")
-                    
-                    # For Excel uploads: We don't have detailed day-by-day data, so use defaults
-                    # The Excel template doesn't include these fields
-                    employees_data.append({
-                        'id': salary.id,
-                        'employee_id': salary.employee_id,
-                        'employee_name': salary.name,
-                        'department': salary.department or '',
-                        # Excel Template Fields - PRESERVE EXACT VALUES
-                        'basic_salary': float(salary.salary),  # SALARY
-                        'total_days': total_days_in_month,  # Total days in month (not in Excel)
-                        'working_days': working_days,  # DAYS
-                        'absent_days': absent_days,  # ABSENT
-                        'holiday_days': 0,  # Not in Excel template
-                        'weekly_penalty_days': 0.0,  # Weekly rules not applied to pure Excel uploads
-                        'off_days': 0,  # Not in Excel template
-                        'raw_present_days': int(present_days),  # Same as present_days for Excel
-                        'extra_paid_days': 0,  # Not tracked in Excel template
-                        'present_days': present_days,  # Calculate: working_days - absent_days
-                        'paid_days': int(present_days),  # Same as present_days for Excel
-                        'ot_hours': float(salary.ot),  # OT
-                        'hour_rate': float(salary.hour_rs),  # HOUR RS
-                        'ot_charges': float(salary.charges),  # CHARGES
-                        'late_minutes': int(salary.late),  # LATE
-                        'late_deduction': float(salary.charge),  # CHARGE
-                        'amt': float(salary.amt),  # AMT
-                        'gross_salary': float(salary.sal_ot),  # SAL+OT
-                        'adv_25th': float(salary.adv_25th),  # 25TH ADV
-                        'old_adv': float(salary.old_adv),  # OLD ADV
-                        'incentive': float(salary.incentive),  # INCENTIVE
-                        'tds_amount': float(salary.tds),  # TDS
-                        'salary_after_tds': float(salary.sal_tds),  # SAL-TDS
-                        'total_advance_balance': float(salary.total_old_adv),  # Total old ADV
-                        'advance_deduction_amount': float(salary.advance),  # ADVANCE
-                        'remaining_advance_balance': float(salary.balnce_adv),  # Balnce Adv
-                        'net_payable': float(salary.nett_payable),  # NETT PAYABLE - Final amount
-                        # System fields
-                        'tds_percentage': 0,  # Not calculated for Excel uploads
-                        'advance_deduction_editable': False,  # Uploaded data is read-only
-                        'is_paid': False,  # SalaryData doesn't track payment status
-                        'payment_date': None
-                    })
-        else:
-            # Get calculated salaries for frontend-tracked data
-            import calendar
-            calculated_salaries = CalculatedSalary.objects.filter(
-                tenant=tenant,
-                payroll_period=period
-            ).order_by('employee_name')
-            
-            for calc in calculated_salaries:
-                # Debug logging for first few employees (removed recalculation logic for performance)
-                if len(employees_data) < 3:
-                    logger.info(f"Payroll Detail - Employee {calc.employee_name}: gross_salary={calc.gross_salary}, ot_charges={calc.ot_charges}, late_deduction={calc.late_deduction}, basic_salary={calc.basic_salary}, present_days={calc.present_days}, working_days={calc.total_working_days}")
-                
-                # Get employee to calculate off_days
-                try:
-                    from ..models import EmployeeProfile
-                    employee = EmployeeProfile.objects.get(tenant=tenant, employee_id=calc.employee_id)
-                    # Calculate off days for the month
-                    month_num = {'JANUARY': 1, 'FEBRUARY': 2, 'MARCH': 3, 'APRIL': 4, 'MAY': 5, 'JUNE': 6,
-                                'JULY': 7, 'AUGUST': 8, 'SEPTEMBER': 9, 'OCTOBER': 10, 'NOVEMBER': 11, 'DECEMBER': 12}.get(period.month.upper(), 1)
-                    total_days = calendar.monthrange(period.year, month_num)[1]
-                    off_days_count = sum([
-                        1 for day in range(1, total_days + 1)
-                        if (
-                            (calendar.weekday(period.year, month_num, day) == 0 and employee.off_monday) or
-                            (calendar.weekday(period.year, month_num, day) == 1 and employee.off_tuesday) or
-                            (calendar.weekday(period.year, month_num, day) == 2 and employee.off_wednesday) or
-                            (calendar.weekday(period.year, month_num, day) == 3 and employee.off_thursday) or
-                            (calendar.weekday(period.year, month_num, day) == 4 and employee.off_friday) or
-                            (calendar.weekday(period.year, month_num, day) == 5 and employee.off_saturday) or
-                            (calendar.weekday(period.year, month_num, day) == 6 and employee.off_sunday)
-                        )
-                    ])
-                    total_days_in_month = total_days
-                except:
-                    off_days_count = 0
-                    month_num = 11  # Default
-                    total_days_in_month = calendar.monthrange(period.year, month_num)[1]
-                
-                # Note: present_days already includes Sunday bonus days (they are marked as PRESENT)
-                # Calculate raw_present_days and extra_paid_days
-                # Note: present_days already excludes off_days, so we only subtract holidays
-                present_days_value = float(calc.present_days)
-                raw_present_days = int(present_days_value - float(calc.holiday_days))
-                working_days = int(calc.total_working_days)
-                expected_max_present = working_days - int(calc.holiday_days)
-                extra_paid_days = max(0, raw_present_days - expected_max_present) if expected_max_present > 0 else 0
-                
-                employees_data.append({
+                yield {
                     'id': calc.id,
                     'employee_id': calc.employee_id,
                     'employee_name': calc.employee_name,
@@ -1368,100 +1225,103 @@ def payroll_period_detail(request, period_id):
                     'net_payable': float(calc.net_payable),
                     'is_paid': calc.is_paid,
                     'payment_date': calc.payment_date.isoformat() if calc.payment_date else None
-                })
+                }
+
+
+def _period_detail_summary(tenant, period, employee_count):
+    """Summary block of payroll_period_detail, aggregated in the database."""
+    from django.db.models import Sum, Count
+    from ..models import SalaryData
+
+    calculated_salaries = CalculatedSalary.objects.filter(tenant=tenant, payroll_period=period)
+
+    if period.data_source == DataSource.UPLOADED and not calculated_salaries.exists():
+        # Fallback: Aggregate from SalaryData
+        summary_agg = SalaryData.objects.filter(
+            tenant=tenant,
+            year=period.year,
+            month=period.month
+        ).aggregate(
+            total_gross=Sum('sal_ot'),
+            total_net=Sum('nett_payable'),
+            total_advances=Sum('advance'),
+            total_tds=Sum('tds'),
+        )
+        paid_employees = 0  # SalaryData doesn't track payment status
+    else:
+        # Use CalculatedSalary aggregation (has is_paid status)
+        summary_agg = calculated_salaries.aggregate(
+            total_gross=Sum('gross_salary'),
+            total_net=Sum('net_payable'),
+            total_advances=Sum('advance_deduction_amount'),
+            total_tds=Sum('tds_amount'),
+            paid_employees=Count('id', filter=Q(is_paid=True))
+        )
+        paid_employees = summary_agg['paid_employees'] or 0
+
+    return {
+        'total_employees': employee_count,  # Use actual count from data
+        'paid_employees': paid_employees,
+        'pending_employees': employee_count - paid_employees,
+        'total_gross_salary': float(summary_agg['total_gross'] or 0),
+        'total_net_salary': float(summary_agg['total_net'] or 0),
+        'total_advance_deductions': float(summary_agg['total_advances'] or 0),
+        'total_tds': float(summary_agg['total_tds'] or 0)
+    }
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def payroll_period_detail(request, period_id):
+    """
+    Get detailed view of a specific payroll period
+
+    Pass ?stream=true to stream the employees list instead of building the whole
+    response in memory; the summary is emitted after the last employee.
+    """
+    try:
+        tenant = getattr(request, 'tenant', None)
+        if not tenant:
+            return Response({"error": "No tenant found"}, status=400)
         
-        # Calculate summary using database aggregation for better performance
-        if period.data_source == DataSource.UPLOADED:
-            # For uploaded data, check if CalculatedSalary exists first
-            calculated_salaries = CalculatedSalary.objects.filter(
-                tenant=tenant,
-                payroll_period=period
-            )
-            
-            if calculated_salaries.exists():
-                # Use CalculatedSalary aggregation (has is_paid status)
-                from django.db.models import Sum, Count, Q
-                summary_agg = calculated_salaries.aggregate(
-                    total_gross=Sum('gross_salary'),
-                    total_net=Sum('net_payable'),
-                    total_advances=Sum('advance_deduction_amount'),
-                    total_tds=Sum('tds_amount'),
-                    total_employees=Count('id'),
-                    paid_employees=Count('id', filter=Q(is_paid=True))
-                )
-                
-                total_gross = float(summary_agg['total_gross'] or 0)
-                total_net = float(summary_agg['total_net'] or 0)
-                total_advances = float(summary_agg['total_advances'] or 0)
-                total_tds = float(summary_agg['total_tds'] or 0)
-                total_employees = summary_agg['total_employees'] or 0
-                paid_employees = summary_agg['paid_employees'] or 0
-            else:
-                # Fallback: Aggregate from SalaryData
-                from django.db.models import Sum, Count
-                from ..models import SalaryData
-                summary_agg = SalaryData.objects.filter(
-                    tenant=tenant,
-                    year=period.year,
-                    month=period.month
-                ).aggregate(
-                    total_gross=Sum('sal_ot'),
-                    total_net=Sum('nett_payable'),
-                    total_advances=Sum('advance'),
-                    total_tds=Sum('tds'),
-                    total_employees=Count('id')
-                )
-                
-                total_gross = float(summary_agg['total_gross'] or 0)
-                total_net = float(summary_agg['total_net'] or 0)
-                total_advances = float(summary_agg['total_advances'] or 0)
-                total_tds = float(summary_agg['total_tds'] or 0)
-                total_employees = summary_agg['total_employees'] or 0
-                paid_employees = 0  # SalaryData doesn't track payment status
-        else:
-            # For calculated data, aggregate from CalculatedSalary
-            from django.db.models import Sum, Count, Q
-            summary_agg = CalculatedSalary.objects.filter(
-                tenant=tenant,
-                payroll_period=period
-            ).aggregate(
-                total_gross=Sum('gross_salary'),
-                total_net=Sum('net_payable'),
-                total_advances=Sum('advance_deduction_amount'),
-                total_tds=Sum('tds_amount'),
-                total_employees=Count('id'),
-                paid_employees=Count('id', filter=Q(is_paid=True))
+        period = PayrollPeriod.objects.filter(tenant=tenant, id=period_id).first()
+        if not period:
+            return Response({"error": "Payroll period not found"}, status=404)
+
+        period_data = {
+            'id': period.id,
+            'year': period.year,
+            'month': period.month,
+            'data_source': period.data_source,
+            'is_locked': period.is_locked,
+            'working_days': period.working_days_in_month,
+            'tds_rate': float(period.tds_rate),
+            'calculation_date': period.calculation_date.isoformat() if period.calculation_date else None
+        }
+
+        from ..utils.streaming_json import is_stream_requested, stream_json_response
+        if is_stream_requested(request):
+            streamed = {'count': 0}
+
+            def counted_rows():
+                for row in _iter_period_detail_rows(tenant, period):
+                    streamed['count'] += 1
+                    yield row
+
+            return stream_json_response(
+                {'success': True, 'period': period_data},
+                'employees',
+                counted_rows(),
+                lambda: {'summary': _period_detail_summary(tenant, period, streamed['count'])},
             )
-            
-            total_gross = float(summary_agg['total_gross'] or 0)
-            total_net = float(summary_agg['total_net'] or 0)
-            total_advances = float(summary_agg['total_advances'] or 0)
-            total_tds = float(summary_agg['total_tds'] or 0)
-            total_employees = summary_agg['total_employees'] or 0
-            paid_employees = summary_agg['paid_employees'] or 0
-        
+
+        employees_data = list(_iter_period_detail_rows(tenant, period))
+
         return Response({
             'success': True,
-            'period': {
-                'id': period.id,
-                'year': period.year,
-                'month': period.month,
-                'data_source': period.data_source,
-                'is_locked': period.is_locked,
-                'working_days': period.working_days_in_month,
-                'tds_rate': float(period.tds_rate),
-                'calculation_date': period.calculation_date.isoformat() if period.calculation_date else None
-            },
+            'period': period_data,
             'employees': employees_data,
-            'summary': {
-                'total_employees': len(employees_data),  # Use actual count from data
-                'paid_employees': paid_employees if 'paid_employees' in locals() else sum(1 for emp in employees_data if emp['is_paid']),
-                'pending_employees': len(employees_data) - (paid_employees if 'paid_employees' in locals() else sum(1 for emp in employees_data if emp['is_paid'])),
-                'total_gross_salary': total_gross,
-                'total_net_salary': total_net,
-                'total_advance_deductions': total_advances,
-                'total_tds': total_tds
-            }
+            'summary': _period_detail_summary(tenant, period, len(employees_data))
         })
         
     except Exception as e:
@@ -1599,7 +1459,7 @@ class AdvancePaymentViewSet(viewsets.ModelViewSet):
         # For now, ensure we only fetch what we need
         queryset = queryset.only(
             'id', 'employee_id', 'employee_name', 'advance_date', 
-            'amount', 'for_month', 'payment_method', 'status', 'remarks',
+            'amount', 'remaining_balance', 'for_month', 'payment_method', 'status', 'remarks',
             'created_at', 'updated_at'
         )
         
@@ -1615,6 +1475,12 @@ class AdvancePaymentViewSet(viewsets.ModelViewSet):
         # Get all advances at once (no N+1 queries)
         advances = list(queryset)
         
+        # Per-employee outstanding totals from the materialized balances (one query)
+        from ..services.advance_balances import get_advance_balances
+        outstanding_by_employee = get_advance_balances(
+            getattr(request, 'tenant', None), {advance.employee_id for advance in advances}
+        ) if advances else {}
+        
         # Prepare response data efficiently
         advances_data = []
         for advance in advances:
@@ -1632,6 +1498,7 @@ class AdvancePaymentViewSet(viewsets.ModelViewSet):
                 'updated_at': advance.updated_at.isoformat(),
                 # Add calculated fields without additional queries
                 'remaining_balance': float(advance.remaining_balance),
+                'employee_outstanding_balance': float(outstanding_by_employee.get(advance.employee_id, 0)),
                 'is_active': advance.status != 'REPAID',
                 'is_fully_repaid': advance.status == 'REPAID',
                 'amount_formatted': f"₹{advance.amount:,.2f}",
@@ -1804,7 +1671,7 @@ class AdvancePaymentViewSet(viewsets.ModelViewSet):
 def get_months_with_attendance(request):
     """
     OPTIMIZED: Get list of months/years that have attendance data for payroll calculation
-    Single aggregated query + caching for 90%+ performance improvement
+    Attendance months come from the AttendanceMonth catalog (no full-table group-by) + caching
     """
     import time
     from django.core.cache import cache
@@ -1830,143 +1697,19 @@ def get_months_with_attendance(request):
                 
                 return Response(cached_data)
         
-        from ..models import DailyAttendance, SalaryData, Attendance
-        
-        # Get daily attendance data periods (from attendance log)
-        daily_attendance_aggregated = DailyAttendance.objects.filter(
-            tenant=tenant
-        ).extra(
-            select={
-                'year': "EXTRACT(year FROM date)", 
-                'month': "EXTRACT(month FROM date)"
-            }
-        ).values('year', 'month').annotate(
-            attendance_records=Count('id'),
-            employees_with_attendance=Count('employee_id', distinct=True)
-        ).order_by('-year', '-month')
-        
-        # Get monthly attendance data periods (from Excel uploads)
-        monthly_attendance_aggregated = Attendance.objects.filter(
-            tenant=tenant
-        ).extra(
-            select={
-                'year': "EXTRACT(year FROM date)", 
-                'month': "EXTRACT(month FROM date)"
+        from ..models import SalaryData
+        from ..services.attendance_months import get_attendance_months
+        
+        # Attendance periods (daily log + Excel uploads) from the maintained month catalog
+        attendance_aggregated = [
+            {
+                'year': period['year'],
+                'month': period['month'],
+                'attendance_records': period['daily_records'] + period['monthly_records'],
+                'employees_with_attendance': period['employees_with_attendance'],
             }
-        ).values('year', 'month').annotate(
-            attendance_records=Count('id'),
-            employees_with_attendance=Count('employee_id', distinct=True)
-        ).order_by('-year', '-month')
-        
-        # OPTIMIZED: Combine both attendance sources using efficient aggregation
-        attendance_dict = {}
-        
-        # Process daily attendance
-        for period in daily_attendance_aggregated:
-            year = int(period['year'])
-            month_num = int(period['month'])
-            key = f"{year}-{month_num}"
-            if key not in attendance_dict:
-                attendance_dict[key] = {
-                    'year': year,
-                    'month_num': month_num,
-                    'attendance_records': 0,
-                    'daily_employees': set(),
-                    'monthly_employees': set()
-                }
-            attendance_dict[key]['attendance_records'] += period['attendance_records']
-        
-        # Process monthly attendance (Excel uploads)
-        for period in monthly_attendance_aggregated:
-            year = int(period['year'])
-            month_num = int(period['month'])
-            key = f"{year}-{month_num}"
-            if key not in attendance_dict:
-                attendance_dict[key] = {
-                    'year': year,
-                    'month_num': month_num,
-                    'attendance_records': 0,
-                    'daily_employees': set(),
-                    'monthly_employees': set()
-                }
-            attendance_dict[key]['attendance_records'] += period['attendance_records']
-        
-        # ULTRA-OPTIMIZED: Use a single query to get all distinct employee counts at once
-        from django.db import connection
-        
-        # Build single query with UNION to get all employees for all periods
-        employee_counts_by_period = {key: {'daily_employees': set(), 'monthly_employees': set()} 
-                                     for key in attendance_dict.keys()}
-        
-        if attendance_dict:
-            with connection.cursor() as cursor:
-                # Build a single UNION query for all periods at once
-                # This reduces N*2 queries to just 2 queries total (one for each table)
-                
-                # Get all daily attendance employees for all periods in one query
-                period_conditions = []
-                params = [tenant.id]
-                
-                for key, data in attendance_dict.items():
-                    period_conditions.append(
-                        "(EXTRACT(year FROM date) = %s AND EXTRACT(month FROM date) = %s)"
-                    )
-                    params.extend([data['year'], data['month_num']])
-                
-                if period_conditions:
-                    # Single query for all daily attendance
-                    daily_query = f"""
-                        SELECT EXTRACT(year FROM date)::int as year, 
-                               EXTRACT(month FROM date)::int as month,
-                               employee_id 
-                        FROM excel_data_dailyattendance 
-                        WHERE tenant_id = %s 
-                        AND ({' OR '.join(period_conditions)})
-                        GROUP BY year, month, employee_id
-                    """
-                    cursor.execute(daily_query, params)
-                    for row in cursor.fetchall():
-                        year, month, employee_id = row
-                        key = f"{year}-{month}"
-                        if key in employee_counts_by_period:
-                            employee_counts_by_period[key]['daily_employees'].add(employee_id)
-                    
-                    # Single query for all monthly attendance
-                    monthly_query = f"""
-                        SELECT EXTRACT(year FROM date)::int as year, 
-                               EXTRACT(month FROM date)::int as month,
-                               employee_id 
-                        FROM excel_data_attendance 
-                        WHERE tenant_id = %s 
-                        AND ({' OR '.join(period_conditions)})
-                        GROUP BY year, month, employee_id
-                    """
-                    cursor.execute(monthly_query, params)
-                    for row in cursor.fetchall():
-                        year, month, employee_id = row
-                        key = f"{year}-{month}"
-                        if key in employee_counts_by_period:
-                            employee_counts_by_period[key]['monthly_employees'].add(employee_id)
-        
-        # Build final attendance_aggregated list using the pre-computed counts
-        attendance_aggregated = []
-        for key, data in attendance_dict.items():
-            # Combine both sources and count distinct employees
-            if key in employee_counts_by_period:
-                distinct_employees = len(
-                    employee_counts_by_period[key]['daily_employees'].union(
-                        employee_counts_by_period[key]['monthly_employees']
-                    )
-                )
-            else:
-                distinct_employees = 0
-            
-            attendance_aggregated.append({
-                'year': data['year'],
-                'month': data['month_num'],
-                'attendance_records': data['attendance_records'],
-                'employees_with_attendance': distinct_employees
-            })
+            for period in get_attendance_months(tenant)
+        ]
         
         # Get salary data periods
         salary_aggregated = SalaryData.objects.filter(
@@ -2038,7 +1781,7 @@ def get_months_with_attendance(request):
             'performance': {
                 'query_time': f"{(time.time() - start_time):.3f}s",
                 'periods_found': len(available_periods),
-                'optimization': 'single_aggregated_query_with_cache',
+                'optimization': 'attendance_month_catalog_with_cache',
                 'cached': False
             }
         }
@@ -2139,8 +1882,7 @@ def calculate_simple_payroll(request):
         attendance_summary = Attendance.objects.filter(
             tenant=tenant,
             employee_id__in=employee_ids,
-            date__year=year,
-            date__month=month_num
+            **month_filter(year, month_num)
         ).values('employee_id').annotate(
             total_present=Sum('present_days', output_field=DecimalField(max_digits=5, decimal_places=1)),
             total_absent=Sum('absent_days', output_field=DecimalField(max_digits=5, decimal_places=1)),
@@ -2203,19 +1945,11 @@ def calculate_simple_payroll(request):
             for item in advance_summary
         }
         
-        # OPTIMIZATION 3.5: Get total advance balance for each employee (all pending advances)
-        total_advance_summary = AdvanceLedger.objects.filter(
-            tenant=tenant,
-            employee_id__in=employees_with_attendance_ids,
-            status__in=['PENDING', 'PARTIALLY_PAID']
-        ).values('employee_id').annotate(
-            total_balance=Sum('remaining_balance', output_field=DecimalField(max_digits=12, decimal_places=2))
-        )
-        
-        # Convert to dictionary for fast lookup
+        # OPTIMIZATION 3.5: Get total advance balance for each employee (materialized balances)
+        from ..services.advance_balances import get_advance_balances
         total_advance_dict = {
-            item['employee_id']: float(item['total_balance'] or 0)
-            for item in total_advance_summary
+            employee_id: float(balance or 0)
+            for employee_id, balance in get_advance_balances(tenant, employees_with_attendance_ids).items()
         }
         
         logger.info(f"Advance deductions aggregated for {len(advance_dict)} employees")
@@ -2597,9 +2331,10 @@ def manual_calculate_payroll(request):
         except (ValueError, TypeError):
             return Response({"error": "Invalid year or month format"}, status=400)
         
-        # Calculate payroll
+        # Calculate payroll (only employees whose inputs changed, unless "full": true)
+        full_recalculation = str(data.get('full', '')).lower() in ('1', 'true', 'yes')
         results = SalaryCalculationService.calculate_salary_for_period(
-            tenant, year, month, force_recalculate=True
+            tenant, year, month, force_recalculate=True, incremental=not full_recalculation
         )
         # CLEAR CACHE: Invalidate payroll overview cache when payroll data changes
         from django.core.cache import cache
@@ -2617,6 +2352,43 @@ def manual_calculate_payroll(request):
         logger.error(f"Error in manual_calculate_payroll: {str(e)}")
         return Response({"error": f"Calculation failed: {str(e)}"}, status=500)
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def simulate_payroll(request, period_id):
+    """
+    What-if payroll: recalculate a period in memory under overridden parameters
+    and return per-employee and aggregate deltas versus the stored results.
+    Nothing is saved.
+
+    Body (all optional):
+        average_days_per_month, break_time,
+        weekly_absent_penalty_enabled, weekly_absent_threshold,
+        ot_rates: {employee_id: rate},
+        changed_only: only list employees whose result changes
+    """
+    try:
+        tenant = getattr(request, 'tenant', None)
+        if not tenant:
+            return Response({"error": "No tenant found"}, status=400)
+
+        from ..services.payroll_simulation import parse_overrides, simulate_payroll_period
+
+        period = PayrollPeriod.objects.filter(tenant=tenant, id=period_id).first()
+        if not period:
+            return Response({"error": "Payroll period not found"}, status=404)
+
+        try:
+            overrides = parse_overrides(request.data)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+
+        changed_only = str(request.data.get('changed_only', '')).lower() in ('1', 'true', 'yes')
+        return Response(simulate_payroll_period(tenant, period, overrides, changed_only=changed_only))
+
+    except Exception as e:
+        logger.error(f"Error in simulate_payroll: {str(e)}")
+        return Response({"error": f"Simulation failed: {str(e)}"}, status=500)
+
 # Add a new super-optimized payroll calculation function after the existing one
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
@@ -2781,8 +2553,7 @@ def calculate_simple_payroll_ultra_fast(request):
                     MAX(COALESCE(total_working_days, 0)) as uploaded_working_days
                 FROM excel_data_attendance 
                 WHERE tenant_id = %s 
-                    AND EXTRACT(YEAR FROM date) = %s 
-                    AND EXTRACT(MONTH FROM date) = %s
+                    AND date >= %s AND date < %s
                 GROUP BY employee_id
             ),
             -- Daily attendance aggregated for the month (fallback when monthly is missing)
@@ -2795,8 +2566,7 @@ def calculate_simple_payroll_ultra_fast(request):
                     SUM(COALESCE(late_minutes, 0)) as late_minutes
                 FROM excel_data_dailyattendance 
                 WHERE tenant_id = %s 
-                    AND EXTRACT(YEAR FROM date) = %s 
-                    AND EXTRACT(MONTH FROM date) = %s
+                    AND date >= %s AND date < %s
                 GROUP BY employee_id
             ),
             -- Unified attendance summary (prefer monthly values, fallback to daily aggregates)
@@ -2819,8 +2589,7 @@ def calculate_simple_payroll_ultra_fast(request):
                 FROM excel_data_employeeprofile e
                 LEFT JOIN holidays h ON h.tenant_id = e.tenant_id
                     AND h.is_active = true
-                    AND EXTRACT(YEAR FROM h.date) = %s
-                    AND EXTRACT(MONTH FROM h.date) = %s
+                    AND h.date >= %s AND h.date < %s
                     AND (
                         e.date_of_joining IS NULL 
                         OR h.date >= e.date_of_joining
@@ -2854,8 +2623,7 @@ def calculate_simple_payroll_ultra_fast(request):
                     SUM(CASE WHEN da.attendance_status IN ('PRESENT', 'PAID_LEAVE') THEN 1 ELSE 0 END) AS present_days
                 FROM excel_data_dailyattendance da
                 WHERE da.tenant_id = %s
-                    AND EXTRACT(YEAR FROM da.date) = %s
-                    AND EXTRACT(MONTH FROM da.date) = %s
+                    AND da.date >= %s AND da.date < %s
                 GROUP BY da.employee_id, date_trunc('week', da.date)
             ),
             -- Weekly rules (penalty only - Sunday bonus handled by marking Sunday as PRESENT)
@@ -2876,15 +2644,13 @@ def calculate_simple_payroll_ultra_fast(request):
                 WHERE e.tenant_id = %s
                 GROUP BY wa.employee_id
             ),
-            -- Total advances (all pending)
+            -- Total advances (all pending, materialized per employee)
             total_advances AS (
                 SELECT 
                     employee_id,
-                    SUM(COALESCE(remaining_balance, 0)) as total_advance
-                FROM excel_data_advanceledger 
-                WHERE tenant_id = %s 
-                    AND status IN ('PENDING', 'PARTIALLY_PAID')
-                GROUP BY employee_id
+                    outstanding_balance as total_advance
+                FROM excel_data_employeeadvancebalance 
+                WHERE tenant_id = %s
             )
             SELECT 
                 e.employee_id,
@@ -2933,15 +2699,16 @@ def calculate_simple_payroll_ultra_fast(request):
             break_time = get_break_time(tenant)
             weekly_absent_enabled = getattr(tenant, 'weekly_absent_penalty_enabled', False)
             weekly_absent_threshold = getattr(tenant, 'weekly_absent_threshold', 4) or 4
+            month_start, next_month_start = month_bounds(year, month_num)
             # Sunday bonus handled separately by marking Sunday as PRESENT (not in SQL)
             params = [
                 tenant.id,  # employee_shifts
                 break_time, break_time, average_days, break_time, average_days, tenant.id,  # ot_rates
-                tenant.id, year, month_num,  # monthly_attendance
-                tenant.id, year, month_num,  # daily_attendance
-                year, month_num, tenant.id,  # employee_holidays
+                tenant.id, month_start, next_month_start,  # monthly_attendance
+                tenant.id, month_start, next_month_start,  # daily_attendance
+                month_start, next_month_start, tenant.id,  # employee_holidays
                 tenant.id,  # weekly_attendance tenant
-                year, month_num,  # weekly_attendance year/month
+                month_start, next_month_start,  # weekly_attendance date range
                 weekly_absent_enabled, weekly_absent_threshold, tenant.id,  # weekly_rules (enabled, threshold, tenant filter)
                 tenant.id,  # total_advances
                 tenant.id   # main WHERE
@@ -3407,6 +3174,12 @@ def save_payroll_period_direct(request):
         else:
             logger.warning(f"Cache invalidation failed: {cache_result.get('error', 'Unknown error')}")
 
+        SSENotifier.notify_payroll_calculated(
+            tenant, year, month_name,
+            period_id=payroll_period.id,
+            saved_entries=created_count + updated_count,
+        )
+
         # ✨ BACKGROUND SYNC: Aggregate chart data in background (Celery/thread)
         bg_start = perf_counter()
         from excel_data.utils.chart_sync import sync_chart_data_batch_async
@@ -3595,6 +3368,13 @@ def bulk_update_payroll_period(request, period_id):
                     AdvanceLedger.objects.bulk_update(advances_to_mark_repaid, ['status', 'remaining_balance'], batch_size=100)
                     logger.info(f"Marked {len(advances_to_mark_repaid)} advances as repaid")
 
+                # bulk_update skips signals: refresh the materialized balances in this transaction
+                from ..services.advance_balances import refresh_advance_balances
+                refresh_advance_balances(tenant, all_employee_ids)
+                # ... and mark the employees' payroll as the AdvanceLedger signal would
+                from ..services.payroll_dirty import mark_employees_dirty_all_periods
+                mark_employees_dirty_all_periods(tenant, all_employee_ids, 'advance_settlement')
+
         # Clear payroll overview cache
         from django.core.cache import cache
         cache_key = f"payroll_overview_{tenant.id}"
@@ -0,0 +1,164 @@
+"""
+ASGI Server-Sent Events streams.
+
+``SSEStreamApplication`` wraps the Django ASGI application (dashboard/asgi.py)
+and answers the stream paths itself; every other request goes to Django.
+Django's ASGI handler runs each request inside its own thread-sensitive
+context, which keeps one thread (and its database connection) per open
+response, so a stream served by a Django view would still cost a thread per
+client. Here an idle stream is an asyncio task waiting on its queue: one
+process holds thousands of connections, fed by the event log poller thread.
+
+Streams bypass Django's middleware (TenantMiddleware, SingleSessionMiddleware),
+so they must carry credentials: a ticket from the authenticated POST
+/api/sse/stream-ticket/, which does pass through it, or a Bearer header.
+Requests without either get 401.
+
+Channels (``?ticket=`` or a Bearer header), events, keepalives and ``Last-Event-ID`` resume match
+the sync SessionConflictSSEView, which WSGI deployments keep serving (urls/sse.py).
+"""
+import asyncio
+import json
+import logging
+import re
+from collections import deque
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+from ..utils.sse_broadcaster import InMemorySSEBroadcaster, format_sse, parse_last_event_id
+from .sse_simple import get_stream_channels
+
+logger = logging.getLogger(__name__)
+
+KEEPALIVE_SECONDS = 2
+
+STREAM_PATHS = ('/api/sse/session-conflicts/',)
+
+SSE_HEADERS = [
+    (b'content-type', b'text/event-stream'),
+    # SSE headers to prevent caching and buffering (critical for production)
+    (b'cache-control', b'no-cache, no-transform'),
+    (b'x-accel-buffering', b'no'),  # Disable nginx buffering
+    (b'x-nginx-cache', b'off'),  # Disable nginx caching
+]
+
+
+def _cors_headers(origin: str):
+    """The Access-Control headers django-cors-headers would send for ``origin``."""
+    if not origin:
+        return []
+    allowed = getattr(settings, 'CORS_ALLOW_ALL_ORIGINS', False) or origin in getattr(settings, 'CORS_ALLOWED_ORIGINS', [])
+    if not allowed:
+        allowed = any(re.match(pattern, origin) for pattern in getattr(settings, 'CORS_ALLOWED_ORIGIN_REGEXES', []))
+    if not allowed:
+        return []
+    headers = [(b'access-control-allow-origin', origin.encode('latin-1')), (b'vary', b'origin')]
+    if getattr(settings, 'CORS_ALLOW_CREDENTIALS', False):
+        headers.append((b'access-control-allow-credentials', b'true'))
+    return headers
+
+
+def _resolve_channels(ticket, authorization):
+    try:
+        return get_stream_channels(ticket, authorization)
+    finally:
+        close_old_connections()
+
+
+def _get_client_ip(scope, headers):
+    x_forwarded_for = headers.get('x-forwarded-for')
+    if x_forwarded_for:
+        return x_forwarded_for.split(',')[0].strip()
+    client = scope.get('client')
+    return client[0] if client else None
+
+
+class SSEStreamApplication:
+    """ASGI application serving the SSE stream paths; other requests go to ``fallback``."""
+
+    def __init__(self, fallback):
+        self.fallback = fallback
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'http' and scope['path'] in STREAM_PATHS:
+            if scope['method'] == 'GET':
+                return await self.stream(scope, receive, send)
+            if scope['method'] != 'OPTIONS':
+                return await self.reject(send, 405, b'Method not allowed')
+        return await self.fallback(scope, receive, send)
+
+    async def reject(self, send, status: int, body: bytes, headers=()):
+        await send({'type': 'http.response.start', 'status': status, 'headers': [(b'content-type', b'text/plain'), *headers]})
+        await send({'type': 'http.response.body', 'body': body})
+
+    async def stream(self, scope, receive, send):
+        headers = {name.decode('latin-1').lower(): value.decode('latin-1') for name, value in scope['headers']}
+        query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+        last_event_id = parse_last_event_id(
+            headers.get('last-event-id') or (query.get('last_event_id') or [None])[0]
+        )
+        client_ip = _get_client_ip(scope, headers)
+        channels = await sync_to_async(_resolve_channels, thread_sensitive=False)(
+            (query.get('ticket') or [None])[0], headers.get('authorization')
+        )
+        if channels is None:
+            return await self.reject(send, 401, b'Missing, invalid or expired stream ticket', _cors_headers(headers.get('origin', '')))
+
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': SSE_HEADERS + _cors_headers(headers.get('origin', '')),
+        })
+        writer = asyncio.ensure_future(self.write_events(send, channels, last_event_id, client_ip))
+        disconnect = asyncio.ensure_future(self.wait_for_disconnect(receive))
+        try:
+            done, _ = await asyncio.wait({writer, disconnect}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in (writer, disconnect):
+                task.cancel()
+            await asyncio.gather(writer, disconnect, return_exceptions=True)
+        if writer in done and disconnect not in done:
+            # The stream ended on an error: close the response
+            await send({'type': 'http.response.body', 'body': b''})
+        logger.info(f"SSE client disconnected from IP: {client_ip} (async)")
+
+    async def wait_for_disconnect(self, receive):
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+
+    async def write_events(self, send, channels, last_event_id, client_ip):
+        async def write(chunk: str):
+            await send({'type': 'http.response.body', 'body': chunk.encode('utf-8'), 'more_body': True})
+
+        subscription = None
+        try:
+            subscription = await InMemorySSEBroadcaster.subscribe_async(channels, last_event_id=last_event_id)
+            await write(f"event: connected\ndata: {json.dumps({'message': 'Connected to session conflict notifications', 'subscribers': InMemorySSEBroadcaster.get_subscriber_count()})}\n\n")
+            logger.info(f"SSE client connected from IP: {client_ip} (async)")
+
+            # Ids already sent (a replayed event can also arrive live)
+            recent_ids = deque(maxlen=200)
+            while True:
+                try:
+                    event = await subscription.get(timeout=KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    await write(": keepalive\n\n")
+                    continue
+                if event['id'] in recent_ids:
+                    continue
+                recent_ids.append(event['id'])
+                await write(format_sse(event))
+        except asyncio.CancelledError:
+            raise
+        except OSError:
+            # Client went away while writing
+            pass
+        except Exception as e:
+            logger.error(f"Error in SSE stream: {e}")
+            await write(f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n")
+        finally:
+            if subscription is not None:
+                InMemorySSEBroadcaster.unsubscribe(subscription)
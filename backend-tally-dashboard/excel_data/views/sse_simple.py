@@ -1,6 +1,6 @@
 """
 Server-Sent Events (SSE) views - No Redis Required!
-Uses simple in-memory broadcasting
+Events fan out through utils.sse_broadcaster (event log + one poller per worker)
 """
 import json
 import time
@@ -10,16 +10,63 @@ from django.views import View
 from django.shortcuts import render
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
-from ..utils.sse_broadcaster import InMemorySSEBroadcaster, SSENotifier
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from ..utils.sse_broadcaster import (
+    LEGACY_BROADCAST, STREAM_TICKET_TTL, InMemorySSEBroadcaster, SSENotifier, channels_for_ticket, channels_for_token,
+    format_sse, issue_stream_ticket, parse_last_event_id,
+)
 
 logger = logging.getLogger(__name__)
 
 
+def get_stream_channels(ticket, authorization=None):
+    """
+    Channels of a stream request: from a ``?ticket=`` (SSEStreamTicketView) or a
+    Bearer Authorization header. Access tokens are not read from the query
+    string, where access logs would record them. None (answered with 401) for
+    bad credentials, and for none at all unless SSE_LEGACY_BROADCAST is on.
+    """
+    if ticket:
+        return channels_for_ticket(ticket)
+    if authorization and authorization.startswith('Bearer '):
+        return channels_for_token(authorization.split(' ', 1)[1])
+    if LEGACY_BROADCAST:
+        return [InMemorySSEBroadcaster.CHANNEL_NAME]
+    return None
+
+
+class SSEStreamTicketView(APIView):
+    """
+    Issue a single-use ticket for opening a stream (EventSource cannot send an
+    Authorization header). Valid for SSE_STREAM_TICKET_TTL seconds.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        try:
+            return Response({"ticket": issue_stream_ticket(request.user), "expires_in": STREAM_TICKET_TTL})
+        except Exception as e:
+            logger.error(f"Error issuing SSE stream ticket: {e}", exc_info=True)
+            return Response(
+                {"error": "Could not open a notification stream. Please try again."},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
+
+
 @method_decorator(csrf_exempt, name='dispatch')
 class SessionConflictSSEView(View):
     """
     SSE endpoint for streaming session conflict events to clients
-    Uses in-memory broadcasting - no external dependencies required
+    Events carry ids; a reconnecting client resumes after its Last-Event-ID
+    
+    With ``?ticket=`` (SSEStreamTicketView; EventSource cannot send headers) or
+    a Bearer Authorization header the stream carries the user's session events
+    and their tenant's notifications only. Without either it is refused (401),
+    unless SSE_LEGACY_BROADCAST serves it the global channel.
     """
     
     def get(self, request):
@@ -27,13 +74,21 @@ class SessionConflictSSEView(View):
         Handle SSE connection
         Streams events from in-memory broadcaster to the client
         """
+        last_event_id = parse_last_event_id(
+            request.META.get('HTTP_LAST_EVENT_ID') or request.GET.get('last_event_id')
+        )
+        channels = get_stream_channels(request.GET.get('ticket'), request.headers.get('Authorization'))
+        if channels is None:
+            from django.http import JsonResponse
+            return JsonResponse({'error': 'Missing, invalid or expired stream ticket'}, status=401)
+        
         def event_stream():
             """Generator that yields SSE formatted messages"""
             event_queue = None
             
             try:
-                # Subscribe to events
-                event_queue = InMemorySSEBroadcaster.subscribe()
+                # Subscribe to events (missed events after Last-Event-ID are queued first)
+                event_queue = InMemorySSEBroadcaster.subscribe(channels, last_event_id=last_event_id)
                 
                 # Send initial connection message
                 yield f"event: connected\ndata: {json.dumps({'message': 'Connected to session conflict notifications', 'subscribers': InMemorySSEBroadcaster.get_subscriber_count()})}\n\n"
@@ -42,53 +97,19 @@ class SessionConflictSSEView(View):
                 
                 # Send periodic keepalive and listen for events
                 from queue import Empty as QueueEmpty
-                from django.core.cache import cache
-                from django.conf import settings
+                from collections import deque
                 
-                USE_DB_BROADCASTING = not getattr(settings, 'DEBUG', True)
-                last_event_check = 0
-                last_event_hash = None
-                channel = InMemorySSEBroadcaster.CHANNEL_NAME
+                # Ids already sent (a replayed event can also arrive live)
+                recent_ids = deque(maxlen=200)
                 
                 while True:
                     try:
-                        # In production, also check database cache for events from other workers
-                        if USE_DB_BROADCASTING:
-                            try:
-                                import time
-                                import hashlib
-                                current_time = time.time()
-                                # Check database cache every 1 second
-                                if current_time - last_event_check > 1.0:
-                                    channel_key = f"sse_channel_{channel}"
-                                    cached_events = cache.get(channel_key, [])
-                                    # Create hash of events to detect changes
-                                    events_str = json.dumps(cached_events, sort_keys=True)
-                                    current_hash = hashlib.md5(events_str.encode()).hexdigest()
-                                    
-                                    # Only process if events have changed
-                                    if current_hash != last_event_hash and cached_events:
-                                        # Process only the last event (most recent)
-                                        latest_event = cached_events[-1]
-                                        event_type = latest_event.get('event_type', 'unknown')
-                                        data = latest_event.get('data', {})
-                                        sse_message = f"event: {event_type}\ndata: {json.dumps(data)}\n\n"
-                                        yield sse_message
-                                        last_event_hash = current_hash
-                                    
-                                    last_event_check = current_time
-                            except Exception as e:
-                                logger.debug(f"Error checking database cache: {e}")
-                        
-                        # Wait for event from in-memory queue with timeout (for keepalive)
-                        event_data = event_queue.get(timeout=2)  # Shorter timeout to check cache more frequently
-                        
-                        event_type = event_data.get('event_type', 'unknown')
-                        data = event_data.get('data', {})
-                        
-                        # Format as SSE event
-                        sse_message = f"event: {event_type}\ndata: {json.dumps(data)}\n\n"
-                        yield sse_message
+                        # Wait for event from the queue with timeout (for keepalive)
+                        event_data = event_queue.get(timeout=2)
+                        if event_data['id'] in recent_ids:
+                            continue
+                        recent_ids.append(event_data['id'])
+                        yield format_sse(event_data)
                         
                     except QueueEmpty:
                         # Queue timeout - send keepalive comment
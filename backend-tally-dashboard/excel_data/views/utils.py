@@ -16,6 +16,8 @@ from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes, parser_classes
 from ..models import EmployeeProfile
+from ..utils.query_budget import query_budget
+from ..utils.date_ranges import month_filter
 from django.db.models import Q, Sum, Count
 from django.utils import timezone
 from rest_framework.permissions import IsAuthenticated, AllowAny
@@ -73,6 +75,7 @@ from ..utils.utils import (
 )
 
 from ..services.salary_service import SalaryCalculationService
+from ..utils.sse_broadcaster import SSENotifier
 
 # Initialize logger
 logger = logging.getLogger(__name__)
@@ -588,8 +591,7 @@ def attendance_status(request):
         # Get employees with attendance records this month
         employees_with_records = Attendance.objects.filter(
             tenant=tenant,
-            date__year=current_date.year,
-            date__month=current_date.month
+            **month_filter(current_date.year, current_date.month)
         ).count()
         
         # Check if we have day-by-day attendance data (DailyAttendance records)
@@ -615,6 +617,7 @@ def attendance_status(request):
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
+@query_budget(12)
 def bulk_update_attendance(request):
     """
     Optimized bulk update attendance with batch processing for better performance
@@ -893,6 +896,12 @@ def bulk_update_attendance(request):
                 )
                 logger.info(f"✅ Django ORM bulk updated {len(records_to_update)} records in batches of {BATCH_SIZE}")
         
+        # bulk_create/bulk_update skip signals: record the changed payroll months explicitly
+        from ..services.payroll_dirty import mark_records_dirty
+        from ..services.attendance_months import mark_records_stale
+        mark_records_dirty(tenant, records_to_create + records_to_update, 'attendance_upload')
+        mark_records_stale(tenant, records_to_create)
+        
         db_operation_time = time.time() - db_start_time
         logger.info(f"OPTIMIZED: Core DB operations completed in {db_operation_time:.3f}s")
         
@@ -2039,6 +2048,11 @@ class UploadAttendanceDataAPIView(APIView):
                             batch_size=100
                         )
                 
+                from ..services.payroll_dirty import mark_records_dirty
+                from ..services.attendance_months import mark_records_stale
+                mark_records_dirty(tenant, attendance_to_create + attendance_to_update, 'attendance_upload')
+                mark_records_stale(tenant, attendance_to_create)
+                
                 
                 # Clear relevant caches
                 from django.core.cache import cache
@@ -2089,6 +2103,11 @@ class UploadAttendanceDataAPIView(APIView):
                     response_data['total_warnings'] = len(warnings)
                     response_data['warnings'] = warnings[:10]  # Show first 10 warnings
                 
+                SSENotifier.notify_upload_finished(
+                    tenant, 'attendance',
+                    month=month, year=year,
+                    records_created=records_created, records_updated=records_updated,
+                )
                 return Response(response_data, status=status.HTTP_201_CREATED)
                 
             except Exception as e:
@@ -2190,6 +2209,10 @@ class UploadMonthlyAttendanceAPIView(APIView):
             if attendance_records:
                 with transaction.atomic():
                     Attendance.objects.bulk_create(attendance_records, ignore_conflicts=True)
+                from ..services.payroll_dirty import mark_records_dirty
+                from ..services.attendance_months import mark_records_stale
+                mark_records_dirty(tenant, attendance_records, 'attendance_upload')
+                mark_records_stale(tenant, attendance_records)
             
             # Clear directory cache after successful upload
             from django.core.cache import cache
@@ -2221,6 +2244,10 @@ class UploadMonthlyAttendanceAPIView(APIView):
             
             logger.info(f"✨ Cleared directory and charts cache for tenant {tenant.id} after monthly attendance upload")
             
+            SSENotifier.notify_upload_finished(
+                tenant, 'monthly_attendance',
+                month=month, year=year, created=created, failed=failed,
+            )
             return Response({
                 'message': 'Monthly attendance data uploaded successfully',
                 'total_records': len(data),
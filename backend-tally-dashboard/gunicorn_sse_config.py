@@ -0,0 +1,38 @@
+# Gunicorn Configuration for the SSE (ASGI) process
+# Serves the SSE streams (excel_data/views/sse_async.py): an idle connection is an asyncio task,
+# not a worker thread, so one process holds thousands of them.
+# Run alongside the WSGI API (gunicorn_config.py) and route /api/sse/ here at the proxy:
+#   gunicorn -c gunicorn_sse_config.py dashboard.asgi:application
+
+import os
+
+# Server socket
+port = os.getenv("SSE_PORT", os.getenv("PORT", "8001"))
+bind = f"0.0.0.0:{port}"
+backlog = 2048
+
+# Worker processes
+# Each worker runs one event log poller (1 query per SSE_POLL_INTERVAL), so keep this small
+workers = int(os.getenv("SSE_WORKERS", 2))
+worker_class = "uvicorn_worker.UvicornWorker"
+# Streams never finish a request: the worker heartbeat, not a request timeout, detects hangs
+timeout = int(os.getenv("SSE_TIMEOUT", 120))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", 5))
+
+# Logging
+accesslog = os.getenv("GUNICORN_ACCESS_LOG", "-")  # Log to stdout
+errorlog = os.getenv("GUNICORN_ERROR_LOG", "-")    # Log to stderr
+loglevel = os.getenv("GUNICORN_LOG_LEVEL", "info")
+
+# Process naming
+proc_name = "hrms-sse"
+
+# Server mechanics
+daemon = False
+umask = 0
+
+# Don't recycle workers on request count: it would drop every open stream
+max_requests = 0
+
+# Graceful timeout for worker shutdown (clients reconnect with Last-Event-ID)
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", 10))
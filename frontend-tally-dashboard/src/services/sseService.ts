@@ -4,9 +4,17 @@
  */
 
 import { API_CONFIG } from "../config/apiConfig";
+import { apiPost } from './api';
 import { logger } from '../utils/logger';
 
-export type SSEEventType = 'force_logout' | 'ip_conflict' | 'session_conflict' | 'login_attempt_blocked' | 'connected';
+export type SSEEventType =
+  | 'force_logout'
+  | 'ip_conflict'
+  | 'session_conflict'
+  | 'login_attempt_blocked'
+  | 'payroll_calculated'
+  | 'upload_finished'
+  | 'connected';
 
 export interface SSEEventData {
   ip_address: string;
@@ -25,6 +33,11 @@ export interface SSEEventData {
   session_key?: string;  // Session key to identify which session should logout
   target_session_key?: string;  // Alternative name for session_key
   target_email?: string;  // Email of the user being logged out
+  // Tenant notifications (payroll_calculated, upload_finished)
+  upload_type?: string;
+  year?: number;
+  month?: string | number;
+  period_id?: number;
 }
 
 export interface SSEEventHandler {
@@ -37,36 +50,91 @@ class SSEService {
   private reconnectAttempts = 0;
   private maxReconnectAttempts = 5;
   private reconnectDelay = 3000;
+  // Id of the last event received: a reconnect resumes after it (the server replays what was missed)
+  private lastEventId: string | null = null;
+  // Set while a stream ticket is being requested; bumped by disconnect() to drop that connect
+  private connecting = false;
+  private connectGeneration = 0;
+
+  /**
+   * Ask the API for a single-use stream ticket
+   * EventSource cannot send headers, and the access token must not end up in the URL
+   */
+  private async fetchStreamTicket(): Promise<string | null> {
+    try {
+      const response = await apiPost('/api/sse/stream-ticket/');
+      if (!response.ok) {
+        return null;
+      }
+      const data = await response.json();
+      return data.ticket || null;
+    } catch (error) {
+      logger.error('Failed to get SSE stream ticket:', error);
+      return null;
+    }
+  }
 
   /**
    * Connect to SSE endpoint
    */
-  connect(): void {
-    if (this.eventSource) {
+  async connect(): Promise<void> {
+    if (this.eventSource || this.connecting) {
       logger.warn('SSE already connected');
       return;
     }
+    if (!localStorage.getItem('access')) {
+      logger.warn('SSE not connected: not logged in');
+      return;
+    }
+
+    const generation = this.connectGeneration;
+    this.connecting = true;
+    let ticket: string | null;
+    try {
+      ticket = await this.fetchStreamTicket();
+    } finally {
+      this.connecting = false;
+    }
+    if (generation !== this.connectGeneration) {
+      // disconnect() was called while the ticket was requested
+      return;
+    }
+    if (!ticket) {
+      this.handleError();
+      return;
+    }
 
     const API_BASE = API_CONFIG.getApiUrl();
     const sseUrl = `${API_BASE}/sse/session-conflicts/`;
+    // The ticket selects this user's and tenant's channels; a reconnect asks for a new one
+    const params = new URLSearchParams();
+    params.set('ticket', ticket);
+    // A new EventSource does not send Last-Event-ID, so pass it in the query string
+    if (this.lastEventId) {
+      params.set('last_event_id', this.lastEventId);
+    }
+    const streamUrl = `${sseUrl}?${params.toString()}`;
 
     logger.info( '🔌 Connecting to SSE:', sseUrl);
 
     try {
-      this.eventSource = new EventSource(sseUrl);
+      this.eventSource = new EventSource(streamUrl);
 
       // Listen to ALL events (including unknown ones)
       this.eventSource.onmessage = (e) => {
         logger.info( '📨 SSE Message received (generic):', e);
+        this.trackEventId(e);
       };
 
       this.eventSource.addEventListener('connected', (e) => {
+        this.trackEventId(e);
         logger.info( '✅ SSE Connected:', e.data);
         this.reconnectAttempts = 0;
         this.emit('connected', JSON.parse(e.data));
       });
 
       this.eventSource.addEventListener('force_logout', (e) => {
+        this.trackEventId(e);
         logger.info( '🚪 Force Logout Event received!');
         logger.info( '🚪 Event data:', e.data);
         logger.info( '🚪 Event type:', e.type);
@@ -78,23 +146,38 @@ class SSEService {
       });
 
       this.eventSource.addEventListener('ip_conflict', (e) => {
+        this.trackEventId(e);
         logger.info( '⚠️ IP Conflict Event:', e.data);
         const data = JSON.parse(e.data);
         this.emit('ip_conflict', data);
       });
 
       this.eventSource.addEventListener('session_conflict', (e) => {
+        this.trackEventId(e);
         logger.info( '⚠️ Session Conflict Event:', e.data);
         const data = JSON.parse(e.data);
         this.emit('session_conflict', data);
       });
 
       this.eventSource.addEventListener('login_attempt_blocked', (e) => {
+        this.trackEventId(e);
         logger.info( '🚫 Login Attempt Blocked:', e.data);
         const data = JSON.parse(e.data);
         this.emit('login_attempt_blocked', data);
       });
 
+      this.eventSource.addEventListener('payroll_calculated', (e) => {
+        this.trackEventId(e);
+        logger.info( '💰 Payroll Calculated:', e.data);
+        this.emit('payroll_calculated', JSON.parse(e.data));
+      });
+
+      this.eventSource.addEventListener('upload_finished', (e) => {
+        this.trackEventId(e);
+        logger.info( '📤 Upload Finished:', e.data);
+        this.emit('upload_finished', JSON.parse(e.data));
+      });
+
       this.eventSource.onerror = (error) => {
         logger.error('❌ SSE Error:', error);
         this.handleError();
@@ -110,6 +193,13 @@ class SSEService {
    * Disconnect from SSE
    */
   disconnect(): void {
+    this.connectGeneration++;
+    this.close();
+    // A later connect() (e.g. another login) starts a new stream
+    this.lastEventId = null;
+  }
+
+  private close(): void {
     if (this.eventSource) {
       logger.info( 'Disconnecting SSE...');
       this.eventSource.close();
@@ -117,6 +207,15 @@ class SSEService {
     }
   }
 
+  /**
+   * Remember the id of a received event for the next reconnect
+   */
+  private trackEventId(e: MessageEvent): void {
+    if (e.lastEventId) {
+      this.lastEventId = e.lastEventId;
+    }
+  }
+
   /**
    * Register event handler
    */
@@ -163,7 +262,8 @@ class SSEService {
    * Handle SSE errors and attempt reconnection
    */
   private handleError(): void {
-    this.disconnect();
+    // Keep lastEventId: the reconnect resumes after it
+    this.close();
 
     if (this.reconnectAttempts < this.maxReconnectAttempts) {
       this.reconnectAttempts++;